@@ -0,0 +1,4 @@
+"""性能基准 / Performance benchmarks
+
+    python -m game_project.benchmarks.scene_benchmark --help
+"""
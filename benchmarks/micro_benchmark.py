@@ -0,0 +1,460 @@
+"""微基准测试 / Microbenchmark suite
+
+战斗数值、行动顺序、角色构造、怒气 / 专注、特效更新和存档读写等热点函数的微基准。
+每个基准先做准备工作，返回一个无参函数，只对这个函数计时。计时方式与 pytest-benchmark 相同：
+先校准每轮的迭代次数，使一轮远大于计时器精度，再重复多轮，报告 min / max / mean / stddev /
+median / iqr / ops。每次运行追加一行到 JSON 历史（JSON Lines），用于画趋势图。
+Microbenchmarks for hot primitives: combat math, turn ordering, character
+construction, rage / focus, effect updates and save I/O. Each benchmark
+does its setup and returns a zero-argument callable, and only that
+callable is timed. Timing follows pytest-benchmark: the iterations per
+round are calibrated so a round is well above the timer resolution, then
+rounds are repeated and min / max / mean / stddev / median / iqr / ops are
+reported. Every run appends one line to a JSON history (JSON Lines) for
+trend charts.
+
+    python -m game_project.benchmarks.micro_benchmark
+    python -m game_project.benchmarks.micro_benchmark -k save --min-time 0.5
+
+历史默认写在用户缓存目录下，不写进源码树。
+The history defaults to the user's cache directory, outside the source tree.
+
+战斗数值基准使用最小的 Combatant 夹具和空特效接收器，只测被测函数本身。
+Combat-math benchmarks use the minimal Combatant fixture and a no-op effect
+sink so only the primitive under test is measured.
+
+依赖缺失或被测代码出错的基准在结果中记为 error，不会中断整个运行。
+A benchmark whose dependencies are missing or whose code raises is
+recorded as an error without aborting the run.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import argparse
+import statistics
+import subprocess
+import tempfile
+import traceback
+from typing import Callable, Dict, List, Optional
+
+from .scene_benchmark import environment_info
+
+MANAGERS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'managers')
+
+
+def _default_history() -> str:
+    """用户缓存目录下的历史文件 / History file under the user's cache directory"""
+    root = os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME')
+    if not root:
+        root = os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(root, 'group8_game', 'benchmarks', 'micro_history.jsonl')
+
+
+# 一轮的最短时间，远大于 perf_counter 的精度 / Minimum round time, well above perf_counter resolution
+MIN_ROUND_TIME = 0.001
+MIN_ROUNDS = 5
+
+_BENCHMARKS: List['Benchmark'] = []
+
+
+class Benchmark:
+    """已注册的基准 / A registered benchmark"""
+
+    def __init__(self, group: str, name: str, factory: Callable, param=None):
+        self.group = group
+        self.name = name
+        self.factory = factory
+        self.param = param
+
+    @property
+    def full_name(self) -> str:
+        return self.name if self.param is None else f"{self.name}[{self.param}]"
+
+
+def bench(group: str, params=(None,)):
+    """注册基准；每个参数值生成一个基准 / Register a benchmark, one per parameter value"""
+    def register(factory):
+        for param in params:
+            _BENCHMARKS.append(Benchmark(group, factory.__name__, factory, param))
+        return factory
+    return register
+
+
+def measure(func: Callable[[], None], min_time: float = 0.2, max_rounds: int = 1000) -> Dict:
+    """校准迭代次数后重复计时，返回每次调用的统计（秒）
+    Calibrate iterations, repeat rounds and return per-call statistics in seconds"""
+    clock = time.perf_counter
+    iterations = 1
+    while True:
+        start = clock()
+        for _ in range(iterations):
+            func()
+        elapsed = clock() - start
+        if elapsed >= MIN_ROUND_TIME:
+            break
+        iterations *= 10 if elapsed < MIN_ROUND_TIME / 10 else 2
+
+    samples = []
+    deadline = clock() + min_time
+    while len(samples) < MIN_ROUNDS or (clock() < deadline and len(samples) < max_rounds):
+        start = clock()
+        for _ in range(iterations):
+            func()
+        samples.append((clock() - start) / iterations)
+
+    ordered = sorted(samples)
+    quarter = len(ordered) // 4
+    mean = statistics.fmean(ordered)
+    return {
+        'min': ordered[0],
+        'max': ordered[-1],
+        'mean': mean,
+        'stddev': statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        'median': statistics.median(ordered),
+        'iqr': ordered[-quarter - 1] - ordered[quarter],
+        'ops': 1.0 / mean if mean else 0.0,
+        'rounds': len(ordered),
+        'iterations': iterations,
+    }
+
+
+# ---- 夹具 / Fixtures ----
+
+class Combatant:
+    """战斗系统使用的角色接口的最小实现 / Minimal implementation of the character interface the battle code uses"""
+
+    def __init__(self, name, rng, position='front'):
+        self.name = name
+        self.hp = self.max_hp = rng.uniform(80, 160)
+        self.stats = {'ATK': rng.uniform(25, 60), 'DEF': rng.uniform(5, 25), 'SPD': rng.uniform(7, 20)}
+        self.crit = rng.uniform(0.05, 0.15)
+        self.dodge = rng.uniform(0.03, 0.07)
+        self.position = position
+        self.buffs = []
+
+    def get_effective_speed(self):
+        return self.stats['SPD']
+
+    def get_dodge_chance(self):
+        return self.dodge
+
+    def get_crit_chance(self):
+        return self.crit
+
+    def get_crit_damage(self):
+        return 1.5
+
+    def get_defense(self):
+        return self.stats['DEF']
+
+    def get_threat_level(self):
+        return self.stats['ATK'] / 60
+
+    def has_buffs(self):
+        return bool(self.buffs)
+
+    def is_alive(self):
+        return self.hp > 0
+
+    def take_damage(self, damage):
+        self.hp = max(0, self.hp - damage)
+        if self.hp == 0:
+            # 保持基准的工作量稳定 / Keep the benchmark's workload steady
+            self.hp = self.max_hp
+        return damage
+
+
+class _NullEffects:
+    """空特效接收器 / No-op effect sink"""
+
+    def create_effect(self, *args, **kwargs):
+        return None
+
+
+def _battle_system(team_size=3, seed=0):
+    """不经过 Game 构造的战斗系统 / A battle system built without a Game"""
+    from game_project.core.battle_system import BattleSystem
+    rng = random.Random(seed)
+    system = object.__new__(BattleSystem)
+    system.rng = random.Random(seed)
+    system.effect_manager = _NullEffects()
+    system.event_system = None
+    system.stats = None
+    system.battle_log_store = None
+    system.current_turn = 0
+    system.battle_state = {'turn_start_time': time.time(), 'battle_log': [], 'battle_id': None,
+                           'current_weather': None}
+    system.player_team = [Combatant(f"P{i}", rng) for i in range(team_size)]
+    system.enemy_team = [Combatant(f"E{i}", rng, 'back' if i % 2 else 'front') for i in range(team_size)]
+    system.turn_order = []
+    return system
+
+
+def _payload(inventory_size: int) -> Dict:
+    """指定背包大小的存档数据 / Save data with the given inventory size"""
+    rng = random.Random(inventory_size)
+    return {
+        'settings': {'language': 'en', 'music_volume': 0.7, 'sfx_volume': 0.8},
+        'player': {
+            'gold': rng.randint(0, 10 ** 6),
+            'unlocked_characters': ['Tanker', 'Warrior', 'Ranger'],
+            'current_team': ['Tanker', 'Warrior', 'Ranger'],
+            'inventory': [
+                {'id': i, 'name': f"item_{i}", 'count': rng.randint(1, 99), 'quality': rng.random()}
+                for i in range(inventory_size)
+            ],
+        },
+        'statistics': {'battles_won': rng.randint(0, 500), 'battles_lost': rng.randint(0, 500)},
+    }
+
+
+_temp_dirs: List[str] = []
+
+# 当前基准结束后运行的清理函数 / Cleanups run when the current benchmark finishes
+_teardowns: List[Callable[[], None]] = []
+
+
+def _temp_dir() -> str:
+    path = tempfile.mkdtemp(prefix='micro_bench_')
+    _temp_dirs.append(path)
+    return path
+
+
+def _save_engine_module():
+    """按模块名导入 save_engine，不经过 managers 包的 __init__（它会导入特效和动画）
+    Import save_engine by module name, bypassing the managers package __init__,
+    which pulls in the effect and animation code"""
+    if MANAGERS_DIR not in sys.path:
+        sys.path.insert(0, MANAGERS_DIR)
+    import save_engine
+    return save_engine
+
+
+# ---- 战斗数值 / Combat math ----
+
+@bench('combat')
+def apply_damage():
+    system = _battle_system()
+    attacker, target = system.player_team[0], system.enemy_team[0]
+    action = {'type': 'attack', 'target': target}
+
+    def run():
+        system._apply_damage(attacker, target, 40.0, action)
+        system.battle_state['battle_log'].clear()
+    return run
+
+
+@bench('combat')
+def calculate_base_damage():
+    system = _battle_system()
+    attacker, target = system.player_team[0], system.enemy_team[0]
+    action = {'type': 'attack', 'target': target}
+    return lambda: system._calculate_base_damage(attacker, action)
+
+
+@bench('combat', params=(3, 10, 50))
+def calculate_turn_order(team_size):
+    system = _battle_system(team_size)
+    return system._calculate_turn_order
+
+
+@bench('combat')
+def calculate_target_score():
+    from game_project.managers.battle_manager import BattleManager
+    manager = object.__new__(BattleManager)
+    system = _battle_system()
+    targets = system.enemy_team
+
+    def run():
+        for target in targets:
+            manager._calculate_target_score(target)
+    return run
+
+
+# ---- 角色 / Characters ----
+
+@bench('characters', params=('Tanker', 'Warrior', 'Ranger'))
+def construct_character(class_name):
+    from game_project.core import characters
+    cls = getattr(characters, class_name)
+    return lambda: cls(class_name)
+
+
+@bench('characters')
+def update_rage():
+    from game_project.core.characters import Warrior
+    warrior = Warrior('Warrior')
+
+    def run():
+        warrior.update_rage(0, 'attack')
+        warrior.rage_system['current_rage'] = 0
+    return run
+
+
+@bench('characters')
+def update_focus():
+    from game_project.core.characters import Ranger
+    ranger = Ranger('Ranger')
+
+    def run():
+        ranger.update_focus(0, 'continuous_hit')
+        ranger.update_focus(0, 'hit')
+    return run
+
+
+# ---- 特效 / Effects ----
+
+@bench('effects', params=(100, 500, 2000))
+def effect_manager_update(particle_count):
+    import pygame
+    from game_project.managers.effect_manager import EffectManager
+    from game_project.animation.particle_system import PixelParticle
+    manager = EffectManager()
+    rng = random.Random(particle_count)
+    for _ in range(particle_count):
+        particle = PixelParticle(rng.uniform(0, 1280), rng.uniform(0, 720), (255, 255, 255),
+                                 size=3, lifetime=1e9)
+        particle.velocity = pygame.Vector2(rng.uniform(-100, 100), rng.uniform(-100, 100))
+        manager.particles.append(particle)
+    return lambda: manager.update(1 / 90)
+
+
+# ---- 存档 / Save I/O ----
+
+@bench('save', params=(10, 1000, 10000))
+def save_engine_save(inventory_size):
+    """只有玩家段变化的保存 / A save where only the player section changed"""
+    engine = _save_engine_module().SaveEngine(_temp_dir())
+    data = _payload(inventory_size)
+    engine.save(1, data)
+
+    def run():
+        data['player']['gold'] += 1
+        engine.save(1, data, dirty={'player'})
+    return run
+
+
+@bench('save', params=(10, 1000, 10000))
+def save_engine_load(inventory_size):
+    engine = _save_engine_module().SaveEngine(_temp_dir())
+    engine.save(1, _payload(inventory_size))
+    return lambda: engine.load(1)
+
+
+@bench('save', params=(10, 1000, 10000))
+def game_data_manager_save(inventory_size):
+    """含后台写盘的完整保存 / A full save including the background write"""
+    from game_project.managers.game_data_manager import GameDataManager
+    manager = GameDataManager(_temp_dir())
+    _teardowns.append(manager.cleanup)
+    payload = _payload(inventory_size)
+    manager.update_settings(payload['settings'])
+    manager.game_data['player'].update(payload['player'])
+    manager.game_data['statistics'].update(payload['statistics'])
+    manager.mark_dirty('player', 'statistics')
+    manager.save_game(1)
+    manager.flush()
+
+    def run():
+        manager.game_data['player']['gold'] += 1
+        manager.mark_dirty('player')
+        manager.save_game(1)
+        manager.flush()
+    return run
+
+
+# ---- 运行 / Running ----
+
+def run_benchmarks(selected: List[Benchmark], min_time: float) -> Dict[str, Dict]:
+    results = {}
+    for benchmark in selected:
+        random.seed(0)
+        entry = {'group': benchmark.group}
+        try:
+            func = benchmark.factory() if benchmark.param is None else benchmark.factory(benchmark.param)
+            entry.update(measure(func, min_time))
+        except Exception as e:
+            entry['error'] = f"{type(e).__name__}: {e}"
+            logging.debug(traceback.format_exc())
+        finally:
+            while _teardowns:
+                _teardowns.pop()()
+        results[benchmark.full_name] = entry
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _print_table(results: Dict[str, Dict]):
+    print(f"{'benchmark':<40} {'min':>12} {'median':>12} {'mean':>12} {'stddev':>12} {'rounds':>7}")
+    for name, entry in results.items():
+        if 'error' in entry:
+            print(f"{name:<40} ERROR {entry['error']}")
+            continue
+        print(f"{name:<40} " + ' '.join(
+            f"{entry[key] * 1e6:>10.2f}us" for key in ('min', 'median', 'mean', 'stddev')
+        ) + f" {entry['rounds']:>7}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmarks / 微基准测试")
+    parser.add_argument('-k', dest='keyword', help="only run benchmarks whose name contains this")
+    parser.add_argument('--group', action='append', help="only run these groups (repeatable)")
+    parser.add_argument('--min-time', type=float, default=0.2, help="seconds of rounds per benchmark")
+    parser.add_argument('--history', default=_default_history(), help="JSON Lines history file")
+    parser.add_argument('--no-history', action='store_true', help="do not append to the history")
+    parser.add_argument('--output', help="also write this run's JSON here")
+    parser.add_argument('--list', action='store_true', help="list the benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    selected = [
+        benchmark for benchmark in _BENCHMARKS
+        if (not args.keyword or args.keyword in benchmark.full_name)
+        and (not args.group or benchmark.group in args.group)
+    ]
+    if args.list:
+        for benchmark in selected:
+            print(f"{benchmark.group}: {benchmark.full_name}")
+        return 0
+
+    try:
+        results = run_benchmarks(selected, args.min_time)
+    finally:
+        for path in _temp_dirs:
+            shutil.rmtree(path, ignore_errors=True)
+        _temp_dirs.clear()
+
+    record = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': _git_commit(),
+        'environment': environment_info(),
+        'min_time': args.min_time,
+        'results': results,
+    }
+    _print_table(results)
+
+    if not args.no_history:
+        os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+        with open(args.history, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, sort_keys=True) + '\n')
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(record, f, indent=2)
+    return 1 if any('error' in entry for entry in results.values()) else 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main())
@@ -0,0 +1,371 @@
+"""场景基准测试 / Scene benchmark runner
+
+用 SDL dummy 视频 / 音频驱动启动 Game，按脚本运行固定帧数的场景，记录每个阶段（事件、更新、
+渲染、呈现）的耗时、tracemalloc 统计的分配和峰值 RSS，与保存的基线按容差比较，输出 JSON 报告。
+Boots Game with the SDL dummy video / audio drivers, drives scripted
+scenes for a fixed number of frames and records per-phase timings
+(events, update, render, present), tracemalloc allocations and peak RSS,
+then compares against stored baselines with a tolerance and writes a JSON
+report.
+
+    python -m game_project.benchmarks.scene_benchmark --frames 600 --output report.json
+    python -m game_project.benchmarks.scene_benchmark --update-baseline
+
+退出码 / Exit codes: 0 正常 / ok, 1 有性能回退 / regressions, 2 游戏无法启动 / Game failed to boot
+"""
+import os
+
+# 必须在导入 pygame 之前设置 / Must be set before pygame is imported
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import argparse
+import json
+import logging
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import pygame
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+PHASES = ('events', 'update', 'render', 'present')
+COMPARED_METRICS = ('p50_ms', 'p95_ms')
+
+
+class Scenario:
+    """脚本化场景 / Scripted scene
+
+    setup(game) 在计时前调用一次，step(game, frame) 在每帧处理事件之前调用。
+    caps 在场景运行期间覆盖画质服务的系统粒子上限。
+    setup(game) runs once before timing, step(game, frame) runs before the
+    events phase of every frame. caps override the quality service's
+    per-system particle caps while the scenario runs.
+    """
+
+    def __init__(self, name: str, setup: Callable, step: Optional[Callable] = None, seed: int = 0,
+                 caps: Optional[Dict[str, int]] = None):
+        self.name = name
+        self.setup = setup
+        self.step = step
+        self.seed = seed
+        self.caps = caps
+
+
+# ---- 场景 / Scenarios ----
+
+def _setup_main_menu(game):
+    from game_project.core.game_state import GameState
+    game.set_state(GameState.MAIN_MENU)
+
+
+def _setup_character_select(game):
+    from game_project.core.game_state import GameState
+    game.set_state(GameState.CHARACTER_SELECT)
+
+
+def _step_character_select(game, frame):
+    # 每 30 帧切换一次角色 / Switch character every 30 frames
+    if frame % 30 == 0:
+        game.character_select.switch_character()
+
+
+def _setup_battle(game, weather_type='clear'):
+    from game_project.core.game_state import GameState
+    game.set_state(GameState.BATTLE)
+    weather = game.weather_manager.weather_system
+    weather['current_transition'] = None
+    weather['current_weather'] = weather_type
+
+
+def _setup_storm_battle(game):
+    _setup_battle(game, 'storm')
+    weather = game.weather_manager.weather_system
+    weather['effects']['storm']['wind_strength'] = 1.0
+    weather['effects']['storm']['lightning_chance'] = 0.05
+
+
+def _step_storm_battle(game, frame):
+    # 每 15 帧一次连击爆发：三名角色的命中特效加上爆发特效
+    # A combo burst every 15 frames: hit effects on three characters plus the burst
+    if frame % 15 == 0:
+        width, height = game.screen.get_size()
+        for index in range(3):
+            x = width * (0.25 + 0.25 * index)
+            game.effect_manager.create_hit_effect(x, height * 0.6, 'critical', 1.5)
+        game.effect_manager.create_battle_effect('combo_burst', (width / 2, height / 2))
+    # 战斗界面不驱动天气管理器，这里按固定步长更新
+    # The battle screen does not drive the weather manager, so step it here
+    game.weather_manager.update(game.dt)
+
+
+def _step_crit_spam(game, frame):
+    # 保持约 500 个存活粒子 / Keep about 500 live particles
+    width, height = game.screen.get_size()
+    effect_manager = game.effect_manager
+    while len(effect_manager.particles) < 500:
+        before = len(effect_manager.particles)
+        effect_manager.create_hit_effect(
+            random.uniform(0, width), random.uniform(0, height), 'critical', 1.0
+        )
+        if len(effect_manager.particles) == before:
+            # 画质上限拦住了新粒子 / The quality cap refused new particles
+            break
+
+
+SCENARIOS = {
+    scenario.name: scenario for scenario in (
+        Scenario('main_menu_idle', _setup_main_menu, seed=1),
+        Scenario('character_select_cycling', _setup_character_select, _step_character_select, seed=2),
+        Scenario('storm_battle_combo', _setup_storm_battle, _step_storm_battle, seed=3),
+        # 特效的默认上限是 400，这里放宽到 500 / The default effects cap is 400, raised to 500 here
+        Scenario('crit_spam_500', _setup_battle, _step_crit_spam, seed=4, caps={'effects': 500}),
+    )
+}
+
+
+# ---- 测量 / Measurement ----
+
+def _summarize(samples: List[float]) -> Dict[str, float]:
+    """秒样本转为毫秒统计 / Seconds samples to millisecond statistics"""
+    if not samples:
+        return {'mean_ms': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 4),
+        'p50_ms': round(ordered[last // 2] * 1000, 4),
+        'p95_ms': round(ordered[int(last * 0.95)] * 1000, 4),
+        'max_ms': round(ordered[last] * 1000, 4),
+    }
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """进程峰值常驻内存 / Peak resident set size of the process"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 单位是 KB，macOS 是字节 / KB on Linux, bytes on macOS
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 2)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, 'peak_wset', info.rss) / 1024 / 1024, 2)
+    except ImportError:
+        return None
+
+
+def _run_frame(game, scenario: Scenario, frame: int, timings: Optional[Dict[str, List[float]]]):
+    """运行一帧，阶段与 Game.run 相同 / Run one frame with the same phases as Game.run"""
+    clock = time.perf_counter
+    if scenario.step is not None:
+        scenario.step(game, frame)
+
+    start = clock()
+    game.handle_events()
+    events_done = clock()
+    # 固定步长保证每次运行的工作量相同 / A fixed step keeps the work identical between runs
+    game.update(game.dt)
+    update_done = clock()
+    game.render()
+    render_done = clock()
+    pygame.display.flip()
+    game.present_frame()
+    present_done = clock()
+
+    if timings is not None:
+        timings['events'].append(events_done - start)
+        timings['update'].append(update_done - events_done)
+        timings['render'].append(render_done - update_done)
+        timings['present'].append(present_done - render_done)
+        timings['frame'].append(present_done - start)
+
+
+def run_scenario(game, scenario: Scenario, frames: int, warmup: int, alloc_frames: int) -> Dict:
+    """运行一个场景：预热、计时、再单独测分配（tracemalloc 会拖慢计时）
+    Run one scenario: warm up, time it, then measure allocations separately
+    because tracemalloc slows the timed frames down"""
+    random.seed(scenario.seed)
+    quality = game.graphics_quality
+    if scenario.caps:
+        # 实例属性遮蔽类上的上限，结束后删除 / An instance attribute shadows the class caps and is removed afterwards
+        quality.SYSTEM_CAPS = dict(type(quality).SYSTEM_CAPS, **scenario.caps)
+    try:
+        scenario.setup(game)
+        for frame in range(warmup):
+            _run_frame(game, scenario, frame, None)
+
+        timings = {phase: [] for phase in PHASES + ('frame',)}
+        for frame in range(frames):
+            _run_frame(game, scenario, warmup + frame, timings)
+
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        for frame in range(alloc_frames):
+            _run_frame(game, scenario, warmup + frames + frame, None)
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        if scenario.caps:
+            del quality.SYSTEM_CAPS
+    allocated = [stat for stat in after.compare_to(before, 'filename') if stat.size_diff > 0]
+
+    return {
+        'frames': frames,
+        'phases': {phase: _summarize(samples) for phase, samples in timings.items()},
+        'allocations': {
+            'frames': alloc_frames,
+            'net_blocks': sum(stat.count_diff for stat in allocated),
+            'net_bytes': sum(stat.size_diff for stat in allocated),
+            'peak_traced_bytes': peak,
+        },
+        'peak_rss_mb': _peak_rss_mb(),
+    }
+
+
+# ---- 基线 / Baselines ----
+
+def load_baselines(path: str) -> Dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baselines(path: str, results: Dict):
+    baselines = load_baselines(path)
+    for name, result in results.items():
+        baselines[name] = {
+            phase: {metric: stats[metric] for metric in COMPARED_METRICS}
+            for phase, stats in result['phases'].items()
+        }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+
+
+def compare(results: Dict, baselines: Dict, tolerance: float, floor_ms: float):
+    """与基线比较；超过 基线 × (1 + 容差) + floor_ms 记为回退
+    Compare with the baselines; above baseline x (1 + tolerance) + floor_ms is a regression"""
+    comparison = {}
+    regressions = []
+    for name, result in results.items():
+        baseline = baselines.get(name)
+        if baseline is None:
+            comparison[name] = 'no_baseline'
+            continue
+        scenario_comparison = comparison[name] = {}
+        for phase, stats in result['phases'].items():
+            for metric in COMPARED_METRICS:
+                expected = baseline.get(phase, {}).get(metric)
+                if expected is None:
+                    continue
+                current = stats[metric]
+                if current > expected * (1 + tolerance) + floor_ms:
+                    status = 'regression'
+                    regressions.append(f"{name}/{phase}/{metric}")
+                elif current < expected * (1 - tolerance) - floor_ms:
+                    status = 'improved'
+                else:
+                    status = 'ok'
+                scenario_comparison[f"{phase}.{metric}"] = {
+                    'baseline': expected,
+                    'current': current,
+                    'ratio': round(current / expected, 3) if expected else None,
+                    'status': status,
+                }
+    return comparison, regressions
+
+
+# ---- 入口 / Entry point ----
+
+def environment_info() -> Dict:
+    return {
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'sdl': '.'.join(str(part) for part in pygame.get_sdl_version()),
+        'platform': platform.platform(),
+        'video_driver': os.environ.get('SDL_VIDEODRIVER'),
+        'audio_driver': os.environ.get('SDL_AUDIODRIVER'),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Scene benchmarks / 场景基准测试")
+    parser.add_argument('--frames', type=int, default=600, help="timed frames per scenario")
+    # 预热要长于 1 秒的状态切换淡入 / Warm-up outlasts the 1 s fade-in of a state switch
+    parser.add_argument('--warmup', type=int, default=120, help="untimed frames before timing")
+    parser.add_argument('--alloc-frames', type=int, default=120, help="frames traced with tracemalloc")
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help="run only these scenarios (repeatable)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument('--tolerance', type=float, default=0.15, help="allowed relative slowdown")
+    parser.add_argument('--floor-ms', type=float, default=0.05, help="absolute slack in milliseconds")
+    parser.add_argument('--update-baseline', action='store_true', help="store these results as the baseline")
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': environment_info(),
+        'settings': {
+            'frames': args.frames, 'warmup': args.warmup, 'alloc_frames': args.alloc_frames,
+            'tolerance': args.tolerance, 'floor_ms': args.floor_ms,
+        },
+        'scenarios': {},
+        'comparison': {},
+        'regressions': [],
+    }
+
+    try:
+        from game_project.core.game import Game
+        game = Game()
+    except Exception as e:
+        logging.exception("游戏启动失败 / Game failed to boot")
+        report['error'] = f"boot failed: {e}"
+        _write_report(report, args.output)
+        return 2
+
+    # 基准测量的是全画质，关闭自动降级 / Benchmarks measure full quality, so adaptive stepping is off
+    game.quality_governor.set_enabled(False)
+    game.graphics_quality.set_tier('high')
+
+    names = args.scenario or list(SCENARIOS)
+    try:
+        for name in names:
+            logging.info(f"基准场景 / Benchmark scenario: {name}")
+            report['scenarios'][name] = run_scenario(
+                game, SCENARIOS[name], args.frames, args.warmup, args.alloc_frames
+            )
+    finally:
+        pygame.quit()
+
+    baselines = load_baselines(args.baseline)
+    report['comparison'], report['regressions'] = compare(
+        report['scenarios'], baselines, args.tolerance, args.floor_ms
+    )
+    if args.update_baseline:
+        save_baselines(args.baseline, report['scenarios'])
+
+    _write_report(report, args.output)
+    return 1 if report['regressions'] and not args.update_baseline else 0
+
+
+def _write_report(report: Dict, output: Optional[str]):
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -11,6 +11,10 @@ class BattleSystem:
         self.turn_order = []
         self.current_turn = 0
         
+        # 战斗专用随机数生成器，状态可被快照和时间回溯恢复
+        # Battle RNG; its state is captured by snapshots and restored on rewind
+        self.rng = random.Random()
+        
         # 战斗配置
         self.battle_config = {
             'turn_time_limit': 30,
@@ -33,7 +37,9 @@ class BattleSystem:
             'boss_appeared': False,
             'last_action_time': 0,
             'current_weather': None,
-            'morale_state': {}
+            'morale_state': {},
+            'battle_id': None,
+            'perfect_qte_streak': 0
         }
         
         # 获取管理器引用
@@ -51,6 +57,20 @@ class BattleSystem:
         self.effect_manager = self.game_engine.get_manager('effect')
         self.audio_manager = self.game_engine.get_manager('audio')
         
+        # 持久化的战斗日志 / Persistent battle log
+        data_manager = self.game_engine.get_manager('data')
+        self.battle_log_store = getattr(data_manager, 'battle_log', None)
+        
+        # 统计数据仓库和成就 / Statistics warehouse and achievements
+        self.stats = getattr(data_manager, 'stats', None)
+        self.achievement_system = getattr(data_manager, 'achievement_system', None)
+        
+        # 事件总线，高频战斗事件的编号在初始化时解析
+        # Event bus; ids of high-frequency combat events are resolved once here
+        self.event_system = getattr(data_manager, 'event_system', None)
+        if self.event_system:
+            self.morale_event_id = self.event_system.get_event_id('morale_change')
+        
     def _init_qte_config(self):
         """初始化QTE配置 / Initialize QTE configuration"""
         self.qte_configs = {
@@ -174,12 +194,14 @@ class BattleSystem:
     def _apply_damage(self, attacker, target, damage, action_data):
         """应用伤害 / Apply damage"""
         # 检查闪避
-        if random.random() < target.get_dodge_chance():
+        if self.rng.random() < target.get_dodge_chance():
             self.effect_manager.create_effect('dodge', target.position)
+            self._log_battle_event('dodge', {'attacker': attacker.name, 'target': target.name},
+                                   actor=target)
             return {'type': 'dodge', 'target': target}
             
         # 检查暴击
-        is_crit = random.random() < attacker.get_crit_chance()
+        is_crit = self.rng.random() < attacker.get_crit_chance()
         if is_crit:
             damage *= attacker.get_crit_damage()
             self.effect_manager.create_effect('critical', target.position)
@@ -190,6 +212,14 @@ class BattleSystem:
         # 扣除生命值
         target.take_damage(final_damage)
         
+        self._log_battle_event('crit' if is_crit else 'damage', {
+            'attacker': attacker.name,
+            'target': target.name,
+            'damage': final_damage,
+            'action': action_data['type']
+        }, actor=attacker)
+        self._record_fact('crit' if is_crit else 'damage', final_damage, attacker)
+        
         return {
             'type': 'damage',
             'target': target,
@@ -204,10 +234,22 @@ class BattleSystem:
             self.battle_state['combo_count'] += 1
         else:
             self.battle_state['combo_count'] = 0
+        if qte_bonus >= 1.5:  # Perfect QTE
+            self.battle_state['perfect_qte_streak'] += 1
+        else:
+            self.battle_state['perfect_qte_streak'] = 0
+            
+        # 记录QTE评分和连击 / Record the QTE rating and combo
+        rating = 'perfect' if qte_bonus >= 1.5 else 'good' if qte_bonus >= 1.2 else 'miss'
+        self._record_fact(f'qte_{rating}', qte_bonus, attacker)
+        self._record_fact('combo', self.battle_state['combo_count'], attacker)
+        self._record_fact('perfect_qte_streak', self.battle_state['perfect_qte_streak'], attacker)
             
         # 更新士气
         morale_change = self._calculate_morale_change(result, qte_bonus)
         self.morale_manager.update_morale(attacker, morale_change)
+        if self.event_system:
+            self.event_system.trigger_event(self.morale_event_id, (attacker, morale_change))
         
         # 检查战斗结束
         self._check_battle_end()
@@ -233,6 +275,13 @@ class BattleSystem:
             'turns': self.current_turn,
             'time': time.time() - self.battle_state['turn_start_time']
         })
+        self._record_fact(result, 1)
+        self._record_fact('turns', self.current_turn)
+        if self.achievement_system and self.stats:
+            self.achievement_system.check_achievements(self.stats)
+        if self.battle_log_store and self.battle_state['battle_id'] is not None:
+            self.battle_log_store.end_battle(self.battle_state['battle_id'])
+            self.battle_state['battle_id'] = None
         
         return {
             'type': 'battle_end',
@@ -259,12 +308,49 @@ class BattleSystem:
             'items': items
         }
 
-    def _log_battle_event(self, event_type: str, data: Dict):
-        """记录战斗事件 / Log battle event"""
+    def _record_fact(self, event: str, value: float, actor=None):
+        """写入统计数据仓库 / Record a fact in the statistics warehouse"""
+        if not self.stats:
+            return
+        self.stats.record(
+            event,
+            value,
+            character_class=type(actor).__name__ if actor is not None else '',
+            weather=self._get_weather_name(),
+            battle=self.battle_state['battle_id'] or 0
+        )
+
+    def _get_weather_name(self) -> str:
+        """当前天气名称 / Current weather name"""
+        weather_system = getattr(self.weather_manager, 'weather_system', None)
+        if weather_system:
+            return weather_system.get('current_weather') or ''
+        return self.battle_state['current_weather'] or ''
+
+    def _log_battle_event(self, event_type: str, data: Dict, actor=None):
+        """记录战斗事件 / Log battle event
+
+        actor: 事件的主体角色，按职业写入日志索引 / character the event is about, indexed by class
+        """
         event = {
             'type': event_type,
             'time': time.time() - self.battle_state['turn_start_time'],
             'turn': self.current_turn,
             'data': data
         }
-        self.battle_state['battle_log'].append(event)
\ No newline at end of file
+        self.battle_state['battle_log'].append(event)
+        if self.event_system:
+            self.event_system.trigger_event(event_type, event)
+        
+        # 追加到带索引的持久日志 / Append to the indexed persistent log
+        if self.battle_log_store:
+            if self.battle_state['battle_id'] is None:
+                self.battle_state['battle_id'] = self.battle_log_store.begin_battle()
+            self.battle_log_store.append(
+                self.battle_state['battle_id'],
+                self.current_turn,
+                event_type,
+                type(actor).__name__ if actor is not None else '',
+                event['time'],
+                data
+            )
\ No newline at end of file
@@ -95,6 +95,8 @@ class BaseCharacter(ABC):
     def __init__(self, name):
         """初始化基础角色类 / Initialize base character"""
         self.name = name
+        # 生命值变化时的回调（如 AI 黑板）/ Callbacks run whenever HP changes, e.g. the AI blackboard
+        self.hp_watchers = []
         # 初始化基础属性
         self.hp = 0
         self.max_hp = 0
@@ -106,6 +108,20 @@ class BaseCharacter(ABC):
         self.level = 1
         self.exp = 0
 
+    @property
+    def hp(self):
+        """当前生命值 / Current HP"""
+        return self._hp
+
+    @hp.setter
+    def hp(self, value):
+        """设置生命值，变化时通知观察者 / Set HP and notify the watchers when it changed"""
+        changed = value != getattr(self, '_hp', None)
+        self._hp = value
+        if changed:
+            for watcher in getattr(self, 'hp_watchers', ()):
+                watcher(self)
+
 class Tanker(BaseCharacter):
     def __init__(self, name):
         """初始化坦克角色 / Initialize tanker character"""
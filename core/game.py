@@ -5,6 +5,7 @@ from typing import Optional, Dict, Any
 from datetime import datetime
 import time
 import os
+from collections import deque
 
 from game_project.core.game_data import GameData
 
@@ -31,11 +32,21 @@ from game_project.ui.character_select import CharacterSelectUI
 from game_project.ui.settings import SettingsUI
 from game_project.ui.loading_screen import LoadingScreen
 from game_project.effects.transition_effect import TransitionEffect
+from game_project.managers.render_queue import RenderQueue
+from game_project.managers.render_scaler import RenderScaler
+from game_project.managers.graphics_quality import graphics_quality
+from game_project.managers.quality_governor import QualityGovernor
 
 from ..utils.performance_monitor import PerformanceMonitor
 
 class Game:
+    # 帧间等待时轮询输入的间隔（秒）/ Input poll interval while waiting between frames, in seconds
+    INPUT_POLL_INTERVAL = 0.001
+
     def __init__(self):
+        # 小缓冲区让界面点击和战斗音效在一个混音缓冲内开始播放
+        # Small mixer buffer so UI clicks and hits start within one buffer
+        pygame.mixer.pre_init(frequency=44100, size=-16, channels=2, buffer=512)
         pygame.init()
         pygame.mixer.init()
         
@@ -57,10 +68,22 @@ class Game:
         self.clock = pygame.time.Clock()
         self.last_frame_time = time.time()
         self.frame_accumulator = 0.0  # 用于帧时间累积
+        self.frame_start = time.perf_counter()
+        self.work_time = 0.0  # 上一帧不含等待的耗时 / Last frame's time without the wait
+        
+        # 后台存档线程写入的结果，游戏线程每帧显示 / Background save results, shown by the game thread each frame
+        self.save_results = deque()
         
         # 性能监控 / Performance monitoring
         self.performance_monitor = PerformanceMonitor()
         
+        # 分层渲染队列，界面和特效提交绘制命令 / Layered render queue; UIs and effects submit draw commands
+        self.render_queue = RenderQueue()
+        
+        # 场景按比例渲染到内部目标再放大，界面保持原生分辨率
+        # The scene renders into a scaled internal target and is upscaled; UI stays native
+        self.render_scaler = RenderScaler(self.screen.get_size())
+        
         # 音乐相关设置 / Music settings
         self.music = None
         
@@ -71,17 +94,32 @@ class Game:
         # 初始化所有管理器 / Initialize all managers first
         self._init_all_managers()
         
+        # 应用保存的渲染缩放 / Apply the saved render scale
+        self.render_scaler.set_scale(self.data_manager.get_setting('render_scale') or 1.0)
+        
+        # 画质档位：粒子预算、天气密度、发光层和平滑缩放
+        # Quality tier: particle budgets, weather density, glow layers and smoothing
+        self.graphics_quality = graphics_quality
+        self.graphics_quality.set_frame_budget(1.0 / self.target_fps)
+        self.graphics_quality.add_listener(self._apply_graphics_quality)
+        particle_effects = self.data_manager.get_setting('particle_effects')
+        self.graphics_quality.set_particles_enabled(particle_effects is not False)
+        self.graphics_quality.set_tier(self.data_manager.get_setting('graphics_quality') or 'high')
+        
+        # 按帧时间闭环调节画质旋钮 / Closed-loop quality knobs driven by frame time
+        self.quality_governor = QualityGovernor(
+            self.graphics_quality, self.render_scaler, target_frame_time=1.0 / self.target_fps
+        )
+        self.quality_governor.set_enabled(bool(self.data_manager.get_setting('adaptive_quality')))
+        
         # 初始化系统和其组件 / Initialize systems and other components
         self.init_systems()
         self.init_game_components()
         self.init_ui_and_animations()
         self.setup_initial_state()
 
-        self.transition_effect = TransitionEffect()
-        self.transition_effect.transition_surface = pygame.Surface(
-            (self.screen.get_width(), self.screen.get_height()),
-            pygame.SRCALPHA
-        )
+        # 过渡效果已在 init_ui_and_animations 中创建，这里不再重复分配
+        # The transition compositor was created in init_ui_and_animations; don't allocate it twice
         self.is_transitioning = False
         self.transition_alpha = 255
 
@@ -171,11 +209,56 @@ class Game:
                     'language': data_manager.game_data['settings']['language'],
                     'fullscreen': pygame.display.get_surface().get_flags() & pygame.FULLSCREEN != 0
                 }
-                data_manager.game_data['settings'].update(settings)
-                data_manager.save_settings()
+                data_manager.update_settings(settings)
         except Exception as e:
             print(f"Error saving settings: {e}")
 
+    def _apply_graphics_quality(self, quality):
+        """把画质档位应用到渲染缩放 / Apply the quality tier to render scaling"""
+        self.render_scaler.smooth = quality.smooth_transforms
+
+    def set_graphics_quality(self, tier=None) -> str:
+        """设置画质档位，不传参数时切换到下一个档位
+        Set the quality tier; without an argument cycle to the next one"""
+        if tier is None:
+            setting = self.graphics_quality.cycle_tier()
+        else:
+            setting = self.graphics_quality.set_tier(tier)
+        data_manager = self.get_manager('data')
+        if data_manager:
+            data_manager.set_setting('graphics_quality', setting)
+        return setting
+
+    def toggle_adaptive_quality(self) -> bool:
+        """开关自适应画质调节 / Toggle the adaptive quality governor"""
+        enabled = not self.quality_governor.enabled
+        self.quality_governor.set_enabled(enabled)
+        data_manager = self.get_manager('data')
+        if data_manager:
+            data_manager.set_setting('adaptive_quality', enabled)
+        return enabled
+
+    def toggle_particles(self) -> bool:
+        """开关粒子特效 / Toggle particle effects"""
+        enabled = not self.graphics_quality.particles_enabled
+        self.graphics_quality.set_particles_enabled(enabled)
+        data_manager = self.get_manager('data')
+        if data_manager:
+            data_manager.set_setting('particle_effects', enabled)
+        return enabled
+
+    def set_render_scale(self, scale=None) -> float:
+        """设置场景渲染比例，不传参数时切换到下一个预设
+        Set the scene render scale; without an argument cycle to the next preset"""
+        if scale is None:
+            scale = self.render_scaler.next_scale()
+        else:
+            scale = self.render_scaler.set_scale(scale)
+        data_manager = self.get_manager('data')
+        if data_manager:
+            data_manager.set_setting('render_scale', scale)
+        return scale
+
     def save_game(self, slot: int = None):
         """保存游戏 / Save game"""
         try:
@@ -209,15 +292,36 @@ class Game:
                 # 如果没有指定槽位，使用当前槽位或创建新槽位
                 slot = data_manager.save_system.current_save or 1
             
-            success = data_manager.save_system.save_game(save_data, slot)
-            if success:
-                self.ui_manager.show_notification("Game saved successfully")
-            else:
-                self.ui_manager.show_notification("Failed to save game")
+            # 快照后交给后台线程写入，不阻塞游戏线程；写完后再提示结果
+            # Snapshot and write in the background; the result is shown once the write finishes
+            data_manager.submit_save(save_data, slot, thumbnail=self._capture_thumbnail(),
+                                     on_complete=self.save_results.append)
+            return True
             
         except Exception as e:
             print(f"Error saving game: {e}")
             self.ui_manager.show_notification("Error saving game")
+            return False
+    
+    def _show_save_results(self):
+        """显示后台存档的结果 / Show the results of background saves"""
+        while self.save_results:
+            if self.save_results.popleft():
+                self.ui_manager.show_notification("Game saved successfully")
+            else:
+                self.ui_manager.show_notification("Error saving game")
+
+    def _capture_thumbnail(self, size=(160, 90)):
+        """截取当前画面的缩略图 (原始 RGB 数据, 尺寸) / Capture a thumbnail of the screen as (raw RGB, size)"""
+        try:
+            if self.graphics_quality.smooth_transforms:
+                thumbnail = pygame.transform.smoothscale(self.screen, size)
+            else:
+                thumbnail = pygame.transform.scale(self.screen, size)
+            return pygame.image.tostring(thumbnail, 'RGB'), size
+        except (pygame.error, ValueError) as e:
+            logging.warning(f"Failed to capture save thumbnail: {e}")
+            return None
 
     def set_state(self, new_state):
         """切换游戏状态 / Switch game state"""
@@ -283,9 +387,9 @@ class Game:
         self.input_manager = InputManager()
         
         # 战斗相关管理器 / Battle-related managers
-        self.qte_manager = QTEManager(self)  # 传入self作为game_engine
+        self.qte_manager = QTEManager(self, self.input_manager)  # 传入self作为game_engine
         self.combo_manager = ComboManager()
-        self.morale_manager = MoraleManager(self)
+        self.morale_manager = MoraleManager(self, self.input_manager)
         self.weather_manager = AdvancedWeatherManager(self)
         self.character_manager = CharacterManager(self)
         self.battle_manager = BattleManager(self)
@@ -379,31 +483,23 @@ class Game:
         if audio_manager:
             audio_manager.play_music("start")
 
-    def get_manager(self, manager_name: str):
-        """获取管理器实例 / Get manager instance"""
-        managers = {
-            'resource': self.resource_manager,
-            'audio': self.audio_manager,
-            'data': self.data_manager,
-            'effect': self.effect_manager,
-            'ui': self.ui_manager,
-            'input': self.input_manager,
-            'battle': self.battle_manager,
-            'character': self.character_manager,
-            'weather': self.weather_manager,
-            'morale': self.morale_manager,
-            'combo': self.combo_manager,
-            'qte': self.qte_manager
-        }
-        return managers.get(manager_name)
-
     def run(self):
         """游戏主循环 / Game main loop"""
         while self.running:
+            # 等到下一帧，等待期间轮询输入 / Wait for the next frame, polling input meanwhile
+            self._wait_for_frame()
+            
             # 固定时间步长 / Fixed time step
-            frame_time = self.clock.tick(self.target_fps) / 1000.0
+            frame_time = self.clock.tick() / 1000.0
             self.frame_accumulator += frame_time
             
+            # 上一帧的实际耗时（不含等待）；开启调节器时由它接管自动画质
+            # Last frame's work time without the wait; the governor takes over auto quality when enabled
+            if self.quality_governor.enabled:
+                self.quality_governor.observe_frame(self.work_time)
+            else:
+                self.graphics_quality.observe_frame(self.work_time)
+            
             # 处理输入 / Handle input
             self.handle_events()
             
@@ -424,6 +520,37 @@ class Game:
             
             # 使用双缓冲更新屏幕 / Update screen with double buffering
             pygame.display.flip()
+            self.present_frame()
+            self.work_time = time.perf_counter() - self.frame_start
+        
+        # 关闭窗口时也要写完所有后台存档 / Finish background writes even when the window is closed
+        data_manager = self.get_manager('data')
+        if data_manager:
+            data_manager.flush()
+
+    def present_frame(self):
+        """记录一帧已呈现，QTE窗口锚定在此（在 display.flip 之后调用）
+        Record that a frame was presented, anchoring QTE windows; call right after display.flip"""
+        self.input_manager.timing.present_frame()
+
+    def _wait_for_frame(self):
+        """等到下一帧的开始时间（代替 clock.tick 的整段休眠）
+        Wait until the next frame is due, replacing clock.tick's single sleep
+
+        等待期间每隔 INPUT_POLL_INTERVAL 秒取出一次事件队列，让按键时间戳接近事件到达的时刻，
+        而不是全部停在下一帧开始时。
+        While waiting, the event queue is drained every INPUT_POLL_INTERVAL
+        seconds so key timestamps land close to when the events arrived,
+        instead of all at the start of the next frame.
+        """
+        deadline = self.frame_start + 1.0 / self.target_fps
+        while True:
+            self.input_manager.poll_events()
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            time.sleep(min(remaining, self.INPUT_POLL_INTERVAL))
+        self.frame_start = time.perf_counter()
 
     def handle_events(self):
         """处理输入事件 / Handle input events"""
@@ -431,7 +558,9 @@ class Game:
         dt = current_time - self.last_frame_time
         self.input_manager.update(dt)
         self.last_frame_time = current_time
-        for event in pygame.event.get():
+        for event, timestamp_ns in self.input_manager.drain_events():
+            # 输入管理器记录边沿状态和取出事件时的时间戳 / Record key edges and the stamp taken when the event was polled
+            self.input_manager.process_event(event, timestamp_ns)
             if event.type == pygame.QUIT:
                 self.running = False
             elif event.type == pygame.KEYDOWN:
@@ -447,6 +576,7 @@ class Game:
         self.effect_manager.update(self.dt)
         self.audio_manager.update()
         self.ui_manager.update(self.dt)
+        self._show_save_results()
         
         # 更新当前状态 / Update current state
         if self.current_state == GameState.MAIN_MENU:
@@ -458,21 +588,43 @@ class Game:
             self.character_select.update(self.dt)
         elif self.current_state == GameState.DIFFICULTY_SELECT:
             self.difficulty_select.update(dt)
+        elif self.current_state == GameState.SETTINGS:
+            self.settings_ui.update(self.dt)
             
         # 更新过效果 / Update transition effects
         self.transition_effect.update(dt, self.screen.get_size())
+        
+        # 帧末批量派发高频事件 / Dispatch batched high-frequency events at the end of the frame
+        self.data_manager.event_system.dispatch_batches()
 
     def render(self):
         """渲染游戏画面 / Render game screen"""
-        # 清空屏幕
-        self.screen.fill((0, 0, 0))
+        # 支持缩放的界面先把场景画到内部目标，放大后覆盖整个窗口
+        # UIs that support scaling draw their scene into the internal target; the upscale covers the window
+        render_scene = getattr(self.current_ui, 'render_scene', None)
+        if render_scene is not None and self.render_scaler.active:
+            try:
+                render_scene(self.render_scaler.get_scene())
+            except Exception as e:
+                logging.error(f"渲染场景失败: {e}")
+            self.render_scaler.present(self.screen)
+        else:
+            # 清空屏幕
+            self.screen.fill((0, 0, 0))
         
-        # 渲染当前UI
+        # 渲染当前UI（原生分辨率）/ Render the current UI at native resolution
         if self.current_ui:
             try:
                 self.current_ui.render(self.screen)
             except Exception as e:
                 logging.error(f"渲染UI失败: {e}")
+                
+        # 战斗特效绘制在特效层 / Battle effects draw on the effects layer
+        self.render_queue.draw('effects', self.effect_manager.render)
+        
+        # 按层批量绘制提交的命令 / Draw the submitted commands layer by layer in batches
+        self.render_queue.flush(self.screen)
+        self.performance_monitor.record_render_stats(self.render_queue.stats)
         
         # 在最后渲染过渡效果
         if hasattr(self, 'transition_effect'):
@@ -496,6 +648,8 @@ class Game:
                 self.battle_ui.handle_input(event)
             elif self.current_state == GameState.CHARACTER_SELECT:
                 self.character_select.handle_input(event)
+            elif self.current_state == GameState.SETTINGS:
+                self.settings_ui.handle_input(event)
         except Exception as e:
             logging.error(f"UI输入处理错误: {e}")
 
@@ -1,6 +1,8 @@
 import pygame
 import random
 
+from ..managers.graphics_quality import graphics_quality
+
 class ArrowTrailEffect:
     """箭矢轨迹特效"""
     def __init__(self, position, params):
@@ -20,7 +22,7 @@ class ArrowTrailEffect:
         
         # 生成尾迹粒子
         if self.elapsed < self.lifetime:
-            for _ in range(3):
+            for _ in range(graphics_quality.particle_budget('arrow_trail', 3, len(self.particles))):
                 offset = pygame.Vector2(
                     random.uniform(-5, 5),
                     random.uniform(-5, 5)
@@ -1,9 +1,30 @@
 import pygame
 from pygame import Surface
 import math
+import random
 
 class TransitionEffect:
-    """过渡效果类 / Transition effect class"""
+    """过渡效果合成器 / Transition effect compositor
+
+    所有过渡共用几张按屏幕尺寸预先分配的非透明表面，每帧不再清空和重绘全屏 SRCALPHA 表面：
+    淡入淡出用一张黑色表面加 set_alpha（整面透明度比逐像素透明度便宜），滑动和擦除直接在
+    屏幕上填充矩形，圆形用一次 Surface.blits 按扫描线 blit 黑色表面的裁剪片段，溶解把预计算的
+    噪声阈值图缩放到带色键的表面。空闲时什么也不做。
+    Every transition shares a few non-alpha surfaces allocated once per
+    screen size instead of clearing and redrawing a full-screen SRCALPHA
+    surface each frame: fades use one black surface with set_alpha (surface
+    alpha is cheaper than per-pixel alpha), slide and wipe fill rects on the
+    screen directly, the circle blits one clipped row span of the black
+    surface per scanline in a single Surface.blits call, and dissolve scales
+    a precomputed noise threshold map into a colour-keyed surface. Idle, it
+    does nothing.
+    """
+
+    # 形状表面的透明色键 / Transparent colour key of the shape surface
+    COLOR_KEY = (255, 0, 255)
+    # 溶解噪声块的像素大小 / Pixel size of a dissolve noise cell
+    DISSOLVE_BLOCK = 8
+
     def __init__(self):
         self.active = False
         self.alpha = 0
@@ -11,20 +32,26 @@ class TransitionEffect:
         self.transition_type = 'fade'  # 默认使用淡入淡出效果
         self.direction = 'out'  # 'in' 或 'out'
         self.callback = None
-        self.transition_surface = None  # 将在第一次render时初始化
-        
+
+        # 按屏幕尺寸分配的共享表面 / Shared surfaces allocated per screen size
+        self.screen_size = None
+        self._black = None  # 非透明黑色表面 / Non-alpha black surface
+        self._shape = None  # 色键形状表面 / Colour-keyed shape surface
+        self._noise = None  # 溶解阈值图 / Dissolve threshold map
+        self._noise_mask = None
+
         # 圆形过渡效果的参数
         self.circle_center = None
         self.circle_radius = 0
         self.max_radius = 1000  # 根据实际屏幕尺寸调整
-        
-    def start_transition(self, transition_type='fade', direction='out', 
+
+    def start_transition(self, transition_type='fade', direction='out',
                         duration=1.0, center=None, callback=None):
         """
         开始过渡效果 / Start transition effect
-        
+
         Args:
-            transition_type (str): 过渡类型 ('fade', 'circle', 'slide')
+            transition_type (str): 过渡类型 ('fade', 'circle', 'slide', 'wipe', 'dissolve')
             direction (str): 过渡方向 ('in' 或 'out')
             duration (float): 过渡持续时间（秒）
             center (tuple): 圆形过渡的中心点 (x, y)
@@ -35,106 +62,176 @@ class TransitionEffect:
         self.direction = direction
         self.callback = callback
         self.fade_speed = 255 / duration
-        
+
         if direction == 'in':
             self.alpha = 255
         else:
             self.alpha = 0
-            
+
         if transition_type == 'circle':
             if center is None:
                 raise ValueError("Circle transition requires a center point")
             self.circle_center = center
             self.circle_radius = 0 if direction == 'out' else self.max_radius
-            
+
     def update(self, dt: float, screen_size: tuple):
         """
         更新过渡效果
-        
+
         Args:
             dt (float): 时间增量
             screen_size (tuple): 屏幕尺寸 (width, height)
         """
         if not self.active:
             return
-            
-        if self.transition_surface is None or \
-           self.transition_surface.get_size() != screen_size:
-            self.transition_surface = Surface(screen_size, pygame.SRCALPHA)
-            self.max_radius = math.sqrt(screen_size[0]**2 + screen_size[1]**2)
-            
+
+        self._ensure_surfaces(screen_size)
+
         # 更新alpha值
         if self.direction == 'out':
             self.alpha = min(255, self.alpha + self.fade_speed * dt)
         else:
             self.alpha = max(0, self.alpha - self.fade_speed * dt)
-            
+
         # 更新圆形过渡
         if self.transition_type == 'circle':
             if self.direction == 'out':
                 self.circle_radius = (self.alpha / 255) * self.max_radius
             else:
                 self.circle_radius = (1 - self.alpha / 255) * self.max_radius
-                
+
         # 检查过渡是否完成
         if (self.direction == 'out' and self.alpha >= 255) or \
            (self.direction == 'in' and self.alpha <= 0):
             self.active = False
             if self.callback:
                 self.callback()
-                
+
     def render(self, screen: Surface):
         """
         渲染过渡效果
-        
+
         Args:
             screen (Surface): 目标surface
         """
-        if not self.active:
+        if not self.active or self.alpha <= 0:
             return
-            
-        if self.transition_surface is None:
-            self.transition_surface = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
-            
-        self.transition_surface.fill((0, 0, 0, 0))
-        
+
+        self._ensure_surfaces(screen.get_size())
+
         if self.transition_type == 'fade':
-            self._render_fade()
+            self.draw_fade(screen, self.alpha)
         elif self.transition_type == 'circle':
-            self._render_circle()
+            self._render_circle(screen)
         elif self.transition_type == 'slide':
-            self._render_slide()
-            
-        screen.blit(self.transition_surface, (0, 0))
-        
-    def _render_fade(self):
-        """渲染淡入淡出效果"""
-        self.transition_surface.fill((0, 0, 0, int(self.alpha)))
-        
-    def _render_circle(self):
-        """渲染圆形过渡效果"""
-        if not self.circle_center:
+            self._render_slide(screen)
+        elif self.transition_type == 'wipe':
+            self._render_wipe(screen)
+        elif self.transition_type == 'dissolve':
+            self._render_dissolve(screen)
+
+    def draw_fade(self, screen: Surface, alpha: float):
+        """在屏幕上叠加一层黑色（供其他界面共用）/ Overlay black on the screen, shared with other screens"""
+        alpha = int(min(255, alpha))
+        if alpha <= 0:
             return
-            
-        pygame.draw.circle(
-            self.transition_surface,
-            (0, 0, 0, int(self.alpha)),
-            self.circle_center,
-            self.circle_radius
-        )
-        
-    def _render_slide(self):
+        self._ensure_surfaces(screen.get_size())
+        if alpha >= 255:
+            screen.fill((0, 0, 0))
+            return
+        self._black.set_alpha(alpha)
+        screen.blit(self._black, (0, 0))
+
+    def _render_circle(self, screen: Surface):
+        """渲染圆形过渡效果：每条扫描线 blit 一段黑色表面 / Blit one span of the black surface per scanline"""
+        if not self.circle_center or self.circle_radius < 1:
+            return
+
+        width, height = self.screen_size
+        center_x, center_y = self.circle_center
+        radius = self.circle_radius
+        radius_squared = radius * radius
+
+        # 圆已覆盖整个屏幕时退化为淡入淡出 / Once the circle covers the screen it is just a fade
+        far_x = max(center_x, width - center_x)
+        far_y = max(center_y, height - center_y)
+        if far_x * far_x + far_y * far_y <= radius_squared:
+            self.draw_fade(screen, self.alpha)
+            return
+
+        black = self._black
+        black.set_alpha(int(self.alpha))
+        spans = []
+        for y in range(max(0, int(center_y - radius)), min(height, int(center_y + radius) + 1)):
+            offset = y + 0.5 - center_y
+            remaining = radius_squared - offset * offset
+            if remaining <= 0:
+                continue
+            half = math.sqrt(remaining)
+            left = max(0, int(center_x - half))
+            right = min(width, int(center_x + half))
+            if right > left:
+                spans.append((black, (left, y), (left, y, right - left, 1)))
+        screen.blits(spans, doreturn=False)
+
+    def _render_slide(self, screen: Surface):
         """渲染滑动过渡效果"""
-        width, height = self.transition_surface.get_size()
-        progress = self.alpha / 255
-        rect_height = int(height * progress)
-        
-        pygame.draw.rect(
-            self.transition_surface,
-            (0, 0, 0, 255),
-            (0, 0, width, rect_height)
-        )
-        
+        width, height = self.screen_size
+        rect_height = int(height * self.alpha / 255)
+        if rect_height > 0:
+            screen.fill((0, 0, 0), (0, 0, width, rect_height))
+
+    def _render_wipe(self, screen: Surface):
+        """渲染从左到右的擦除效果 / Render a left-to-right wipe"""
+        width, height = self.screen_size
+        rect_width = int(width * self.alpha / 255)
+        if rect_width > 0:
+            screen.fill((0, 0, 0), (0, 0, rect_width, height))
+
+    def _render_dissolve(self, screen: Surface):
+        """渲染溶解效果：按预计算的噪声阈值图逐块覆盖 / Cover cells in order of a precomputed noise threshold map"""
+        if self._noise is None:
+            self._create_noise()
+
+        # 噪声值高于阈值的块被覆盖为黑色，其余为色键
+        # Cells whose noise exceeds the threshold turn black, the rest stay colour key
+        level = 255 - int(self.alpha)
+        self._noise_mask.fill(self.COLOR_KEY)
+        pygame.transform.threshold(self._noise_mask, self._noise, (0, 0, 0), (level, level, level), (0, 0, 0), 1)
+        pygame.transform.scale(self._noise_mask, self.screen_size, self._shape)
+        self._shape.set_alpha(None)
+        screen.blit(self._shape, (0, 0))
+
+    def _ensure_surfaces(self, screen_size: tuple):
+        """屏幕尺寸变化时重新分配共享表面 / Reallocate the shared surfaces when the screen size changes"""
+        screen_size = tuple(screen_size)
+        if self.screen_size == screen_size:
+            return
+        self.screen_size = screen_size
+        self.max_radius = math.sqrt(screen_size[0]**2 + screen_size[1]**2)
+
+        self._black = Surface(screen_size)
+        self._shape = Surface(screen_size)
+        if pygame.display.get_surface() is not None:
+            self._black = self._black.convert()
+            self._shape = self._shape.convert()
+        self._black.fill((0, 0, 0))
+        self._shape.set_colorkey(self.COLOR_KEY)
+        self._noise = None
+        self._noise_mask = None
+
+    def _create_noise(self):
+        """预计算溶解阈值图（每块一个 1-255 的随机值）/ Precompute the dissolve threshold map, one 1-255 value per cell"""
+        width, height = self.screen_size
+        cells = (max(1, width // self.DISSOLVE_BLOCK), max(1, height // self.DISSOLVE_BLOCK))
+        rng = random.Random(cells[0] * 65536 + cells[1])
+        values = bytearray()
+        for _ in range(cells[0] * cells[1]):
+            value = rng.randint(1, 255)
+            values += bytes((value, value, value))
+        self._noise = pygame.image.frombuffer(bytes(values), cells, 'RGB').copy()
+        self._noise_mask = Surface(cells)
+
     def start(self, direction='in', callback=None, duration=1.0):
         """start方法别名，用于兼容性 / Alias for start_transition method"""
         self.start_transition(
@@ -142,4 +239,4 @@ class TransitionEffect:
             direction=direction,
             duration=duration,
             callback=callback
-        )
\ No newline at end of file
+        )
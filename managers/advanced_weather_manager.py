@@ -3,6 +3,8 @@ import math
 import random
 import time
 
+from .graphics_quality import graphics_quality
+
 class AdvancedWeatherManager:
     def __init__(self, game_engine):
         self.game_engine = game_engine
@@ -100,7 +102,7 @@ class AdvancedWeatherManager:
                 self._handle_puddle(particle['position'].x, screen_height)
                 
         # 生成新雨滴 / Generate new raindrops
-        if len(rain['particles']) < rain['droplet_count'] * rain['intensity']:
+        if len(rain['particles']) < graphics_quality.weather_limit('rain', rain['droplet_count'] * rain['intensity']):
             x = random.randint(-50, screen_width + 50)
             rain['particles'].append({
                 'position': pygame.Vector2(x, -10),
@@ -129,7 +131,7 @@ class AdvancedWeatherManager:
                 snow['particles'].remove(particle)
                 
         # 生成新雪花 / Generate new snowflakes
-        if len(snow['particles']) < 80 * snow['intensity']:
+        if len(snow['particles']) < graphics_quality.weather_limit('snow', 80 * snow['intensity']):
             x = random.randint(-50, screen_width + 50)
             snow['particles'].append({
                 'position': pygame.Vector2(x, -10),
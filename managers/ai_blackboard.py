@@ -0,0 +1,188 @@
+import heapq
+from itertools import count
+from typing import Any, Callable, Dict, List, Optional
+
+class AIBlackboard:
+    """AI黑板 / AI blackboard
+
+    为每支队伍维护若干排序（最低生命比例、最高威胁、后排……），每个排序是一个按键值排列的堆。
+    角色变化时（伤害、暴击、闪避、士气事件，或回合结束时的行动者）只重新计算该角色的键值并
+    压入新条目，旧条目靠版本号惰性丢弃，所以一次AI决策是 O(log n)，而不是每回合重新给所有
+    角色打分。
+    Keeps several orderings per team (lowest HP ratio, highest threat,
+    back line, ...), each a heap ordered by key. When a character changes
+    (damage, crit, dodge and morale events, or the actor at the end of its
+    turn) only that character's keys are recomputed and pushed as new
+    entries; stale entries are dropped lazily by version, so an AI decision
+    is O(log n) instead of rescoring every character every turn.
+
+    生命值不经事件变化时（如连击伤害直接调用 take_damage），角色的 hp_watchers 回调同样会
+    重新计算；任何快照恢复（撤销回合、时间回溯）都会发出 RESTORE_EVENT，黑板随之整体丢弃。
+    HP changes that raise no event (e.g. combo damage calling take_damage
+    directly) are caught through the character's hp_watchers callbacks, and
+    every snapshot restore (turn undo, time rewind) raises RESTORE_EVENT,
+    which drops the whole blackboard.
+
+    排序函数返回键值（越小越优先），返回 None 表示该角色不参与此排序。
+    An ordering function returns a key (smaller comes first), or None to
+    leave the character out of that ordering.
+    """
+
+    # 触发重新计算的事件 / Events that trigger a rescore
+    CHARACTER_EVENTS = ('damage', 'crit', 'dodge')
+    MORALE_EVENT = 'morale_change'
+    # 快照恢复后发出的事件 / Event raised after a snapshot restore
+    RESTORE_EVENT = 'state_restored'
+
+    def __init__(self, orderings: Dict[str, Callable[[Any], Optional[float]]]):
+        self.orderings = orderings
+
+        # 队伍 -> 成员列表 / Team -> member list
+        self._members: Dict[str, list] = {}
+        self._team_of: Dict[int, str] = {}
+        self._by_name: Dict[str, List[Any]] = {}
+        # (队伍, 排序) -> 堆 [(键值, 序号, 版本, 角色)] / (team, ordering) -> heap of (key, seq, version, character)
+        self._heaps: Dict[tuple, list] = {}
+        self._versions: Dict[int, int] = {}
+        self._sequence = count()
+
+        self._event_system = None
+        self._handlers = []
+
+    # ---- 队伍 / Teams ----
+
+    def sync(self, team: str, characters: list):
+        """成员变化时重建队伍（如新波次、Boss出场）/ Rebuild a team when its members changed, e.g. a new wave"""
+        members = self._members.get(team)
+        if members is not None and members == characters:
+            return
+        if members is not None:
+            for character in members:
+                self._forget(character)
+        self._members[team] = list(characters)
+        for name in self.orderings:
+            self._heaps[(team, name)] = []
+        for character in characters:
+            self._team_of[id(character)] = team
+            self._by_name.setdefault(getattr(character, 'name', None), []).append(character)
+            watchers = getattr(character, 'hp_watchers', None)
+            if watchers is not None and self.invalidate not in watchers:
+                watchers.append(self.invalidate)
+            self.invalidate(character)
+
+    def reset(self):
+        """丢弃所有队伍（例如撤销回合之后）/ Drop every team, e.g. after undoing a turn"""
+        for members in self._members.values():
+            for character in members:
+                self._unwatch(character)
+        self._members.clear()
+        self._team_of.clear()
+        self._by_name.clear()
+        self._heaps.clear()
+        self._versions.clear()
+
+    # ---- 更新 / Updates ----
+
+    def invalidate(self, character):
+        """重新计算角色在各排序中的键值 / Recompute a character's keys in every ordering"""
+        team = self._team_of.get(id(character))
+        if team is None:
+            return
+        version = self._versions.get(id(character), 0) + 1
+        self._versions[id(character)] = version
+        for name, key_func in self.orderings.items():
+            key = key_func(character)
+            if key is None:
+                continue
+            heap = self._heaps[(team, name)]
+            heapq.heappush(heap, (key, next(self._sequence), version, character))
+            # 旧条目过多时压缩 / Compact when stale entries pile up
+            if len(heap) > 4 * len(self._members[team]) + 16:
+                self._compact(team, name)
+
+    def invalidate_name(self, name: str):
+        """按名称重新计算（事件中只带名称）/ Recompute by name, since events only carry names"""
+        for character in self._by_name.get(name, ()):
+            self.invalidate(character)
+
+    # ---- 查询 / Queries ----
+
+    def best(self, team: str, ordering: str):
+        """某排序中排在最前的角色 / The first character of an ordering"""
+        heap = self._heaps.get((team, ordering))
+        if not heap:
+            return None
+        versions = self._versions
+        while heap:
+            _, _, version, character = heap[0]
+            if versions.get(id(character)) == version:
+                return character
+            heapq.heappop(heap)
+        return None
+
+    # ---- 事件 / Events ----
+
+    def bind(self, event_system):
+        """订阅战斗事件 / Subscribe to battle events"""
+        if event_system is None or self._event_system is event_system:
+            return
+        self.unbind()
+        self._event_system = event_system
+        for event_type in self.CHARACTER_EVENTS:
+            self._subscribe(event_type, self._on_character_event)
+        self._subscribe(self.MORALE_EVENT, self._on_morale_event)
+        self._subscribe(self.RESTORE_EVENT, self._on_restore_event)
+
+    def unbind(self):
+        """取消订阅 / Unsubscribe"""
+        if self._event_system is not None:
+            for event_type, handler in self._handlers:
+                self._event_system.unregister_handler(event_type, handler)
+        self._event_system = None
+        self._handlers = []
+
+    def _subscribe(self, event_type: str, handler):
+        """注册即时处理器：决策必须看到最新的状态 / Register an immediate handler, decisions must see fresh state"""
+        self._event_system.register_handler(event_type, handler)
+        self._handlers.append((event_type, handler))
+
+    def _on_character_event(self, event: Dict):
+        """伤害/暴击/闪避：攻击者和目标都可能变化 / Damage, crit, dodge: attacker and target may both change"""
+        data = event.get('data') or {}
+        for key in ('target', 'attacker'):
+            name = data.get(key)
+            if name is not None:
+                self.invalidate_name(name)
+
+    def _on_morale_event(self, event):
+        """士气变化 / Morale change"""
+        character, _ = event
+        self.invalidate(character)
+
+    def _on_restore_event(self, _):
+        """快照恢复：所有排序都可能过期 / Snapshot restore: every ordering may be stale"""
+        self.reset()
+
+    # ---- 内部方法 / Internals ----
+
+    def _forget(self, character):
+        """移除角色的索引 / Remove a character's index entries"""
+        self._unwatch(character)
+        self._team_of.pop(id(character), None)
+        self._versions.pop(id(character), None)
+        same_name = self._by_name.get(getattr(character, 'name', None))
+        if same_name and character in same_name:
+            same_name.remove(character)
+
+    def _unwatch(self, character):
+        """移除生命值回调 / Remove the HP callback"""
+        watchers = getattr(character, 'hp_watchers', None)
+        if watchers is not None and self.invalidate in watchers:
+            watchers.remove(self.invalidate)
+
+    def _compact(self, team: str, ordering: str):
+        """只保留当前版本的条目 / Keep only current-version entries"""
+        versions = self._versions
+        heap = [entry for entry in self._heaps[(team, ordering)] if versions.get(id(entry[3])) == entry[2]]
+        heapq.heapify(heap)
+        self._heaps[(team, ordering)] = heap
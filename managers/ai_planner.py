@@ -0,0 +1,261 @@
+import time
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+class _SearchTimeout(Exception):
+    """搜索超出时间预算 / Search ran out of its time budget"""
+    pass
+
+class AIPlanner:
+    """搜索式AI规划器（噩梦难度）/ Search-based AI planner for nightmare difficulty
+
+    游戏线程把战斗状态压缩成只含生命值的元组和不变的属性表，工作线程在其上做期望最大化
+    搜索：AI 取最大值，玩家取最小值，每次攻击展开闪避/暴击/普通三个机会节点。迭代加深直到
+    用完每回合的时间预算，返回最后一个完整深度的最佳目标，所以游戏线程从不等待搜索。
+    The game thread compresses the battle into a tuple of HP values plus a
+    table of static stats; a worker thread runs expectimax on it: the AI
+    maximises, players minimise, and every attack expands into dodge / crit /
+    normal chance nodes. Iterative deepening runs until the per-turn time
+    budget is spent and the best target of the last completed depth is
+    returned, so the game thread never waits for the search.
+    """
+
+    # 评估权重 / Evaluation weights
+    HP_WEIGHT = 1.0
+    ALIVE_WEIGHT = 0.5
+    MAX_DEPTH = 12
+
+    def __init__(self, time_budget: float = 0.005):
+        self.time_budget = time_budget
+
+        self._condition = threading.Condition()
+        self._request: Optional[dict] = None
+        self._result: Optional[dict] = None
+        self._running = True
+
+        self.stats = {'requests': 0, 'nodes': 0, 'depth': 0}
+
+        self._thread = threading.Thread(target=self._run, name="ai-planner", daemon=True)
+        self._thread.start()
+
+    # ---- 游戏线程接口 / Game thread interface ----
+
+    def request(self, battle_system, actor) -> bool:
+        """为 actor 请求一次规划（在游戏线程上压缩状态）
+        Request a plan for actor; the state is compressed on the game thread"""
+        problem = self.build_problem(battle_system, actor)
+        if problem is None:
+            return False
+        with self._condition:
+            self._request = problem
+            self._result = None
+            self.stats['requests'] += 1
+            self._condition.notify()
+        return True
+
+    def poll(self, actor) -> Optional[Dict[str, Any]]:
+        """获取 actor 的规划结果，尚未完成时返回 None
+        Get the plan for actor, or None while it is still being searched"""
+        with self._condition:
+            result = self._result
+            if result is None or result['actor'] is not actor:
+                return None
+            self._result = None
+            return result
+
+    def is_pending(self, actor) -> bool:
+        """actor 是否有进行中的规划 / Whether a plan for actor is in progress"""
+        with self._condition:
+            request = self._request
+            result = self._result
+        return (request is not None and request['actor'] is actor) or \
+            (result is not None and result['actor'] is actor)
+
+    def stop(self):
+        """停止工作线程 / Stop the worker thread"""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+
+    def build_problem(self, battle_system, actor) -> Optional[dict]:
+        """把战斗状态压缩为搜索问题 / Compress the battle state into a search problem"""
+        ai_team = [c for c in battle_system.enemy_team if c.is_alive()]
+        player_team = [c for c in battle_system.player_team if c.is_alive()]
+        if actor not in ai_team or not player_team:
+            return None
+
+        characters = ai_team + player_team
+        # 按速度排定行动顺序 / Turn order by speed
+        characters.sort(key=lambda c: self._stat(c, 'get_effective_speed', 'spd', 0), reverse=True)
+        units = []
+        for character in characters:
+            units.append((
+                character in ai_team,
+                max(1.0, float(getattr(character, 'max_hp', 1) or 1)),
+                self._stat(character, 'get_attack', 'atk', 0),
+                self._stat(character, 'get_defense', 'def_', 0),
+                min(1.0, self._stat(character, 'get_crit_chance', 'crt', 0)),
+                self._stat(character, 'get_crit_damage', 'c_dmg', 1.5),
+                min(1.0, self._stat(character, 'get_dodge_chance', 'evd', 0))
+            ))
+        return {
+            'actor': actor,
+            'characters': characters,
+            'units': tuple(units),
+            'hps': tuple(float(c.hp) for c in characters),
+            'actor_index': characters.index(actor)
+        }
+
+    # ---- 搜索 / Search ----
+
+    def plan(self, problem: dict, deadline: Optional[float] = None) -> dict:
+        """在时间预算内搜索最佳目标 / Search for the best target within the time budget"""
+        if deadline is None:
+            deadline = time.perf_counter() + self.time_budget
+        self._units = problem['units']
+        self._deadline = deadline
+        self._nodes = 0
+
+        hps = problem['hps']
+        actor_index = problem['actor_index']
+        targets = self._targets(hps, actor_index)
+        # 深度 0 的后备：伤害期望最高的目标 / Depth-0 fallback: the target taking the most expected damage
+        best_target = max(targets, key=lambda t: self._expected_damage(actor_index, t) / hps[t])
+        best_value = None
+        completed_depth = 0
+
+        for depth in range(1, self.MAX_DEPTH + 1):
+            try:
+                value, target = self._search_root(hps, actor_index, depth)
+            except _SearchTimeout:
+                break
+            best_value, best_target = value, target
+            completed_depth = depth
+            if len(targets) == 1:
+                break
+
+        self.stats['nodes'] += self._nodes
+        self.stats['depth'] = completed_depth
+        return {
+            'actor': problem['actor'],
+            'target': problem['characters'][best_target],
+            'value': best_value,
+            'depth': completed_depth,
+            'nodes': self._nodes
+        }
+
+    def _search_root(self, hps: tuple, actor_index: int, depth: int) -> Tuple[float, int]:
+        """根节点：AI 选择目标 / Root: the AI picks a target"""
+        best_value, best_target = None, None
+        for target in self._targets(hps, actor_index):
+            value = self._chance(hps, actor_index, target, depth)
+            if best_value is None or value > best_value:
+                best_value, best_target = value, target
+        return best_value, best_target
+
+    def _decide(self, hps: tuple, actor_index: int, depth: int) -> float:
+        """决策节点：AI 取最大值，玩家取最小值 / Decision node: AI maximises, players minimise"""
+        self._nodes += 1
+        if self._nodes & 63 == 0 and time.perf_counter() > self._deadline:
+            raise _SearchTimeout()
+        if depth == 0 or self._is_terminal(hps):
+            return self._evaluate(hps)
+
+        maximizing = self._units[actor_index][0]
+        best = None
+        for target in self._targets(hps, actor_index):
+            value = self._chance(hps, actor_index, target, depth)
+            if best is None or (value > best if maximizing else value < best):
+                best = value
+        return best
+
+    def _chance(self, hps: tuple, attacker: int, target: int, depth: int) -> float:
+        """机会节点：闪避 / 暴击 / 普通命中 / Chance node: dodge / crit / normal hit"""
+        _, _, atk, _, crit, crit_damage, _ = self._units[attacker]
+        defense, dodge = self._units[target][3], self._units[target][6]
+        next_actor = self._next_actor(hps, attacker)
+
+        value = 0.0
+        if dodge > 0:
+            value += dodge * self._decide(hps, next_actor, depth - 1)
+        hit = 1.0 - dodge
+        for probability, damage in ((hit * crit, atk * crit_damage), (hit * (1.0 - crit), atk)):
+            if probability <= 0:
+                continue
+            damaged = list(hps)
+            damaged[target] = max(0.0, hps[target] - max(1.0, damage - defense))
+            damaged = tuple(damaged)
+            value += probability * self._decide(damaged, self._next_actor(damaged, attacker), depth - 1)
+        return value
+
+    def _targets(self, hps: tuple, actor_index: int) -> List[int]:
+        """可攻击的目标 / Attackable targets"""
+        side = self._units[actor_index][0]
+        return [i for i, unit in enumerate(self._units) if unit[0] != side and hps[i] > 0]
+
+    def _next_actor(self, hps: tuple, actor_index: int) -> int:
+        """下一个存活的行动者 / The next living actor"""
+        count = len(hps)
+        for step in range(1, count + 1):
+            index = (actor_index + step) % count
+            if hps[index] > 0:
+                return index
+        return actor_index
+
+    def _is_terminal(self, hps: tuple) -> bool:
+        """一方全灭 / One side is wiped out"""
+        ai_alive = player_alive = False
+        for unit, hp in zip(self._units, hps):
+            if hp > 0:
+                if unit[0]:
+                    ai_alive = True
+                else:
+                    player_alive = True
+        return not (ai_alive and player_alive)
+
+    def _evaluate(self, hps: tuple) -> float:
+        """从 AI 角度评估局面 / Evaluate the position from the AI's side"""
+        score = 0.0
+        for unit, hp in zip(self._units, hps):
+            value = self.HP_WEIGHT * hp / unit[1] + (self.ALIVE_WEIGHT if hp > 0 else 0.0)
+            score += value if unit[0] else -value
+        return score
+
+    def _expected_damage(self, attacker: int, target: int) -> float:
+        """一次攻击的伤害期望 / Expected damage of one attack"""
+        _, _, atk, _, crit, crit_damage, _ = self._units[attacker]
+        defense, dodge = self._units[target][3], self._units[target][6]
+        normal = max(1.0, atk - defense)
+        critical = max(1.0, atk * crit_damage - defense)
+        return (1.0 - dodge) * (crit * critical + (1.0 - crit) * normal)
+
+    # ---- 工作线程 / Worker thread ----
+
+    def _run(self):
+        """工作线程主循环 / Worker main loop"""
+        while True:
+            with self._condition:
+                while self._running and self._request is None:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                problem = self._request
+
+            result = self.plan(problem)
+
+            with self._condition:
+                # 规划期间有新请求时丢弃旧结果 / Drop the result if a newer request arrived
+                if self._request is problem:
+                    self._request = None
+                    self._result = result
+
+    @staticmethod
+    def _stat(character, method: str, attribute: str, default: float) -> float:
+        """读取角色属性，优先使用计算方法 / Read a character stat, preferring its getter method"""
+        getter = getattr(character, method, None)
+        if callable(getter):
+            try:
+                return float(getter())
+            except Exception:
+                pass
+        return float(getattr(character, attribute, default) or default)
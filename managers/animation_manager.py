@@ -1,118 +1,331 @@
 import pygame
 import math
-from typing import Dict, List, Tuple, Optional
+from array import array
+from typing import Dict, List, Tuple, Optional, Callable
 
 class AnimationManager:
-    """动画管理系统 / Animation management system"""
+    """动画管理系统 / Animation management system
+
+    播放状态保存在按槽位排列的并行数组中，所有计时器在一次遍历中推进；
+    渲染时生成按层级和帧表面排序的绘制列表，并通过变换缓存获取缩放、旋转和透明度后的表面，
+    不再修改共享的帧表面。
+    Playback state lives in parallel per-slot arrays and all timers advance in
+    one pass. Rendering builds a draw list sorted by layer and frame surface and
+    resolves scaled/rotated/faded frames through a cache instead of mutating
+    shared frame surfaces.
+    """
+
+    # 变换量化精度 / Transform quantisation steps (keep the cache small)
+    SCALE_STEP = 0.01
+    ROTATION_STEP = 1.0
+    ALPHA_STEP = 4
+    MAX_TRANSFORM_CACHE = 512
+
     def __init__(self):
         self.animations = {}
         self.sprite_sheets = {}
-        self.current_animations = []
-        
-    def load_animation(self, character_id: str, animation_type: str, frames: List[pygame.Surface]):
+
+        # 并行播放状态数组 / Parallel playback state arrays (slot-indexed)
+        self._timers = array('d')
+        self._frame_index = array('i')
+        self._frame_counts = array('i')
+        self._frame_durations = array('d')
+        self._loops = array('b')
+        self._pos_x = array('d')
+        self._pos_y = array('d')
+        self._scales = array('d')
+        self._rotations = array('d')
+        self._alphas = array('i')
+        self._layers = array('i')
+        self._clip_keys: List[str] = []
+        self._callbacks: List[Optional[Callable]] = []
+
+        # 句柄与槽位映射 / Stable handle <-> slot mapping
+        self._slot_handles: List[int] = []
+        self._handle_slots: Dict[int, int] = {}
+        self._next_handle = 1
+
+        # 变换缓存 / Transform cache: (clip, frame, scale, rotation, alpha) -> Surface
+        self._transform_cache: Dict[tuple, pygame.Surface] = {}
+
+    @property
+    def current_animations(self) -> List[int]:
+        """当前活动动画句柄 / Handles of active animations"""
+        return list(self._slot_handles)
+
+    def load_animation(self, character_id: str, animation_type: str, frames: List[pygame.Surface],
+                       frame_duration: float = 0.1):
         """加载动画 / Load animation"""
         key = f"{character_id}_{animation_type}"
         self.animations[key] = {
             'frames': frames,
-            'frame_duration': 0.1,  # 每帧持续时间 / Duration per frame
+            'frame_duration': frame_duration,  # 每帧持续时间 / Duration per frame
             'loop': animation_type in ['idle', 'run', 'float']  # 循环动画类型
         }
-        
-    def create_animation(self, 
-                        character_id: str, 
+        self._invalidate_clip(key)
+
+        # 正在播放该剪辑的实例改用新的帧表，帧序号不越界；没有帧时移除
+        # Instances playing this clip switch to the new frames with their frame index clamped; removed without frames
+        for slot in range(len(self._slot_handles) - 1, -1, -1):
+            if self._clip_keys[slot] != key:
+                continue
+            if not frames:
+                self._remove_slot(slot)
+                continue
+            self._frame_counts[slot] = len(frames)
+            self._frame_durations[slot] = max(frame_duration, 1e-6)
+            self._loops[slot] = 1 if self.animations[key]['loop'] else 0
+            self._frame_index[slot] = min(self._frame_index[slot], len(frames) - 1)
+
+    def create_animation(self,
+                        character_id: str,
                         animation_type: str,
                         position: Tuple[float, float],
-                        on_complete=None):
-        """创建新动画实例 / Create new animation instance"""
+                        on_complete=None,
+                        layer: int = 0) -> Optional[int]:
+        """创建新动画实例，返回句柄 / Create new animation instance and return its handle"""
         key = f"{character_id}_{animation_type}"
-        if key not in self.animations:
+        config = self.animations.get(key)
+        if not config or not config['frames']:
             return None
-            
-        animation = {
-            'key': key,
-            'current_frame': 0,
-            'timer': 0,
-            'position': position,
-            'scale': 1.0,
-            'rotation': 0,
-            'alpha': 255,
-            'on_complete': on_complete,
-            'config': self.animations[key]
-        }
-        
-        self.current_animations.append(animation)
-        return animation
-        
+
+        handle = self._next_handle
+        self._next_handle += 1
+
+        self._handle_slots[handle] = len(self._slot_handles)
+        self._slot_handles.append(handle)
+        self._clip_keys.append(key)
+        self._callbacks.append(on_complete)
+        self._timers.append(0.0)
+        self._frame_index.append(0)
+        self._frame_counts.append(len(config['frames']))
+        self._frame_durations.append(max(config['frame_duration'], 1e-6))
+        self._loops.append(1 if config['loop'] else 0)
+        self._pos_x.append(float(position[0]))
+        self._pos_y.append(float(position[1]))
+        self._scales.append(1.0)
+        self._rotations.append(0.0)
+        self._alphas.append(255)
+        self._layers.append(layer)
+        return handle
+
+    def set_transform(self, handle: int,
+                      position: Optional[Tuple[float, float]] = None,
+                      scale: Optional[float] = None,
+                      rotation: Optional[float] = None,
+                      alpha: Optional[int] = None,
+                      layer: Optional[int] = None) -> bool:
+        """设置动画实例的变换 / Set transform of an animation instance"""
+        slot = self._handle_slots.get(handle)
+        if slot is None:
+            return False
+        if position is not None:
+            self._pos_x[slot] = float(position[0])
+            self._pos_y[slot] = float(position[1])
+        if scale is not None:
+            self._scales[slot] = float(scale)
+        if rotation is not None:
+            self._rotations[slot] = float(rotation)
+        if alpha is not None:
+            self._alphas[slot] = max(0, min(255, int(alpha)))
+        if layer is not None:
+            self._layers[slot] = int(layer)
+        return True
+
+    def stop_animation(self, handle: int) -> bool:
+        """停止动画实例（不触发回调） / Stop an animation instance without firing its callback"""
+        slot = self._handle_slots.get(handle)
+        if slot is None:
+            return False
+        self._remove_slot(slot)
+        return True
+
+    def is_playing(self, handle: int) -> bool:
+        """检查动画是否仍在播放 / Check whether an animation is still playing"""
+        return handle in self._handle_slots
+
     def update(self, dt: float):
-        """更新所有动画 / Update all animations"""
-        for anim in self.current_animations[:]:
-            anim['timer'] += dt
-            
-            # 检查是否需要切换到下一帧
-            if anim['timer'] >= anim['config']['frame_duration']:
-                anim['timer'] = 0
-                anim['current_frame'] += 1
-                
-                # 检查动画是否结束
-                if anim['current_frame'] >= len(anim['config']['frames']):
-                    if anim['config']['loop']:
-                        anim['current_frame'] = 0
-                    else:
-                        if anim['on_complete']:
-                            anim['on_complete']()
-                        self.current_animations.remove(anim)
-                        continue
-                        
+        """一次遍历推进所有动画 / Advance all animations in a single pass"""
+        timers = self._timers
+        frame_index = self._frame_index
+        frame_counts = self._frame_counts
+        durations = self._frame_durations
+        loops = self._loops
+        finished = []
+
+        for slot in range(len(timers)):
+            timer = timers[slot] + dt
+            duration = durations[slot]
+            if timer < duration:
+                timers[slot] = timer
+                continue
+
+            # 保留余量，避免长帧丢失时间 / Keep the remainder so long frames don't lose time
+            steps = int(timer / duration)
+            timers[slot] = timer - steps * duration
+            frame = frame_index[slot] + steps
+            count = frame_counts[slot]
+            if frame >= count:
+                if loops[slot]:
+                    frame %= count
+                else:
+                    frame = count - 1
+                    finished.append(slot)
+            frame_index[slot] = frame
+
+        if not finished:
+            return
+
+        # 从高到低移除，保证交换删除不影响待处理槽位
+        # Remove from the highest slot down so swap-removal keeps pending slots valid
+        callbacks = []
+        for slot in reversed(finished):
+            callback = self._callbacks[slot]
+            if callback:
+                callbacks.append(callback)
+            self._remove_slot(slot)
+
+        for callback in reversed(callbacks):
+            callback()
+
+    def build_draw_list(self) -> List[Tuple[pygame.Surface, Tuple[int, int]]]:
+        """生成排序后的绘制列表 / Build the sorted draw list
+
+        按层级排序，同层内按创建顺序（句柄）排序，z 顺序在每次运行中都稳定；结果用一次 blits 提交。
+        Sorted by layer and, within a layer, by creation order (handle), so
+        the z-order is stable across runs; the list is submitted with a
+        single ``blits`` call.
+        """
+        commands = []
+        for slot in range(len(self._slot_handles)):
+            alpha = self._alphas[slot]
+            if alpha <= 0:
+                continue
+            key = self._clip_keys[slot]
+            frame = self._get_frame_surface(
+                key,
+                self._frame_index[slot],
+                self._scales[slot],
+                self._rotations[slot],
+                alpha
+            )
+            if frame is None:
+                continue
+            width, height = frame.get_size()
+            dest = (int(self._pos_x[slot] - width / 2), int(self._pos_y[slot] - height / 2))
+            commands.append((self._layers[slot], self._slot_handles[slot], frame, dest))
+
+        commands.sort(key=lambda command: (command[0], command[1]))
+        return [(frame, dest) for _, _, frame, dest in commands]
+
     def render(self, surface: pygame.Surface):
         """渲染所有动画 / Render all animations"""
-        for anim in self.current_animations:
-            frame = anim['config']['frames'][anim['current_frame']]
-            
-            # 应用变换
-            if anim['scale'] != 1.0 or anim['rotation'] != 0:
-                frame = self._apply_transforms(frame, anim)
-                
-            # 应用透明度
-            if anim['alpha'] != 255:
-                frame.set_alpha(anim['alpha'])
-                
-            # 绘制到目标表面
-            rect = frame.get_rect(center=anim['position'])
-            surface.blit(frame, rect)
-            
-    def _apply_transforms(self, surface: pygame.Surface, animation: dict) -> pygame.Surface:
-        """应用变换效果 / Apply transformations"""
-        if animation['scale'] != 1.0:
+        draw_list = self.build_draw_list()
+        if draw_list:
+            surface.blits(draw_list, doreturn=False)
+
+    def _get_frame_surface(self, key: str, frame_index: int, scale: float,
+                           rotation: float, alpha: int) -> Optional[pygame.Surface]:
+        """获取（缓存的）变换后帧表面 / Get the (cached) transformed frame surface"""
+        config = self.animations.get(key)
+        if not config or not config['frames']:
+            return None
+        frame_index = min(frame_index, len(config['frames']) - 1)
+        frame = config['frames'][frame_index]
+
+        scale_q = round(scale / self.SCALE_STEP) * self.SCALE_STEP
+        rotation_q = (round(rotation / self.ROTATION_STEP) * self.ROTATION_STEP) % 360
+        alpha_q = 255 if alpha >= 255 else (alpha // self.ALPHA_STEP) * self.ALPHA_STEP
+        if math.isclose(scale_q, 1.0) and rotation_q == 0 and alpha_q == 255:
+            return frame
+
+        cache_key = (key, frame_index, scale_q, rotation_q, alpha_q)
+        cached = self._transform_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        transformed = self._apply_transforms(frame, scale_q, rotation_q, alpha_q)
+        if len(self._transform_cache) >= self.MAX_TRANSFORM_CACHE:
+            self._transform_cache.clear()
+        self._transform_cache[cache_key] = transformed
+        return transformed
+
+    def _apply_transforms(self, surface: pygame.Surface, scale: float,
+                          rotation: float, alpha: int) -> pygame.Surface:
+        """应用变换效果（总是返回新表面） / Apply transformations, always returning a new surface"""
+        if not math.isclose(scale, 1.0):
             size = surface.get_size()
-            new_size = (int(size[0] * animation['scale']), 
-                       int(size[1] * animation['scale']))
+            new_size = (max(1, int(size[0] * scale)),
+                        max(1, int(size[1] * scale)))
             surface = pygame.transform.scale(surface, new_size)
-            
-        if animation['rotation'] != 0:
-            surface = pygame.transform.rotate(surface, animation['rotation'])
-            
-        return surface 
+
+        if rotation != 0:
+            surface = pygame.transform.rotate(surface, rotation)
+
+        if alpha != 255:
+            # 在副本上设置透明度，避免影响共享帧 / Fade a copy, never the shared frame
+            if surface.get_flags() & pygame.SRCALPHA:
+                surface = surface.copy()
+                surface.fill((255, 255, 255, alpha), special_flags=pygame.BLEND_RGBA_MULT)
+            else:
+                surface = surface.copy()
+                surface.set_alpha(alpha)
+
+        return surface
+
+    def _remove_slot(self, slot: int):
+        """交换删除槽位 / Swap-remove a slot in O(1)"""
+        last = len(self._slot_handles) - 1
+        handle = self._slot_handles[slot]
+        del self._handle_slots[handle]
+
+        if slot != last:
+            moved_handle = self._slot_handles[last]
+            self._slot_handles[slot] = moved_handle
+            self._handle_slots[moved_handle] = slot
+            for column in self._columns():
+                column[slot] = column[last]
+
+        self._slot_handles.pop()
+        for column in self._columns():
+            column.pop()
+
+    def _columns(self) -> tuple:
+        """所有按槽位排列的列 / All slot-indexed columns"""
+        return (
+            self._timers, self._frame_index, self._frame_counts, self._frame_durations,
+            self._loops, self._pos_x, self._pos_y, self._scales, self._rotations,
+            self._alphas, self._layers, self._clip_keys, self._callbacks
+        )
+
+    def _invalidate_clip(self, key: str):
+        """清除某个剪辑的变换缓存 / Drop cached transforms of a clip"""
+        stale = [cache_key for cache_key in self._transform_cache if cache_key[0] == key]
+        for cache_key in stale:
+            del self._transform_cache[cache_key]
 
     def cleanup_finished_animations(self):
-        """清理已完成的动画 / Clean up finished animations"""
-        self.current_animations = [
-            anim for anim in self.current_animations
-            if (anim['config']['loop'] or 
-                anim['current_frame'] < len(anim['config']['frames']))
-        ]
-    
+        """清理已完成的动画 / Clean up finished animations
+
+        一次性动画在 update 中完成时即被移除，这里只需处理外部修改的剪辑。
+        One-shot animations are removed by update as they finish; this only
+        drops instances whose clip was unloaded.
+        """
+        for slot in range(len(self._slot_handles) - 1, -1, -1):
+            if self._clip_keys[slot] not in self.animations:
+                self._remove_slot(slot)
+
     def cleanup_resources(self):
         """清理所有资源 / Clean up all resources"""
         # 清理精灵表
-        for sheet in self.sprite_sheets.values():
-            sheet = None
         self.sprite_sheets.clear()
-        
-        # 清理动画帧
-        for anim in self.animations.values():
-            for frame in anim['frames']:
-                frame = None
+
+        # 清理动画帧和变换缓存
         self.animations.clear()
-        
+        self._transform_cache.clear()
+
         # 清理当前动画
-        self.current_animations.clear()
\ No newline at end of file
+        for column in self._columns():
+            del column[:]
+        self._slot_handles.clear()
+        self._handle_slots.clear()
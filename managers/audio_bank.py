@@ -0,0 +1,221 @@
+import os
+import io
+import logging
+import threading
+import pygame
+from typing import Dict, Optional, Tuple
+from game_project.config import AudioConfig
+
+def _default_cache_dir() -> str:
+    """用户缓存目录下的音频缓存 / Audio cache under the user's cache directory"""
+    root = os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME')
+    if not root:
+        root = os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(root, 'group8_game', 'audio')
+
+
+class AudioBank:
+    """音频库 - 预加载并缓存混音器格式的音效缓冲区，后台预读音乐
+    Audio bank - decodes sound effects once into mixer-format buffers and
+    prefetches music tracks in the background.
+
+    音效只解码一次：解码后的 PCM 数据按混音器格式写入用户缓存目录（不写入资源目录），之后通过
+    ``pygame.mixer.Sound(buffer=...)`` 直接创建，不再经过解码器。
+    共享的 Sound 对象音量等于音效音量设置，界面直接调用 ``sound.play()`` 时也遵守该设置；
+    各类通道的相对音量（环境、特效）作用于通道。
+    Effects are decoded once: the raw PCM is cached per mixer format in the
+    user's cache directory (never inside the asset tree) and rebuilt with
+    ``pygame.mixer.Sound(buffer=...)`` afterwards. Shared Sound objects carry
+    the SFX volume setting, so UI code that calls ``sound.play()`` directly
+    still honours it; the relative volume of each channel class (ambient,
+    effects) is applied per channel.
+    """
+    def __init__(self, resource_manager, cache_dir: Optional[str] = None):
+        self.resource_manager = resource_manager
+        self.base_path = getattr(resource_manager, 'base_path', 'resources')
+        self.cache_dir = cache_dir or _default_cache_dir()
+        self.sfx_volume = AudioConfig.SFX_VOLUME
+
+        # 混音器格式 / Mixer format (frequency, size, channels)
+        self.mixer_format: Optional[Tuple[int, int, int]] = pygame.mixer.get_init()
+
+        # 已解码音效 / Decoded sound effects
+        self.sounds: Dict[str, pygame.mixer.Sound] = {}
+
+        # 路径解析缓存（包括未找到的结果）/ Resolved path cache, including misses
+        self._sfx_paths: Dict[str, Optional[str]] = {}
+        self._music_paths: Dict[str, Optional[str]] = {}
+
+        # 后台预读的音乐数据 / Music data prefetched in the background
+        self._music_data: Dict[str, bytes] = {}
+        self._prefetch_threads: Dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
+
+    def preload_all(self):
+        """预加载配置中的所有音效 / Preload every configured sound effect"""
+        for sound_name in AudioConfig.SOUND_EFFECTS:
+            self.get_sound(sound_name)
+
+    def get_sound(self, sound_name: str) -> Optional[pygame.mixer.Sound]:
+        """获取音效，首次使用时解码 / Get a sound effect, decoding it on first use"""
+        sound = self.sounds.get(sound_name)
+        if sound is not None:
+            return sound
+
+        # 复用资源管理器已加载的对象 / Reuse objects the resource manager already loaded
+        shared = getattr(self.resource_manager, 'sounds', {}).get(sound_name)
+        if shared is not None:
+            shared.set_volume(self.sfx_volume)
+            self.sounds[sound_name] = shared
+            return shared
+
+        sound = self._decode_sound(sound_name)
+        if sound is not None:
+            sound.set_volume(self.sfx_volume)
+            self.sounds[sound_name] = sound
+        return sound
+
+    def set_sfx_volume(self, volume: float):
+        """把音效音量设置应用到所有共享的 Sound 对象
+        Apply the SFX volume setting to every shared Sound object"""
+        self.sfx_volume = volume
+        shared = getattr(self.resource_manager, 'sounds', {})
+        for sound in list(self.sounds.values()) + list(shared.values()):
+            if sound is not None:
+                sound.set_volume(volume)
+
+    def _decode_sound(self, sound_name: str) -> Optional[pygame.mixer.Sound]:
+        """解码音效到混音器格式缓冲区 / Decode a sound effect into a mixer-format buffer"""
+        source_path = self.resolve_sfx_path(sound_name)
+        if not source_path or not self.mixer_format:
+            return None
+
+        cache_path = self._get_cache_path(sound_name)
+        try:
+            # 缓存存在且比源文件新时直接使用原始缓冲区
+            # Use the raw buffer when the cache is newer than the source
+            if (os.path.exists(cache_path) and
+                    os.path.getmtime(cache_path) >= os.path.getmtime(source_path)):
+                with open(cache_path, 'rb') as f:
+                    return pygame.mixer.Sound(buffer=f.read())
+
+            sound = pygame.mixer.Sound(source_path)
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(cache_path, 'wb') as f:
+                    f.write(sound.get_raw())
+            except OSError as e:
+                logging.warning(f"Could not write audio cache for {sound_name}: {e}")
+            return sound
+
+        except Exception as e:
+            logging.error(f"Error decoding sound {sound_name}: {e}")
+            return None
+
+    def _get_cache_path(self, sound_name: str) -> str:
+        """获取与混音器格式对应的缓存路径 / Get the cache path for the current mixer format"""
+        frequency, size, channels = self.mixer_format
+        return os.path.join(self.cache_dir, f"{sound_name}_{frequency}_{size}_{channels}.pcm")
+
+    def resolve_sfx_path(self, sound_name: str) -> Optional[str]:
+        """解析音效路径（只解析一次） / Resolve a sound effect path once"""
+        if sound_name in self._sfx_paths:
+            return self._sfx_paths[sound_name]
+
+        path = None
+        sound_file = AudioConfig.SOUND_EFFECTS.get(sound_name)
+        if sound_file:
+            for candidate in (
+                os.path.join(self.base_path, 'audio', 'sfx', sound_file),
+                os.path.join(AudioConfig.SFX_DIR, sound_file)
+            ):
+                if os.path.exists(candidate):
+                    path = candidate
+                    break
+        if not path:
+            logging.warning(f"Sound file not found: {sound_name}")
+
+        self._sfx_paths[sound_name] = path
+        return path
+
+    def resolve_music_path(self, track_name: str) -> Optional[str]:
+        """解析音乐路径（只解析一次） / Resolve a music track path once"""
+        if track_name in self._music_paths:
+            return self._music_paths[track_name]
+
+        # 资源管理器在加载时已解析过音乐路径 / The resource manager resolved these at load time
+        path = getattr(self.resource_manager, 'music', {}).get(track_name)
+        if not path:
+            music_file = AudioConfig.MUSIC_TRACKS.get(track_name)
+            if music_file:
+                for candidate in (
+                    os.path.join(self.base_path, 'audio', 'music', music_file),
+                    os.path.join(self.base_path, 'audio', music_file),
+                    os.path.join(AudioConfig.AUDIO_ROOT, music_file)
+                ):
+                    if os.path.exists(candidate):
+                        path = candidate
+                        break
+
+        self._music_paths[track_name] = path
+        return path
+
+    def prefetch_music(self, track_name: str):
+        """在后台线程预读音乐文件 / Read a music file into memory on a background thread"""
+        with self._lock:
+            if track_name in self._music_data or track_name in self._prefetch_threads:
+                return
+            path = self.resolve_music_path(track_name)
+            if not path:
+                return
+            thread = threading.Thread(
+                target=self._prefetch_worker,
+                args=(track_name, path),
+                name=f"music-prefetch-{track_name}",
+                daemon=True
+            )
+            self._prefetch_threads[track_name] = thread
+        thread.start()
+
+    def _prefetch_worker(self, track_name: str, path: str):
+        """预读工作线程 / Prefetch worker"""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            with self._lock:
+                self._music_data[track_name] = data
+        except OSError as e:
+            logging.warning(f"Could not prefetch music {track_name}: {e}")
+        finally:
+            with self._lock:
+                self._prefetch_threads.pop(track_name, None)
+
+    def open_music(self, track_name: str) -> Tuple[Optional[object], str]:
+        """获取可供 mixer.music.load 使用的音乐源 / Get a source for mixer.music.load
+
+        已预读的曲目从内存加载，否则回退到文件路径。返回 (来源, 格式提示)。
+        Prefetched tracks load from memory; others fall back to the file path.
+        Returns (source, namehint).
+        """
+        path = self.resolve_music_path(track_name)
+        if not path:
+            return None, ''
+        namehint = os.path.splitext(path)[1].lstrip('.')
+        with self._lock:
+            data = self._music_data.get(track_name)
+        if data is not None:
+            return io.BytesIO(data), namehint
+        return path, namehint
+
+    def evict_music(self, keep=()):
+        """释放不再需要的预读音乐 / Drop prefetched music that is no longer needed"""
+        with self._lock:
+            for track_name in list(self._music_data):
+                if track_name not in keep:
+                    del self._music_data[track_name]
+
+    def clear(self):
+        """清理音频库 / Clear the audio bank"""
+        self.sounds.clear()
+        with self._lock:
+            self._music_data.clear()
@@ -1,12 +1,21 @@
 import pygame
 from ..config import AudioConfig
-import os
+from .audio_bank import AudioBank
+from .voice_allocator import VoiceAllocator
 import logging
 
 class AudioManager:
     """音频管理器 - 处理所有游戏音频，包括音乐和音效"""
+    # 曲目切换的可能后继，用于后台预读 / Likely next tracks, prefetched in the background
+    MUSIC_SUCCESSORS = {
+        'start': ['battle'],
+        'battle': ['boss_battle', 'start'],
+        'boss_battle': ['start']
+    }
+
     def __init__(self, resource_manager):
-        self.resource_manager = resource_manager
+        # 兼容传入游戏实例的情况 / Accept the game instance as well
+        self.resource_manager = getattr(resource_manager, 'resource_manager', resource_manager)
         
         # 音量设置
         self.music_volume = AudioConfig.MUSIC_VOLUME
@@ -26,36 +35,39 @@ class AudioManager:
         self.current_music = None
         self.previous_music = None
         
-        # 战斗音效队列
-        self.battle_sound_queue = []
+        # 音频库：音效只解码一次，音乐后台预读
+        self.audio_bank = AudioBank(self.resource_manager)
+        self.audio_bank.preload_all()
+        
+        # 战斗音效语音分配器（替代线性扫描和音效队列）
+        self.voice_allocator = VoiceAllocator(self.battle_channels, self.audio_bank.get_sound)
         
     def play_music(self, track_name, fade_ms=1000, loops=-1):
         """播放背景音乐（带淡入效果）/ Play background music with fade effect"""
         if self.current_music != track_name:
             try:
-                music_file = AudioConfig.MUSIC_TRACKS.get(track_name)
-                if not music_file:
+                if track_name not in AudioConfig.MUSIC_TRACKS:
                     logging.warning(f"Music track '{track_name}' not found in config")
                     return
                 
-                # 首先尝试从游戏目录加载
-                full_path = os.path.join(self.resource_manager.base_path, 'audio', 'music', music_file)
-                
-                # 如果本地不存在，尝试从原始资源目录加载
-                if not os.path.exists(full_path):
-                    original_path = os.path.join(r"C:\Users\34275\.cursor-tutor\resources\audio", music_file)
-                    if os.path.exists(original_path):
-                        full_path = original_path
-                    else:
-                        logging.warning(f"Music file not found: {music_file}")
-                        return False
+                # 已预读的曲目从内存加载，路径只解析一次
+                source, namehint = self.audio_bank.open_music(track_name)
+                if source is None:
+                    logging.warning(f"Music file not found: {track_name}")
+                    return False
                         
                 pygame.mixer.music.fadeout(fade_ms)
-                pygame.mixer.music.load(full_path)
+                pygame.mixer.music.load(source, namehint)
                 pygame.mixer.music.set_volume(self.music_volume)
                 pygame.mixer.music.play(loops, fade_ms=fade_ms)
                 self.previous_music = self.current_music
                 self.current_music = track_name
+                
+                # 预读下一首可能的曲目 / Prefetch the likely next tracks
+                successors = self.MUSIC_SUCCESSORS.get(track_name, [])
+                self.audio_bank.evict_music(keep=successors)
+                for successor in successors:
+                    self.audio_bank.prefetch_music(successor)
                 return True
                 
             except Exception as e:
@@ -63,44 +75,38 @@ class AudioManager:
                 self.current_music = None
                 return False
     
-    def play_battle_sound(self, sound_name):
-        """在可用通道上播放战斗音效"""
-        for channel in self.battle_channels:
-            if not channel.get_busy():
-                if sound_name in self.resource_manager.sounds:
-                    sound = self.resource_manager.sounds[sound_name]
-                    sound.set_volume(self.sfx_volume)
-                    channel.play(sound)
-                break
+    def play_battle_sound(self, sound_name, importance=1.0, distance=0.0):
+        """请求播放战斗音效，由语音分配器在本帧按优先级分配通道
+        Request a battle sound; the voice allocator assigns channels by priority this frame"""
+        self.voice_allocator.request(sound_name, 1.0, importance, distance)
     
     def play_ui_sound(self, sound_name):
         """播放UI音效 / Play UI sound effect"""
         try:
-            sound = self.resource_manager.sounds.get(sound_name)
-            if not sound:
-                sound = self.resource_manager.load_sound(sound_name)
-                if not sound:
-                    return
-                
             if not self.ui_channel.get_busy():  # 避免重复播放
-                sound.set_volume(self.sfx_volume)
-                self.ui_channel.play(sound)
+                self._play_on_channel(self.ui_channel, sound_name, 1.0)
         except Exception as e:
             logging.error(f"Error playing UI sound {sound_name}: {e}")
     
     def play_ambient_sound(self, sound_name, loops=-1):
         """播放环境音效"""
-        if sound_name in self.resource_manager.sounds:
-            sound = self.resource_manager.sounds[sound_name]
-            sound.set_volume(self.sfx_volume * 0.5)  # 环境音效音量稍低
-            self.ambient_channel.play(sound, loops)
+        # 环境音效音量稍低
+        self._play_on_channel(self.ambient_channel, sound_name, 0.5, loops)
     
     def play_effect_sound(self, sound_name):
         """播放特效音效"""
-        if sound_name in self.resource_manager.sounds:
-            sound = self.resource_manager.sounds[sound_name]
-            sound.set_volume(self.sfx_volume * 0.7)
-            self.effect_channel.play(sound)
+        self._play_on_channel(self.effect_channel, sound_name, 0.7)
+    
+    def _play_on_channel(self, channel, sound_name, volume, loops=0):
+        """在指定通道上播放音效；共享 Sound 的音量已是音效音量设置，这里只设置通道的相对音量
+        Play a sound on a channel; the shared Sound already carries the SFX
+        setting, so only the channel's relative volume is set here"""
+        sound = self.audio_bank.get_sound(sound_name)
+        if not sound:
+            return None
+        channel.set_volume(volume)
+        channel.play(sound, loops)
+        return channel
     
     def play_random_event_music(self):
         """播放随机事件音乐"""
@@ -116,6 +122,7 @@ class AudioManager:
     def set_sfx_volume(self, volume):
         """设置音效音量 (0.0 到 1.0)"""
         self.sfx_volume = max(0.0, min(1.0, volume))
+        self.audio_bank.set_sfx_volume(self.sfx_volume)
     
     def pause_music(self):
         """暂停当前音乐"""
@@ -127,15 +134,14 @@ class AudioManager:
     
     def stop_all_sounds(self):
         """停止所有声音"""
+        self.voice_allocator.stop_all()
         pygame.mixer.stop()
         pygame.mixer.music.stop()
     
     def update(self):
         """更新音频系统"""
-        # 处理队列中的战斗音效
-        while self.battle_sound_queue and not all(channel.get_busy() for channel in self.battle_channels):
-            sound_name = self.battle_sound_queue.pop(0)
-            self.play_battle_sound(sound_name)
+        # 分配本帧请求的战斗音效
+        self.voice_allocator.flush()
     
     def cleanup(self):
         """清理音频资源"""
@@ -143,8 +149,7 @@ class AudioManager:
         pygame.mixer.stop()
         
         # 清理音效
-        if hasattr(self, 'sounds'):
-            self.sounds.clear()
+        self.audio_bank.clear()
         
         # 停止所有通道
         for i in range(pygame.mixer.get_num_channels()):
@@ -159,9 +164,11 @@ class AudioManager:
                 print(f"Warning: Sound effect '{effect_name}' not found in config")
                 return
                 
-            if effect_name in self.resource_manager.sounds:
-                sound = self.resource_manager.sounds[effect_name]
-                sound.set_volume(self.sfx_volume)
-                return sound.play()
+            sound = self.audio_bank.get_sound(effect_name)
+            if sound:
+                channel = sound.play()
+                if channel:
+                    channel.set_volume(1.0)
+                return channel
         except Exception as e:
             print(f"Error playing sound effect {effect_name}: {e}")
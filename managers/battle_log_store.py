@@ -0,0 +1,345 @@
+import os
+import json
+import mmap
+import struct
+import logging
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+from .save_engine import write_atomic
+
+class BattleLogStore:
+    """战斗日志存储 / Battle log store
+
+    战斗事件以定长头部 + JSON 负载追加到数据文件；每 BLOCK_SIZE 条记录形成一个块，
+    块的稀疏索引（战斗、回合范围、事件类型掩码、角色掩码、偏移）追加到索引文件。
+    读取时通过 mmap 只访问匹配块，并在解码负载之前用头部过滤记录。
+    Battle events are appended to a data file as a fixed header plus a JSON
+    payload. Every BLOCK_SIZE records form a block whose sparse index entry
+    (battle, turn range, event type mask, actor mask, offset) is appended to
+    an index file. Reads go through mmap, touch only the matching blocks and
+    filter records on their headers before any payload is decoded.
+
+    文件 / Files:
+        battles.log    <I length><I battle><I turn><H type><H actor><f time><JSON>
+        battles.idx    每块 <I battle><Q offset><I count><I first_turn><I last_turn><Q type_mask><Q actor_mask>
+        battles.names  事件类型和角色名称表（JSON） / event type and actor name tables (JSON)
+    """
+
+    RECORD_HEADER = struct.Struct('<IIIHHf')
+    INDEX_ENTRY = struct.Struct('<IQIIIQQ')
+    BLOCK_SIZE = 64
+
+    def __init__(self, base_path: str, name: str = "battles"):
+        self.base_path = base_path
+        os.makedirs(base_path, exist_ok=True)
+        self.data_path = os.path.join(base_path, f"{name}.log")
+        self.index_path = os.path.join(base_path, f"{name}.idx")
+        self.names_path = os.path.join(base_path, f"{name}.names")
+
+        self._lock = threading.RLock()
+        self._data_file = None
+        self._index_file = None
+
+        # 名称表 / Name tables
+        self.type_names: List[str] = []
+        self.actor_names: List[str] = []
+        self._type_ids: Dict[str, int] = {}
+        self._actor_ids: Dict[str, int] = {}
+
+        # 战斗 -> 块列表 / battle -> blocks
+        self.blocks: Dict[int, List[dict]] = {}
+        self.next_battle_id = 1
+
+        # 正在写入的块 / Block currently being written
+        self._open_block: Optional[dict] = None
+
+        self._load()
+
+    # ---- 写入 / Writing ----
+
+    def begin_battle(self) -> int:
+        """开始新的战斗，返回战斗编号 / Start a new battle and return its id"""
+        with self._lock:
+            self._close_block()
+            battle_id = self.next_battle_id
+            self.next_battle_id += 1
+            return battle_id
+
+    def append(self, battle_id: int, turn: int, event_type: str, actor: str = '',
+               time: float = 0.0, data: Optional[Dict[str, Any]] = None):
+        """追加一条战斗事件 / Append one battle event"""
+        payload = json.dumps(data or {}, ensure_ascii=False, separators=(',', ':'),
+                             default=str).encode('utf-8')
+        with self._lock:
+            type_id = self._name_id(self.type_names, self._type_ids, event_type)
+            actor_id = self._name_id(self.actor_names, self._actor_ids, actor)
+
+            data_file = self._get_data_file()
+            offset = data_file.tell()
+            data_file.write(self.RECORD_HEADER.pack(
+                len(payload), battle_id, turn, type_id, actor_id, time) + payload)
+            self._add_to_block(battle_id, offset, turn, type_id, actor_id)
+
+    def end_battle(self, battle_id: int):
+        """结束战斗：写出当前块 / End a battle and write out its open block"""
+        with self._lock:
+            if self._open_block is not None and self._open_block['battle'] == battle_id:
+                self._close_block()
+
+    def flush(self):
+        """写出所有缓冲数据 / Flush all buffered data"""
+        with self._lock:
+            self._close_block()
+            for f in (self._data_file, self._index_file):
+                if f is not None:
+                    f.flush()
+
+    def close(self):
+        """关闭文件 / Close the files"""
+        with self._lock:
+            self.flush()
+            for f in (self._data_file, self._index_file):
+                if f is not None:
+                    f.close()
+            self._data_file = None
+            self._index_file = None
+
+    # ---- 查询 / Queries ----
+
+    def battles(self) -> List[int]:
+        """所有已记录的战斗编号 / Every recorded battle id"""
+        with self._lock:
+            return sorted(self.blocks)
+
+    def query(self, battle: Optional[int] = None, event_type: Optional[str] = None,
+              actor: Optional[str] = None, turn: Optional[int] = None,
+              turns: Optional[range] = None) -> Iterator[Dict[str, Any]]:
+        """查询事件，例如 query(battle=1834, event_type='crit', actor='Ranger')
+        Query events, e.g. query(battle=1834, event_type='crit', actor='Ranger')
+
+        只解码满足所有条件的记录的负载。 / Only payloads of matching records are decoded.
+        """
+        for header, payload in self._scan(battle, event_type, actor, turn, turns):
+            _, battle_id, record_turn, type_id, actor_id, time = header
+            yield {
+                'battle': battle_id,
+                'turn': record_turn,
+                'type': self.type_names[type_id],
+                'actor': self.actor_names[actor_id],
+                'time': time,
+                'data': json.loads(payload.decode('utf-8'))
+            }
+
+    def count(self, battle: Optional[int] = None, event_type: Optional[str] = None,
+              actor: Optional[str] = None, turn: Optional[int] = None,
+              turns: Optional[range] = None) -> int:
+        """只读头部统计事件数量 / Count events from headers only"""
+        return sum(1 for _ in self._scan(battle, event_type, actor, turn, turns, decode=False))
+
+    def summarize(self, battle: int) -> Dict[str, Dict[str, int]]:
+        """按事件类型和角色统计一场战斗（只读头部），用于战后统计界面
+        Count a battle's events per type and actor from headers only, for the post-battle screen"""
+        summary: Dict[str, Dict[str, int]] = {}
+        for header, _ in self._scan(battle, None, None, None, None, decode=False):
+            type_name = self.type_names[header[3]]
+            actor_name = self.actor_names[header[4]]
+            counts = summary.setdefault(type_name, {})
+            counts[actor_name] = counts.get(actor_name, 0) + 1
+        return summary
+
+    def _scan(self, battle, event_type, actor, turn, turns, decode=True):
+        """按索引扫描匹配的记录 / Scan matching records through the index"""
+        if turn is not None:
+            turns = range(turn, turn + 1)
+
+        with self._lock:
+            if self._data_file is not None:
+                self._data_file.flush()
+            type_id = self._lookup(self._type_ids, event_type)
+            actor_id = self._lookup(self._actor_ids, actor)
+            if type_id is False or actor_id is False:
+                return
+            if battle is not None:
+                blocks = list(self.blocks.get(battle, ()))
+            else:
+                blocks = [block for battle_id in sorted(self.blocks) for block in self.blocks[battle_id]]
+            # 尚未写入索引的块也参与查询 / The open block is queried as well
+            open_block = self._open_block
+            if open_block is not None and battle in (None, open_block['battle']):
+                blocks.append(dict(open_block))
+
+        type_bit = self._mask_bit(type_id) if type_id is not None else 0
+        actor_bit = self._mask_bit(actor_id) if actor_id is not None else 0
+        blocks = [
+            block for block in blocks
+            if (not type_bit or block['type_mask'] & type_bit)
+            and (not actor_bit or block['actor_mask'] & actor_bit)
+            and (turns is None or (block['first_turn'] < turns.stop and block['last_turn'] >= turns.start))
+        ]
+        if not blocks or not os.path.getsize(self.data_path):
+            return
+
+        header_size = self.RECORD_HEADER.size
+        with open(self.data_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            for block in blocks:
+                position = block['offset']
+                for _ in range(block['count']):
+                    header = self.RECORD_HEADER.unpack_from(view, position)
+                    start = position + header_size
+                    position = start + header[0]
+                    if type_id is not None and header[3] != type_id:
+                        continue
+                    if actor_id is not None and header[4] != actor_id:
+                        continue
+                    if turns is not None and header[2] not in turns:
+                        continue
+                    yield header, (view[start:position] if decode else None)
+
+    # ---- 内部方法 / Internals ----
+
+    def _load(self):
+        """加载名称表和索引，并补建索引缺失的尾部
+        Load name tables and index, and re-index any unindexed tail"""
+        if os.path.exists(self.names_path):
+            try:
+                with open(self.names_path, 'r', encoding='utf-8') as f:
+                    names = json.load(f)
+                self.type_names = names['types']
+                self.actor_names = names['actors']
+            except (OSError, ValueError, KeyError) as e:
+                logging.error(f"Failed to read battle log names: {e}")
+        self._type_ids = {name: i for i, name in enumerate(self.type_names)}
+        self._actor_ids = {name: i for i, name in enumerate(self.actor_names)}
+
+        last_block = None
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'rb') as f:
+                index_data = f.read()
+            usable = len(index_data) - len(index_data) % self.INDEX_ENTRY.size
+            for entry in self.INDEX_ENTRY.iter_unpack(index_data[:usable]):
+                block = dict(zip(('battle', 'offset', 'count', 'first_turn', 'last_turn',
+                                  'type_mask', 'actor_mask'), entry))
+                self.blocks.setdefault(block['battle'], []).append(block)
+                if last_block is None or block['offset'] > last_block['offset']:
+                    last_block = block
+            if usable != len(index_data):
+                with open(self.index_path, 'r+b') as f:
+                    f.truncate(usable)
+
+        if self.blocks:
+            self.next_battle_id = max(self.blocks) + 1
+        self._reindex_tail(self._block_end(last_block) if last_block else 0)
+
+    def _block_end(self, block: dict) -> int:
+        """计算块在数据文件中的结束偏移 / Compute the end offset of a block in the data file"""
+        if not os.path.exists(self.data_path):
+            return 0
+        position = block['offset']
+        with open(self.data_path, 'rb') as f:
+            for _ in range(block['count']):
+                f.seek(position)
+                header = f.read(self.RECORD_HEADER.size)
+                if len(header) < self.RECORD_HEADER.size:
+                    break
+                position += self.RECORD_HEADER.size + self.RECORD_HEADER.unpack(header)[0]
+        return position
+
+    def _reindex_tail(self, start: int):
+        """为崩溃前未写入索引的记录补建块，并截断残缺记录
+        Build blocks for records written before a crash but never indexed, and cut torn records"""
+        if not os.path.exists(self.data_path):
+            return
+        size = os.path.getsize(self.data_path)
+        if start >= size:
+            return
+
+        header_size = self.RECORD_HEADER.size
+        position = start
+        with open(self.data_path, 'rb') as f:
+            f.seek(start)
+            tail = f.read()
+        offset = 0
+        while offset + header_size <= len(tail):
+            header = self.RECORD_HEADER.unpack_from(tail, offset)
+            length, battle_id, turn, type_id, actor_id, time = header
+            if offset + header_size + length > len(tail) \
+                    or type_id >= len(self.type_names) or actor_id >= len(self.actor_names):
+                break
+            self._add_to_block(battle_id, position, turn, type_id, actor_id)
+            offset += header_size + length
+            position += header_size + length
+            self.next_battle_id = max(self.next_battle_id, battle_id + 1)
+        self._close_block()
+
+        if position < size:
+            logging.warning(f"Discarding {size - position} bytes of incomplete battle log")
+            if self._data_file is not None:
+                self._data_file.close()
+                self._data_file = None
+            with open(self.data_path, 'r+b') as f:
+                f.truncate(position)
+
+    def _add_to_block(self, battle_id: int, offset: int, turn: int, type_id: int, actor_id: int):
+        """把记录计入当前块，块满时写入索引 / Add a record to the open block; full blocks are indexed"""
+        block = self._open_block
+        if block is None or block['battle'] != battle_id:
+            self._close_block()
+            block = self._open_block = {
+                'battle': battle_id, 'offset': offset, 'count': 0,
+                'first_turn': turn, 'last_turn': turn, 'type_mask': 0, 'actor_mask': 0
+            }
+        block['count'] += 1
+        block['first_turn'] = min(block['first_turn'], turn)
+        block['last_turn'] = max(block['last_turn'], turn)
+        block['type_mask'] |= self._mask_bit(type_id)
+        block['actor_mask'] |= self._mask_bit(actor_id)
+        if block['count'] >= self.BLOCK_SIZE:
+            self._close_block()
+
+    def _close_block(self):
+        """把当前块写入索引 / Write the open block to the index"""
+        block = self._open_block
+        if block is None:
+            return
+        self._open_block = None
+        if self._data_file is not None:
+            self._data_file.flush()
+        if self._index_file is None:
+            self._index_file = open(self.index_path, 'ab')
+        self._index_file.write(self.INDEX_ENTRY.pack(
+            block['battle'], block['offset'], block['count'], block['first_turn'],
+            block['last_turn'], block['type_mask'], block['actor_mask']))
+        self._index_file.flush()
+        self.blocks.setdefault(block['battle'], []).append(block)
+
+    def _get_data_file(self):
+        """获取追加模式的数据文件 / Get the data file in append mode"""
+        if self._data_file is None:
+            self._data_file = open(self.data_path, 'ab')
+        return self._data_file
+
+    def _name_id(self, names: List[str], ids: Dict[str, int], name: str) -> int:
+        """获取名称编号，新名称写入名称表 / Get a name's id; new names are saved to the name table"""
+        name_id = ids.get(name)
+        if name_id is None:
+            name_id = ids[name] = len(names)
+            names.append(name)
+            data = json.dumps({'types': self.type_names, 'actors': self.actor_names},
+                              ensure_ascii=False).encode('utf-8')
+            write_atomic(self.names_path, data)
+        return name_id
+
+    @staticmethod
+    def _lookup(ids: Dict[str, int], name: Optional[str]):
+        """查询条件的名称编号：None 不过滤，False 表示不存在
+        Name id for a query filter: None means no filter, False means unknown"""
+        if name is None:
+            return None
+        return ids.get(name, False)
+
+    @staticmethod
+    def _mask_bit(name_id: int) -> int:
+        """名称编号对应的掩码位（超过 63 的编号共用最高位）
+        Mask bit of a name id; ids above 63 share the top bit"""
+        return 1 << min(name_id, 63)
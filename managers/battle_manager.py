@@ -1,6 +1,8 @@
-import random
 import time
 from typing import List, Dict, Optional, Tuple
+from .state_snapshot import StateSnapshotEngine
+from .ai_planner import AIPlanner
+from .ai_blackboard import AIBlackboard
 
 class BattleManager:
     """战斗管理器 / Battle Manager"""
@@ -15,9 +17,11 @@ class BattleManager:
         self.selected_target = None
         self.selected_skill = None
         
-        # 缓存和回溯系统
-        self.battle_history = []
+        # 缓存和回溯系统：每回合开始时的快照，用于撤销
+        # History: a snapshot at the start of every turn, used for undo
         self.max_history = 3
+        self.battle_history = StateSnapshotEngine(capacity=self.max_history)
+        self._snapshot_character = None
         
         # 难度配置
         self.difficulty_config = {
@@ -47,6 +51,22 @@ class BattleManager:
             }
         }
         
+        # 'optimal' 目标选择由后台线程的搜索规划器决定，每回合预算约5毫秒
+        # 'optimal' targeting comes from the search planner on a worker thread, ~5ms per turn
+        self.planner = None
+        self._planned_target = None
+        if self.difficulty_config[difficulty]['ai_target_selection'] == 'optimal':
+            self.planner = AIPlanner(time_budget=0.005)
+            
+        # AI黑板：维护目标排序，决策时不再给所有角色重新打分
+        # AI blackboard: maintained target orderings, so decisions don't rescore every character
+        self.blackboard = AIBlackboard({
+            'hp_ratio': lambda c: c.hp / c.max_hp if c.is_alive() else None,
+            'threat': lambda c: -c.get_threat_level() if c.is_alive() else None,
+            'back_line': lambda c: c.hp / c.max_hp if c.is_alive() and c.position == 'back' else None,
+            'strategic': lambda c: -self._calculate_target_score(c) if c.is_alive() else None
+        })
+        
     def update(self, dt):
         """更新战斗系统 / Update battle system"""
         battle_state = self.battle_system.get_battle_state()
@@ -68,6 +88,14 @@ class BattleManager:
             self._update_turn_order()
             return
             
+        # 新回合开始时保存快照 / Snapshot when a new turn starts
+        if self.active_character is not self._snapshot_character:
+            # 上一个行动者的增益和仇恨可能已变化 / The previous actor's buffs and threat may have changed
+            if self._snapshot_character is not None:
+                self.blackboard.invalidate(self._snapshot_character)
+            self._snapshot_character = self.active_character
+            self.battle_history.capture(self.battle_system, force=True)
+            
         # 检查回合时间限制
         current_time = time.time()
         battle_state = self.battle_system.get_battle_state()
@@ -79,10 +107,27 @@ class BattleManager:
         if self.active_character.is_ai:
             self._handle_ai_turn()
             
+    def undo_turn(self, turns: int = 1) -> bool:
+        """撤销到之前回合开始时的状态 / Undo back to the start of an earlier turn"""
+        if not self.battle_history.restore(self.battle_system, steps=turns):
+            return False
+        self.active_character = None
+        self._snapshot_character = None
+        self.selected_action = None
+        self.selected_target = None
+        self.selected_skill = None
+        self.blackboard.reset()
+        return True
+        
     def _handle_ai_turn(self):
         """处理AI回合 / Handle AI turn"""
         config = self.difficulty_config[self.difficulty]
+        self._sync_blackboard()
         
+        # 等待规划线程给出目标（通常在下一帧）/ Wait for the planner's target, usually next frame
+        if self.planner and not self._poll_planner():
+            return False
+            
         # Boss特殊AI处理
         if self.active_character.is_boss:
             return self._handle_boss_ai()
@@ -97,9 +142,48 @@ class BattleManager:
         strategy_func = strategy_map.get(self.active_character.class_type, self._get_default_strategy)
         strategy = strategy_func()
         
+        # 普通攻击目标交给规划器 / The planner picks the basic attack target
+        if config['ai_target_selection'] == 'optimal':
+            strategy['target_type'] = 'optimal'
+            
         # 执行策略
         return self._execute_strategy(strategy)
         
+    def _poll_planner(self):
+        """轮询当前角色的规划结果 / Poll the plan for the active character"""
+        plan = self.planner.poll(self.active_character)
+        if plan is not None:
+            self._planned_target = plan['target']
+            return True
+        if self.planner.is_pending(self.active_character):
+            return False
+        self._planned_target = None
+        # 无法规划时直接使用策略目标 / Fall back to the strategic target when there is nothing to plan
+        return not self.planner.request(self.battle_system, self.active_character)
+        
+    def _sync_blackboard(self):
+        """同步黑板的队伍和事件订阅 / Sync the blackboard's teams and event subscriptions"""
+        self.blackboard.bind(getattr(self.battle_system, 'event_system', None))
+        # 从AI视角：己方是敌人队伍 / From the AI's side, allies are the enemy team
+        self.blackboard.sync('ally', self.battle_system.enemy_team)
+        self.blackboard.sync('enemy', self.battle_system.player_team)
+        
+    def _find_weakest_ally(self):
+        """生命比例最低的己方角色 / Ally with the lowest HP ratio"""
+        return self.blackboard.best('ally', 'hp_ratio')
+        
+    def _find_weakest_enemy(self):
+        """生命比例最低的敌人 / Enemy with the lowest HP ratio"""
+        return self.blackboard.best('enemy', 'hp_ratio')
+        
+    def _find_strongest_enemy(self):
+        """威胁最高的敌人 / Enemy with the highest threat"""
+        return self.blackboard.best('enemy', 'threat')
+        
+    def _find_back_line_target(self):
+        """后排最虚弱的敌人，没有后排时取最弱敌人 / Weakest back-line enemy, else the weakest enemy"""
+        return self.blackboard.best('enemy', 'back_line') or self._find_weakest_enemy()
+        
     def _get_tanker_strategy(self):
         """获取坦克策略 / Get tanker strategy"""
         config = self.difficulty_config[self.difficulty]
@@ -111,11 +195,11 @@ class BattleManager:
         # 寻找需要保护的队友
         weak_ally = self._find_weakest_ally()
         if weak_ally and weak_ally.hp / weak_ally.max_hp < 0.3:
-            if random.random() < config['ai_skill_usage']:
+            if self.battle_system.rng.random() < config['ai_skill_usage']:
                 strategy['priority'].append(('protect_skill', weak_ally))
                 
         # 嘲讽敌方最强者
-        if random.random() < config['ai_aggression']:
+        if self.battle_system.rng.random() < config['ai_aggression']:
             strongest_enemy = self._find_strongest_enemy()
             strategy['priority'].append(('taunt_skill', strongest_enemy))
             
@@ -130,7 +214,7 @@ class BattleManager:
         }
         
         # 优先使用增伤技能
-        if random.random() < config['ai_skill_usage']:
+        if self.battle_system.rng.random() < config['ai_skill_usage']:
             strategy['priority'].append(('buff_skill', self.active_character))
             
         # 选择最弱目标进行攻击
@@ -193,31 +277,30 @@ class BattleManager:
     def _select_target(self, target_type):
         """选择目标 / Select target"""
         if target_type == 'random':
-            return random.choice(self.battle_system.player_team)
+            return self.battle_system.rng.choice(self.battle_system.player_team)
             
         target_strategies = {
             'protect': self._find_weakest_ally,
             'aggressive': self._find_weakest_enemy,
             'ranged': self._find_back_line_target,
-            'strategic': self._find_strategic_target
+            'strategic': self._find_strategic_target,
+            'optimal': self._find_optimal_target
         }
         
         strategy_func = target_strategies.get(target_type, self._find_default_target)
         return strategy_func()
         
+    def _find_optimal_target(self):
+        """使用规划器搜索出的目标 / Use the target found by the planner"""
+        target = self._planned_target
+        self._planned_target = None
+        if target is not None and target.is_alive() and target in self.battle_system.player_team:
+            return target
+        return self._find_strategic_target()
+        
     def _find_strategic_target(self):
         """寻找策略目标 / Find strategic target"""
-        targets = []
-        for target in self.battle_system.player_team:
-            if target.is_alive():
-                score = self._calculate_target_score(target)
-                targets.append((score, target))
-                
-        if not targets:
-            return None
-            
-        targets.sort(reverse=True)
-        return targets[0][1]
+        return self.blackboard.best('enemy', 'strategic')
         
     def _calculate_target_score(self, target):
         """计算目标分数 / Calculate target score"""
@@ -1,11 +1,9 @@
 import pygame
-import time
 import math
 from typing import Dict, List, Tuple, Optional
 from ..core.game_state import GameState
 from ..core.characters import BaseCharacter
-from ..managers import EffectManager
-from ..managers import audio_manager
+from .qte_timing import NS_PER_SECOND
 
 class ComboManager:
     def __init__(self):
@@ -13,6 +11,7 @@ class ComboManager:
         self.input_buffer = []
         self.last_input_time = 0
         self.buffer_timeout = 0.8
+        self._patterns_registered = False
         
         # 协同技能配置 / Combo skills configuration
         self.combo_skills = {
@@ -76,31 +75,57 @@ class ComboManager:
 
     def update(self, dt, input_manager, effect_manager, audio_manager, team, enemies):
         """更新协同技能系统 / Update combo system"""
-        if not self.active_combo:
-            return
+        if not self._patterns_registered:
+            self.register_patterns(input_manager.patterns)
             
-        current_time = time.time()
-        if current_time - self.active_combo['start_time'] > self.active_combo['config']['window']:
-            self._handle_combo_fail(effect_manager, audio_manager, team)
+        if not self.active_combo:
             return
             
+        # 窗口锚定在提示呈现的帧上，按输入事件时间戳评分
+        # The window anchors to the presented frame; presses are graded by event timestamp
+        timing = input_manager.timing
+        if 'anchor' not in self.active_combo:
+            self.active_combo['anchor'] = timing.open_window()
+            self.active_combo['opened_ns'] = self.active_combo['anchor']['time_ns']
+        anchor = self.active_combo['anchor']
+        
         # 根据combo类型处理输入
         combo_type = self.active_combo['config'].get('type', 'sequence')
         if combo_type in self.combo_types:
-            if self.combo_types[combo_type](input_manager, current_time):
-                completion_time = current_time - self.active_combo['start_time']
-                window_time = self.active_combo['config']['window']
-                rating = self._calculate_rating(completion_time, window_time)
+            completed_ns = self.combo_types[combo_type](input_manager, timing, effect_manager, audio_manager)
+            if completed_ns is not None:
+                rating, _ = timing.grade(
+                    anchor,
+                    completed_ns,
+                    self.active_combo['config']['window'],
+                    self.rating_thresholds,
+                    late_rating='normal'
+                )
                 self._trigger_combo_skill(effect_manager, audio_manager, team, enemies, rating)
+                return
+                
+        if not self.active_combo:
+            return
+        # 长按开始后由松开或完成结束，不受窗口限制 / Once a hold has started, release or completion ends it
+        config = self.active_combo['config']
+        hold_start = input_manager.get_key_hold_start(config['key']) if combo_type == 'hold' else None
+        holding = hold_start is not None and hold_start >= self.active_combo['opened_ns']
+        if not holding and timing.is_expired(anchor, config['window']):
+            self._handle_combo_fail(effect_manager, audio_manager, team)
 
-    def _calculate_rating(self, completion_time: float, window_time: float) -> str:
-        """计算技能评分 / Calculate skill rating"""
-        time_ratio = completion_time / window_time
-        if time_ratio < self.rating_thresholds['perfect']:
-            return 'perfect'
-        elif time_ratio < self.rating_thresholds['good']:
-            return 'good'
-        return 'normal'
+    def register_patterns(self, patterns):
+        """把协同技能按键定义编译进共享的模式自动机
+        Compile combo key definitions into the shared pattern automaton"""
+        for config in self.combo_skills.values():
+            pattern_id = f"combo:{config['name']}"
+            combo_type = config.get('type', 'sequence')
+            if combo_type == 'sequence':
+                patterns.register(pattern_id, config['keys'], window=config['window'])
+            elif combo_type == 'press':
+                patterns.register(pattern_id, config['keys'][:1], window=config['window'])
+            elif combo_type == 'hold':
+                patterns.register(pattern_id, [config['key']], hold=config.get('duration', 1.0))
+        self._patterns_registered = True
 
     def _create_key_feedback(self, effect_manager, team):
         """创建按键反馈特效 / Create key feedback effects"""
@@ -258,54 +283,65 @@ class ComboManager:
             if character.combo_cooldown > 0:
                 return False
         
-        # 设置激活的连击
+        # 设置激活的连击（计时锚点在首次更新时创建）
         self.active_combo = {
             'config': self.combo_skills[combo_type],
-            'start_time': time.time(),
             'team': team
         }
         
         return True
 
-    def _handle_sequence_combo(self, input_manager, current_time):
-        """处理序列型连击 / Handle sequence combo"""
-        if input_manager.is_key_just_pressed(self.active_combo['config']['keys'][len(self.input_buffer)]):
-            self.input_buffer.append(self.active_combo['config']['keys'][len(self.input_buffer)])
-            self.last_input_time = current_time
-            return len(self.input_buffer) == len(self.active_combo['config']['keys'])
-        return False
+    def _handle_sequence_combo(self, input_manager, timing, effect_manager, audio_manager):
+        """处理序列型连击，完成时返回最后一次按键的时间戳
+        Handle sequence combo; returns the last press timestamp on completion"""
+        return self._get_combo_match(input_manager)
 
-    def _handle_press_combo(self, input_manager, current_time):
+    def _handle_press_combo(self, input_manager, timing, effect_manager, audio_manager):
         """处理按压型连击 / Handle press combo"""
-        if input_manager.is_key_just_pressed(self.active_combo['config']['keys'][0]):
-            timing = current_time - self.active_combo['start_time']
-            window = self.active_combo['config']['window']
-            return True
-        return False
+        return self._get_combo_match(input_manager)
 
-    def _handle_hold_combo(self, input_manager, current_time):
-        """处理长按型连击 / Handle hold combo"""
+    def _get_combo_match(self, input_manager):
+        """获取激活连击开始后完成的匹配时间戳 / Completion timestamp of the active combo, if matched"""
+        pattern_id = f"combo:{self.active_combo['config']['name']}"
+        match = input_manager.patterns.get_match(pattern_id, self.active_combo['opened_ns'])
+        if match is None:
+            return None
+        self.last_input_time = match[1]
+        return match[1]
+
+    def _handle_hold_combo(self, input_manager, timing, effect_manager, audio_manager):
+        """处理长按型连击，由共享自动机的长按模式判定完成
+        Handle hold combo; completion comes from the shared automaton's hold pattern"""
+        pattern_id = f"combo:{self.active_combo['config']['name']}"
+        match = input_manager.patterns.get_match(pattern_id, self.active_combo['opened_ns'])
+        if match is not None:
+            # 按住开始的时刻决定评分 / The moment the hold began decides the rating
+            return match[0]
+            
         key = self.active_combo['config']['key']
-        if not input_manager.is_key_held(key):
-            self._handle_combo_fail(EffectManager, audio_manager, self.active_combo['team'])
-            return False
+        hold_start = input_manager.get_key_hold_start(key)
+        if hold_start is None or hold_start < self.active_combo['opened_ns']:
+            # 按下后提前松开判定失败 / Releasing before the hold completes is a failure
+            if input_manager.is_key_just_released(key):
+                self._handle_combo_fail(effect_manager, audio_manager, self.active_combo['team'])
+            return None
             
-        hold_time = current_time - self.active_combo['start_time']
+        hold_time = (timing.now_ns() - hold_start) / NS_PER_SECOND
         required_duration = self.active_combo['config'].get('duration', 1.0)
         
         # 创建持续按压反馈 / Create continuous press feedback
         if hold_time % 0.2 < 0.1:  # 每0.2秒创建一次反馈 / Create feedback every 0.2 seconds
             for character in self.active_combo['team']:
                 # 创建基础特效 / Create base effect
-                self._create_key_feedback(
-                    EffectManager, 
-                    [character],
+                effect_manager.create_hit_effect(
+                    character.position.x,
+                    character.position.y,
                     'magical',
                     0.3 + (hold_time / required_duration) * 0.7
                 )
                 
                 # 创建能量场效果 / Create energy field effect
-                EffectManager.create_effect({
+                effect_manager.create_effect({
                     'type': 'energy_field',
                     'position': (character.position.x, character.position.y),
                     'params': {
@@ -316,11 +352,7 @@ class ComboManager:
                     }
                 })
         
-        # 检查是否达到所需时长 / Check if required duration is reached
-        if hold_time >= required_duration:
-            return True
-            
-        return False
+        return None
 
     def _get_intensity_multiplier(self, rating: str) -> float:
         """获取特效强度倍率 / Get effect intensity multiplier"""
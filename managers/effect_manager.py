@@ -15,6 +15,7 @@ from ..animation.particle_system import (
     BurstParticle
 )
 from ..config import Colors
+from .graphics_quality import graphics_quality
 
 class EffectManager:
     """特效管理器 - 处理所有游戏特效 / Effect manager - handles all game effects"""
@@ -92,8 +93,8 @@ class EffectManager:
         """创建打击特效 / Create hit effect"""
         color = self.effect_colors.get(effect_type, Colors.WHITE)
         
-        # 基础粒子 / Basic particles
-        num_particles = int(10 * intensity)
+        # 基础粒子（按画质档位和上限裁剪）/ Basic particles, trimmed by the quality tier and cap
+        num_particles = graphics_quality.particle_budget('effects', int(10 * intensity), len(self.particles))
         for _ in range(num_particles):
             particle = PixelParticle(
                 x, y, color, 
@@ -107,12 +108,13 @@ class EffectManager:
             self.particles.append(particle)
         
         # 发光效果 / Glow effect
-        glow = GlowParticle(
-            x, y, color,
-            radius=20 * intensity,
-            lifetime=0.5
-        )
-        self.particles.append(glow)
+        if graphics_quality.glow and graphics_quality.particle_budget('effects', 1, len(self.particles)):
+            glow = GlowParticle(
+                x, y, color,
+                radius=20 * intensity,
+                lifetime=0.5
+            )
+            self.particles.append(glow)
         
         # 特殊效果 / Special effects
         if effect_type == 'magical':
@@ -128,7 +130,7 @@ class EffectManager:
     def _add_magical_effects(self, x: float, y: float, color: Tuple[int, int, int], 
                            intensity: float):
         """添加魔法特效 / Add magical effects"""
-        for _ in range(5):
+        for _ in range(graphics_quality.particle_budget('effects', 5, len(self.particles))):
             trail = TrailParticle(
                 x, y, color,
                 trail_length=int(10 * intensity),
@@ -143,7 +145,7 @@ class EffectManager:
     def _add_critical_effects(self, x: float, y: float, color: Tuple[int, int, int], 
                             intensity: float):
         """添加暴击特效 / Add critical effects"""
-        for _ in range(8):
+        for _ in range(graphics_quality.particle_budget('effects', 8, len(self.particles))):
             spark = SparkParticle(
                 x, y, color,
                 length=15 * intensity,
@@ -151,12 +153,13 @@ class EffectManager:
             )
             self.particles.append(spark)
             
-        burst = BurstParticle(
-            x, y, color,
-            size=30 * intensity,
-            lifetime=0.4
-        )
-        self.particles.append(burst)
+        if graphics_quality.glow and graphics_quality.particle_budget('effects', 1, len(self.particles)):
+            burst = BurstParticle(
+                x, y, color,
+                size=30 * intensity,
+                lifetime=0.4
+            )
+            self.particles.append(burst)
 
     def create_skill_effect(self, x: float, y: float, skill_type: str, power: float):
         """创建技能特效 / Create skill effect"""
@@ -181,7 +184,7 @@ class EffectManager:
         """创建治疗特效 / Create heal effect"""
         color = self.effect_colors['heal']
         
-        for _ in range(int(10 * intensity)):
+        for _ in range(graphics_quality.particle_budget('effects', int(10 * intensity), len(self.particles))):
             particle = PixelParticle(
                 x + random.uniform(-20, 20),
                 y + random.uniform(-10, 10),
@@ -194,6 +197,20 @@ class EffectManager:
                 random.uniform(-80, -40)
             )
             self.particles.append(particle)
+    def create_particle(self, x: float, y: float, color: Tuple[int, int, int], scale: float = 1.0):
+        """创建单个像素粒子（调用方负责画质预算）/ Create one pixel particle; the caller applies the quality budget"""
+        particle = PixelParticle(
+            x, y, color,
+            size=max(1, round(2 * scale)),
+            lifetime=random.uniform(0.4, 0.8)
+        )
+        particle.velocity = pygame.Vector2(
+            random.uniform(-80, 80) * scale,
+            random.uniform(-80, 80) * scale
+        )
+        self.particles.append(particle)
+        return particle
+        
     def create_particle_effect(self, effect_type: str, position, **kwargs):
         try:
             return self.particle_system.create_emitter(effect_type, position, **kwargs)
@@ -1,25 +1,41 @@
 import os
 import json
+import time
 import pickle
 import logging
+from array import array
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from ..config import Paths, DEFAULT_LANGUAGE
+from .save_engine import SaveEngine, write_atomic
+from .persistence_worker import PersistenceWorker, snapshot
+from .battle_log_store import BattleLogStore
+from .stats_warehouse import StatsWarehouse
 
 class SaveSystem:
+    """存档系统 - 所有存档都通过 SaveEngine 写入 / Save system - every save goes through SaveEngine"""
     def __init__(self, base_path: str = "saves"):
         self.base_path = base_path
         self.current_save = None
         os.makedirs(base_path, exist_ok=True)
+        # 与同一目录的其他存档入口共享引擎 / Share the engine with every other save path for this directory
+        self.engine = SaveEngine.for_directory(base_path)
         
-    def save_game(self, data: Dict[str, Any], slot: int) -> bool:
-        """保存游戏数据到指定槽位 / Save game data to specified slot"""
+    def save_game(self, data: Dict[str, Any], slot: int, dirty: Optional[set] = None,
+                  metadata: Optional[Dict[str, Any]] = None, thumbnail: Optional[bytes] = None) -> bool:
+        """保存游戏数据到指定槽位 / Save game data to specified slot
+
+        dirty: 自上次保存以来变化的段，None 表示全部 / sections changed since the last save, None for all
+        metadata: 写入槽位索引的元数据 / metadata stored in the slot index
+        thumbnail: 缩略图原始数据 / raw thumbnail bytes
+        """
         try:
-            save_path = os.path.join(self.base_path, f"save_{slot}.json")
             data['save_time'] = datetime.now().isoformat()
-            
-            with open(save_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
+            if dirty is not None:
+                dirty = set(dirty) | {'save_time'}
+                
+            if not self.engine.save(slot, data, dirty, metadata, thumbnail):
+                return False
                 
             self.current_save = slot
             logging.info(f"Game saved to slot {slot}")
@@ -32,14 +48,13 @@ class SaveSystem:
     def load_game(self, slot: int) -> Optional[Dict[str, Any]]:
         """从指定槽位加载游戏数据 / Load game data from specified slot"""
         try:
-            save_path = os.path.join(self.base_path, f"save_{slot}.json")
-            if not os.path.exists(save_path):
+            data = self.engine.load(slot)
+            if data is None:
+                data = self._load_legacy_json(slot)
+            if data is None:
                 logging.warning(f"Save file not found in slot {slot}")
                 return None
                 
-            with open(save_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
             self.current_save = slot
             logging.info(f"Game loaded from slot {slot}")
             return data
@@ -48,45 +63,72 @@ class SaveSystem:
             logging.error(f"Failed to load game: {str(e)}")
             return None
             
+    def _load_legacy_json(self, slot: int) -> Optional[Dict[str, Any]]:
+        """读取旧版 JSON 存档 / Read a legacy JSON save"""
+        save_path = os.path.join(self.base_path, f"save_{slot}.json")
+        if not os.path.exists(save_path):
+            return None
+        with open(save_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+            
     def get_save_info(self, slot: int) -> Optional[Dict[str, Any]]:
-        """获取存档信息 / Get save file information"""
+        """获取存档信息（来自槽位索引）/ Get save file information from the slot index"""
         try:
-            save_path = os.path.join(self.base_path, f"save_{slot}.json")
-            if not os.path.exists(save_path):
+            data = self.engine.get_metadata(slot)
+            if data is None:
+                data = self._load_legacy_json(slot)
+            if data is None:
                 return None
-                
-            with open(save_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-            return {
-                'slot': slot,
-                'save_time': data.get('save_time'),
-                'player_level': data.get('player_level'),
-                'play_time': data.get('play_time'),
-                'location': data.get('location')
-            }
+            return self._make_save_info(slot, data)
             
         except Exception:
             return None
             
+    def _make_save_info(self, slot: int, data: Dict[str, Any]) -> Dict[str, Any]:
+        """构建存档信息 / Build save information"""
+        return {
+            'slot': slot,
+            'save_time': data.get('save_time'),
+            'player_level': data.get('player_level'),
+            'play_time': data.get('play_time'),
+            'location': data.get('location')
+        }
+            
     def list_saves(self) -> Dict[int, Dict[str, Any]]:
-        """列出所有存档 / List all save files"""
+        """列出所有存档（只读取槽位索引）/ List all save files by reading only the slot index"""
         saves = {}
-        for i in range(10):  # 假设有10个存档槽位
-            info = self.get_save_info(i)
-            if info:
-                saves[i] = info
+        for slot, entry in self.engine.list_slots().items():
+            if slot.isdigit():
+                saves[int(slot)] = self._make_save_info(int(slot), entry['meta'])
+                
+        # 尚未迁移的旧版 JSON 存档 / Legacy JSON saves not migrated yet
+        for file in os.listdir(self.base_path):
+            slot = file[len("save_"):-len(".json")]
+            if file.startswith("save_") and file.endswith(".json") and slot.isdigit() and int(slot) not in saves:
+                info = self.get_save_info(int(slot))
+                if info:
+                    saves[int(slot)] = info
         return saves
         
+    def load_latest_save(self) -> Optional[Dict[str, Any]]:
+        """加载最近保存的存档 / Load the most recently saved slot"""
+        saves = self.list_saves()
+        if not saves:
+            return None
+        latest = max(saves.values(), key=lambda info: info.get('save_time') or '')
+        return self.load_game(latest['slot'])
+        
     def delete_save(self, slot: int) -> bool:
         """删除指定槽位的存档 / Delete save file in specified slot"""
         try:
+            deleted = self.engine.delete(slot)
             save_path = os.path.join(self.base_path, f"save_{slot}.json")
             if os.path.exists(save_path):
                 os.remove(save_path)
+                deleted = True
+            if deleted:
                 logging.info(f"Deleted save in slot {slot}")
-                return True
-            return False
+            return deleted
             
         except Exception as e:
             logging.error(f"Failed to delete save: {str(e)}")
@@ -104,17 +146,20 @@ class AchievementSystem:
             'first_blood': {
                 'name': '初次血战',
                 'description': '赢得第一场战斗',
-                'reward': {'gold': 100}
+                'reward': {'gold': 100},
+                'requirement': ('victory', 'count', 1)
             },
             'combo_master': {
                 'name': '连击大师',
                 'description': '达成10连击',
-                'reward': {'gold': 200}
+                'reward': {'gold': 200},
+                'requirement': ('combo', 'max', 10)
             },
             'perfect_qte': {
                 'name': 'QTE完美者',
                 'description': '连续完成3次完美QTE',
-                'reward': {'gold': 150}
+                'reward': {'gold': 150},
+                'requirement': ('perfect_qte_streak', 'max', 3)
             }
         }
         
@@ -130,6 +175,18 @@ class AchievementSystem:
         logging.info(f"Achievement unlocked: {achievement_id}")
         return True
         
+    def check_achievements(self, stats) -> list:
+        """按统计汇总检查成就（O(1)，不扫描历史），返回新解锁的成就
+        Check achievements against statistics rollups in O(1); returns newly unlocked ones"""
+        unlocked = []
+        for achievement_id, achievement in self.achievements.items():
+            if achievement_id in self.unlocked_achievements or 'requirement' not in achievement:
+                continue
+            event, field, threshold = achievement['requirement']
+            if stats.get_total(event, field) >= threshold and self.unlock_achievement(achievement_id):
+                unlocked.append(achievement_id)
+        return unlocked
+        
     def get_achievement_progress(self, achievement_id: str) -> Dict[str, Any]:
         """获取成就进度 / Get achievement progress"""
         if achievement_id not in self.achievements:
@@ -144,31 +201,158 @@ class AchievementSystem:
         }
 
 class EventSystem:
-    def __init__(self):
+    """事件总线 / Event bus
+
+    事件类型映射为整数编号，订阅在注册时解析为每个编号的处理器元组，触发时只做一次列表索引。
+    历史记录是预分配的环形缓冲区（不再无限增长，也不再为每个事件生成时间字符串）。
+    批量处理器在帧末一次性收到本帧该类型的全部事件，适合命中、暴击、闪避、士气变化等高频战斗事件。
+    Event types map to integer ids and subscriptions are resolved at
+    registration time into a handler tuple per id, so triggering is a single
+    list index. History is a preallocated ring buffer (no unbounded growth and
+    no timestamp string per event). Batch handlers receive all of a frame's
+    events of their type at once at the end of the frame, which suits
+    high-frequency combat events such as hit, crit, dodge and morale change.
+    """
+    HISTORY_SIZE = 1024
+    
+    def __init__(self, history_size: int = HISTORY_SIZE):
         self.active_events = []
-        self.event_history = []
-        self.event_handlers = {}
-        
-    def register_handler(self, event_type: str, handler):
-        """注册事件处理器 / Register event handler"""
-        if event_type not in self.event_handlers:
-            self.event_handlers[event_type] = []
-        self.event_handlers[event_type].append(handler)
-        
-    def trigger_event(self, event_type: str, event_data: Dict[str, Any]):
-        """触发事件 / Trigger event"""
-        if event_type in self.event_handlers:
-            for handler in self.event_handlers[event_type]:
-                handler(event_data)
-        
-        self.event_history.append({
-            'type': event_type,
-            'data': event_data,
-            'timestamp': datetime.now().isoformat()
-        })
+        
+        # 事件类型 <-> 编号 / Event type <-> id
+        self.event_ids: Dict[str, int] = {}
+        self.event_names: List[str] = []
+        
+        # 按编号索引的处理器元组 / Handler tuples indexed by id
+        self._handlers: List[tuple] = []
+        self._batch_handlers: List[tuple] = []
+        
+        # 本帧待批量派发的事件：编号 -> 事件数据列表 / Events waiting for batch dispatch: id -> data list
+        self._batches: List[list] = []
+        self._pending_ids: List[int] = []
+        
+        # 环形历史缓冲 / Ring buffer history
+        self.history_size = history_size
+        self._history_types = array('i', [-1]) * history_size
+        self._history_times = array('d', [0.0]) * history_size
+        self._history_data: List[Any] = [None] * history_size
+        self._history_next = 0
+        self._history_count = 0
+        
+    def get_event_id(self, event_type: str) -> int:
+        """获取（必要时分配）事件类型编号 / Get, allocating if needed, an event type id"""
+        event_id = self.event_ids.get(event_type)
+        if event_id is None:
+            event_id = self.event_ids[event_type] = len(self.event_names)
+            self.event_names.append(event_type)
+            self._handlers.append(())
+            self._batch_handlers.append(())
+            self._batches.append([])
+        return event_id
+        
+    def _resolve_id(self, event_type) -> int:
+        """名称分配编号；编号必须是 get_event_id 返回过的
+        Allocate an id for a name; an int must be an id returned by get_event_id"""
+        if not isinstance(event_type, int):
+            return self.get_event_id(event_type)
+        if not 0 <= event_type < len(self.event_names):
+            raise ValueError(f"unknown event id {event_type}")
+        return event_type
+        
+    def register_handler(self, event_type, handler, batch: bool = False) -> int:
+        """注册事件处理器，返回事件编号 / Register an event handler; returns the event id
+        
+        batch=True 时处理器在帧末收到本帧该类型事件数据的列表。
+        With batch=True the handler receives, at the end of the frame, the
+        list of this frame's event data for the type.
+        """
+        event_id = self._resolve_id(event_type)
+        if batch:
+            self._batch_handlers[event_id] += (handler,)
+        else:
+            self._handlers[event_id] += (handler,)
+        return event_id
+        
+    def unregister_handler(self, event_type, handler):
+        """注销事件处理器 / Unregister an event handler"""
+        if isinstance(event_type, int):
+            event_id = self._resolve_id(event_type)
+        else:
+            event_id = self.event_ids.get(event_type)
+            if event_id is None:
+                return
+        self._handlers[event_id] = tuple(h for h in self._handlers[event_id] if h != handler)
+        self._batch_handlers[event_id] = tuple(h for h in self._batch_handlers[event_id] if h != handler)
+        
+    def trigger_event(self, event_type, event_data: Any = None):
+        """触发事件（类型可以是名称或编号）/ Trigger an event; the type may be a name or an id"""
+        event_id = self._resolve_id(event_type)
+        
+        for handler in self._handlers[event_id]:
+            handler(event_data)
+        if self._batch_handlers[event_id]:
+            batch = self._batches[event_id]
+            if not batch:
+                self._pending_ids.append(event_id)
+            batch.append(event_data)
+        
+        # 写入环形历史 / Write into the ring history
+        index = self._history_next
+        self._history_types[index] = event_id
+        self._history_times[index] = time.time()
+        self._history_data[index] = event_data
+        self._history_next = (index + 1) % self.history_size
+        if self._history_count < self.history_size:
+            self._history_count += 1
+            
+    def dispatch_batches(self):
+        """派发本帧积累的批量事件（每帧调用一次）/ Dispatch this frame's batched events; call once per frame"""
+        if not self._pending_ids:
+            return
+        pending, self._pending_ids = self._pending_ids, []
+        for event_id in pending:
+            batch = self._batches[event_id]
+            self._batches[event_id] = []
+            for handler in self._batch_handlers[event_id]:
+                handler(batch)
+                
+    def get_history(self, event_type=None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """获取历史事件（从旧到新）/ Get historical events, oldest first"""
+        event_id = None
+        if event_type is not None:
+            event_id = event_type if isinstance(event_type, int) else self.event_ids.get(event_type)
+            if event_id is None:
+                return []
+        
+        start = (self._history_next - self._history_count) % self.history_size
+        events = []
+        for offset in range(self._history_count):
+            index = (start + offset) % self.history_size
+            if event_id is not None and self._history_types[index] != event_id:
+                continue
+            events.append({
+                'type': self.event_names[self._history_types[index]],
+                'data': self._history_data[index],
+                'timestamp': datetime.fromtimestamp(self._history_times[index]).isoformat()
+            })
+        if limit is not None:
+            events = events[-limit:]
+        return events
+        
+    @property
+    def event_history(self) -> List[Dict[str, Any]]:
+        """历史事件（兼容旧接口，按需生成）/ Event history, built on demand for the old interface"""
+        return self.get_history()
 
 class GameDataManager:
     """游戏数据管理器 - 处理存档、加载和游戏数据管理"""
+    # 设置文件两次写入的最小间隔（秒），拖动滑块时合并写入
+    # Minimum seconds between settings writes; slider drags are coalesced
+    SETTINGS_WRITE_INTERVAL = 0.5
+    
+    # 写入槽位索引的玩家摘要字段（不含背包等大数据）
+    # Player fields summarised in the slot index (no inventory or other bulky data)
+    SLOT_SUMMARY_KEYS = ('gold', 'current_team', 'unlocked_characters', 'unlocked_maps')
+    
     def __init__(self, save_dir=Paths.SAVES):
         self.save_dir = save_dir
         self.max_retries = 3
@@ -182,13 +366,26 @@ class GameDataManager:
         self.achievement_system = AchievementSystem()
         self.event_system = EventSystem()
         
+        # 后台写盘线程：游戏线程只做快照 / Background writer; the game thread only takes snapshots
+        self.persistence = PersistenceWorker("game-data-writer")
+        
+        # 带索引的战斗日志 / Indexed battle log
+        self.battle_log = BattleLogStore(save_dir)
+        
+        # 按列存储的统计数据和汇总，满块由后台线程写出 / Columnar statistics with rollups; full chunks are written by the background writer
+        self.stats = StatsWarehouse(os.path.join(save_dir, "stats"), self.persistence)
+        
         # 初始化数据结构
         self.game_data = {
             "settings": {
                 "language": DEFAULT_LANGUAGE,
                 "music_volume": 0.7,
                 "sfx_volume": 0.8,
-                "fullscreen": False
+                "fullscreen": False,
+                "render_scale": 1.0,
+                "graphics_quality": "high",
+                "particle_effects": True,
+                "adaptive_quality": False
             },
             "player": {
                 "gold": 0,
@@ -208,80 +405,91 @@ class GameDataManager:
             }
         }
         
+        # 自上次保存以来变化的数据段 / Sections changed since the last save
+        self.dirty_sections = set(self.game_data)
+        
         # 加载设置
         self.load_settings()
 
-    def save_all_data(self):
-        """保存所有游戏数据 / Save all game data"""
-        try:
-            if not os.path.exists(self.save_directory):
-                os.makedirs(self.save_directory)
-                
-            save_data = {
-                'game_state': self.game_engine.get_state(),
-                'player_data': self.game_data.get('player', {}),
-                'settings': self.game_data.get('settings', {})
-            }
-            
-            with open(os.path.join(self.save_directory, 'game_save.json'), 'w') as f:
-                json.dump(save_data, f)
-                
-        except Exception as e:
-            print(f"Error saving game data: {e}")    
     def save_game(self, slot_id):
-        """保存游戏到指定槽位"""
-        save_path = os.path.join(self.save_dir, f"save_{slot_id}.dat")
-        backup_path = save_path + ".backup"
-        
-        # 添加保存时间戳
-        save_data = {
-            "timestamp": datetime.now().isoformat(),
-            "game_data": self.game_data
-        }
+        """保存游戏到指定槽位（后台写入，只重新编码变化的段）
+        Save game to a slot in the background, re-encoding only changed sections"""
+        dirty = set(self.dirty_sections)
+        self.dirty_sections.clear()
+        self.submit_save(self.game_data, slot_id, dirty)
+        return True
+    
+    def submit_save(self, data, slot_id, dirty=None, thumbnail=None, on_complete=None):
+        """对存档数据做快照并交给后台线程写入
+        Snapshot save data and hand it to the background writer
+
+        thumbnail: (原始 RGB 数据, (宽, 高))，显示在读档菜单中
+        thumbnail: (raw RGB bytes, (width, height)) shown in the load menu
+        on_complete: 写入完成后在后台线程上以 True / False 调用
+        on_complete: called on the background thread with True / False once the write finishes
+        """
+        data = snapshot(data)
+        metadata = {'player': self.make_slot_summary(data.get('player', {}))}
+        thumbnail_bytes = None
+        if thumbnail is not None:
+            thumbnail_bytes, metadata['thumbnail_size'] = thumbnail[0], list(thumbnail[1])
+        if dirty is not None:
+            # 合并的写入只执行最后一次，脏段先记到引擎里以免丢失
+            # Coalesced writes only run the last one, so record dirty sections in the engine first
+            self.save_system.engine.mark_dirty(slot_id, *dirty)
         
-        try:
-            # 先创建备份
-            if os.path.exists(save_path):
-                os.replace(save_path, backup_path)
-            
-            # 保存新数据
-            with open(save_path, 'wb') as f:
-                pickle.dump(save_data, f)
-            
-            # 保存成功后删除备份
-            if os.path.exists(backup_path):
-                os.remove(backup_path)
-                
-            return True
-        except Exception as e:
-            logging.error(f"Error saving game to slot {slot_id}: {e}")
-            # 如果保存失败，恢复备份
-            if os.path.exists(backup_path):
-                os.replace(backup_path, save_path)
+        def write(data):
+            # 写入失败时引擎会丢弃缓存，下次保存完整重写
+            # On failure the engine drops its cache, so the next save rewrites everything
+            if self.save_system.save_game(data, slot_id, dirty, metadata, thumbnail_bytes):
+                return True
+            logging.error(f"Error saving game to slot {slot_id}")
             return False
+        
+        self.persistence.submit(f"slot_{slot_id}", write, data, on_complete=on_complete)
     
     def load_game(self, slot_id):
         """从指定槽位加载游戏"""
-        save_path = os.path.join(self.save_dir, f"save_{slot_id}.dat")
-        
-        if not os.path.exists(save_path):
+        data = self.save_system.load_game(slot_id)
+        if data is None:
+            data = self._load_legacy_pickle(slot_id)
+        if data is None:
             return False
         
+        data.pop('save_time', None)
+        self.game_data = data
+        self.dirty_sections.clear()
+        return True
+    
+    def _load_legacy_pickle(self, slot_id):
+        """读取旧版 pickle 存档（只读，用于迁移）/ Read a legacy pickle save, for migration only"""
+        save_path = os.path.join(self.save_dir, f"save_{slot_id}.dat")
+        if not os.path.exists(save_path):
+            return None
         try:
             with open(save_path, 'rb') as f:
-                save_data = pickle.load(f)
-                self.game_data = save_data["game_data"]
-            return True
+                return pickle.load(f)["game_data"]
         except Exception as e:
             logging.error(f"Error loading game from slot {slot_id}: {e}")
-            return False
+            return None
+    
+    def mark_dirty(self, *sections):
+        """标记自上次保存以来变化的数据段 / Mark data sections changed since the last save"""
+        self.dirty_sections.update(sections)
     
     def save_settings(self) -> bool:
-        """保存游戏设置"""
+        """保存游戏设置（后台合并写入）/ Save settings; writes are coalesced in the background"""
+        self.persistence.submit("settings", self._write_settings,
+                                snapshot(self.game_data["settings"]),
+                                self.SETTINGS_WRITE_INTERVAL)
+        return True
+    
+    def _write_settings(self, settings) -> bool:
+        """写入设置文件（在后台线程运行）/ Write the settings file (runs on the writer thread)"""
         try:
             settings_path = os.path.join(self.save_dir, "settings.json")
-            with open(settings_path, 'w', encoding='utf-8') as f:
-                json.dump(self.game_data["settings"], f, ensure_ascii=False, indent=4)
+            data = json.dumps(settings, ensure_ascii=False, indent=4).encode('utf-8')
+            write_atomic(settings_path, data)
             return True
         except Exception as e:
             logging.error(f"Failed to save settings: {str(e)}")
@@ -297,43 +505,60 @@ class GameDataManager:
             except Exception as e:
                 logging.error(f"Error loading settings: {e}")
     
+    def make_slot_summary(self, player_data):
+        """提取写入槽位索引的玩家摘要 / Extract the player summary stored in the slot index"""
+        return {key: player_data[key] for key in self.SLOT_SUMMARY_KEYS if key in player_data}
+    
     def get_save_slots(self):
-        """获取所有存档槽位信息"""
+        """获取所有存档槽位信息（只读取槽位索引）/ Get every save slot by reading only the slot index"""
         slots = []
-        for file in os.listdir(self.save_dir):
-            if file.startswith("save_") and file.endswith(".dat"):
-                slot_id = int(file.split("_")[1].split(".")[0])
-                try:
-                    with open(os.path.join(self.save_dir, file), 'rb') as f:
-                        save_data = pickle.load(f)
-                        slots.append({
-                            "id": slot_id,
-                            "timestamp": save_data["timestamp"],
-                            "player_data": save_data["game_data"]["player"]
-                        })
-                except Exception as e:
-                    logging.error(f"Error reading save slot {slot_id}: {e}")
+        for slot_id, entry in self.save_system.engine.list_slots().items():
+            if not slot_id.isdigit():
+                continue
+            meta = entry['meta']
+            slots.append({
+                "id": int(slot_id),
+                "timestamp": meta.get("save_time"),
+                "player_data": meta.get("player", {}),
+                "thumbnail_size": meta.get("thumbnail_size")
+            })
         
         return sorted(slots, key=lambda x: x["id"])
     
+    def get_slot_thumbnail(self, slot_id):
+        """获取存档缩略图 (原始 RGB 数据, (宽, 高))，没有时返回 None
+        Get a slot thumbnail as (raw RGB bytes, (width, height)), or None"""
+        meta = self.save_system.engine.get_metadata(slot_id)
+        if not meta or not meta.get("thumbnail_size"):
+            return None
+        data = self.save_system.engine.load_thumbnail(slot_id)
+        if data is None:
+            return None
+        return data, tuple(meta["thumbnail_size"])
+    
     def update_statistics(self, stat_name, value):
         """更新游戏统计数据"""
         if stat_name in self.game_data["statistics"]:
             self.game_data["statistics"][stat_name] += value
+            self.dirty_sections.add("statistics")
+            self.stats.record(stat_name, value)
     
     def unlock_character(self, character_id):
         """解锁新角色"""
         if character_id not in self.game_data["player"]["unlocked_characters"]:
             self.game_data["player"]["unlocked_characters"].append(character_id)
+            self.dirty_sections.add("player")
     
     def unlock_map(self, map_id):
         """解锁新地图"""
         if map_id not in self.game_data["player"]["unlocked_maps"]:
             self.game_data["player"]["unlocked_maps"].append(map_id)
+            self.dirty_sections.add("player")
     
     def add_gold(self, amount):
         """增加金币"""
         self.game_data["player"]["gold"] += amount
+        self.dirty_sections.add("player")
         self.update_statistics("gold_earned", amount)
     
     def get_setting(self, key):
@@ -342,23 +567,29 @@ class GameDataManager:
     
     def set_setting(self, key, value):
         """设置设置值"""
-        self.game_data["settings"][key] = value
+        self.update_settings({key: value})
+    
+    def update_settings(self, settings):
+        """批量修改设置并标记为脏 / Change several settings at once and mark them dirty"""
+        self.game_data["settings"].update(settings)
+        self.dirty_sections.add("settings")
         self.save_settings()
     
+    def flush(self, timeout=None) -> bool:
+        """等待所有后台写入完成 / Wait for every background write to finish"""
+        return self.persistence.flush(timeout)
+    
+    def cleanup(self):
+        """写出剩余数据并停止后台线程 / Flush remaining writes and stop the writer thread"""
+        self.persistence.stop()
+        self.battle_log.close()
+        self.stats.flush()
+    
+    # 退出时自动保存的槽位 / Slot written by the save on exit
+    AUTOSAVE_SLOT = "autosave"
+    
     def save_all_data(self):
-        """保存所有游戏数据 / Save all game data"""
-        try:
-            if not os.path.exists(self.save_dir):
-                os.makedirs(self.save_dir)
-                
-            save_data = {
-                'game_state': self.game_data.get('player', {}),
-                'player_data': self.game_data.get('player', {}),
-                'settings': self.game_data.get('settings', {})
-            }
-            
-            with open(os.path.join(self.save_dir, 'game_save.json'), 'w') as f:
-                json.dump(save_data, f)
-                
-        except Exception as e:
-            print(f"Error saving game data: {e}")
\ No newline at end of file
+        """保存所有游戏数据（退出时调用，经由存档引擎写入自动存档槽位）
+        Save all game data on exit, through the save engine into the autosave slot"""
+        self.save_settings()
+        self.save_game(self.AUTOSAVE_SLOT)
\ No newline at end of file
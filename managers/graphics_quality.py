@@ -0,0 +1,200 @@
+import logging
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+class GraphicsQuality:
+    """画质档位服务 / Graphics quality tier service
+
+    特效、天气和 QTE 生成粒子前向这里申请数量：档位按比例缩放粒子预算和天气密度，决定是否绘制
+    发光层和是否使用平滑缩放；每个系统另有存活粒子的硬上限，任何档位都不会超过。
+    Effects, weather and QTE ask here before spawning particles: the tier
+    scales particle budgets and weather density and decides whether glow
+    layers are drawn and transforms are smoothed; every system also has a
+    hard cap on live particles that no tier can exceed.
+
+    画质调节器（QualityGovernor）通过 set_limits 在档位之上再乘以粒子和天气系数，并限制视差层数
+    和背景动画频率。
+    The quality governor multiplies particle and weather factors on top of
+    the tier through set_limits, and limits parallax layers and the
+    background animation rate.
+
+    自动模式从最高档开始，当最近 AUTO_WINDOW 帧中超过一半的帧超出帧时间预算时降一档，
+    降档后冷却 AUTO_COOLDOWN 帧再继续观察。
+    Auto mode starts at the top tier and steps down one tier when more than
+    half of the last AUTO_WINDOW frames overran the frame-time budget, then
+    waits AUTO_COOLDOWN frames before looking again.
+    """
+
+    TIERS = ('low', 'medium', 'high')
+    AUTO = 'auto'
+
+    PRESETS = {
+        'low': {'particles': 0.3, 'weather_density': 0.4, 'glow': False, 'smooth_transforms': False},
+        'medium': {'particles': 0.6, 'weather_density': 0.7, 'glow': True, 'smooth_transforms': False},
+        'high': {'particles': 1.0, 'weather_density': 1.0, 'glow': True, 'smooth_transforms': True},
+    }
+
+    # 每个系统存活粒子的硬上限 / Hard cap on live particles per system
+    SYSTEM_CAPS = {
+        'effects': 400,
+        'arrow_trail': 60,
+        'qte': 15,
+        'rain': 150,
+        'snow': 100,
+        'weather_indicator': 50,
+    }
+
+    AUTO_WINDOW = 120
+    AUTO_OVERRUN_RATIO = 0.5
+    AUTO_COOLDOWN = 180
+
+    def __init__(self, tier: str = 'high'):
+        self.tier = 'high'
+        self.auto = False
+        self.particles_enabled = True
+        self.frame_budget = 1.0 / 90
+        self._frame_overruns = deque(maxlen=self.AUTO_WINDOW)
+        self._overrun_count = 0
+        self._cooldown = 0
+        self._listeners: List[Callable[['GraphicsQuality'], None]] = []
+        
+        # 画质调节器的限制 / Limits set by the quality governor
+        self.particle_scale = 1.0
+        self.weather_scale = 1.0
+        self.parallax_layers: Optional[int] = None
+        self.background_rate = 1.0
+        
+        self.set_tier(tier)
+
+    # ---- 档位 / Tiers ----
+
+    @property
+    def preset(self) -> Dict:
+        return self.PRESETS[self.tier]
+
+    @property
+    def setting(self) -> str:
+        """保存到设置中的值 / Value stored in the settings"""
+        return self.AUTO if self.auto else self.tier
+
+    def set_tier(self, tier: str) -> str:
+        """设置档位（'low' / 'medium' / 'high' / 'auto'）/ Set the tier"""
+        if tier == self.AUTO:
+            self.auto = True
+            self._reset_auto()
+            self._apply('high')
+        elif tier in self.PRESETS:
+            self.auto = False
+            self._apply(tier)
+        else:
+            logging.warning(f"未知画质档位 / Unknown graphics quality tier: {tier!r}")
+        return self.setting
+
+    def cycle_tier(self) -> str:
+        """low -> medium -> high -> auto -> low"""
+        order = self.TIERS + (self.AUTO,)
+        return self.set_tier(order[(order.index(self.setting) + 1) % len(order)])
+
+    def set_particles_enabled(self, enabled: bool):
+        """粒子特效开关 / Particle effects toggle"""
+        if bool(enabled) != self.particles_enabled:
+            self.particles_enabled = bool(enabled)
+            self._notify()
+
+    def set_limits(self, particles: float = 1.0, weather: float = 1.0,
+                   parallax_layers: Optional[int] = None, background_rate: float = 1.0):
+        """设置画质调节器的限制（1.0 / None 表示不限制）
+        Set the governor's limits; 1.0 / None means unlimited"""
+        self.particle_scale = particles
+        self.weather_scale = weather
+        self.parallax_layers = parallax_layers
+        self.background_rate = background_rate
+
+    def add_listener(self, callback: Callable[['GraphicsQuality'], None]):
+        """档位变化时回调 / Call back whenever the tier changes"""
+        self._listeners.append(callback)
+
+    def _apply(self, tier: str):
+        if tier != self.tier:
+            self.tier = tier
+            logging.info(f"画质档位 / Graphics quality: {tier}")
+        self._notify()
+
+    def _notify(self):
+        for callback in self._listeners:
+            try:
+                callback(self)
+            except Exception as e:
+                logging.error(f"画质回调失败 / Graphics quality listener failed: {e}")
+
+    # ---- 预算 / Budgets ----
+
+    @property
+    def glow(self) -> bool:
+        """是否绘制发光层 / Whether glow layers are drawn"""
+        return self.preset['glow']
+
+    @property
+    def smooth_transforms(self) -> bool:
+        """缩放时是否使用 smoothscale / Whether scaling uses smoothscale"""
+        return self.preset['smooth_transforms']
+
+    @property
+    def weather_density(self) -> float:
+        return self.preset['weather_density'] * self.weather_scale
+
+    def particle_budget(self, system: str, requested: int, live: int = 0) -> int:
+        """本次可生成的粒子数：按档位缩放，并且不超过系统上限减去存活数
+        Particles that may be spawned now: scaled by the tier and never more
+        than the system cap minus the live count"""
+        if not self.particles_enabled or requested <= 0:
+            return 0
+        count = max(1, round(requested * self.preset['particles'] * self.particle_scale))
+        cap = self.SYSTEM_CAPS.get(system)
+        if cap is not None:
+            count = min(count, int(cap * self.particle_scale) - live)
+        return max(0, count)
+
+    def weather_limit(self, system: str, count: float) -> int:
+        """天气系统的目标粒子数 / Target particle count for a weather system"""
+        count = int(count * self.weather_density)
+        cap = self.SYSTEM_CAPS.get(system)
+        return count if cap is None else min(count, cap)
+
+    # ---- 自动模式 / Auto mode ----
+
+    def set_frame_budget(self, seconds: float):
+        """自动模式的帧时间预算 / Frame-time budget for auto mode"""
+        self.frame_budget = seconds
+
+    def observe_frame(self, frame_time: float):
+        """记录一帧的耗时（秒）/ Record one frame's time in seconds"""
+        if not self.auto:
+            return
+        if self._cooldown > 0:
+            self._cooldown -= 1
+            return
+
+        window = self._frame_overruns
+        if len(window) == window.maxlen:
+            self._overrun_count -= window[0]
+        overrun = frame_time > self.frame_budget
+        window.append(overrun)
+        self._overrun_count += overrun
+
+        if (len(window) == window.maxlen
+                and self._overrun_count > self.AUTO_OVERRUN_RATIO * window.maxlen):
+            index = self.TIERS.index(self.tier)
+            if index > 0:
+                self._apply(self.TIERS[index - 1])
+            self._reset_auto()
+            self._cooldown = self.AUTO_COOLDOWN
+
+    def _reset_auto(self):
+        self._frame_overruns.clear()
+        self._overrun_count = 0
+        self._cooldown = 0
+
+
+# 全局共享的画质服务 / Shared quality service
+graphics_quality = GraphicsQuality()
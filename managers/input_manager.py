@@ -1,29 +1,63 @@
 import time
 import pygame
-from typing import Dict, List, Callable
+from collections import deque
+from typing import Dict, List, Callable, Optional
 from ..core.characters import BaseCharacter
+from .qte_timing import QTETimingEngine
+from .input_pattern_matcher import InputPatternMatcher
 
 class InputManager:
+    """输入管理器 / Input manager
+
+    由 KEYDOWN/KEYUP 等事件驱动：只记录本帧发生变化的按键及其高精度时间戳，
+    不再每帧复制整张按键表。所有管理器共享同一个实例。
+    Driven by KEYDOWN/KEYUP (and mouse) events: only keys that changed this
+    frame are recorded, together with a high-resolution timestamp, instead of
+    copying the whole key table every frame. Every manager shares this instance.
+
+    pygame 2.6 的事件不带时间戳，所以时间戳是事件从队列中取出的时刻。主循环在帧间等待时
+    每隔约 1 ms 调用 poll_events，等待期间到达的事件误差约为轮询间隔（受系统休眠精度限制）；
+    在更新和渲染期间到达的事件要到下一次轮询才被打上时间戳，误差最多为这一帧的工作时间。
+    pygame 2.6 events carry no timestamp, so the stamp is the moment an
+    event is taken off the queue. The main loop calls poll_events about
+    every millisecond while it waits between frames, so events arriving
+    during the wait are stamped within the poll interval (bounded by the OS
+    sleep granularity); events arriving during update and render are stamped
+    at the next poll, up to one frame's work time late.
+    """
     def __init__(self):
         # 基础输入状态 / Basic input states
-        keys = pygame.key.get_pressed()
-        self.key_states = {i: keys[i] for i in range(len(keys))}  # 正确转换为字典
-        self.prev_key_states = self.key_states.copy()
-        
-        mouse_buttons = pygame.mouse.get_pressed()
-        self.mouse_states = {i: mouse_buttons[i] for i in range(len(mouse_buttons))}  # 正确转换为字典
-        self.prev_mouse_states = self.mouse_states.copy()
+        self.held_keys = set()
+        self.pressed_keys: Dict[int, int] = {}   # 本帧按下的键 -> 时间戳(ns) / key -> perf_counter_ns
+        self.released_keys: Dict[int, int] = {}  # 本帧松开的键 -> 时间戳(ns)
+        self.key_down_times: Dict[int, int] = {}  # 按住的键 -> 按下时间戳(ns)
+
+        self.held_buttons = set()
+        self.pressed_buttons: Dict[int, int] = {}
+        self.released_buttons: Dict[int, int] = {}
         self.mouse_pos = (0, 0)
+
+        # 帧时间戳 / Frame timestamp (ns)
+        self.frame_time_ns = time.perf_counter_ns()
         
+        # QTE计时引擎（与按键时间戳使用同一时钟） / QTE timing engine on the same clock as key timestamps
+        self.timing = QTETimingEngine()
+        
+        # 连击和QTE共享的按键模式自动机 / Key pattern automaton shared by combos and QTEs
+        self.patterns = InputPatternMatcher()
+
+        # 已取出但尚未处理的事件及其时间戳 / Events taken off the queue, with stamps, not yet processed
+        self._arrivals = deque()
+
         # 事件系统 / Event system
-        self.event_queue = []
+        self.event_queue = deque()
         self.event_handlers = {}
-        
+
         # 状态变量 / State variables
         self.input_buffer = []
         self.buffer_timeout = 0.5
         self.last_input_time = 0
-        
+
         # 按键映射 / Key mappings
         self.key_mappings = {
             'up': pygame.K_w,
@@ -36,50 +70,143 @@ class InputManager:
         }
 
     def update(self, dt):
-        """更新输入状态 / Update input states"""
-        # 更新按键状态 / Update key states
-        self.prev_key_states = self.key_states.copy()
-        keys = pygame.key.get_pressed()
-        self.key_states = {i: keys[i] for i in range(len(keys))}
-        
-        # 更新鼠标状态 / Update mouse states
-        self.prev_mouse_states = self.mouse_states.copy()
-        mouse_buttons = pygame.mouse.get_pressed()
-        self.mouse_states = {i: mouse_buttons[i] for i in range(len(mouse_buttons))}
-        self.mouse_pos = pygame.mouse.get_pos()
-        
+        """开始新的输入帧 / Begin a new input frame
+
+        在拉取本帧事件之前调用：清空上一帧的边沿状态。
+        Call before this frame's events are fed in: clears last frame's edges.
+        """
+        self.frame_time_ns = time.perf_counter_ns()
+        self.patterns.begin_frame()
+        self.patterns.update(self.frame_time_ns, self.held_keys)
+        if self.pressed_keys:
+            self.pressed_keys.clear()
+        if self.released_keys:
+            self.released_keys.clear()
+        if self.pressed_buttons:
+            self.pressed_buttons.clear()
+        if self.released_buttons:
+            self.released_buttons.clear()
+
         # 更新输入缓冲 / Update input buffer
         current_time = time.time()
         if current_time - self.last_input_time > self.buffer_timeout:
             self.input_buffer.clear()
-            
-        # 处理事件队列 / Process event queue
+
+        # 处理外部投递的事件队列 / Process externally queued events
         while self.event_queue:
-            event = self.event_queue.pop(0)
-            if event.type in self.event_handlers:
-                for handler in self.event_handlers[event.type]:
-                    handler(event)
+            event = self.event_queue.popleft()
+            for handler in self.event_handlers.get(event.type, ()):
+                handler(event)
+
+    def poll_events(self):
+        """从 pygame 队列取出所有事件并打上时间戳，留给下一帧处理
+        Take every event off the pygame queue and stamp it, keeping it for the next frame"""
+        events = pygame.event.get()
+        if events:
+            timestamp_ns = time.perf_counter_ns()
+            self._arrivals.extend((event, timestamp_ns) for event in events)
+
+    def drain_events(self):
+        """取出本帧要处理的 (事件, 时间戳)，包括轮询期间收集的事件
+        Yield this frame's (event, timestamp) pairs, including those collected while polling"""
+        self.poll_events()
+        arrivals = self._arrivals
+        while arrivals:
+            yield arrivals.popleft()
+
+    def process_event(self, event, timestamp_ns: Optional[int] = None):
+        """处理单个 pygame 事件 / Process a single pygame event"""
+        if timestamp_ns is None:
+            timestamp_ns = time.perf_counter_ns()
+
+        if event.type == pygame.KEYDOWN:
+            key = event.key
+            if key not in self.held_keys:
+                self.held_keys.add(key)
+                self.pressed_keys[key] = timestamp_ns
+                self.key_down_times[key] = timestamp_ns
+                self.input_buffer.append((key, timestamp_ns))
+                self.last_input_time = time.time()
+                self.patterns.feed(key, timestamp_ns)
+        elif event.type == pygame.KEYUP:
+            key = event.key
+            self.held_keys.discard(key)
+            self.key_down_times.pop(key, None)
+            self.released_keys[key] = timestamp_ns
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            self.held_buttons.add(event.button)
+            self.pressed_buttons[event.button] = timestamp_ns
+            self.mouse_pos = event.pos
+        elif event.type == pygame.MOUSEBUTTONUP:
+            self.held_buttons.discard(event.button)
+            self.released_buttons[event.button] = timestamp_ns
+            self.mouse_pos = event.pos
+        elif event.type == pygame.MOUSEMOTION:
+            self.mouse_pos = event.pos
+        elif event.type == pygame.WINDOWFOCUSLOST:
+            # 失去焦点时收不到 KEYUP，释放所有按键 / No KEYUP arrives after focus loss
+            self._release_all(timestamp_ns)
+
+        for handler in self.event_handlers.get(event.type, ()):
+            handler(event)
+
+    def _release_all(self, timestamp_ns: int):
+        """释放所有按住的按键和鼠标按钮 / Release every held key and button"""
+        for key in self.held_keys:
+            self.released_keys[key] = timestamp_ns
+        for button in self.held_buttons:
+            self.released_buttons[button] = timestamp_ns
+        self.held_keys.clear()
+        self.held_buttons.clear()
+        self.key_down_times.clear()
+
+    def _resolve_key(self, key):
+        """解析按键映射名 / Resolve a mapped key name"""
+        if isinstance(key, str):
+            return self.key_mappings.get(key, None)
+        return key
 
     def is_key_just_pressed(self, key):
         """检查按键是否刚被按下 / Check if key was just pressed"""
-        if isinstance(key, str):
-            key = self.key_mappings.get(key, None)
-            if key is None:
-                return False
-        return bool(self.key_states.get(key, False)) and not bool(self.prev_key_states.get(key, False))
-        
+        key = self._resolve_key(key)
+        return key is not None and key in self.pressed_keys
+
+    def is_key_just_released(self, key):
+        """检查按键是否刚被松开 / Check if key was just released"""
+        key = self._resolve_key(key)
+        return key is not None and key in self.released_keys
+
     def is_key_held(self, key):
         """检查按键是否被持续按下 / Check if key is being held"""
-        if isinstance(key, str):
-            key = self.key_mappings.get(key, None)
-            if key is None:
-                return False
-        return bool(self.key_states.get(key, False))
-        
+        key = self._resolve_key(key)
+        return key is not None and key in self.held_keys
+
+    def get_key_press_time(self, key) -> Optional[int]:
+        """获取本帧按键按下的时间戳(ns) / Get the press timestamp (ns) of a key this frame"""
+        key = self._resolve_key(key)
+        return self.pressed_keys.get(key)
+
+    def get_key_hold_start(self, key) -> Optional[int]:
+        """获取按住按键的起始时间戳(ns) / Get the timestamp (ns) a held key went down"""
+        key = self._resolve_key(key)
+        return self.key_down_times.get(key)
+
+    def get_pressed_keys(self) -> Dict[int, int]:
+        """获取本帧按下的所有按键 / Get all keys pressed this frame"""
+        return self.pressed_keys
+
+    def is_mouse_just_pressed(self, button: int = 1):
+        """检查鼠标按钮是否刚被按下 / Check if mouse button was just pressed"""
+        return button in self.pressed_buttons
+
+    def is_mouse_held(self, button: int = 1):
+        """检查鼠标按钮是否被按住 / Check if mouse button is held"""
+        return button in self.held_buttons
+
     def get_mouse_pos(self):
         """获取鼠标位置 / Get mouse position"""
         return self.mouse_pos
-        
+
     def register_handler(self, event_type, handler):
         """注册事件处理程序 / Register event handler"""
         if event_type not in self.event_handlers:
@@ -89,7 +216,11 @@ class InputManager:
     def cleanup(self):
         """清理资源 / Cleanup resources"""
         self.input_buffer.clear()
+        self._arrivals.clear()
         self.event_queue.clear()
         self.event_handlers.clear()
-        
-    
\ No newline at end of file
+        self.held_keys.clear()
+        self.pressed_keys.clear()
+        self.released_keys.clear()
+        self.key_down_times.clear()
+        self.held_buttons.clear()
@@ -0,0 +1,263 @@
+from typing import Dict, List, Optional, Set, Tuple
+
+NS_PER_SECOND = 1_000_000_000
+
+class InputPatternMatcher:
+    """输入模式匹配器 / Input pattern matcher
+
+    把所有连击和QTE按键定义编译成一个共享的前缀树自动机，边上带有时间约束
+    （按键间隔、总窗口）。每个按键事件只沿当前活跃游标前进一步，因此定义数量增加到上百个
+    也不会增加每帧开销；同时可以查询某个模式是否仍可达成。重新编译时活跃游标按其按键路径
+    迁移到新的自动机上，注册新模式不会打断正在进行的输入。
+    Compiles every combo and QTE key definition into one shared trie automaton
+    with timing guards (press interval, total window). Each key event advances
+    the live cursors by one edge, so hundreds of definitions add no per-frame
+    cost, and whether a pattern is still reachable can be queried at any time.
+    Recompiling carries live cursors over to the new automaton along their
+    key paths, so registering patterns never interrupts input in progress.
+    """
+    def __init__(self):
+        # 模式定义 / Pattern definitions
+        self.patterns: Dict[str, dict] = {}
+        self._dirty = False
+
+        # 编译结果 / Compiled automaton
+        self.nodes: List[dict] = []
+
+        # 活跃游标：节点 -> 游标 / Live cursors: node -> cursor
+        self.cursors: Dict[int, dict] = {}
+
+        # 等待长按完成的游标 / Cursors waiting for a hold to complete
+        self.holds: List[dict] = []
+
+        # 本帧完成的匹配：模式 -> (开始时间, 完成时间)
+        # Matches completed this frame: pattern -> (start_ns, end_ns)
+        self.matches: Dict[str, Tuple[int, int]] = {}
+
+    def register(self, pattern_id: str, keys: List[int],
+                 max_interval: Optional[float] = None,
+                 window: Optional[float] = None,
+                 hold: Optional[float] = None):
+        """注册或更新模式 / Register or update a pattern
+
+        keys: 按键序列 / key sequence
+        max_interval: 相邻按键最大间隔（秒） / max seconds between presses
+        window: 从第一次按键起的总时限（秒） / total seconds from the first press
+        hold: 最后一个键需要按住的时长（秒） / seconds the last key must be held
+        """
+        pattern = {
+            'keys': tuple(keys),
+            'max_interval': self._to_ns(max_interval),
+            'window': self._to_ns(window),
+            'hold': self._to_ns(hold)
+        }
+        if self.patterns.get(pattern_id) != pattern:
+            self.patterns[pattern_id] = pattern
+            self._dirty = True
+
+    def unregister(self, pattern_id: str):
+        """移除模式 / Remove a pattern"""
+        if self.patterns.pop(pattern_id, None) is not None:
+            self._dirty = True
+
+    def compile(self):
+        """编译前缀树自动机，保留仍然有效的游标 / Compile the trie automaton, keeping cursors that still apply"""
+        old_nodes = self.nodes
+        self.nodes = [self._new_node(0)]
+        continuing: List[List[str]] = [[]]
+        for pattern_id, pattern in self.patterns.items():
+            if not pattern['keys']:
+                continue
+            node_id = 0
+            for key in pattern['keys']:
+                node = self.nodes[node_id]
+                node['reachable'].add(pattern_id)
+                continuing[node_id].append(pattern_id)
+                child = node['children'].get(key)
+                if child is None:
+                    child = len(self.nodes)
+                    self.nodes.append(self._new_node(node['depth'] + 1, node['path'] + (key,)))
+                    continuing.append([])
+                    node['children'][key] = child
+                node_id = child
+            node = self.nodes[node_id]
+            node['reachable'].add(pattern_id)
+            node['accepting'].append(pattern_id)
+
+        # 节点约束取经过它继续前进的模式中最宽松的值
+        # A node's guards are the loosest of the patterns that continue through it
+        for node, pattern_ids in zip(self.nodes, continuing):
+            for guard in ('max_interval', 'window'):
+                values = [self.patterns[pattern_id][guard] for pattern_id in pattern_ids]
+                node[guard] = 0 if not values or 0 in values else max(values)
+
+        # 游标按按键路径迁移到新节点，路径已不存在的游标丢弃
+        # Move cursors to the new nodes along their key paths; drop those whose path is gone
+        cursors = {}
+        for cursor in self.cursors.values():
+            node_id = self._find_node(old_nodes[cursor['node']]['path'])
+            if node_id is not None:
+                cursors[node_id] = dict(cursor, node=node_id)
+        self.cursors = cursors
+        self.holds = [hold for hold in self.holds if hold['pattern'] in self.patterns]
+        self._dirty = False
+
+    def _find_node(self, path: Tuple[int, ...]) -> Optional[int]:
+        """沿按键路径查找节点 / Find the node at the end of a key path"""
+        node_id = 0
+        for key in path:
+            node_id = self.nodes[node_id]['children'].get(key)
+            if node_id is None:
+                return None
+        return node_id
+
+    def begin_frame(self):
+        """开始新的输入帧 / Begin a new input frame"""
+        if self.matches:
+            self.matches.clear()
+
+    def feed(self, key: int, timestamp_ns: int) -> List[str]:
+        """输入一个按键事件，返回本次完成的模式
+        Feed one key press; returns the patterns it completed"""
+        if self._dirty:
+            self.compile()
+        if not self.nodes:
+            return []
+
+        advanced: Dict[int, dict] = {}
+        # 从根节点开始新的游标 / Start a new cursor from the root
+        candidates = list(self.cursors.values())
+        candidates.append({'node': 0, 'start_ns': timestamp_ns, 'last_ns': timestamp_ns, 'max_gap': 0})
+
+        for cursor in candidates:
+            child = self.nodes[cursor['node']]['children'].get(key)
+            if child is None or not self._cursor_alive(cursor, timestamp_ns):
+                continue
+            gap = timestamp_ns - cursor['last_ns']
+            moved = {
+                'node': child,
+                'start_ns': cursor['start_ns'],
+                'last_ns': timestamp_ns,
+                'max_gap': max(cursor['max_gap'], gap)
+            }
+            # 同一节点只保留最晚开始的游标，它对时间窗口最宽松
+            # Keep the latest-starting cursor per node; it is the most lenient
+            existing = advanced.get(child)
+            if existing is None or moved['start_ns'] > existing['start_ns']:
+                advanced[child] = moved
+
+        self.cursors = advanced
+
+        completed = []
+        for cursor in advanced.values():
+            for pattern_id in self.nodes[cursor['node']]['accepting']:
+                pattern = self.patterns[pattern_id]
+                if not self._accepts(pattern, cursor, timestamp_ns):
+                    continue
+                if pattern['hold']:
+                    self.holds.append({
+                        'pattern': pattern_id,
+                        'key': key,
+                        'start_ns': cursor['start_ns'],
+                        'down_ns': timestamp_ns
+                    })
+                else:
+                    self.matches[pattern_id] = (cursor['start_ns'], timestamp_ns)
+                    completed.append(pattern_id)
+        return completed
+
+    def update(self, now_ns: int, held_keys: Set[int]) -> List[str]:
+        """处理长按模式和过期游标 / Resolve hold patterns and expire stale cursors"""
+        completed = []
+        if self.holds:
+            remaining = []
+            for hold in self.holds:
+                if hold['key'] not in held_keys:
+                    continue
+                pattern = self.patterns.get(hold['pattern'])
+                if pattern is None:
+                    continue
+                end_ns = hold['down_ns'] + pattern['hold']
+                if now_ns >= end_ns:
+                    self.matches[hold['pattern']] = (hold['start_ns'], end_ns)
+                    completed.append(hold['pattern'])
+                else:
+                    remaining.append(hold)
+            self.holds = remaining
+
+        if self.cursors:
+            self.cursors = {
+                node_id: cursor for node_id, cursor in self.cursors.items()
+                if self._cursor_alive(cursor, now_ns)
+            }
+        return completed
+
+    def get_match(self, pattern_id: str, since_ns: int = 0) -> Optional[Tuple[int, int]]:
+        """获取本帧完成的匹配（开始不早于 since_ns）
+        Get this frame's match of a pattern that started no earlier than since_ns"""
+        match = self.matches.get(pattern_id)
+        if match is None or match[0] < since_ns:
+            return None
+        return match
+
+    def get_progress(self, pattern_id: str, since_ns: int = 0) -> int:
+        """获取模式已输入的按键数 / Number of keys of a pattern entered so far"""
+        best = 0
+        for cursor in self.cursors.values():
+            if cursor['start_ns'] < since_ns:
+                continue
+            if pattern_id in self.nodes[cursor['node']]['reachable']:
+                best = max(best, self.nodes[cursor['node']]['depth'])
+        return best
+
+    def is_reachable(self, pattern_id: str, since_ns: int = 0) -> bool:
+        """模式是否仍可由当前游标完成 / Whether a live cursor can still complete the pattern"""
+        for cursor in self.cursors.values():
+            if cursor['start_ns'] >= since_ns and pattern_id in self.nodes[cursor['node']]['reachable']:
+                return True
+        return any(hold['pattern'] == pattern_id for hold in self.holds)
+
+    def reset(self):
+        """清除所有游标和匹配 / Drop every cursor and match"""
+        self.cursors.clear()
+        self.holds.clear()
+        self.matches.clear()
+
+    def _new_node(self, depth: int, path: Tuple[int, ...] = ()) -> dict:
+        """创建自动机节点 / Create an automaton node"""
+        return {
+            'children': {},
+            'accepting': [],
+            'reachable': set(),
+            'depth': depth,
+            'path': path,
+            # 离开该节点的约束（纳秒，0 表示无限制） / Guards for leaving this node (ns, 0 = unbounded)
+            'max_interval': 0,
+            'window': 0
+        }
+
+    def _accepts(self, pattern: dict, cursor: dict, timestamp_ns: int) -> bool:
+        """精确检查模式的时间约束 / Check a pattern's timing guards exactly"""
+        if pattern['max_interval'] and cursor['max_gap'] > pattern['max_interval']:
+            return False
+        if pattern['window'] and timestamp_ns - cursor['start_ns'] > pattern['window']:
+            return False
+        return True
+
+    def _cursor_alive(self, cursor: dict, now_ns: int) -> bool:
+        """游标在给定时间是否仍可能前进 / Whether a cursor can still advance at the given time"""
+        node = self.nodes[cursor['node']]
+        if not node['children']:
+            return False
+        if node['max_interval'] and now_ns - cursor['last_ns'] > node['max_interval']:
+            return False
+        if node['window'] and now_ns - cursor['start_ns'] > node['window']:
+            return False
+        return True
+
+    @staticmethod
+    def _to_ns(seconds: Optional[float]) -> int:
+        """秒转纳秒，None 表示无限制 / Seconds to ns; None means unbounded"""
+        if not seconds:
+            return 0
+        return int(seconds * NS_PER_SECOND)
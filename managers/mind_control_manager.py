@@ -3,6 +3,9 @@ import pygame
 class MindControlManager:
     """心智控制系统管理器 / Mind control system manager"""
     def __init__(self, game_engine):
+        self.game_engine = game_engine
+        # 共享的输入管理器 / Shared input manager
+        self.input = game_engine.get_manager('input')
         self.mind_control = {
             'active': False,
             'target': None,
@@ -34,13 +37,13 @@ class MindControlManager:
         if not target:
             return
             
-        if self.is_key_just_pressed(self.mind_control['commands']['attack']):
+        if self.input.is_key_just_pressed(self.mind_control['commands']['attack']):
             self._execute_mind_control_command('attack', target)
-        elif self.is_key_just_pressed(self.mind_control['commands']['move']):
+        elif self.input.is_key_just_pressed(self.mind_control['commands']['move']):
             self._execute_mind_control_command('move', target)
-        elif self.is_key_just_pressed(self.mind_control['commands']['skill']):
+        elif self.input.is_key_just_pressed(self.mind_control['commands']['skill']):
             self._execute_mind_control_command('skill', target)
-        elif self.is_key_just_pressed(self.mind_control['commands']['release']):
+        elif self.input.is_key_just_pressed(self.mind_control['commands']['release']):
             self._release_mind_control()
 
     def _execute_mind_control_command(self, command, target):
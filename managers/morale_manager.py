@@ -1,8 +1,11 @@
 import pygame
 
 class MoraleManager:
-    def __init__(self, game_engine):
+    def __init__(self, game_engine, input_manager=None):
         self.game_engine = game_engine
+        # 共享的输入管理器；Game 构造时管理器尚未注册，因此由调用方传入
+        # Shared input manager; passed in by Game because managers are not registered yet at construction
+        self.input = input_manager or game_engine.get_manager('input')
         self.morale_inputs = {
             'boost': {
                 'key': pygame.K_b,
@@ -21,11 +24,11 @@ class MoraleManager:
     def _update_morale_system(self, dt):
         """更新士气系统"""
         # 处理个人士气提升
-        if self.is_key_just_pressed(self.morale_inputs['boost']['key']):
+        if self.input.is_key_just_pressed(self.morale_inputs['boost']['key']):
             self._trigger_morale_boost()
             
         # 处理团队鼓舞
-        if self.is_key_just_pressed(self.morale_inputs['inspire']['key']):
+        if self.input.is_key_just_pressed(self.morale_inputs['inspire']['key']):
             self._trigger_team_inspire()
             
     def _trigger_morale_boost(self):
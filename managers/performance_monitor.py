@@ -16,6 +16,9 @@ class PerformanceMonitor:
             'frame_times': []
         }
         
+        # Per-layer render counters of the last frame
+        self.render_stats = {}
+        
         self.last_metrics_update = time.time()
     
     def start_frame(self):
@@ -50,6 +53,10 @@ class PerformanceMonitor:
             
             self.last_metrics_update = current_time
     
+    def record_render_stats(self, layer_stats):
+        """Record per-layer render counters (commands, pixels, batches)"""
+        self.render_stats = {layer: dict(stats) for layer, stats in layer_stats.items()}
+    
     def get_memory_usage(self):
         """Get current memory usage in MB"""
         try:
@@ -0,0 +1,182 @@
+import time
+import weakref
+import atexit
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+# 仍在运行的工作线程；弱引用，停止后的工作线程可以被回收
+# Workers still running; weak references, so stopped workers can be collected
+_running_workers = weakref.WeakSet()
+
+@atexit.register
+def _stop_running_workers():
+    """退出时写完所有工作线程的数据 / Flush every running worker on exit"""
+    for worker in list(_running_workers):
+        worker.stop()
+
+def snapshot(value: Any) -> Any:
+    """创建游戏数据的独立快照 / Take an independent snapshot of game data
+
+    游戏数据只包含 JSON 类型，递归复制字典和列表比 copy.deepcopy 便宜得多。
+    Game data holds JSON types only, so copying dicts and lists recursively is
+    much cheaper than copy.deepcopy.
+    """
+    if isinstance(value, dict):
+        return {key: snapshot(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [snapshot(item) for item in value]
+    if isinstance(value, set):
+        return [snapshot(item) for item in value]
+    return value
+
+class PersistenceWorker:
+    """持久化工作线程 / Persistence worker
+
+    游戏线程提交 (键, 写入函数, 快照)；后台线程按键合并写入，同一键在
+    ``min_interval`` 内最多写一次，只写最新的快照。退出时保证全部写完。
+    The game thread submits (key, write function, snapshot); a background
+    thread coalesces writes per key, writes each key at most once per
+    ``min_interval`` using only the newest snapshot, and guarantees that
+    everything is flushed on exit.
+
+    on_complete 回调在写入完成或失败后以 True / False 调用（在工作线程上）；被合并的提交
+    也会收到合并后那次写入的结果。
+    on_complete callbacks are called with True / False once the write
+    succeeds or fails, on the worker thread; submissions that were
+    coalesced receive the result of the write that replaced them.
+    """
+    def __init__(self, name: str = "persistence"):
+        self._pending: Dict[str, dict] = {}
+        self._last_write: Dict[str, float] = {}
+        self._condition = threading.Condition()
+        self._writing = 0
+        self._running = True
+        self._flush_requested = False
+
+        self.stats = {'submitted': 0, 'written': 0, 'coalesced': 0, 'failed': 0}
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        _running_workers.add(self)
+
+    def submit(self, key: str, write_fn: Callable[[Any], Any], data: Any,
+               min_interval: float = 0.0, on_complete: Optional[Callable[[bool], None]] = None):
+        """提交写入任务（data 必须是快照）/ Submit a write; data must already be a snapshot"""
+        callbacks = [on_complete] if on_complete is not None else []
+        with self._condition:
+            if not self._running:
+                # 已停止时同步写入，保证数据不丢失 / Write synchronously once stopped
+                self._execute(key, write_fn, data, callbacks)
+                return
+
+            now = time.monotonic()
+            pending = self._pending.get(key)
+            if pending is not None:
+                self.stats['coalesced'] += 1
+                due = pending['due']
+                callbacks = pending['callbacks'] + callbacks
+            else:
+                due = max(now, self._last_write.get(key, 0.0) + min_interval)
+            self._pending[key] = {'write_fn': write_fn, 'data': data, 'due': due,
+                                  'callbacks': callbacks}
+            self.stats['submitted'] += 1
+            self._condition.notify()
+
+    def has_pending(self) -> bool:
+        """是否还有未完成的写入 / Whether writes are still outstanding"""
+        with self._condition:
+            return bool(self._pending) or self._writing > 0
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """立即写出所有待写数据并等待完成 / Write everything now and wait for completion"""
+        if threading.current_thread() is self._thread:
+            return False
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            if not self._thread.is_alive():
+                self._drain_locked()
+                return True
+            self._flush_requested = True
+            self._condition.notify_all()
+            while self._pending or self._writing:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            self._flush_requested = False
+            return True
+
+    def stop(self, timeout: Optional[float] = None):
+        """写出所有数据并停止线程 / Flush everything and stop the thread"""
+        if not self._running:
+            return
+        _running_workers.discard(self)
+        self.flush(timeout)
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
+        with self._condition:
+            self._drain_locked()
+
+    def _run(self):
+        """工作线程主循环 / Worker main loop"""
+        while True:
+            with self._condition:
+                while True:
+                    if not self._running and not self._pending:
+                        return
+                    key = self._next_due_key()
+                    if key is not None:
+                        break
+                    timeout = None
+                    if self._pending:
+                        due = min(item['due'] for item in self._pending.values())
+                        timeout = max(0.0, due - time.monotonic())
+                    self._condition.wait(timeout)
+
+                item = self._pending.pop(key)
+                self._writing += 1
+
+            try:
+                self._execute(key, item['write_fn'], item['data'], item['callbacks'])
+            finally:
+                with self._condition:
+                    self._writing -= 1
+                    self._last_write[key] = time.monotonic()
+                    self._condition.notify_all()
+
+    def _next_due_key(self) -> Optional[str]:
+        """获取已到期的键（刷新时全部到期）/ Get a due key; everything is due while flushing"""
+        if not self._pending:
+            return None
+        if self._flush_requested or not self._running:
+            return next(iter(self._pending))
+        now = time.monotonic()
+        for key, item in self._pending.items():
+            if item['due'] <= now:
+                return key
+        return None
+
+    def _drain_locked(self):
+        """在当前线程写出剩余数据 / Write the remaining data on the calling thread"""
+        while self._pending:
+            key, item = self._pending.popitem()
+            self._execute(key, item['write_fn'], item['data'], item['callbacks'])
+
+    def _execute(self, key: str, write_fn: Callable[[Any], Any], data: Any,
+                 callbacks: List[Callable[[bool], None]] = ()):
+        """执行写入并通知回调 / Run one write and notify the callbacks"""
+        try:
+            ok = write_fn(data) is not False
+        except Exception as e:
+            ok = False
+            logging.error(f"Persistence write '{key}' failed: {e}")
+        self.stats['written' if ok else 'failed'] += 1
+        for callback in callbacks:
+            try:
+                callback(ok)
+            except Exception as e:
+                logging.error(f"Persistence callback for '{key}' failed: {e}")
@@ -1,14 +1,22 @@
 import pygame
-import time
 import logging
 from typing import Dict, List, Optional, Callable
+from .qte_timing import QTETimingEngine
+from .graphics_quality import graphics_quality
 
 class QTEManager:
-    def __init__(self, game_engine):
+    def __init__(self, game_engine, input_manager=None):
         self.game_engine = game_engine
+        # 共享的输入管理器；Game 构造时管理器尚未注册，因此由调用方传入
+        # Shared input manager; passed in by Game because managers are not registered yet at construction
+        self.input = input_manager or game_engine.get_manager('input')
         self.active_qte = None
+        self._timing = None
+        self._patterns = None
         self.input_buffer = []
         self.last_input_time = 0
+        # QTE 生成的存活粒子 / Live particles spawned by QTEs
+        self.effect_particles = []
         self.success_count = 0
         self.total_count = 0
         
@@ -39,6 +47,8 @@ class QTEManager:
                 'type': 'hold',
                 'key': pygame.K_r,  # 修正为小写
                 'duration': 1.5,
+                'window': 1.0,  # 开始按住的时限
+
                 'bonus': 2.0,
                 'visual_guide': True
             },
@@ -60,6 +70,15 @@ class QTEManager:
             }
         }
         
+        # QTE检查方法 / QTE check handlers
+        self.qte_checks = {
+            'press': self._check_press_qte,
+            'sequence': self._check_sequence_qte,
+            'hold': self._check_hold_qte,
+            'motion': self._check_motion_qte,
+            'multi_press': self._check_multi_press_qte
+        }
+        
         # QTE效果配置
         self.effect_config = {
             'perfect': {
@@ -97,15 +116,17 @@ class QTEManager:
             if qte_type not in self.qte_config:
                 return False
                 
+            # 计时窗口锚定在提示呈现的帧上 / Window is anchored to the frame that presents the prompt
             self.active_qte = {
                 'type': qte_type,
                 'config': self.qte_config[qte_type].copy(),
                 'character': character,
                 'callback': callback,
-                'start_time': time.time(),
-                'last_update': time.time(),
+                'anchor': self._get_timing().open_window(),
+                'opened_ns': self._get_timing().now_ns(),
                 'input_buffer': []
             }
+            self._get_patterns()
             
             # 创建视觉引导
             if self.active_qte['config'].get('visual_guide'):
@@ -135,30 +156,21 @@ class QTEManager:
             return
             
         try:
-            current_time = time.time()
-            elapsed = current_time - self.active_qte['last_update']
-            self.active_qte['last_update'] = current_time
-            
             qte_type = self.active_qte['config']['type']
             
             # 更新视觉引导
             if self.active_qte['config'].get('visual_guide'):
                 self._update_visual_guide(dt)
             
-            # 根据QTE类型调用对应的处理方法
-            if qte_type == 'press':
-                self._check_press_qte(dt)
-            elif qte_type == 'sequence':
-                self._check_sequence_qte(dt)
-            elif qte_type == 'hold':
-                self._check_hold_qte(dt)
-            elif qte_type == 'motion':
-                self._check_motion_qte(dt)
-            elif qte_type == 'multi_press':
-                self._check_multi_press_qte(dt)
+            # 根据QTE类型调用对应的处理方法（按键类由共享的模式自动机匹配）
+            self.qte_checks[qte_type](dt)
                 
-            # 检查超时
-            if current_time - self.active_qte['start_time'] > self.active_qte['config']['window']:
+            # 检查超时（长按开始后由松开或完成结束）
+            if not self.active_qte:
+                return
+            window = self.active_qte['config'].get('window')
+            holding = qte_type == 'hold' and self.active_qte['input_buffer']
+            if window and not holding and self._get_timing().is_expired(self.active_qte['anchor'], window):
                 self._handle_qte_result('miss')
                 
         except Exception as e:
@@ -167,57 +179,62 @@ class QTEManager:
 
     def _check_press_qte(self, dt: float) -> None:
         """检查按键QTE"""
-        for key in self.active_qte['config']['keys']:
-            if self.is_key_just_pressed(key):
-                timing = time.time() - self.active_qte['start_time']
-                window = self.active_qte['config']['window']
-                
-                if timing < window * self.rating_thresholds['perfect']:
-                    self._handle_qte_result('perfect')
-                elif timing < window * self.rating_thresholds['good']:
-                    self._handle_qte_result('good')
-                else:
-                    self._handle_qte_result('miss')
+        for index in range(len(self.active_qte['config']['keys'])):
+            match = self._get_qte_match(f"{self.active_qte['type']}:{index}")
+            if match:
+                # 使用事件到达时的时间戳评分，而非本帧更新的时间
+                rating, _ = self._get_timing().grade(
+                    self.active_qte['anchor'],
+                    match[1],
+                    self.active_qte['config']['window'],
+                    self.rating_thresholds
+                )
+                self._handle_qte_result(rating)
                 return
 
     def _check_sequence_qte(self, dt: float) -> None:
         """检查序列QTE"""
-        for key in self.active_qte['config']['keys']:
-            if self.is_key_just_pressed(key):
-                expected_key = self.active_qte['config']['keys'][len(self.input_buffer)]
-                if key != expected_key:
-                    self._handle_qte_result('miss')
-                    return
-                
-                self.input_buffer.append(key)
-                self.last_input_time = time.time()
-                self._create_key_feedback()
-                
-                if self.input_buffer == self.active_qte['config']['keys']:
-                    timing = time.time() - self.active_qte['start_time']
-                    window = self.active_qte['config']['window']
-                    if timing < window * self.rating_thresholds['perfect']:
-                        self._handle_qte_result('perfect')
-                    else:
-                        self._handle_qte_result('good')
-                elif len(self.input_buffer) > len(self.active_qte['config']['keys']):
-                    self._handle_qte_result('miss')
+        pattern_id = self.active_qte['type']
+        match = self._get_qte_match(pattern_id)
+        if match:
+            rating, _ = self._get_timing().grade(
+                self.active_qte['anchor'],
+                match[1],
+                self.active_qte['config']['window'],
+                self.rating_thresholds,
+                late_rating='good'
+            )
+            self._handle_qte_result(rating)
+            return
+            
+        # 每个按下的序列键都必须让进度前进一步，否则就是按错了（包括重复第一个键重新开始）
+        # Every sequence key pressed must advance the progress by one; anything
+        # else is a wrong key, including repeating the first key to restart
+        keys = self.active_qte['config']['keys']
+        pressed = sum(1 for key in self.input.get_pressed_keys() if key in keys)
+        if pressed:
+            previous = self.active_qte.get('progress', 0)
+            self._update_qte_progress(pattern_id)
+            if self.active_qte['progress'] - previous != pressed:
+                self._handle_qte_result('miss')
 
     def _check_hold_qte(self, dt: float) -> None:
         """检查长按QTE"""
-        key = self.active_qte['config']['key']
-        if not pygame.key.get_pressed()[key]:
-            self._handle_qte_result('miss')
+        if self._get_qte_match(self.active_qte['type']):
+            self._handle_qte_result('perfect')
             return
             
-        hold_time = time.time() - self.active_qte['start_time']
-        if hold_time >= self.active_qte['config']['duration']:
-            self._handle_qte_result('perfect')
+        # 按下后提前松开判定失败 / Releasing before the hold completes is a miss
+        key = self.active_qte['config']['key']
+        if self.input.is_key_just_released(key) and self.active_qte['input_buffer']:
+            self._handle_qte_result('miss')
+        elif self.input.is_key_just_pressed(key):
+            self.active_qte['input_buffer'].append(key)
 
     def _check_motion_qte(self, dt: float) -> None:
         """检查滑动QTE"""
         config = self.active_qte['config']
-        mouse_pos = pygame.mouse.get_pos()
+        mouse_pos = self.input.get_mouse_pos()
         
         if not hasattr(self, '_start_pos'):
             self._start_pos = mouse_pos
@@ -225,37 +242,75 @@ class QTEManager:
             
         dx = mouse_pos[0] - self._start_pos[0]
         if abs(dx) >= config['distance']:
-            timing = time.time() - self.active_qte['start_time']
-            window = config['window']
-            if timing < window * self.rating_thresholds['perfect']:
-                self._handle_qte_result('perfect')
-            else:
-                self._handle_qte_result('good')
+            rating, _ = self._get_timing().grade(
+                self.active_qte['anchor'],
+                self._get_timing().now_ns(),
+                config['window'],
+                self.rating_thresholds,
+                device='mouse',
+                late_rating='good'
+            )
+            self._handle_qte_result(rating)
 
     def _check_multi_press_qte(self, dt: float) -> None:
         """检查连击QTE"""
         config = self.active_qte['config']
-        current_time = time.time()
-        
-        if self.is_key_just_pressed(config['key']):
-            if not self.input_buffer:
-                self.input_buffer.append(current_time)
-                self._create_key_feedback()
-            else:
-                last_press = self.input_buffer[-1]
-                if current_time - last_press <= config['interval']:
-                    self.input_buffer.append(current_time)
-                    self._create_key_feedback()
-                    
-                    if len(self.input_buffer) == config['count']:
-                        timing = current_time - self.active_qte['start_time']
-                        window = config['window']
-                        if timing < window * self.rating_thresholds['perfect']:
-                            self._handle_qte_result('perfect')
-                        else:
-                            self._handle_qte_result('good')
-                else:
-                    self.input_buffer = [current_time]
+        pattern_id = self.active_qte['type']
+        match = self._get_qte_match(pattern_id)
+        if match:
+            rating, _ = self._get_timing().grade(
+                self.active_qte['anchor'],
+                match[1],
+                config.get('window', config['interval'] * config['count']),
+                self.rating_thresholds,
+                late_rating='good'
+            )
+            self._handle_qte_result(rating)
+        elif self.input.is_key_just_pressed(config['key']):
+            self._update_qte_progress(pattern_id)
+
+    def _get_patterns(self):
+        """获取共享的输入模式匹配器，首次使用时编译QTE定义
+        Get the shared pattern matcher, compiling QTE definitions on first use"""
+        if self._patterns is None:
+            self._patterns = self.input.patterns
+            self._register_patterns()
+        return self._patterns
+
+    def _register_patterns(self) -> None:
+        """把QTE配置注册为按键模式 / Register QTE configs as key patterns"""
+        for name, config in self.qte_config.items():
+            pattern_id = f"qte:{name}"
+            qte_type = config['type']
+            if qte_type == 'press':
+                # 任意一个键都可以完成 / Any of the keys completes it
+                for index, key in enumerate(config['keys']):
+                    self._patterns.register(f"{pattern_id}:{index}", [key])
+            elif qte_type == 'sequence':
+                self._patterns.register(pattern_id, config['keys'], window=config['window'])
+            elif qte_type == 'hold':
+                self._patterns.register(pattern_id, [config['key']], hold=config['duration'])
+            elif qte_type == 'multi_press':
+                self._patterns.register(
+                    pattern_id,
+                    [config['key']] * config['count'],
+                    max_interval=config['interval']
+                )
+
+    def _get_qte_match(self, name: str):
+        """获取当前QTE开始后完成的匹配 / Get a match completed since the active QTE opened"""
+        return self._get_patterns().get_match(f"qte:{name}", self.active_qte['opened_ns'])
+
+    def _update_qte_progress(self, name: str) -> bool:
+        """根据匹配进度创建按键反馈，返回模式是否仍可达成
+        Give key feedback as progress advances; returns whether the pattern is still reachable"""
+        patterns = self._get_patterns()
+        pattern_id = f"qte:{name}"
+        progress = patterns.get_progress(pattern_id, self.active_qte['opened_ns'])
+        if progress > self.active_qte.get('progress', 0):
+            self._create_key_feedback()
+        self.active_qte['progress'] = progress
+        return patterns.is_reachable(pattern_id, self.active_qte['opened_ns'])
 
     def _handle_qte_result(self, result: str) -> None:
         """处理QTE结果"""
@@ -321,14 +376,21 @@ class QTEManager:
         effect_config = self.effect_config[result]
         effect_manager = self.game_engine.get_manager('effect')
         
-        # 创建粒子效果
-        for _ in range(effect_config['particles']):
-            effect_manager.create_particle(
+        # 创建粒子效果：同时受 QTE 和特效的存活粒子上限约束
+        # Create particles, bounded by both the QTE and the effects live-particle caps
+        requested = effect_config['particles']
+        self.effect_particles = [particle for particle in self.effect_particles if not particle.is_dead()]
+        count = min(
+            graphics_quality.particle_budget('qte', requested, len(self.effect_particles)),
+            graphics_quality.particle_budget('effects', requested, len(effect_manager.particles))
+        )
+        for _ in range(count):
+            self.effect_particles.append(effect_manager.create_particle(
                 character.position.x,
                 character.position.y,
                 effect_config['color'],
                 scale=effect_config['scale']
-            )
+            ))
         
         # 屏幕效果
         if effect_config['screen_flash']:
@@ -381,26 +443,98 @@ class QTEManager:
     def _adjust_difficulty(self, success_rate: float) -> None:
         """根据玩家表现调整QTE难度"""
         if success_rate > 0.8:  # 成功率超过80%
-            for config in self.qte_config.values():
-                config['window'] *= 0.95  # 缩短时间窗口
-                if 'interval' in config:
-                    config['interval'] *= 0.95
+            scale = 0.95  # 缩短时间窗口
         elif success_rate < 0.4:  # 成功率低于40%
-            for config in self.qte_config.values():
-                config['window'] *= 1.05  # 延长时间窗口
-                if 'interval' in config:
-                    config['interval'] *= 1.05
+            scale = 1.05  # 延长时间窗口
+        else:
+            return
+            
+        for config in self.qte_config.values():
+            if 'window' in config:
+                config['window'] *= scale
+            if 'interval' in config:
+                config['interval'] *= scale
+                
+        # 时间约束改变后重新注册模式 / Re-register patterns with the new timing guards
+        if self._patterns is not None:
+            self._register_patterns()
 
     def _reset_qte(self) -> None:
         """重置QTE状态"""
+        if self.active_qte:
+            self._get_timing().close_window(self.active_qte['anchor'])
         self.active_qte = None
         self.input_buffer.clear()
         if hasattr(self, '_start_pos'):
             delattr(self, '_start_pos')
 
-    def is_key_just_pressed(self, key: int) -> bool:
-        """检查按键是否刚被按下"""
-        return pygame.key.get_pressed()[key] and not self.game_engine.input_manager.previous_keys[key]
+    def _get_timing(self) -> QTETimingEngine:
+        """获取共享的QTE计时引擎，首次使用时加载已保存的设备偏移
+        Get the shared timing engine, loading saved device offsets on first use"""
+        if self._timing is None:
+            self._timing = self.input.timing
+            data_manager = self.game_engine.get_manager('data')
+            offsets = data_manager.get_setting('input_offsets') if data_manager else None
+            if offsets:
+                self._timing.load_offsets(offsets)
+        return self._timing
+
+    def start_latency_calibration(self, device: str = 'keyboard') -> bool:
+        """开始输入延迟校准（设置界面中使用）/ Start input latency calibration, from the settings screen"""
+        if self.active_qte or device not in ('keyboard', 'mouse'):
+            return False
+        self._get_timing().start_calibration(device)
+        return True
+
+    def cancel_latency_calibration(self) -> None:
+        """取消校准 / Cancel calibration"""
+        self._get_timing().cancel_calibration()
+
+    def get_calibration_beat(self) -> Optional[float]:
+        """校准中已经过的节拍数，未校准时为 None / Beats elapsed in the calibration, None when idle"""
+        return self._get_timing().get_calibration_beat()
+
+    def get_calibration_device(self) -> Optional[str]:
+        """正在校准的设备 / Device being calibrated"""
+        calibration = self._get_timing().calibration
+        return calibration['device'] if calibration else None
+
+    def update_calibration(self) -> Optional[dict]:
+        """收集被校准设备的按键，结束时保存偏移
+        Collect presses from the device being calibrated and save the offset when done
+
+        校准结束（完成或超时）时返回 {'device', 'offset'}，offset 为秒数，样本不足时为 None；
+        进行中返回 None。
+        Returns {'device', 'offset'} when the calibration ends (completed or
+        timed out), offset in seconds or None without enough samples; None
+        while it is still running.
+        """
+        timing = self._get_timing()
+        calibration = timing.calibration
+        if not calibration:
+            return None
+        device = calibration['device']
+        if device == 'mouse':
+            presses = self.input.pressed_buttons.values()
+        else:
+            presses = [press_ns for key, press_ns in self.input.get_pressed_keys().items()
+                       if key != pygame.K_ESCAPE]
+            
+        done = False
+        for press_ns in sorted(presses):
+            if timing.record_calibration_press(press_ns):
+                done = True
+                break
+        if not done and not timing.is_calibration_expired():
+            return None
+            
+        offset = timing.finish_calibration()
+        if offset is not None:
+            logging.info(f"输入延迟校准完成 / Latency calibrated ({device}): {offset * 1000:.1f} ms")
+            data_manager = self.game_engine.get_manager('data')
+            if data_manager:
+                data_manager.set_setting('input_offsets', timing.get_offsets())
+        return {'device': device, 'offset': offset}
 
     def _update_visual_guide(self, dt: float) -> None:
         """更新视觉引导"""
@@ -409,7 +543,7 @@ class QTEManager:
             
         qte_display = self.game_engine.get_component('qte_display')
         if qte_display:
-            progress = (time.time() - self.active_qte['start_time']) / self.active_qte['config']['window']
+            progress = self._get_timing().elapsed(self.active_qte['anchor']) / self.active_qte['config']['window']
             qte_display.update(dt, progress)
 
     def _create_press_guide(self) -> None:
@@ -0,0 +1,180 @@
+import time
+import statistics
+from typing import Dict, List, Optional, Tuple
+
+NS_PER_SECOND = 1_000_000_000
+
+class QTETimingEngine:
+    """QTE计时引擎 / QTE timing engine
+
+    所有时间都使用 ``time.perf_counter_ns`` 的单调时间戳。QTE窗口锚定在提示第一次被
+    呈现到屏幕上的帧时间，按键以输入管理器从事件队列取出事件时的时间戳评分，并减去每个设备的
+    延迟偏移。pygame 2.6 的事件本身没有时间戳，因此精度取决于轮询：主循环在帧间等待时约每
+    1 ms 轮询一次，渲染期间到达的按键仍会晚到下一次轮询（最多一帧的工作时间）。
+    All times are monotonic ``time.perf_counter_ns`` timestamps. A QTE window
+    is anchored to the frame on which its prompt was first presented, and
+    presses are graded with the timestamp the input manager took when it
+    pulled the event off the queue, minus a per-device latency offset.
+    pygame 2.6 events carry no timestamp of their own, so precision depends
+    on polling: the main loop polls about every millisecond while it waits
+    between frames, but a press that arrives during rendering is still
+    stamped at the next poll, up to one frame's work time late.
+    """
+
+    # 校准设置 / Calibration settings
+    CALIBRATION_INTERVAL = 0.6  # 节拍间隔（秒） / Seconds between beats
+    CALIBRATION_BEATS = 8
+    CALIBRATION_TIMEOUT_BEATS = 20  # 超过这么多拍仍未完成就结束 / Give up after this many beats
+    MAX_OFFSET = 0.25           # 允许的最大偏移（秒） / Largest accepted offset in seconds
+
+    def __init__(self):
+        self.last_present_ns = time.perf_counter_ns()
+        self.frame_interval_ns = NS_PER_SECOND // 60
+
+        # 等待呈现的锚点 / Anchors waiting for the next presented frame
+        self._pending_anchors: List[dict] = []
+
+        # 每个设备的延迟偏移（纳秒） / Per-device latency offset in ns
+        self.device_offsets: Dict[str, int] = {'keyboard': 0, 'mouse': 0}
+
+        # 校准状态 / Calibration state
+        self.calibration = None
+
+    @staticmethod
+    def now_ns() -> int:
+        """当前单调时间戳 / Current monotonic timestamp"""
+        return time.perf_counter_ns()
+
+    def present_frame(self, timestamp_ns: Optional[int] = None):
+        """记录一帧已呈现（在 display.flip 之后调用）
+        Record that a frame was presented (call right after display.flip)"""
+        if timestamp_ns is None:
+            timestamp_ns = time.perf_counter_ns()
+        interval = timestamp_ns - self.last_present_ns
+        if interval > 0:
+            # 平滑的帧间隔，用于界面进度预测 / Smoothed frame interval for UI progress
+            self.frame_interval_ns += (interval - self.frame_interval_ns) // 8
+        self.last_present_ns = timestamp_ns
+
+        for anchor in self._pending_anchors:
+            anchor['time_ns'] = timestamp_ns
+            anchor['presented'] = True
+        self._pending_anchors.clear()
+
+    def open_window(self) -> dict:
+        """创建新的计时锚点 / Create a new timing anchor
+
+        锚点在下一帧呈现时固定为该帧的时间；在此之前使用创建时间。
+        The anchor snaps to the next presented frame; until then it uses the
+        creation time.
+        """
+        anchor = {'time_ns': time.perf_counter_ns(), 'presented': False}
+        self._pending_anchors.append(anchor)
+        return anchor
+
+    def close_window(self, anchor: dict):
+        """关闭计时锚点 / Close a timing anchor"""
+        if not anchor['presented'] and anchor in self._pending_anchors:
+            self._pending_anchors.remove(anchor)
+
+    def elapsed(self, anchor: dict, timestamp_ns: Optional[int] = None,
+                device: str = 'keyboard') -> float:
+        """计算锚点到给定时间的秒数（已扣除设备延迟）
+        Seconds from the anchor to the given time, minus device latency"""
+        if timestamp_ns is None:
+            timestamp_ns = time.perf_counter_ns()
+        offset = self.device_offsets.get(device, 0)
+        return max(0, timestamp_ns - offset - anchor['time_ns']) / NS_PER_SECOND
+
+    def grade(self, anchor: dict, timestamp_ns: int, window: float,
+              thresholds: Dict[str, float], device: str = 'keyboard',
+              late_rating: str = 'miss') -> Tuple[str, float]:
+        """按输入时间戳评分 / Grade a press by its input timestamp
+
+        返回 (评分, 用时秒数)。在锚点之前的按键（提示呈现之前）判为 'miss'。
+        Returns (rating, seconds taken). A press before the anchor, i.e.
+        before the prompt was presented, is a 'miss'.
+        """
+        timing = (timestamp_ns - self.device_offsets.get(device, 0) - anchor['time_ns']) / NS_PER_SECOND
+        if timing < 0:
+            return 'miss', timing
+        if timing < window * thresholds['perfect']:
+            return 'perfect', timing
+        if timing < window * thresholds['good']:
+            return 'good', timing
+        return late_rating, timing
+
+    def is_expired(self, anchor: dict, window: float) -> bool:
+        """检查窗口是否已超时 / Check whether a window has timed out"""
+        return self.elapsed(anchor, device='none') > window
+
+    def start_calibration(self, device: str = 'keyboard'):
+        """开始延迟校准：玩家跟随呈现的节拍按键
+        Start latency calibration: the player presses along with presented beats"""
+        self.calibration = {
+            'device': device,
+            'anchor': self.open_window(),
+            'interval_ns': int(self.CALIBRATION_INTERVAL * NS_PER_SECOND),
+            'samples': []
+        }
+
+    def get_calibration_beat(self, timestamp_ns: Optional[int] = None) -> Optional[float]:
+        """获取已经过的节拍数，整数部分是节拍序号，小数部分是拍内相位（用于绘制节拍提示）
+        Beats elapsed so far; the integer part is the beat index and the
+        fraction the phase within the beat, for drawing the cue"""
+        if not self.calibration:
+            return None
+        if timestamp_ns is None:
+            timestamp_ns = time.perf_counter_ns()
+        elapsed_ns = timestamp_ns - self.calibration['anchor']['time_ns']
+        return elapsed_ns / self.calibration['interval_ns']
+
+    def is_calibration_expired(self) -> bool:
+        """校准是否已超时 / Whether the calibration ran out of beats"""
+        beat = self.get_calibration_beat()
+        return beat is not None and beat > self.CALIBRATION_TIMEOUT_BEATS
+
+    def cancel_calibration(self):
+        """取消校准，不修改偏移 / Cancel calibration without touching the offsets"""
+        if self.calibration:
+            self.close_window(self.calibration['anchor'])
+        self.calibration = None
+
+    def record_calibration_press(self, timestamp_ns: int) -> bool:
+        """记录一次校准按键，返回是否已收集足够样本
+        Record a calibration press; returns True once enough samples exist"""
+        if not self.calibration:
+            return False
+        interval = self.calibration['interval_ns']
+        elapsed_ns = timestamp_ns - self.calibration['anchor']['time_ns']
+        beat = round(elapsed_ns / interval)
+        if beat <= 0:
+            return False
+        self.calibration['samples'].append(elapsed_ns - beat * interval)
+        return len(self.calibration['samples']) >= self.CALIBRATION_BEATS
+
+    def finish_calibration(self) -> Optional[float]:
+        """结束校准并应用偏移（秒），样本不足时返回 None
+        Finish calibration and apply the offset in seconds; None without enough samples"""
+        calibration = self.calibration
+        self.calibration = None
+        if not calibration or len(calibration['samples']) < self.CALIBRATION_BEATS // 2:
+            return None
+
+        # 中位数能抵抗个别误按 / The median ignores stray presses
+        offset_ns = int(statistics.median(calibration['samples']))
+        limit = int(self.MAX_OFFSET * NS_PER_SECOND)
+        offset_ns = max(-limit, min(limit, offset_ns))
+        self.device_offsets[calibration['device']] = offset_ns
+        return offset_ns / NS_PER_SECOND
+
+    def get_offsets(self) -> Dict[str, float]:
+        """获取设备偏移（秒），用于保存设置 / Device offsets in seconds, for saving settings"""
+        return {device: offset / NS_PER_SECOND for device, offset in self.device_offsets.items()}
+
+    def load_offsets(self, offsets: Dict[str, float]):
+        """加载设备偏移（秒） / Load device offsets in seconds"""
+        limit = self.MAX_OFFSET
+        for device, offset in offsets.items():
+            offset = max(-limit, min(limit, float(offset)))
+            self.device_offsets[device] = int(offset * NS_PER_SECOND)
@@ -0,0 +1,131 @@
+import logging
+from typing import Dict, List
+
+class QualityGovernor:
+    """自适应画质调节器 / Adaptive quality governor
+
+    根据帧耗时闭环调节一组画质旋钮（背景动画频率、粒子上限、天气密度、视差层数、内部渲染
+    比例），保持目标帧时间。旋钮按 LEVELS 组成一条单调的降级阶梯，每级只比上一级多牺牲一点画面。
+    Closes the loop on frame time to hold a target by turning a set of
+    quality knobs (background animation rate, particle cap, weather density,
+    parallax layer count, internal render scale). The knobs form the
+    monotonic degradation ladder LEVELS; each level gives up a little more
+    than the one before.
+
+    滞回 / Hysteresis:
+        - 信号是帧耗时的指数滑动平均 / the signal is an EMA of the frame time
+        - 高于 目标 × DEGRADE_RATIO 连续 DEGRADE_FRAMES 帧降一级
+          above target x DEGRADE_RATIO for DEGRADE_FRAMES frames: degrade one level
+        - 低于 目标 × RESTORE_RATIO 连续 restore_frames 帧恢复一级
+          below target x RESTORE_RATIO for restore_frames frames: restore one level
+        - 两个阈值之间是死区，每次调整后冷却 COOLDOWN_FRAMES 帧
+          between the thresholds is a dead band; every change is followed by COOLDOWN_FRAMES frames of cooldown
+        - 恢复后 PROBE_FRAMES 帧内又降级说明恢复失败，restore_frames 翻倍（最多 MAX_BACKOFF 倍）
+          degrading within PROBE_FRAMES of a restore means the restore failed and restore_frames doubles, up to MAX_BACKOFF
+    """
+
+    LEVELS: List[Dict] = [
+        {'background_rate': 1.0, 'particles': 1.0, 'weather': 1.0, 'parallax_layers': None, 'render_scale': 1.0},
+        {'background_rate': 0.5, 'particles': 1.0, 'weather': 1.0, 'parallax_layers': None, 'render_scale': 1.0},
+        {'background_rate': 0.5, 'particles': 0.75, 'weather': 0.75, 'parallax_layers': None, 'render_scale': 1.0},
+        {'background_rate': 0.5, 'particles': 0.75, 'weather': 0.75, 'parallax_layers': 4, 'render_scale': 1.0},
+        {'background_rate': 0.5, 'particles': 0.75, 'weather': 0.75, 'parallax_layers': 4, 'render_scale': 0.75},
+        {'background_rate': 0.5, 'particles': 0.5, 'weather': 0.5, 'parallax_layers': 3, 'render_scale': 0.75},
+        {'background_rate': 0.33, 'particles': 0.5, 'weather': 0.5, 'parallax_layers': 2, 'render_scale': 0.5},
+        {'background_rate': 0.33, 'particles': 0.25, 'weather': 0.3, 'parallax_layers': 2, 'render_scale': 0.5},
+    ]
+
+    EMA_ALPHA = 0.1
+    DEGRADE_RATIO = 1.05
+    RESTORE_RATIO = 0.75
+    DEGRADE_FRAMES = 30
+    RESTORE_FRAMES = 180
+    COOLDOWN_FRAMES = 45
+    PROBE_FRAMES = 300
+    MAX_BACKOFF = 16
+
+    def __init__(self, quality, render_scaler, target_frame_time: float = 1.0 / 90):
+        self.quality = quality
+        self.render_scaler = render_scaler
+        self.target_frame_time = target_frame_time
+        self.enabled = False
+        self.level = 0
+        self.average = None
+        self.restore_frames = self.RESTORE_FRAMES
+        self._over = 0
+        self._under = 0
+        self._cooldown = 0
+        self._since_restore = None
+
+    def set_enabled(self, enabled: bool):
+        """开启或关闭；关闭时恢复全部画质 / Turn on or off; turning off restores full quality"""
+        self.enabled = bool(enabled)
+        self.reset()
+
+    def reset(self):
+        """回到第 0 级并清空统计 / Go back to level 0 and clear the statistics"""
+        self.average = None
+        self.restore_frames = self.RESTORE_FRAMES
+        self._over = self._under = self._cooldown = 0
+        self._since_restore = None
+        self._set_level(0)
+
+    def observe_frame(self, frame_time: float):
+        """记录一帧的耗时（秒）并在需要时调整一级 / Record one frame's time in seconds and step a level if needed"""
+        if not self.enabled:
+            return
+        if self.average is None:
+            self.average = frame_time
+        else:
+            self.average += (frame_time - self.average) * self.EMA_ALPHA
+
+        if self._since_restore is not None:
+            self._since_restore += 1
+            if self._since_restore > self.PROBE_FRAMES:
+                # 恢复后的一级已经稳定 / The restored level held
+                self._since_restore = None
+                self.restore_frames = self.RESTORE_FRAMES
+
+        if self._cooldown > 0:
+            self._cooldown -= 1
+            return
+
+        target = self.target_frame_time
+        if self.average > target * self.DEGRADE_RATIO:
+            self._over += 1
+            self._under = 0
+        elif self.average < target * self.RESTORE_RATIO:
+            self._under += 1
+            self._over = 0
+        else:
+            self._over = self._under = 0
+
+        if self._over >= self.DEGRADE_FRAMES and self.level < len(self.LEVELS) - 1:
+            if self._since_restore is not None:
+                # 刚恢复就撑不住，下次等更久 / The restore did not hold; wait longer next time
+                self.restore_frames = min(self.restore_frames * 2, self.RESTORE_FRAMES * self.MAX_BACKOFF)
+                self._since_restore = None
+            self._step(self.level + 1)
+        elif self._under >= self.restore_frames and self.level > 0:
+            self._step(self.level - 1)
+            self._since_restore = 0
+
+    def _step(self, level: int):
+        self._over = self._under = 0
+        self._cooldown = self.COOLDOWN_FRAMES
+        logging.info(
+            f"画质调节 / Quality governor: level {self.level} -> {level} "
+            f"(avg {self.average * 1000:.1f} ms, target {self.target_frame_time * 1000:.1f} ms)"
+        )
+        self._set_level(level)
+
+    def _set_level(self, level: int):
+        self.level = level
+        knobs = self.LEVELS[level]
+        self.quality.set_limits(
+            particles=knobs['particles'],
+            weather=knobs['weather'],
+            parallax_layers=knobs['parallax_layers'],
+            background_rate=knobs['background_rate']
+        )
+        self.render_scaler.set_scale_limit(knobs['render_scale'])
@@ -0,0 +1,77 @@
+import pygame
+from operator import itemgetter
+from typing import Callable, Dict, List, Optional, Tuple
+
+class RenderQueue:
+    """分层渲染队列 / Layered render queue
+
+    组件每帧提交 (层, z, 表面, 位置, 区域, 混合标志) 命令，而不是各自调用 blit。flush 时按层
+    顺序绘制，层内按 z 稳定排序（相同 z 保持提交顺序），连续的 blit 命令合并为一次
+    Surface.blits 调用。仍需直接绘制的内容（粒子、图元特效）以回调命令提交，回调把 blit
+    批次分段。每层的命令数、像素数和批次数保存在 stats 中供性能监控读取。
+    Components submit (layer, z, surface, dest, area, flags) commands each
+    frame instead of blitting one at a time. flush draws the layers in
+    order, stable-sorts each layer by z (equal z keeps submission order) and
+    merges consecutive blits into one Surface.blits call. Anything that must
+    still draw directly (particles, primitive effects) is submitted as a
+    callback command, which splits the blit batch. Per-layer command, pixel
+    and batch counts are kept in stats for the performance monitor.
+    """
+
+    LAYERS = ('background', 'world', 'characters', 'effects', 'ui', 'overlay')
+
+    def __init__(self, layers: Tuple[str, ...] = LAYERS):
+        self.layers = tuple(layers)
+        self._commands: Dict[str, list] = {layer: [] for layer in self.layers}
+        self.stats: Dict[str, Dict[str, int]] = {
+            layer: {'commands': 0, 'pixels': 0, 'batches': 0} for layer in self.layers
+        }
+
+    def submit(self, layer: str, surface: pygame.Surface, dest, z: float = 0,
+               area: Optional[pygame.Rect] = None, flags: int = 0):
+        """提交一次 blit / Submit a blit"""
+        self._commands[layer].append((z, surface, dest, area, flags))
+
+    def draw(self, layer: str, draw_func: Callable[[pygame.Surface], None], z: float = 0):
+        """提交一个直接绘制的回调，调用时传入目标表面
+        Submit a callback that draws directly; it receives the target surface"""
+        self._commands[layer].append((z, draw_func, None, None, None))
+
+    def flush(self, target: pygame.Surface):
+        """按层绘制并清空队列 / Draw every layer and empty the queue"""
+        for layer in self.layers:
+            commands = self._commands[layer]
+            stats = self.stats[layer]
+            stats['commands'] = len(commands)
+            stats['pixels'] = 0
+            stats['batches'] = 0
+            if not commands:
+                continue
+
+            commands.sort(key=itemgetter(0))
+            batch: List[tuple] = []
+            pixels = 0
+            for _, source, dest, area, flags in commands:
+                if dest is None and callable(source):
+                    if batch:
+                        target.blits(batch, doreturn=False)
+                        stats['batches'] += 1
+                        batch = []
+                    source(target)
+                    continue
+                if area is not None:
+                    pixels += area[2] * area[3]
+                else:
+                    width, height = source.get_size()
+                    pixels += width * height
+                batch.append((source, dest, area, flags))
+            if batch:
+                target.blits(batch, doreturn=False)
+                stats['batches'] += 1
+            stats['pixels'] = pixels
+            commands.clear()
+
+    def clear(self):
+        """丢弃未绘制的命令 / Drop commands that were not drawn"""
+        for commands in self._commands.values():
+            commands.clear()
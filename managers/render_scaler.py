@@ -0,0 +1,121 @@
+import logging
+import pygame
+from typing import Optional, Tuple
+
+class RenderScaler:
+    """渲染缩放 / Render scaling
+
+    场景（背景、世界）绘制到尺寸为 窗口 × scale 的内部目标，每帧只放大一次到窗口；
+    界面和文字随后直接以窗口原生分辨率绘制，所以布局和鼠标坐标始终是窗口坐标。
+    scale 为 1.0 时不使用内部目标，没有任何额外开销。
+    The scene (backgrounds, world) is drawn into an internal target of
+    window size x scale and upscaled into the window once per frame; UI and
+    text are drawn afterwards at the window's native resolution, so layouts
+    and mouse coordinates always stay in window space. At scale 1.0 no
+    internal target is used and there is no extra cost.
+
+    界面通过实现 render_scene(scene) 选择加入：Game.render 在缩放生效时先调用它，放大后
+    再调用 render(screen)，界面的 render 此时应跳过已在场景中绘制的内容。
+    UIs opt in by implementing render_scene(scene): while scaling is active
+    Game.render calls it first, upscales, then calls render(screen), which
+    should skip whatever was already drawn into the scene.
+    """
+
+    SCALES = (0.5, 0.75, 1.0)
+    MIN_SCALE = 0.25
+
+    def __init__(self, window_size: Tuple[int, int], scale: float = 1.0, smooth: bool = False):
+        self.window_size = tuple(window_size)
+        self.smooth = smooth
+        # base_scale 是玩家设置，scale_limit 由画质调节器降低，实际比例取两者较小值
+        # base_scale is the player's setting, scale_limit is lowered by the quality
+        # governor; the effective scale is the smaller of the two
+        self.base_scale = 1.0
+        self.scale_limit = 1.0
+        self.scale = 1.0
+        self._scene: Optional[pygame.Surface] = None
+        self.set_scale(scale)
+
+    @property
+    def active(self) -> bool:
+        """内部目标是否生效 / Whether the internal target is in use"""
+        return self.scale < 1.0
+
+    @property
+    def scene_size(self) -> Tuple[int, int]:
+        """内部目标尺寸 / Internal target size"""
+        width, height = self.window_size
+        return max(1, round(width * self.scale)), max(1, round(height * self.scale))
+
+    def set_scale(self, scale) -> float:
+        """设置玩家选择的比例（限制在 MIN_SCALE..1.0）/ Set the player's scale, clamped to MIN_SCALE..1.0"""
+        self.base_scale = self._clamp(scale)
+        self._update_scale()
+        return self.base_scale
+
+    def set_scale_limit(self, limit) -> float:
+        """设置比例上限（画质调节器使用）/ Set the scale ceiling, used by the quality governor"""
+        self.scale_limit = self._clamp(limit)
+        self._update_scale()
+        return self.scale
+
+    def next_scale(self) -> float:
+        """切换到下一个预设比例（循环）/ Cycle to the next preset scale"""
+        larger = [s for s in self.SCALES if s > self.base_scale]
+        return self.set_scale(larger[0] if larger else self.SCALES[0])
+
+    def _clamp(self, scale) -> float:
+        try:
+            scale = float(scale)
+        except (TypeError, ValueError):
+            logging.warning(f"无效的渲染缩放 / Invalid render scale: {scale!r}")
+            scale = 1.0
+        return round(max(self.MIN_SCALE, min(1.0, scale)), 3)
+
+    def _update_scale(self):
+        scale = min(self.base_scale, self.scale_limit)
+        if scale != self.scale:
+            self.scale = scale
+            self._scene = None
+
+    def resize(self, window_size: Tuple[int, int]):
+        """窗口尺寸变化 / The window size changed"""
+        window_size = tuple(window_size)
+        if window_size != self.window_size:
+            self.window_size = window_size
+            self._scene = None
+
+    def get_scene(self) -> pygame.Surface:
+        """获取内部目标，每个比例只分配一次 / Get the internal target, allocated once per scale"""
+        scene = self._scene
+        if scene is None:
+            scene = pygame.Surface(self.scene_size)
+            if pygame.display.get_surface() is not None:
+                scene = scene.convert()
+            self._scene = scene
+        return scene
+
+    def present(self, window: pygame.Surface):
+        """把内部目标放大到窗口（直接写入窗口，不分配）
+        Upscale the internal target into the window, writing in place without allocating"""
+        scene = self.get_scene()
+        size = window.get_size()
+        if size != self.window_size:
+            self.resize(size)
+            scene = self.get_scene()
+        if self.smooth:
+            try:
+                pygame.transform.smoothscale(scene, size, window)
+                return
+            except ValueError:
+                # smoothscale 只支持 24/32 位表面 / smoothscale only supports 24/32-bit surfaces
+                self.smooth = False
+        pygame.transform.scale(scene, size, window)
+
+    def to_scene(self, pos):
+        """窗口坐标转为场景坐标 / Window coordinates to scene coordinates"""
+        return pos[0] * self.scale, pos[1] * self.scale
+
+    def to_window(self, pos):
+        """场景坐标转为窗口坐标 / Scene coordinates to window coordinates"""
+        return pos[0] / self.scale, pos[1] / self.scale
@@ -45,6 +45,7 @@ class ResourceManager:
         self.backgrounds = {}
         self.ui_elements = {}
         self.sounds = {}
+        self.sound_paths = {}
         self.music = {}
         self.icons = {}
         self.fx = {}
@@ -484,34 +485,25 @@ class ResourceManager:
     def load_sound(self, sound_name: str) -> Optional[pygame.mixer.Sound]:
         """加载音效 / Load sound effect"""
         try:
-            # 首先检查缓存
-            if sound_name in self.sounds:
-                return self.sounds[sound_name]
-                
             # 处理完整路径作为sound_name的情况
             if '/' in sound_name:
                 # 从路径中提取实际的音效名称
                 sound_name = sound_name.split('/')[-1].replace('.wav', '')
                 
-            # 从配置获取完整文件名
-            sound_file = AudioConfig.SOUND_EFFECTS.get(sound_name)
-            if not sound_file:
-                logging.warning(f"Sound name not found in config: {sound_name}")
-                return None
+            # 首先检查缓存
+            if sound_name in self.sounds:
+                return self.sounds[sound_name]
                 
-            # 构建正确的文件路径
-            sound_path = os.path.join(self.base_path, 'audio', 'sfx', sound_file)
-            
-            # 如果本地路径不存在，尝试从原始资源目录加载
-            if not os.path.exists(sound_path):
-                original_path = os.path.join(r"C:\Users\34275\.cursor-tutor\resources\audio\sfx", sound_file)
-                if os.path.exists(original_path):
-                    sound_path = original_path
-                else:
-                    logging.warning(f"Sound file not found: {sound_file}")
-                    return None
+            # 路径只解析一次，未找到的结果也会缓存
+            if sound_name in self.sound_paths:
+                sound_path = self.sound_paths[sound_name]
+            else:
+                sound_path = self._resolve_sound_path(sound_name)
+                self.sound_paths[sound_name] = sound_path
+            if not sound_path:
+                return None
                 
-            # 加载并缓存音效
+            # 加载并缓存音效，共享对象的音量即音效音量设置
             sound = pygame.mixer.Sound(sound_path)
             sound.set_volume(AudioConfig.SFX_VOLUME)
             self.sounds[sound_name] = sound
@@ -521,6 +513,26 @@ class ResourceManager:
             logging.error(f"Error loading sound {sound_name}: {e}")
             return None
 
+    def _resolve_sound_path(self, sound_name: str) -> Optional[str]:
+        """解析音效文件路径 / Resolve sound effect file path"""
+        # 从配置获取完整文件名
+        sound_file = AudioConfig.SOUND_EFFECTS.get(sound_name)
+        if not sound_file:
+            logging.warning(f"Sound name not found in config: {sound_name}")
+            return None
+            
+        # 构建正确的文件路径
+        sound_path = os.path.join(self.base_path, 'audio', 'sfx', sound_file)
+        
+        # 如果本地路径不存在，尝试从原始资源目录加载
+        if not os.path.exists(sound_path):
+            original_path = os.path.join(r"C:\Users\34275\.cursor-tutor\resources\audio\sfx", sound_file)
+            if os.path.exists(original_path):
+                return original_path
+            logging.warning(f"Sound file not found: {sound_file}")
+            return None
+        return sound_path
+
     def get_cached_sound(self, sound_name: str) -> Optional[pygame.mixer.Sound]:
         """获取已缓存的音效，如果不存在则加载 / Get cached sound, load if not exists"""
         if '/' in sound_name:
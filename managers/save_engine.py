@@ -0,0 +1,468 @@
+import os
+import json
+import time
+import zlib
+import struct
+import logging
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+class SaveFormatError(Exception):
+    """存档格式错误 / Save file format error"""
+    pass
+
+def write_atomic(path: str, data: bytes):
+    """写临时文件、fsync 并原子替换 / Write a temp file, fsync it and atomically replace"""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+    # 同步目录项，确保重命名落盘（Windows 不支持） / Sync the directory entry; unsupported on Windows
+    if hasattr(os, 'O_DIRECTORY'):
+        try:
+            dir_fd = os.open(os.path.dirname(path) or '.', os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError:
+            pass
+
+class SaveEngine:
+    """存档引擎 - 统一的版本化二进制存档格式
+    Save engine - one versioned binary save format for every save path.
+
+    文件结构 / File layout:
+        头部   <4s magic><H version><H section_count>
+        段表   每段 <B name_len><name><B codec><I offset><I length><I crc32>
+        数据段 紧凑 JSON，超过阈值时用 zlib 压缩
+        header        <4s magic><H version><H section_count>
+        section table per section <B name_len><name><B codec><I offset><I length><I crc32>
+        payloads      compact JSON, zlib-compressed above a size threshold
+
+    写入先写临时文件、fsync 后再原子替换，崩溃时旧存档保持完整，所以文件总是整体重写；
+    每个槽位缓存已编码的段，只有标记为脏的段重新编码，其余段直接拼接缓存的字节。
+    编码和索引更新持有引擎锁，文件写入和 fsync 只持有写入锁，所以 list_slots 等查询不会等待磁盘。
+    Writes go to a temp file, are fsynced and atomically renamed, so a crash
+    always leaves the previous save intact; the file is therefore always
+    rewritten whole. Encoded sections are cached per slot, only sections
+    marked dirty are encoded again and the rest are packed from the cached
+    bytes. Encoding and index updates hold the engine lock while file writes
+    and fsync hold only the write lock, so queries such as list_slots never
+    wait on the disk.
+
+    一个目录的所有槽位保存同一份游戏数据，所以写入一个槽位时的脏段也会记到其他已缓存的槽位上。
+    Every slot in a directory saves the same game data, so the dirty
+    sections of one slot's save are also recorded for the other cached slots.
+
+    每次保存同时更新槽位索引文件（元数据、缩略图和校验和），读档菜单只需读取这一个小文件。
+    Every save also updates a slot index file (metadata, thumbnail and
+    checksums), so the load menu only needs to read that one small file.
+    """
+
+    MAGIC = b'VVSV'
+    VERSION = 1
+    EXTENSION = '.sav'
+
+    HEADER = struct.Struct('<4sHH')
+    SECTION_ENTRY = struct.Struct('<BIII')
+
+    CODEC_JSON = 0
+    CODEC_ZLIB_JSON = 1
+    COMPRESS_THRESHOLD = 512  # 字节 / bytes
+
+    INDEX_FILE = 'slots.idx'
+    INDEX_VERSION = 1
+    THUMBNAIL_EXTENSION = '.thumb'
+    # 自动写入索引的段 / Sections copied into the index automatically
+    INDEX_SECTIONS = ('save_time', 'player_level', 'play_time', 'location')
+
+    # 每个存档目录共享一个引擎，索引和缓存只有一份 / One engine per save directory, so there is one index and cache
+    _shared: Dict[str, 'SaveEngine'] = {}
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def for_directory(cls, base_path: str = "saves") -> 'SaveEngine':
+        """获取存档目录共享的引擎 / Get the engine shared by everything saving to a directory"""
+        key = os.path.normcase(os.path.abspath(base_path))
+        with cls._shared_lock:
+            engine = cls._shared.get(key)
+            if engine is None:
+                engine = cls._shared[key] = cls(base_path)
+            return engine
+
+    def __init__(self, base_path: str = "saves"):
+        self.base_path = base_path
+        os.makedirs(base_path, exist_ok=True)
+
+        # 槽位 -> {段名: (编码, 数据)} / slot -> {section: (codec, payload)}
+        self._encoded: Dict[str, Dict[str, tuple]] = {}
+        self._dirty: Dict[str, set] = {}
+        self._lock = threading.RLock()
+        
+        # 写入锁按顺序执行文件写入；每个槽位的代号让较旧的写入不会覆盖较新的
+        # The write lock orders file writes; per-slot generations keep an older write from replacing a newer one
+        self._write_lock = threading.Lock()
+        self._generation: Dict[str, int] = {}
+        self._written: Dict[str, int] = {}
+
+        # 槽位索引，首次使用时加载 / Slot index, loaded on first use
+        self._index: Optional[Dict[str, dict]] = None
+
+    def slot_path(self, slot) -> str:
+        """获取槽位文件路径 / Get the file path of a slot"""
+        return os.path.join(self.base_path, f"save_{slot}{self.EXTENSION}")
+
+    def exists(self, slot) -> bool:
+        """检查槽位是否存在 / Check whether a slot exists"""
+        return os.path.exists(self.slot_path(slot))
+
+    def mark_dirty(self, slot, *sections: str):
+        """标记需要重新序列化的段 / Mark sections that must be serialized again"""
+        with self._lock:
+            self._dirty.setdefault(str(slot), set()).update(sections)
+
+    def save(self, slot, sections: Dict[str, Any], dirty: Optional[Iterable[str]] = None,
+             metadata: Optional[Dict[str, Any]] = None, thumbnail: Optional[bytes] = None) -> bool:
+        """保存槽位 / Save a slot
+
+        dirty 为 None 时所有段都重新编码；否则只重新编码 dirty 中的段、mark_dirty 标记过的段和尚未缓存的段，
+        其余段复用缓存的字节。
+        With dirty=None every section is encoded again. Otherwise only sections
+        in dirty, sections marked via mark_dirty and uncached sections are
+        encoded; the rest reuse their cached bytes.
+
+        metadata: 额外写入索引的元数据，None 时沿用上次的 / extra metadata stored in the index; None keeps the previous one
+        thumbnail: 缩略图原始数据，单独存放 / raw thumbnail bytes, stored next to the save
+        """
+        key = str(slot)
+        with self._lock:
+            cache = self._encoded.setdefault(key, {})
+            pending = self._dirty.pop(key, set())
+            if dirty is None:
+                pending.update(sections.keys())
+            else:
+                pending.update(dirty)
+
+            changed = False
+            for name, value in sections.items():
+                cached = cache.get(name)
+                if cached is not None and name not in pending:
+                    continue
+                encoded = self._encode_section(value)
+                if encoded != cached:
+                    changed = True
+                cache[name] = encoded
+            for name in [name for name in cache if name not in sections]:
+                del cache[name]
+                changed = True
+            
+            # 其他槽位缓存的这些段已经过时 / The other slots' cached copies of these sections are now stale
+            for other in self._encoded:
+                if other != key:
+                    self._dirty.setdefault(other, set()).update(pending)
+
+            # 没有传入元数据时沿用上次的元数据（如玩家摘要）/ Without new metadata, carry the previous one forward, e.g. the player summary
+            entry = self._get_index().get(key)
+            meta = dict(entry['meta']) if entry is not None and metadata is None else {}
+            meta.update((name, sections[name]) for name in self.INDEX_SECTIONS if name in sections)
+            if metadata:
+                meta.update(metadata)
+
+            # 内容未变化、文件存在且没有未完成的写入时跳过写入
+            # Skip the write when nothing changed, the file exists and no earlier write is outstanding
+            written = self._written.get(key, 0) == self._generation.get(key, 0)
+            data = None
+            if changed or entry is None or not written or not self.exists(slot):
+                data = self._pack(cache)
+                generation = self._generation[key] = self._generation.get(key, 0) + 1
+
+        # 文件写入和 fsync 不持有引擎锁 / File writes and fsync run without the engine lock
+        try:
+            with self._write_lock:
+                if thumbnail is not None:
+                    write_atomic(self._thumbnail_path(slot), thumbnail)
+                if data is not None:
+                    if self._generation.get(key) != generation:
+                        # 之后的保存会写出更新的内容 / A later save will write newer content
+                        return True
+                    write_atomic(self.slot_path(slot), data)
+                    self._written[key] = generation
+
+            with self._lock:
+                if data is not None:
+                    self._set_index_entry(key, len(data), zlib.crc32(data), meta, thumbnail)
+                elif thumbnail is not None or entry['meta'] != meta:
+                    self._set_index_entry(key, entry['size'], entry['crc'], meta, thumbnail)
+                else:
+                    return True
+            self._write_index()
+            return True
+        except Exception as e:
+            logging.error(f"Failed to write save slot {slot}: {e}")
+            # 写入失败时丢弃缓存，下次完整重写 / Drop the cache so the next save rewrites everything
+            with self._lock:
+                self._encoded.pop(key, None)
+            return False
+
+    def load(self, slot, sections: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """加载槽位（可只加载部分段） / Load a slot, optionally only some sections"""
+        path = self.slot_path(slot)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            table = self._unpack_table(data)
+            wanted = set(sections) if sections is not None else None
+
+            result = {}
+            cache = {}
+            for name, codec, offset, length, crc in table:
+                payload = data[offset:offset + length]
+                if zlib.crc32(payload) != crc:
+                    raise SaveFormatError(f"checksum mismatch in section '{name}'")
+                cache[name] = (codec, payload)
+                if wanted is None or name in wanted:
+                    result[name] = self._decode_section(codec, payload)
+
+            stale = False
+            with self._lock:
+                self._encoded[str(slot)] = cache
+                # 文件被外部修改（如云同步）时刷新索引 / Refresh the index after external changes such as cloud sync
+                entry = self._get_index().get(str(slot))
+                crc = zlib.crc32(data)
+                if entry is None or entry['crc'] != crc:
+                    meta = self._read_index_meta(table, data)
+                    if entry is not None:
+                        meta = dict(entry['meta'], **meta)
+                    self._set_index_entry(str(slot), len(data), crc, meta)
+                    stale = True
+            if stale:
+                self._write_index()
+            return result
+
+        except (SaveFormatError, struct.error, ValueError, zlib.error) as e:
+            logging.error(f"Corrupt save slot {slot}: {e}")
+            return None
+        except OSError as e:
+            logging.error(f"Failed to read save slot {slot}: {e}")
+            return None
+
+    def delete(self, slot) -> bool:
+        """删除槽位 / Delete a slot"""
+        key = str(slot)
+        with self._lock:
+            self._encoded.pop(key, None)
+            self._dirty.pop(key, None)
+            # 让尚未写出的旧保存失效 / Invalidate older saves that have not been written yet
+            self._generation[key] = self._written[key] = self._generation.get(key, 0) + 1
+            removed = self._get_index().pop(key, None) is not None
+        if removed:
+            self._write_index()
+        thumbnail_path = self._thumbnail_path(slot)
+        if os.path.exists(thumbnail_path):
+            os.remove(thumbnail_path)
+        path = self.slot_path(slot)
+        if os.path.exists(path):
+            os.remove(path)
+            return True
+        return False
+
+    def list_slots(self) -> Dict[str, Dict[str, Any]]:
+        """从索引列出所有槽位，不打开任何存档 / List every slot from the index without opening a save
+
+        返回 槽位 -> {'meta', 'size', 'crc', 'written_at', 'thumbnail'}。
+        Returns slot -> {'meta', 'size', 'crc', 'written_at', 'thumbnail'}.
+        """
+        with self._lock:
+            return {slot: dict(entry) for slot, entry in self._get_index().items()}
+
+    def get_metadata(self, slot) -> Optional[Dict[str, Any]]:
+        """从索引获取槽位元数据 / Get a slot's metadata from the index"""
+        with self._lock:
+            entry = self._get_index().get(str(slot))
+            return dict(entry['meta']) if entry else None
+
+    def latest_slot(self) -> Optional[str]:
+        """最近写入的槽位 / The most recently written slot"""
+        with self._lock:
+            index = self._get_index()
+            if not index:
+                return None
+            return max(index, key=lambda slot: index[slot]['written_at'])
+
+    def load_thumbnail(self, slot) -> Optional[bytes]:
+        """读取并校验槽位缩略图 / Read and verify a slot's thumbnail"""
+        with self._lock:
+            entry = self._get_index().get(str(slot))
+        if not entry or not entry.get('thumbnail'):
+            return None
+        try:
+            with open(self._thumbnail_path(slot), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        if zlib.crc32(data) != entry['thumbnail']['crc']:
+            logging.warning(f"Thumbnail checksum mismatch in slot {slot}")
+            return None
+        return data
+
+    def rebuild_index(self):
+        """扫描存档目录重建索引 / Rebuild the index by scanning the save directory
+
+        只解码索引需要的段。索引缺失或损坏时自动调用。
+        Only the sections the index needs are decoded. Called automatically
+        when the index is missing or corrupt.
+        """
+        with self._lock:
+            self._rebuild_index_locked()
+        self._write_index()
+
+    def _rebuild_index_locked(self):
+        """在内存中重建索引（调用方持有锁）/ Rebuild the index in memory; the caller holds the lock"""
+        old_index = self._index or {}
+        self._index = {}
+        prefix, suffix = "save_", self.EXTENSION
+        for file in os.listdir(self.base_path):
+            if not (file.startswith(prefix) and file.endswith(suffix)):
+                continue
+            slot = file[len(prefix):-len(suffix)]
+            path = os.path.join(self.base_path, file)
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                meta = self._read_index_meta(self._unpack_table(data), data)
+            except (SaveFormatError, struct.error, ValueError, zlib.error, OSError) as e:
+                logging.error(f"Skipping unreadable save slot {slot}: {e}")
+                continue
+            if slot in old_index:
+                meta = dict(old_index[slot]['meta'], **meta)
+            entry = {
+                'size': len(data),
+                'crc': zlib.crc32(data),
+                'written_at': os.path.getmtime(path),
+                'meta': meta
+            }
+            thumbnail_path = self._thumbnail_path(slot)
+            if os.path.exists(thumbnail_path):
+                with open(thumbnail_path, 'rb') as f:
+                    thumbnail = f.read()
+                entry['thumbnail'] = {'size': len(thumbnail), 'crc': zlib.crc32(thumbnail)}
+            self._index[slot] = entry
+
+    def _get_index(self) -> Dict[str, dict]:
+        """获取槽位索引（调用方持有锁）/ Get the slot index; the caller holds the lock"""
+        if self._index is None:
+            path = os.path.join(self.base_path, self.INDEX_FILE)
+            try:
+                with open(path, 'rb') as f:
+                    index = json.loads(f.read().decode('utf-8'))
+                if index.get('version') != self.INDEX_VERSION:
+                    raise ValueError(f"unsupported index version {index.get('version')}")
+                self._index = index['slots']
+            except FileNotFoundError:
+                self._rebuild_index_locked()
+            except (OSError, ValueError, KeyError, AttributeError) as e:
+                logging.warning(f"Rebuilding corrupt save index: {e}")
+                self._rebuild_index_locked()
+        return self._index
+
+    def _set_index_entry(self, slot: str, size: int, crc: int, meta: Dict[str, Any],
+                         thumbnail: Optional[bytes] = None):
+        """在内存中更新一个槽位的索引项（调用方持有锁）/ Update one slot's index entry in memory; the caller holds the lock"""
+        index = self._get_index()
+        entry = {'size': size, 'crc': crc, 'written_at': time.time(), 'meta': meta}
+        if thumbnail is not None:
+            entry['thumbnail'] = {'size': len(thumbnail), 'crc': zlib.crc32(thumbnail)}
+        elif slot in index and 'thumbnail' in index[slot]:
+            entry['thumbnail'] = index[slot]['thumbnail']
+        index[slot] = entry
+
+    def _write_index(self):
+        """原子写入索引文件（调用方不能持有引擎锁）/ Atomically write the index file; the caller must not hold the engine lock
+
+        在写入锁内序列化，所以最后写出的总是最新的索引。
+        Serialized inside the write lock, so the last write is always the newest index.
+        """
+        with self._write_lock:
+            with self._lock:
+                data = json.dumps({'version': self.INDEX_VERSION, 'slots': self._get_index()},
+                                  ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            write_atomic(os.path.join(self.base_path, self.INDEX_FILE), data)
+
+    def _read_index_meta(self, table: list, data: bytes) -> Dict[str, Any]:
+        """从存档中解码索引需要的段 / Decode the sections the index needs from a save"""
+        meta = {}
+        for name, codec, offset, length, crc in table:
+            if name in self.INDEX_SECTIONS:
+                meta[name] = self._decode_section(codec, data[offset:offset + length])
+        return meta
+
+    def _thumbnail_path(self, slot) -> str:
+        """获取缩略图文件路径 / Get the thumbnail file path of a slot"""
+        return os.path.join(self.base_path, f"save_{slot}{self.THUMBNAIL_EXTENSION}")
+
+    def _encode_section(self, value: Any) -> tuple:
+        """编码单个段 / Encode one section"""
+        payload = json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        if len(payload) > self.COMPRESS_THRESHOLD:
+            return self.CODEC_ZLIB_JSON, zlib.compress(payload, 1)
+        return self.CODEC_JSON, payload
+
+    def _decode_section(self, codec: int, payload: bytes) -> Any:
+        """解码单个段 / Decode one section"""
+        if codec == self.CODEC_ZLIB_JSON:
+            payload = zlib.decompress(payload)
+        elif codec != self.CODEC_JSON:
+            raise SaveFormatError(f"unknown section codec {codec}")
+        return json.loads(payload.decode('utf-8'))
+
+    def _pack(self, sections: Dict[str, tuple]) -> bytes:
+        """打包头部、段表和数据 / Pack header, section table and payloads"""
+        names = [name.encode('utf-8') for name in sections]
+        table_size = sum(1 + len(name) + self.SECTION_ENTRY.size for name in names)
+        offset = self.HEADER.size + table_size
+
+        table = bytearray()
+        for name, (codec, payload) in zip(names, sections.values()):
+            table += struct.pack('<B', len(name)) + name
+            table += self.SECTION_ENTRY.pack(codec, offset, len(payload), zlib.crc32(payload))
+            offset += len(payload)
+
+        header = self.HEADER.pack(self.MAGIC, self.VERSION, len(names))
+        return b''.join([header, bytes(table)] + [entry[1] for entry in sections.values()])
+
+    def _unpack_table(self, data: bytes) -> list:
+        """解析头部和段表；截断或损坏时抛出 SaveFormatError
+        Parse header and section table, raising SaveFormatError when truncated or corrupt"""
+        if len(data) < self.HEADER.size:
+            raise SaveFormatError("truncated header")
+        magic, version, count = self.HEADER.unpack_from(data, 0)
+        if magic != self.MAGIC:
+            raise SaveFormatError("not a save file")
+        if version > self.VERSION:
+            raise SaveFormatError(f"unsupported save version {version}")
+
+        table = []
+        position = self.HEADER.size
+        for _ in range(count):
+            if position >= len(data):
+                raise SaveFormatError("truncated section table")
+            name_len = data[position]
+            if position + 1 + name_len + self.SECTION_ENTRY.size > len(data):
+                raise SaveFormatError("truncated section table")
+            try:
+                name = data[position + 1:position + 1 + name_len].decode('utf-8')
+            except UnicodeDecodeError:
+                raise SaveFormatError("corrupt section name")
+            position += 1 + name_len
+            codec, offset, length, crc = self.SECTION_ENTRY.unpack_from(data, position)
+            position += self.SECTION_ENTRY.size
+            if offset + length > len(data):
+                raise SaveFormatError(f"truncated section '{name}'")
+            table.append((name, codec, offset, length, crc))
+        return table
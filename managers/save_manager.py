@@ -1,23 +1,27 @@
 import os
 import json
 from datetime import datetime
+from .save_engine import SaveEngine
 
 class SaveManager:
     def __init__(self):
         self.save_dir = "saves"
         os.makedirs(self.save_dir, exist_ok=True)
+        # 与数据管理器共享同一目录的引擎 / Share the directory's engine with the data manager
+        self.engine = SaveEngine.for_directory(self.save_dir)
     
     def load_latest_save(self):
-        """加载最新存档 / Load latest save"""
+        """加载最新存档（由槽位索引确定）/ Load latest save, found through the slot index"""
         try:
+            slot = self.engine.latest_slot()
+            if slot is not None:
+                return self.engine.load(slot)
+            
+            # 兼容旧版 JSON 存档 / Fall back to legacy JSON saves
             save_files = [f for f in os.listdir(self.save_dir) if f.endswith('.json')]
             if not save_files:
                 return None
-            
-            # 获取最新的存档文件
             latest_save = max(save_files, key=lambda x: os.path.getmtime(os.path.join(self.save_dir, x)))
-            
-            # 加载存档数据
             with open(os.path.join(self.save_dir, latest_save), 'r', encoding='utf-8') as f:
                 return json.load(f)
         except Exception as e:
@@ -28,12 +32,7 @@ class SaveManager:
         """保存游戏 / Save game"""
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            save_file = os.path.join(self.save_dir, f"save_{timestamp}.json")
-            
-            with open(save_file, 'w', encoding='utf-8') as f:
-                json.dump(game_state, f, indent=4, ensure_ascii=False)
-            
-            return True
+            return self.engine.save(timestamp, game_state)
         except Exception as e:
             print(f"Error saving game: {e}")
-            return False
\ No newline at end of file
+            return False
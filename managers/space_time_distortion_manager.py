@@ -5,6 +5,8 @@ import time
 class SpaceTimeDistortionManager:
     def __init__(self, game_engine):
         self.game_engine = game_engine
+        # 共享的输入管理器 / Shared input manager
+        self.input = game_engine.get_manager('input')
         self.distortions = {
             'active': False,
             'current_distortions': [],
@@ -54,7 +56,7 @@ class SpaceTimeDistortionManager:
                 self._update_distortion_effect(distortion, dt)
                 
         # 检查触发条件 / Check trigger condition
-        if self.is_key_just_pressed(pygame.K_D):
+        if self.input.is_key_just_pressed(pygame.K_D):
             self._trigger_distortion()
             
     def _trigger_distortion(self):
@@ -195,9 +197,6 @@ class SpaceTimeDistortionManager:
             return 1
         return x * x * (3 - 2 * x)
         
-    def is_key_just_pressed(self, key):
-        # Implement the logic to check if a key is just pressed
-        pass
         
     def _create_distortion_animation(self, distortion: dict):
         """创建扭曲动画 / Create distortion animation"""
@@ -0,0 +1,220 @@
+import time
+from array import array
+from typing import Dict, List, Optional
+
+class StateSnapshotEngine:
+    """战斗状态快照引擎 / Battle state snapshot engine
+
+    把战斗状态（角色属性、技能冷却、增益/状态效果、行动顺序、随机数位置）捕获为紧凑的
+    元组，存入固定容量的环形缓冲。与上一个快照相同的部分直接共享同一个对象（写时复制），
+    所以每个快照只为真正变化的角色付出内存，恢复时只需把元组写回对象。
+    Captures battle state (character stats, skill cooldowns, buffs and status
+    effects, turn order, RNG position) as compact tuples in a fixed-capacity
+    ring. Anything equal to the previous snapshot shares the same object
+    (copy-on-write), so a snapshot only pays for the characters that
+    actually changed, and restoring just writes the tuples back.
+    """
+
+    # 捕获的角色标量属性 / Scalar character attributes captured
+    CHARACTER_FIELDS = (
+        'hp', 'max_hp', 'atk', 'def_', 'spd', 'crt', 'evd', 'level', 'exp',
+        'def_bonus', 'crit_bonus', 'dmg_bonus', 'evd_bonus', 'combo', 'morale'
+    )
+    # 捕获的角色子系统字典 / Character sub-system dicts captured
+    SYSTEM_FIELDS = ('threat_system', 'rage_system', 'focus_system')
+    # 捕获的效果列表 / Effect lists captured
+    EFFECT_FIELDS = ('buffs', 'status_effects')
+    # 捕获的战斗状态键 / Battle state keys captured
+    BATTLE_STATE_KEYS = (
+        'phase', 'combo_count', 'current_wave', 'boss_appeared',
+        'perfect_qte_streak', 'current_weather'
+    )
+
+    # 恢复后通过战斗系统的事件总线发出，依赖战斗状态的缓存（如 AI 黑板）据此失效
+    # Raised on the battle system's event bus after a restore, so caches built on battle state (e.g. the AI blackboard) drop themselves
+    RESTORE_EVENT = 'state_restored'
+
+    _MISSING = object()
+
+    def __init__(self, capacity: Optional[int] = None, seconds: float = 10.0, rate: float = 10.0):
+        """capacity: 快照数量；未指定时为 seconds * rate
+        capacity: number of snapshots; defaults to seconds * rate
+        rate: 每秒最多捕获的快照数 / most snapshots captured per second"""
+        self.capacity = capacity or max(1, int(seconds * rate))
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+
+        self._ring: List[Optional[tuple]] = [None] * self.capacity
+        self._next = 0
+        self._count = 0
+        self._last_capture = float('-inf')
+
+        # 上一个快照的各部分，用于结构共享 / Parts of the last snapshot, for structural sharing
+        self._previous_characters: Dict[int, tuple] = {}
+        self._previous_battle: Optional[tuple] = None
+        self._previous_rng: Optional[tuple] = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def capture(self, battle_system, timestamp: Optional[float] = None, force: bool = False) -> bool:
+        """捕获快照（按 rate 限流，force 时总是捕获）/ Capture a snapshot, throttled to rate unless forced"""
+        if timestamp is None:
+            timestamp = time.time()
+        if not force and timestamp - self._last_capture < self.interval:
+            return False
+        self._last_capture = timestamp
+
+        characters = []
+        current: Dict[int, tuple] = {}
+        for character in list(battle_system.player_team) + list(battle_system.enemy_team):
+            record = self._capture_character(character)
+            previous = self._previous_characters.get(id(character))
+            if previous is not None and previous == record:
+                record = previous
+            current[id(character)] = record
+            characters.append(record)
+        self._previous_characters = current
+
+        battle = (
+            tuple(battle_system.player_team),
+            tuple(battle_system.enemy_team),
+            tuple(battle_system.turn_order),
+            battle_system.current_turn,
+            tuple(battle_system.battle_state.get(key) for key in self.BATTLE_STATE_KEYS)
+        )
+        if battle == self._previous_battle:
+            battle = self._previous_battle
+        self._previous_battle = battle
+
+        rng = self._capture_rng(getattr(battle_system, 'rng', None))
+
+        self._ring[self._next] = (timestamp, tuple(characters), battle, rng)
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+        return True
+
+    def restore(self, battle_system, seconds_ago: Optional[float] = None, steps: int = 1,
+                now: Optional[float] = None) -> bool:
+        """恢复快照 / Restore a snapshot
+
+        seconds_ago: 恢复到不晚于这么多秒之前的最新快照（不足时用最早的快照）
+        steps: 未指定 seconds_ago 时回退的快照数，1 表示最近一个
+        seconds_ago: restore the newest snapshot at least this many seconds
+        old, or the oldest one if history is shorter
+        steps: without seconds_ago, how many snapshots to step back; 1 is the latest
+        """
+        if not self._count:
+            return False
+
+        if seconds_ago is not None:
+            if now is None:
+                now = time.time()
+            target = now - seconds_ago
+            steps = self._count
+            for back in range(1, self._count + 1):
+                if self._at(back)[0] <= target:
+                    steps = back
+                    break
+        steps = max(1, min(steps, self._count))
+
+        snapshot = self._at(steps)
+        self._apply(battle_system, snapshot)
+
+        # 丢弃比恢复点更新的快照 / Drop snapshots newer than the restore point
+        for _ in range(steps - 1):
+            self._next = (self._next - 1) % self.capacity
+            self._ring[self._next] = None
+        self._count -= steps - 1
+        self._previous_characters = {}
+        self._previous_battle = None
+        self._last_capture = snapshot[0]
+
+        event_system = getattr(battle_system, 'event_system', None)
+        if event_system is not None:
+            event_system.trigger_event(self.RESTORE_EVENT, battle_system)
+        return True
+
+    def clear(self):
+        """清空历史 / Clear the history"""
+        self._ring = [None] * self.capacity
+        self._next = 0
+        self._count = 0
+        self._last_capture = float('-inf')
+        self._previous_characters = {}
+        self._previous_battle = None
+        self._previous_rng = None
+
+    def _at(self, back: int) -> tuple:
+        """获取倒数第 back 个快照 / Get the snapshot back steps from the newest"""
+        return self._ring[(self._next - back) % self.capacity]
+
+    def _capture_character(self, character) -> tuple:
+        """捕获单个角色 / Capture one character"""
+        missing = self._MISSING
+        fields = tuple(getattr(character, name, missing) for name in self.CHARACTER_FIELDS)
+
+        skills = getattr(character, 'skills', None)
+        cooldowns = ()
+        if isinstance(skills, dict):
+            cooldowns = tuple(
+                (name, skill.get('current_cooldown', 0)) for name, skill in skills.items()
+                if isinstance(skill, dict)
+            )
+
+        systems = tuple(
+            tuple(system.items()) if isinstance(system, dict) else None
+            for system in (getattr(character, name, None) for name in self.SYSTEM_FIELDS)
+        )
+        effects = tuple(
+            tuple(tuple(effect.items()) if isinstance(effect, dict) else effect for effect in effect_list)
+            if isinstance(effect_list, list) else None
+            for effect_list in (getattr(character, name, None) for name in self.EFFECT_FIELDS)
+        )
+        return (character, fields, cooldowns, systems, effects)
+
+    def _capture_rng(self, rng) -> Optional[tuple]:
+        """捕获随机数状态（未变化时共享）/ Capture the RNG state, shared while unchanged"""
+        if rng is None:
+            return None
+        version, internal, gauss = rng.getstate()
+        previous = self._previous_rng
+        if previous is not None and previous[2] == gauss and previous[1].tolist() == list(internal):
+            return previous
+        # 624 个 32 位字存为 array 只占 2.5KB / 624 32-bit words take 2.5KB as an array
+        state = (version, array('I', internal), gauss)
+        self._previous_rng = state
+        return state
+
+    def _apply(self, battle_system, snapshot: tuple):
+        """把快照写回战斗系统 / Write a snapshot back into the battle system"""
+        _, characters, battle, rng = snapshot
+        missing = self._MISSING
+
+        for character, fields, cooldowns, systems, effects in characters:
+            for name, value in zip(self.CHARACTER_FIELDS, fields):
+                if value is not missing:
+                    setattr(character, name, value)
+            skills = getattr(character, 'skills', None)
+            for name, cooldown in cooldowns:
+                skills[name]['current_cooldown'] = cooldown
+            for name, items in zip(self.SYSTEM_FIELDS, systems):
+                if items is not None:
+                    system = getattr(character, name)
+                    system.clear()
+                    system.update(items)
+            for name, effect_list in zip(self.EFFECT_FIELDS, effects):
+                if effect_list is not None:
+                    setattr(character, name, [
+                        dict(effect) if isinstance(effect, tuple) else effect for effect in effect_list
+                    ])
+
+        player_team, enemy_team, turn_order, current_turn, state_values = battle
+        battle_system.player_team[:] = player_team
+        battle_system.enemy_team[:] = enemy_team
+        battle_system.turn_order[:] = turn_order
+        battle_system.current_turn = current_turn
+        battle_system.battle_state.update(zip(self.BATTLE_STATE_KEYS, state_values))
+
+        if rng is not None and getattr(battle_system, 'rng', None) is not None:
+            version, internal, gauss = rng
+            battle_system.rng.setstate((version, tuple(internal), gauss))
@@ -0,0 +1,383 @@
+import os
+import json
+import time
+import zlib
+import struct
+import logging
+import threading
+from array import array
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .save_engine import write_atomic
+from .persistence_worker import PersistenceWorker, snapshot
+
+class StatsWarehouse:
+    """统计数据仓库 / Statistics warehouse
+
+    每条战斗事实（伤害、暴击、QTE评分、回合数、天气……）按列写入内存缓冲，满 CHUNK_ROWS
+    行后每列单独 zlib 压缩写成一个块文件。写入时同时更新按会话、日期、职业和全局汇总的
+    预聚合（次数、总和、最小值、最大值），成就检查和统计界面以 O(1) 读取汇总，不再扫描历史。
+    Every battle fact (damage, crit, QTE rating, turns, weather, ...) is
+    buffered column by column; every CHUNK_ROWS rows each column is zlib
+    compressed into one chunk file. Recording a fact also updates
+    pre-aggregated rollups (count, sum, min, max) per session, day,
+    character class and overall, so achievement checks and stats screens
+    read rollups in O(1) instead of scanning history.
+
+    缓冲行的汇总单独累计，写出块时才并入 rollups 并随块一起写入汇总文件，所以磁盘上的汇总
+    只统计已写出的行，崩溃后汇总和块始终一致；查询时合并两部分。
+    Rollups of buffered rows are kept apart and merged into rollups when
+    their chunk is written, and the rollup file is written with every
+    chunk, so the rollups on disk count only flushed rows and always match
+    the chunks after a crash; queries combine the two.
+
+    传入 persistence 时，满块的列缓冲被冻结后交给后台写盘线程压缩和写入，游戏线程只做追加；
+    写出之前冻结的块仍从内存读取。
+    With a persistence worker, a full chunk's column buffers are frozen and
+    handed to the background writer for compression and writing, so the
+    game thread only appends; frozen chunks are read from memory until they
+    are written.
+
+    列以 array.array 返回，支持缓冲区协议，分析工具可以用 numpy.asarray 零拷贝读取。
+    Columns are returned as array.array, which supports the buffer protocol,
+    so analytics can read them zero-copy with numpy.asarray.
+
+    块文件 / Chunk file:
+        <4s magic><I rows><H columns>，每列 <B name_len><name><c typecode><I length> + 压缩数据
+        <4s magic><I rows><H columns>, per column <B name_len><name><c typecode><I length> + compressed data
+    """
+
+    MAGIC = b'VVST'
+    CHUNK_HEADER = struct.Struct('<4sIH')
+    COLUMN_ENTRY = struct.Struct('<cI')
+    CHUNK_ROWS = 4096
+    ROLLUP_FILE = 'rollups.json'
+
+    # 列定义：名称 -> array 类型码 / Column schema: name -> array typecode
+    COLUMNS = {
+        'timestamp': 'd',
+        'session': 'I',
+        'day': 'I',
+        'battle': 'I',
+        'event': 'H',
+        'character_class': 'H',
+        'weather': 'H',
+        'value': 'd'
+    }
+    # 字典编码的列 / Dictionary-encoded columns
+    DICTIONARY_COLUMNS = ('event', 'character_class', 'weather')
+
+    def __init__(self, base_path: str, persistence: Optional[PersistenceWorker] = None):
+        self.base_path = base_path
+        os.makedirs(base_path, exist_ok=True)
+        self._lock = threading.RLock()
+        # 后台写盘线程，None 时同步写入 / Background writer; None writes synchronously
+        self.persistence = persistence
+
+        self.dictionaries: Dict[str, List[str]] = {name: [] for name in self.DICTIONARY_COLUMNS}
+        self._codes: Dict[str, Dict[str, int]] = {name: {} for name in self.DICTIONARY_COLUMNS}
+
+        # 已写出行的汇总：范围 -> 键 -> 事件 -> [次数, 总和, 最小值, 最大值]
+        # Rollups of flushed rows: scope -> key -> event -> [count, sum, min, max]
+        self.rollups: Dict[str, Dict[str, Dict[str, list]]] = self._empty_rollups()
+        # 缓冲行的汇总，写出块时并入 rollups / Rollups of buffered rows, merged into rollups when the chunk is written
+        self._pending_rollups = self._empty_rollups()
+        self.chunk_count = 0
+        self.session = 0
+
+        self._buffer = {name: array(code) for name, code in self.COLUMNS.items()}
+        self._rollups_dirty = False
+        # 已冻结、尚未写出的块：序号 -> 列；写入失败的块在下次提交时重试
+        # Frozen chunks not written yet: index -> columns; failed chunks are retried with the next submission
+        self._unwritten: Dict[int, Dict[str, array]] = {}
+        self._failed_chunks = set()
+
+        self._load()
+        self.session += 1
+        self._rollups_dirty = True
+
+    # ---- 写入 / Recording ----
+
+    def record(self, event: str, value: float = 1.0, character_class: str = '',
+               weather: str = '', battle: int = 0, timestamp: Optional[float] = None):
+        """记录一条事实并更新汇总 / Record one fact and update the rollups"""
+        if timestamp is None:
+            timestamp = time.time()
+        day = date.fromtimestamp(timestamp).toordinal()
+
+        with self._lock:
+            buffer = self._buffer
+            buffer['timestamp'].append(timestamp)
+            buffer['session'].append(self.session)
+            buffer['day'].append(day)
+            buffer['battle'].append(battle)
+            buffer['event'].append(self._encode('event', event))
+            buffer['character_class'].append(self._encode('character_class', character_class))
+            buffer['weather'].append(self._encode('weather', weather))
+            buffer['value'].append(value)
+
+            pending = self._pending_rollups
+            self._roll_up(pending, 'all', '', event, value)
+            self._roll_up(pending, 'session', str(self.session), event, value)
+            self._roll_up(pending, 'day', date.fromordinal(day).isoformat(), event, value)
+            if character_class:
+                self._roll_up(pending, 'class', character_class, event, value)
+
+            if len(buffer['timestamp']) >= self.CHUNK_ROWS:
+                self._write_chunk()
+
+    def flush(self):
+        """写出缓冲的行和汇总并等待写入完成 / Write buffered rows and rollups and wait for the writes"""
+        with self._lock:
+            if len(self._buffer['timestamp']):
+                self._write_chunk()
+            elif self._rollups_dirty or self._failed_chunks:
+                self._retry_failed_chunks()
+                self._rollups_dirty = False
+                self._submit('stats_rollups', (None, None, self._rollup_document()))
+        if self.persistence is not None:
+            self.persistence.flush()
+
+    # ---- 汇总查询 / Rollup queries ----
+
+    def get_rollup(self, event: str, scope: str = 'all', key: Any = '') -> Dict[str, float]:
+        """获取汇总，例如 get_rollup('crit', 'class', 'Ranger')
+        Get a rollup, e.g. get_rollup('crit', 'class', 'Ranger')
+
+        scope: 'all' | 'session' | 'day' | 'class'
+        """
+        with self._lock:
+            entry = self.rollups[scope].get(str(key), {}).get(event)
+            pending = self._pending_rollups[scope].get(str(key), {}).get(event)
+            if entry is None:
+                entry = pending
+            elif pending is not None:
+                entry = self._merge_entry(list(entry), pending)
+        if entry is None:
+            return {'count': 0, 'sum': 0.0, 'min': 0.0, 'max': 0.0, 'mean': 0.0}
+        count, total, low, high = entry
+        return {'count': count, 'sum': total, 'min': low, 'max': high, 'mean': total / count}
+
+    def get_total(self, event: str, field: str = 'count') -> float:
+        """全局汇总的单个字段 / A single field of the overall rollup"""
+        return self.get_rollup(event)[field]
+
+    def get_keys(self, scope: str) -> List[str]:
+        """某个范围下的所有键（会话、日期或职业）/ Every key of a scope (sessions, days or classes)"""
+        with self._lock:
+            return sorted(set(self.rollups[scope]) | set(self._pending_rollups[scope]))
+
+    # ---- 原始列 / Raw columns ----
+
+    def iter_chunks(self, columns: Optional[List[str]] = None) -> Iterator[Dict[str, array]]:
+        """按块流式读取列（包括尚未写出的缓冲）/ Stream columns chunk by chunk, including the buffer"""
+        wanted = set(columns or self.COLUMNS)
+        with self._lock:
+            chunk_count = self.chunk_count
+            unwritten = {index: {name: column for name, column in columns.items() if name in wanted}
+                         for index, columns in self._unwritten.items()}
+            pending = {name: array(column.typecode, column)
+                       for name, column in self._buffer.items() if name in wanted}
+
+        for index in range(chunk_count):
+            if index in unwritten:
+                yield unwritten[index]
+                continue
+            try:
+                yield self._read_chunk(index, wanted)
+            except (OSError, ValueError, struct.error, zlib.error) as e:
+                logging.error(f"Skipping unreadable stats chunk {index}: {e}")
+        if pending and len(next(iter(pending.values()))):
+            yield pending
+
+    def iter_column(self, name: str) -> Iterator[array]:
+        """流式读取单列 / Stream a single column"""
+        for chunk in self.iter_chunks([name]):
+            yield chunk[name]
+
+    def decode(self, column: str, code: int) -> str:
+        """把字典编码还原为名称 / Turn a dictionary code back into its name"""
+        return self.dictionaries[column][code]
+
+    # ---- 内部方法 / Internals ----
+
+    def _encode(self, column: str, name: str) -> int:
+        """字典编码 / Dictionary-encode a value"""
+        code = self._codes[column].get(name)
+        if code is None:
+            code = self._codes[column][name] = len(self.dictionaries[column])
+            self.dictionaries[column].append(name)
+        return code
+
+    @staticmethod
+    def _empty_rollups() -> Dict[str, Dict[str, Dict[str, list]]]:
+        return {'all': {}, 'session': {}, 'day': {}, 'class': {}}
+
+    @staticmethod
+    def _roll_up(rollups: dict, scope: str, key: str, event: str, value: float):
+        """更新一个汇总项 / Update one rollup entry"""
+        events = rollups[scope].setdefault(key, {})
+        entry = events.get(event)
+        if entry is None:
+            events[event] = [1, value, value, value]
+        else:
+            entry[0] += 1
+            entry[1] += value
+            if value < entry[2]:
+                entry[2] = value
+            if value > entry[3]:
+                entry[3] = value
+
+    @staticmethod
+    def _merge_entry(entry: list, other: list) -> list:
+        """把 other 合并进汇总项 entry / Merge other into the rollup entry"""
+        entry[0] += other[0]
+        entry[1] += other[1]
+        entry[2] = min(entry[2], other[2])
+        entry[3] = max(entry[3], other[3])
+        return entry
+
+    def _merge_pending_rollups(self):
+        """把缓冲行的汇总并入已写出的汇总 / Merge the buffered rows' rollups into the flushed rollups"""
+        for scope, keys in self._pending_rollups.items():
+            for key, events in keys.items():
+                target = self.rollups[scope].setdefault(key, {})
+                for event, entry in events.items():
+                    if event in target:
+                        self._merge_entry(target[event], entry)
+                    else:
+                        target[event] = entry
+        self._pending_rollups = self._empty_rollups()
+
+    def _chunk_path(self, index: int) -> str:
+        """块文件路径 / Path of a chunk file"""
+        return os.path.join(self.base_path, f"chunk_{index:06d}.col")
+
+    def _write_chunk(self):
+        """冻结缓冲的列并提交写入（调用方持有锁）/ Freeze the buffered columns and submit the write; the caller holds the lock"""
+        self._retry_failed_chunks()
+        index = self.chunk_count
+        columns = self._buffer
+        self._unwritten[index] = columns
+        self.chunk_count += 1
+        self._buffer = {name: array(code) for name, code in self.COLUMNS.items()}
+        # 随块写出汇总，磁盘上的汇总只统计已写出的行 / Write the rollups with the chunk so they count only flushed rows
+        self._merge_pending_rollups()
+        self._rollups_dirty = False
+        self._submit(f"stats_chunk_{index}", (index, columns, self._rollup_document()))
+
+    def _retry_failed_chunks(self):
+        """重新提交写入失败的块（调用方持有锁）/ Resubmit chunks whose write failed; the caller holds the lock"""
+        for index in sorted(self._failed_chunks):
+            self._submit(f"stats_chunk_{index}", (index, self._unwritten[index], None))
+        self._failed_chunks.clear()
+
+    def _submit(self, key: str, job: tuple):
+        """把 (块序号, 列, 汇总) 交给后台线程，没有后台线程时直接写入
+        Hand (chunk index, columns, rollups) to the writer, or write them directly without one"""
+        if self.persistence is None:
+            self._write_files(job)
+        else:
+            self.persistence.submit(key, self._write_files, job)
+
+    def _write_files(self, job: tuple) -> bool:
+        """压缩并写出块，再写出汇总（在后台线程运行）
+        Compress and write a chunk, then the rollups; runs on the writer thread"""
+        index, columns, document = job
+        if columns is not None:
+            rows = len(columns['timestamp'])
+            parts = [self.CHUNK_HEADER.pack(self.MAGIC, rows, len(columns))]
+            payloads = []
+            for name, column in columns.items():
+                payload = zlib.compress(column.tobytes(), 6)
+                encoded_name = name.encode('utf-8')
+                parts.append(struct.pack('<B', len(encoded_name)) + encoded_name)
+                parts.append(self.COLUMN_ENTRY.pack(column.typecode.encode('ascii'), len(payload)))
+                payloads.append(payload)
+            try:
+                write_atomic(self._chunk_path(index), b''.join(parts + payloads))
+            except OSError as e:
+                # 块留在内存中，下次提交时重试 / The chunk stays in memory and is retried with the next submission
+                logging.error(f"Failed to write stats chunk {index}: {e}")
+                with self._lock:
+                    self._failed_chunks.add(index)
+                    self._rollups_dirty = True
+                return False
+            with self._lock:
+                self._unwritten.pop(index, None)
+        if document is None:
+            return True
+        with self._lock:
+            # 较早的块缺失时不写汇总，磁盘上的汇总不能统计缺失的行
+            # Skip the rollups while an earlier chunk is missing, so the rollups on disk never count missing rows
+            if any(missing < document['chunks'] for missing in self._unwritten):
+                self._rollups_dirty = True
+                return True
+        try:
+            self._write_rollups(document)
+        except OSError as e:
+            # 下次写出块或 flush 时重试 / Retried with the next chunk or flush
+            logging.error(f"Failed to write stats rollups: {e}")
+            with self._lock:
+                self._rollups_dirty = True
+            return False
+        return True
+
+    def _read_chunk(self, index: int, wanted: set) -> Dict[str, array]:
+        """读取块中需要的列 / Read the wanted columns of a chunk"""
+        with open(self._chunk_path(index), 'rb') as f:
+            data = f.read()
+        magic, rows, column_count = self.CHUNK_HEADER.unpack_from(data, 0)
+        if magic != self.MAGIC:
+            raise ValueError("not a stats chunk")
+
+        position = self.CHUNK_HEADER.size
+        entries: List[Tuple[str, str, int]] = []
+        for _ in range(column_count):
+            name_len = data[position]
+            name = data[position + 1:position + 1 + name_len].decode('utf-8')
+            position += 1 + name_len
+            typecode, length = self.COLUMN_ENTRY.unpack_from(data, position)
+            position += self.COLUMN_ENTRY.size
+            entries.append((name, typecode.decode('ascii'), length))
+
+        columns = {}
+        for name, typecode, length in entries:
+            if name in wanted:
+                column = array(typecode)
+                column.frombytes(zlib.decompress(data[position:position + length]))
+                columns[name] = column
+            position += length
+        return columns
+
+    def _rollup_document(self) -> Dict[str, Any]:
+        """汇总和字典的快照（调用方持有锁）/ Snapshot of rollups and dictionaries; the caller holds the lock"""
+        return {
+            'chunks': self.chunk_count,
+            'session': self.session,
+            'dictionaries': snapshot(self.dictionaries),
+            'rollups': snapshot(self.rollups)
+        }
+
+    def _write_rollups(self, document: Dict[str, Any]):
+        """原子写入汇总和字典 / Atomically write rollups and dictionaries"""
+        data = json.dumps(document, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        write_atomic(os.path.join(self.base_path, self.ROLLUP_FILE), data)
+
+    def _load(self):
+        """加载汇总和字典 / Load rollups and dictionaries"""
+        path = os.path.join(self.base_path, self.ROLLUP_FILE)
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.chunk_count = data['chunks']
+            self.session = data['session']
+            self.rollups.update(data['rollups'])
+            for name, values in data['dictionaries'].items():
+                self.dictionaries[name] = values
+                self._codes[name] = {value: code for code, value in enumerate(values)}
+        except (OSError, ValueError, KeyError) as e:
+            logging.error(f"Failed to load statistics rollups: {e}")
@@ -1,15 +1,18 @@
 import pygame
 import time
 import math
+from .state_snapshot import StateSnapshotEngine
 
 
 class TimeManager:
     def __init__(self, game_engine):
         self.game_engine = game_engine
+        # 共享的输入管理器 / Shared input manager
+        self.input = game_engine.get_manager('input')
         self.time_rewind = {
             'enabled': True,
-            'max_history': 5,
-            'current_history': [],
+            'history_seconds': 10.0,  # 保留的历史长度 / Length of history kept
+            'rewind_seconds': 5.0,    # 每次回溯的时长 / How far one rewind goes back
             'cooldown': 30.0,
             'last_use': 0,
             'rating_thresholds': {
@@ -22,6 +25,9 @@ class TimeManager:
                 'miss': -5
             }
         }
+        
+        # 固定容量的快照环，每秒 10 个快照 / Fixed snapshot ring at 10 snapshots per second
+        self.snapshots = StateSnapshotEngine(seconds=self.time_rewind['history_seconds'], rate=10.0)
 
     def _update_time_rewind(self, dt):
         """更新时间回溯系统 / Update time rewind system"""
@@ -30,24 +36,22 @@ class TimeManager:
             
         current_time = time.time()
         
+        # 记录历史状态（引擎按频率限流）/ Record history; the engine throttles captures
+        battle_system = self.game_engine.get_system('battle')
+        if battle_system:
+            self.snapshots.capture(battle_system, current_time)
+        
         # 更新冷却时间 / Update cooldown
         if current_time - self.time_rewind['last_use'] < self.time_rewind['cooldown']:
             return
             
-        # 记录历史状态 / Record history state
-        if len(self.time_rewind['current_history']) >= self.time_rewind['max_history']:
-            self.time_rewind['current_history'].pop(0)
-            
-        game_state = self.game_engine.get_current_state()
-        self.time_rewind['current_history'].append(game_state)
-        
         # 检查间回溯触发 / Check time rewind trigger
-        if self.is_key_just_pressed(pygame.K_T):
+        if self.input.is_key_just_pressed(pygame.K_t):
             self._trigger_time_rewind()
                        
     def _trigger_time_rewind(self):
         """触发时间回溯 / Trigger time rewind"""
-        if not self.time_rewind['enabled'] or not self.time_rewind['current_history']:
+        if not self.time_rewind['enabled'] or not len(self.snapshots):
             return
             
         current_time = time.time()
@@ -58,12 +62,14 @@ class TimeManager:
         time_since_last = current_time - self.time_rewind['last_use']
         rating = self._calculate_rating(time_since_last)
         
-        # Get previous state and apply effects
-        previous_state = self.time_rewind['current_history'].pop()
+        # Restore the battle state from rewind_seconds ago, then apply effects
+        battle_system = self.game_engine.get_system('battle')
+        if not self.snapshots.restore(battle_system, seconds_ago=self.time_rewind['rewind_seconds'],
+                                      now=current_time):
+            return
         self._create_rewind_effects(rating)
         
-        # Restore game state and update cooldown
-        self.game_engine.restore_state(previous_state)
+        # Update cooldown
         self.time_rewind['last_use'] = current_time
 
     def _calculate_rating(self, time_since_last: float) -> str:
@@ -0,0 +1,162 @@
+import time
+import pygame
+from typing import Callable, Dict, List, Optional
+
+class VoiceAllocator:
+    """语音分配器 - 按优先级为战斗音效分配有限的混音通道
+    Voice allocator - assigns a fixed set of mixer channels to battle sounds by priority.
+
+    同一帧内的请求先去重并合并（取最近的距离和最高的重要性），然后按得分（优先级 × 重要性 ÷
+    距离衰减）从高到低分配；通道用尽时抢占得分最低的语音，每种音效还受最大实例数限制。
+    混音器仍在播放的通道不会被当作空闲，分配器之外开始播放的通道也不会被抢占。
+    Requests made in the same frame are deduplicated, merging to the nearest
+    distance and highest importance, then allocated from the highest score
+    (priority x importance / distance falloff) down. When every channel is
+    busy the lowest-scoring voice is stolen; each sound is also capped by a
+    maximum instance count. A channel the mixer is still playing is never
+    treated as free, and channels started outside the allocator are never
+    stolen.
+    """
+
+    # 音效配置 / Per-sound priority and instance limits
+    SOUND_PROFILES = {
+        'critical_hit': {'priority': 10, 'max_instances': 2},
+        'skill': {'priority': 8, 'max_instances': 2},
+        'death': {'priority': 9, 'max_instances': 2},
+        'level_up': {'priority': 9, 'max_instances': 1},
+        'hurt': {'priority': 6, 'max_instances': 3},
+        'attack': {'priority': 5, 'max_instances': 3},
+        'dodge': {'priority': 4, 'max_instances': 2},
+        'footstep': {'priority': 1, 'max_instances': 1}
+    }
+    DEFAULT_PROFILE = {'priority': 5, 'max_instances': 2}
+
+    # 距离衰减参考值（像素） / Distance falloff reference in pixels
+    DISTANCE_FALLOFF = 600.0
+
+    def __init__(self, channels: List[pygame.mixer.Channel],
+                 sound_provider: Callable[[str], Optional[pygame.mixer.Sound]]):
+        self.channels = channels
+        self.sound_provider = sound_provider
+
+        # 每个通道当前的语音状态 / Voice state per channel
+        self.voices = [
+            {'sound': None, 'score': 0.0, 'started': 0.0}
+            for _ in channels
+        ]
+
+        # 本帧待处理请求（按音效名去重） / Pending requests this frame, keyed by sound name
+        self.pending: Dict[str, dict] = {}
+
+        # 统计 / Statistics
+        self.stats = {'played': 0, 'stolen': 0, 'dropped': 0, 'merged': 0}
+
+    def request(self, sound_name: str, volume: float = 1.0,
+                importance: float = 1.0, distance: float = 0.0):
+        """请求播放音效（本帧结束时分配） / Request a sound; allocated when the frame flushes"""
+        distance = max(0.0, distance)
+        request = self.pending.get(sound_name)
+        if request is None:
+            self.pending[sound_name] = {
+                'volume': volume,
+                'importance': importance,
+                'distance': distance,
+                'score': self._get_score(sound_name, importance, distance),
+                'count': 1
+            }
+            return
+
+        # 同帧重复请求合并为一次：取最近的距离、最高的重要性和音量，再重新计算得分
+        # Same-frame duplicates merge into one at the nearest distance, highest importance and volume, then are rescored
+        request['count'] += 1
+        request['importance'] = max(request['importance'], importance)
+        request['distance'] = min(request['distance'], distance)
+        request['score'] = self._get_score(sound_name, request['importance'], request['distance'])
+        request['volume'] = max(request['volume'], volume)
+        self.stats['merged'] += 1
+
+    def flush(self):
+        """分配本帧所有请求 / Allocate all requests made this frame"""
+        if not self.pending:
+            return
+
+        now = time.perf_counter()
+        self._refresh_voices()
+
+        requests = sorted(self.pending.items(), key=lambda item: item[1]['score'], reverse=True)
+        self.pending = {}
+
+        for sound_name, request in requests:
+            profile = self.SOUND_PROFILES.get(sound_name, self.DEFAULT_PROFILE)
+            # 合并的请求最多占用 max_instances 个语音
+            # A merged burst may occupy up to max_instances voices
+            instances = min(request['count'], profile['max_instances'])
+            for _ in range(instances):
+                if not self._allocate(sound_name, request, profile, now):
+                    break
+
+    def _allocate(self, sound_name: str, request: dict, profile: dict, now: float) -> bool:
+        """为一个实例分配通道 / Allocate a channel for one instance"""
+        sound = self.sound_provider(sound_name)
+        if not sound:
+            return False
+
+        playing = [i for i, voice in enumerate(self.voices) if voice['sound'] == sound_name]
+        if len(playing) >= profile['max_instances']:
+            # 达到实例上限时重新触发最早的实例 / At the cap, retrigger the oldest instance
+            index = min(playing, key=lambda i: self.voices[i]['started'])
+        else:
+            index = self._find_free_voice()
+            if index is None:
+                index = self._find_victim(request['score'])
+                if index is None:
+                    self.stats['dropped'] += 1
+                    return False
+                self.stats['stolen'] += 1
+
+        channel = self.channels[index]
+        channel.stop()
+        channel.set_volume(request['volume'])
+        channel.play(sound)
+        self.voices[index] = {'sound': sound_name, 'score': request['score'], 'started': now}
+        self.stats['played'] += 1
+        return True
+
+    def _find_free_voice(self) -> Optional[int]:
+        """查找空闲通道（混音器也未在播放）/ Find an idle channel the mixer is not playing either"""
+        for i, voice in enumerate(self.voices):
+            if voice['sound'] is None and not self.channels[i].get_busy():
+                return i
+        return None
+
+    def _find_victim(self, score: float) -> Optional[int]:
+        """查找得分低于新请求的语音（同分时取最早的） / Find a lower-scoring voice, oldest first on ties"""
+        victim = None
+        for i, voice in enumerate(self.voices):
+            # 没有语音的忙碌通道由分配器之外的代码播放 / A busy channel without a voice is played by code outside the allocator
+            if voice['sound'] is None or voice['score'] >= score:
+                continue
+            if (victim is None or
+                    (voice['score'], voice['started']) <
+                    (self.voices[victim]['score'], self.voices[victim]['started'])):
+                victim = i
+        return victim
+
+    def _refresh_voices(self):
+        """释放已播放完毕的通道 / Release channels that finished playing"""
+        for i, channel in enumerate(self.channels):
+            if self.voices[i]['sound'] is not None and not channel.get_busy():
+                self.voices[i] = {'sound': None, 'score': 0.0, 'started': 0.0}
+
+    def _get_score(self, sound_name: str, importance: float, distance: float) -> float:
+        """计算请求得分 / Compute request score"""
+        profile = self.SOUND_PROFILES.get(sound_name, self.DEFAULT_PROFILE)
+        falloff = 1.0 + max(0.0, distance) / self.DISTANCE_FALLOFF
+        return profile['priority'] * importance / falloff
+
+    def stop_all(self):
+        """停止所有语音 / Stop every voice"""
+        for i, channel in enumerate(self.channels):
+            channel.stop()
+            self.voices[i] = {'sound': None, 'score': 0.0, 'started': 0.0}
+        self.pending.clear()
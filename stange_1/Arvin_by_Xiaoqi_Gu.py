@@ -1,5 +1,5 @@
-import json
 from datetime import datetime
+from battle_log import BattleLog
 
 
 # 游戏数据存储类
@@ -11,22 +11,34 @@ class GameDataStorage:
             "game_state": {},  # 存储游戏的状态信息
             "battle_logs": []  # 存储所有的战斗日志
         }
+        self.journal = BattleLog(json_file)  # 只追加的变更日志，定期压缩为快照
+        self._log_handle = None  # 文本日志文件，首次记录时打开并保持打开
         self.load_data()
 
-    # 加载数据
+    # 加载数据（快照 + 重放日志尾部）
     def load_data(self):
-        try:
-            with open(self.json_file, 'r', encoding='utf-8') as f:
-                self.data = json.load(f)
+        data, records = self.journal.load()
+        if data is not None:
+            self.data = data
             print(f"数据已从 {self.json_file} 加载")
-        except (FileNotFoundError, json.JSONDecodeError):
+        else:
             print(f"{self.json_file} 不存在或格式错误，已创建新的数据文件")
+        # 崩溃恢复：重放快照之后记录的变更
+        for record in records:
+            self.apply_record(record)
+        if data is None or records:
             self.save_data()
 
-    # 保存数据
+    # 应用一条日志记录
+    def apply_record(self, record):
+        if record['op'] == 'state':
+            self.data['game_state'][record['key']] = record['value']
+        elif record['op'] == 'log':
+            self.data['battle_logs'].append(record['entry'])
+
+    # 保存数据（写入快照并清空日志）
     def save_data(self):
-        with open(self.json_file, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, ensure_ascii=False, indent=4)
+        self.journal.compact(self.data)
         print(f"数据已保存至 {self.json_file}")
 
     # 记录战斗日志
@@ -35,18 +47,29 @@ class GameDataStorage:
         log_entry = f"{timestamp} - {event}"
         self.data['battle_logs'].append(log_entry)
 
-        # 实时更新日志文件
-        with open(self.log_file, 'a', encoding='utf-8') as f:
-            f.write(log_entry + "\n")
+        # 实时更新日志文件（文件保持打开，每条记录后刷新）
+        if self._log_handle is None:
+            self._log_handle = open(self.log_file, 'a', encoding='utf-8')
+        self._log_handle.write(log_entry + "\n")
+        self._log_handle.flush()
 
         print(f"事件已记录: {log_entry}")
-        self.save_data()
+        if self.journal.append({'op': 'log', 'entry': log_entry}):
+            self.save_data()
 
-    # 更新游戏状态
+    # 更新游戏状态（只追加变更，压缩时才写完整数据）
     def update_game_state(self, key: str, value):
         self.data['game_state'][key] = value
         print(f"游戏状态更新: {key} = {value}")
-        self.save_data()
+        if self.journal.append({'op': 'state', 'key': key, 'value': value}):
+            self.save_data()
+
+    # 关闭文本日志和变更日志
+    def close(self):
+        if self._log_handle is not None:
+            self._log_handle.close()
+            self._log_handle = None
+        self.journal.close()
 
     # 读取游戏状态
     def get_game_state(self, key: str):
@@ -0,0 +1,131 @@
+import os
+import json
+import zlib
+import struct
+
+
+# Append-only write-ahead log for battle data
+class BattleLog:
+    """
+    Append-only, length-prefixed binary log with periodic compaction.
+
+    Every change is appended as one record instead of rewriting the whole
+    data file, so the cost per change is the size of the change. Every
+    compact_every records the full data is written to the snapshot file
+    (atomically) and the log starts over. After a crash, load() returns the
+    snapshot plus the records appended after it; a torn record at the end of
+    the log is cut off.
+
+    Record layout: <I payload length><Q sequence number><I crc32><JSON payload>
+    """
+
+    RECORD_HEADER = struct.Struct('<IQI')
+    SEQ_KEY = 'log_seq'  # Sequence number stored in the snapshot
+
+    def __init__(self, snapshot_file, log_file=None, compact_every=1000, sync=False):
+        """
+        Parameters:
+        snapshot_file: JSON file holding the last compacted data.
+        log_file: Binary log file, defaults to snapshot_file + '.wal'.
+        compact_every: Number of records after which compaction is due.
+        sync: fsync after every record (slower, survives power loss).
+        """
+        self.snapshot_file = snapshot_file
+        self.log_file = log_file or snapshot_file + '.wal'
+        self.compact_every = compact_every
+        self.sync = sync
+        self.seq = 0
+        self.pending = 0  # Records appended since the last compaction
+        self._file = None
+
+    def load(self):
+        """
+        Read the snapshot and the log tail.
+
+        Returns (data, records): data is the snapshot (None if missing or
+        unreadable) and records are the logged changes not yet in it.
+        """
+        data = None
+        snapshot_seq = 0
+        try:
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            snapshot_seq = data.pop(self.SEQ_KEY, 0)
+        except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+            data = None
+
+        records = []
+        self.seq = snapshot_seq
+        valid_end = 0
+        try:
+            with open(self.log_file, 'rb') as f:
+                buffer = f.read()
+        except FileNotFoundError:
+            buffer = b''
+
+        position = 0
+        header_size = self.RECORD_HEADER.size
+        while position + header_size <= len(buffer):
+            length, seq, crc = self.RECORD_HEADER.unpack_from(buffer, position)
+            payload = buffer[position + header_size:position + header_size + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break  # Torn or corrupt tail
+            position += header_size + length
+            valid_end = position
+            # Records already in the snapshot (crash during compaction) are skipped
+            if seq > snapshot_seq:
+                records.append(json.loads(payload.decode('utf-8')))
+                self.seq = seq
+
+        if valid_end < len(buffer):
+            print(f"Discarding {len(buffer) - valid_end} bytes of incomplete log in {self.log_file}")
+            with open(self.log_file, 'r+b') as f:
+                f.truncate(valid_end)
+
+        self.pending = len(records)
+        return data, records
+
+    def append(self, record):
+        """
+        Append one record. Returns True when compaction is due.
+        """
+        if self._file is None:
+            self._file = open(self.log_file, 'ab')
+        self.seq += 1
+        payload = json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self._file.write(self.RECORD_HEADER.pack(len(payload), self.seq, zlib.crc32(payload)) + payload)
+        self._file.flush()
+        if self.sync:
+            os.fsync(self._file.fileno())
+        self.pending += 1
+        return self.pending >= self.compact_every
+
+    def compact(self, data):
+        """
+        Write data as the new snapshot and empty the log.
+        """
+        snapshot = dict(data)
+        snapshot[self.SEQ_KEY] = self.seq
+        temp_file = self.snapshot_file + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.snapshot_file)
+
+        # The snapshot records its sequence number, so a crash before this
+        # truncation only leaves records that load() will skip
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.log_file, 'wb')
+        self.pending = 0
+
+    def close(self):
+        """
+        Flush and close the log file.
+        """
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
@@ -1,8 +1,8 @@
-import json
 import pandas as pd
 import random
 from abc import ABC, abstractmethod
 from datetime import datetime
+from battle_log import BattleLog
 
 # Extract data from Excel
 df = pd.read_excel("characters.xlsx")
@@ -21,21 +21,31 @@ class GameDataStorage:
         self.log_file = log_file # # Text file for logging battle events
         self.data = {"game_state": {}, "battle_logs": []} # Initial game state and logs
         self.log_buffer = [] # Temporary buffer for logs
+        self.journal = BattleLog(json_file) # Append-only log of changes since the last snapshot
         self.load_data() # Load existing game data
 
     def load_data(self):
-        try:
-            with open(self.json_file, 'r', encoding='utf-8') as f:
-                self.data = json.load(f)
+        data, records = self.journal.load()
+        if data is not None:
+            self.data = data
             print(f"Data loaded from {self.json_file}")
-        except (FileNotFoundError, json.JSONDecodeError):
+        else:
             print(f"Data file error, creating a new one")
+        # Replay changes logged after the snapshot (crash recovery)
+        for record in records:
+            self.apply_record(record)
+        if data is None or records:
             self.save_data() # Create a new data file if load fails
 
+    def apply_record(self, record):
+        if record['op'] == 'state':
+            self.data['game_state'][record['key']] = record['value']
+        elif record['op'] == 'log':
+            self.data['battle_logs'].append(record['entry'])
+
     def save_data(self):
         try:
-            with open(self.json_file, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, ensure_ascii=False, indent=4)
+            self.journal.compact(self.data) # Write a snapshot and start a new log
             print(f"Data saved to {self.json_file}")
         except IOError as e:
             print(f"An error occurred while saving data: {e}")
@@ -44,6 +54,8 @@ class GameDataStorage:
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         log_entry = f"{timestamp} - {event}"
         self.data['battle_logs'].append(log_entry) # Add log entry to data
+        if self.journal.append({'op': 'log', 'entry': log_entry}):
+            self.save_data() # Compact once enough records have been logged
         self.log_buffer.append(log_entry) # Add log entry to buffer
         if len(self.log_buffer) >= 10:
             self.flush_logs() # Write logs to file if buffer is full
@@ -59,7 +71,13 @@ class GameDataStorage:
 
     def update_game_state(self, key, value):
         self.data['game_state'][key] = value
-        self.save_data() # Save the updated game state
+        # Append only the change; the full data is written on compaction
+        if self.journal.append({'op': 'state', 'key': key, 'value': value}):
+            self.save_data()
+
+    def close(self):
+        self.flush_logs() # Write any buffered logs
+        self.journal.close() # Flush and close the change log
 
 # Abstract character interface
 class CharacterInterface(ABC):
@@ -331,7 +349,8 @@ def battle(player_team, ai_team, storage):
                 storage.update_game_state(target.name + "_EXP", target.exp)
 
 def game_over(storage):
-    storage.flush_logs()
+    storage.save_data()
+    storage.close()
     while True:
         choice = input("Game Over. Choose an option:\n1. Play Again\n2. End Game\n")
         if choice == "1":
@@ -0,0 +1,30 @@
+import os
+import sys
+import importlib.machinery
+import importlib.util
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 这些测试覆盖只依赖标准库的管理器模块，直接按模块名导入，不经过 managers 包的 __init__
+# These tests cover manager modules that depend only on the standard library
+# and import them by module name, bypassing the managers package __init__
+MANAGERS_DIR = os.path.join(ROOT_DIR, 'managers')
+STAGE_DIR = os.path.join(ROOT_DIR, 'stange_1')
+for path in (MANAGERS_DIR, STAGE_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def _register_package(name, path):
+    """注册包但不执行它的 __init__ / Register a package without running its __init__"""
+    spec = importlib.machinery.ModuleSpec(name, None, is_package=True)
+    spec.submodule_search_locations = [path]
+    sys.modules.setdefault(name, importlib.util.module_from_spec(spec))
+
+
+# 使用相对导入的模块按 game_project.managers.* 导入；managers 的 __init__ 会导入依赖 pygame 和动画的管理器
+# Modules with relative imports are imported as game_project.managers.*; the managers
+# __init__ would pull in the managers that need pygame and the animation package
+if importlib.util.find_spec('game_project') is None:
+    _register_package('game_project', ROOT_DIR)
+    _register_package('game_project.managers', MANAGERS_DIR)
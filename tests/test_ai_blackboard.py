@@ -0,0 +1,105 @@
+import random
+
+import pytest
+from ai_blackboard import AIBlackboard
+from state_snapshot import StateSnapshotEngine
+
+
+class FakeEventSystem:
+    def __init__(self):
+        self.handlers = {}
+
+    def register_handler(self, event_type, handler):
+        self.handlers.setdefault(event_type, []).append(handler)
+
+    def unregister_handler(self, event_type, handler):
+        self.handlers[event_type].remove(handler)
+
+    def trigger_event(self, event_type, event_data=None):
+        for handler in self.handlers.get(event_type, ()):
+            handler(event_data)
+
+
+class FakeCharacter:
+    """与 BaseCharacter 一样在生命值变化时调用 hp_watchers / Calls hp_watchers on HP changes like BaseCharacter"""
+
+    def __init__(self, name, hp):
+        self.name = name
+        self.hp_watchers = []
+        self.max_hp = 100
+        self._hp = hp
+
+    @property
+    def hp(self):
+        return self._hp
+
+    @hp.setter
+    def hp(self, value):
+        changed = value != self._hp
+        self._hp = value
+        if changed:
+            for watcher in self.hp_watchers:
+                watcher(self)
+
+    def is_alive(self):
+        return self.hp > 0
+
+
+class FakeBattle:
+    def __init__(self, player_team):
+        self.player_team = player_team
+        self.enemy_team = []
+        self.turn_order = list(player_team)
+        self.current_turn = 0
+        self.battle_state = {}
+        self.rng = random.Random(1)
+        self.event_system = FakeEventSystem()
+
+
+@pytest.fixture
+def blackboard():
+    return AIBlackboard({'hp_ratio': lambda c: c.hp / c.max_hp if c.is_alive() else None})
+
+
+def test_hp_changes_without_events_reorder(blackboard):
+    knight, mage = FakeCharacter('knight', 90), FakeCharacter('mage', 60)
+    blackboard.sync('enemy', [knight, mage])
+    assert blackboard.best('enemy', 'hp_ratio') is mage
+
+    knight.hp = 10
+    assert blackboard.best('enemy', 'hp_ratio') is knight
+    mage.hp = 0
+    knight.hp = 0
+    assert blackboard.best('enemy', 'hp_ratio') is None
+
+
+def test_restore_resets_the_blackboard(blackboard):
+    knight, mage = FakeCharacter('knight', 90), FakeCharacter('mage', 60)
+    battle = FakeBattle([knight, mage])
+    blackboard.bind(battle.event_system)
+    blackboard.sync('enemy', battle.player_team)
+
+    snapshots = StateSnapshotEngine(capacity=4)
+    snapshots.capture(battle, timestamp=0.0, force=True)
+    knight.hp = 10
+    assert blackboard.best('enemy', 'hp_ratio') is knight
+
+    assert snapshots.restore(battle)
+    assert knight.hp == 90
+    # 恢复后黑板被清空，观察者也已移除 / The restore emptied the blackboard and removed its watchers
+    assert blackboard.best('enemy', 'hp_ratio') is None
+    assert knight.hp_watchers == [] and mage.hp_watchers == []
+
+    blackboard.sync('enemy', battle.player_team)
+    assert blackboard.best('enemy', 'hp_ratio') is mage
+
+
+def test_resync_moves_watchers(blackboard):
+    knight, mage = FakeCharacter('knight', 90), FakeCharacter('mage', 60)
+    blackboard.sync('enemy', [knight])
+    blackboard.sync('enemy', [knight])
+    assert len(knight.hp_watchers) == 1
+
+    blackboard.sync('enemy', [mage])
+    assert knight.hp_watchers == []
+    assert len(mage.hp_watchers) == 1
@@ -0,0 +1,90 @@
+import time
+
+import pytest
+from ai_planner import AIPlanner
+
+
+class FakeCharacter:
+    def __init__(self, name, hp, atk=20, def_=0, spd=10, crt=0.0, evd=0.0):
+        self.name = name
+        self.hp = hp
+        self.max_hp = 100
+        self.atk = atk
+        self.def_ = def_
+        self.spd = spd
+        self.crt = crt
+        self.evd = evd
+
+    def is_alive(self):
+        return self.hp > 0
+
+
+class FakeBattle:
+    def __init__(self, player_team, enemy_team):
+        self.player_team = player_team
+        self.enemy_team = enemy_team
+
+
+@pytest.fixture
+def planner():
+    planner = AIPlanner(time_budget=0.05)
+    yield planner
+    planner.stop()
+
+
+def test_build_problem(planner):
+    actor = FakeCharacter('boss', 100, spd=5)
+    fast = FakeCharacter('rogue', 100, spd=20)
+    battle = FakeBattle([fast, FakeCharacter('dead', 0)], [actor])
+
+    problem = planner.build_problem(battle, actor)
+    assert problem['characters'] == [fast, actor]
+    assert problem['hps'] == (100.0, 100.0)
+    assert problem['actor_index'] == 1
+    assert problem['units'][1][0] is True
+
+    # 行动者不是存活的 AI 时没有问题可解 / Nothing to solve unless the actor is a living AI
+    assert planner.build_problem(battle, fast) is None
+
+
+def test_plan_finishes_the_weak_target(planner):
+    actor = FakeCharacter('boss', 100, atk=30)
+    weak = FakeCharacter('mage', 20, atk=40)
+    healthy = FakeCharacter('knight', 100, atk=10)
+    problem = planner.build_problem(FakeBattle([healthy, weak], [actor]), actor)
+
+    result = planner.plan(problem)
+    assert result['actor'] is actor
+    assert result['target'] is weak
+    assert result['depth'] >= 1
+    assert result['nodes'] > 0
+
+
+def test_plan_stops_at_the_deadline(planner):
+    actor = FakeCharacter('boss', 100, atk=30)
+    weak = FakeCharacter('mage', 20)
+    healthy = FakeCharacter('knight', 100)
+    problem = planner.build_problem(FakeBattle([healthy, weak], [actor]), actor)
+
+    # 每 64 个节点检查一次截止时间，之后返回最后一个完整深度的结果
+    # The deadline is checked every 64 nodes; the last completed depth is returned
+    result = planner.plan(problem, deadline=time.perf_counter() - 1.0)
+    assert result['nodes'] == 64
+    assert result['depth'] < planner.MAX_DEPTH
+    assert result['target'] in (weak, healthy)
+
+
+def test_request_and_poll(planner):
+    actor = FakeCharacter('boss', 100)
+    target = FakeCharacter('hero', 50)
+    assert planner.request(FakeBattle([target], [actor]), actor)
+    assert planner.poll(target) is None
+
+    deadline = time.monotonic() + 5.0
+    result = None
+    while result is None and time.monotonic() < deadline:
+        result = planner.poll(actor)
+        time.sleep(0.001)
+    assert result is not None
+    assert result['target'] is target
+    assert not planner.is_pending(actor)
@@ -0,0 +1,59 @@
+import os
+
+import pytest
+from battle_log import BattleLog
+
+
+@pytest.fixture
+def snapshot_file(tmp_path):
+    return str(tmp_path / 'game_data.json')
+
+
+def test_records_are_replayed_after_reopen(snapshot_file):
+    log = BattleLog(snapshot_file)
+    assert log.load() == (None, [])
+    log.append({'turn': 1})
+    log.append({'turn': 2})
+    log.close()
+
+    reopened = BattleLog(snapshot_file)
+    assert reopened.load() == (None, [{'turn': 1}, {'turn': 2}])
+    assert reopened.seq == 2
+
+
+def test_torn_tail_is_cut_off(snapshot_file):
+    log = BattleLog(snapshot_file)
+    log.load()
+    log.append({'turn': 1})
+    log.append({'turn': 2})
+    log.close()
+
+    # 模拟写到一半时崩溃 / Simulate a crash halfway through the last record
+    size = os.path.getsize(log.log_file)
+    with open(log.log_file, 'r+b') as f:
+        f.truncate(size - 3)
+
+    reopened = BattleLog(snapshot_file)
+    assert reopened.load() == (None, [{'turn': 1}])
+    # 截断后可以继续追加 / Appending continues after the cut
+    reopened.append({'turn': 3})
+    reopened.close()
+    assert BattleLog(snapshot_file).load()[1] == [{'turn': 1}, {'turn': 3}]
+
+
+def test_compaction_and_crash_before_truncation(snapshot_file):
+    log = BattleLog(snapshot_file, compact_every=2)
+    log.load()
+    log.append({'turn': 1})
+    assert log.append({'turn': 2})
+    with open(log.log_file, 'rb') as f:
+        stale_log = f.read()
+    log.compact({'battles': 2})
+    log.append({'turn': 3})
+    log.close()
+    assert BattleLog(snapshot_file).load() == ({'battles': 2}, [{'turn': 3}])
+
+    # 压缩后、清空日志前崩溃：快照里已有的记录被跳过 / Crash after the snapshot but before the log was emptied
+    with open(log.log_file, 'wb') as f:
+        f.write(stale_log)
+    assert BattleLog(snapshot_file).load() == ({'battles': 2}, [])
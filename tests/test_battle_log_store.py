@@ -0,0 +1,83 @@
+import os
+
+import pytest
+from game_project.managers.battle_log_store import BattleLogStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = BattleLogStore(str(tmp_path))
+    yield store
+    store.close()
+
+
+def fill(store, battles=3, turns=10):
+    ids = []
+    for _ in range(battles):
+        battle = store.begin_battle()
+        ids.append(battle)
+        for turn in range(turns):
+            for actor in ('Warrior', 'Ranger'):
+                event = 'crit' if turn % 5 == 0 else 'hit'
+                store.append(battle, turn, event, actor, time=float(turn), data={'damage': turn})
+        store.end_battle(battle)
+    return ids
+
+
+def test_queries_filter_on_every_field(store):
+    first, second, _ = fill(store)
+    assert store.count(battle=first) == 20
+    assert store.count(event_type='crit') == 12
+    assert store.count(battle=second, event_type='crit', actor='Ranger') == 2
+    assert [event['data']['damage'] for event in store.query(battle=first, actor='Warrior', turns=range(3, 6))] == [3, 4, 5]
+    assert store.count(event_type='dodge') == 0
+    assert store.summarize(first) == {'crit': {'Warrior': 2, 'Ranger': 2}, 'hit': {'Warrior': 8, 'Ranger': 8}}
+
+
+def test_block_index_skips_other_battles(store, monkeypatch):
+    store.BLOCK_SIZE = 4
+    first, second, third = fill(store)
+    assert len(store.blocks[second]) == 5
+
+    # 只解码匹配块中的记录 / Only records in matching blocks are read
+    scanned = []
+    unpack = store.RECORD_HEADER.unpack_from
+
+    class CountingHeader:
+        size = store.RECORD_HEADER.size
+
+        @staticmethod
+        def unpack_from(buffer, offset):
+            scanned.append(offset)
+            return unpack(buffer, offset)
+
+    monkeypatch.setattr(store, 'RECORD_HEADER', CountingHeader)
+    assert store.count(battle=second, turn=7) == 2
+    assert len(scanned) == 4
+    offsets = {block['offset'] for block in store.blocks[second]}
+    assert min(scanned) in offsets
+
+
+def test_index_survives_reopen_and_unindexed_tail(tmp_path):
+    store = BattleLogStore(str(tmp_path))
+    store.BLOCK_SIZE = 4
+    first, _, _ = fill(store)
+    battle = store.begin_battle()
+    store.append(battle, 0, 'hit', 'Warrior')
+    store.append(battle, 1, 'hit', 'Warrior')
+    # 未关闭：最后一块没有写入索引，最后一条记录写了一半
+    # Not closed: the last block was never indexed and the last record is torn
+    store._data_file.write(b'\x10\x00')
+    store._data_file.flush()
+
+    reopened = BattleLogStore(str(tmp_path))
+    try:
+        assert reopened.count(battle=first) == 20
+        assert reopened.count(battle=battle) == 2
+        assert reopened.begin_battle() == battle + 1
+        reopened.append(battle + 1, 0, 'hit', 'Ranger')
+        assert reopened.count(battle=battle + 1, actor='Ranger') == 1
+    finally:
+        reopened.close()
+        store._data_file.close()
+        store._index_file.close()
@@ -0,0 +1,56 @@
+import pytest
+
+# game_data_manager 需要游戏配置模块 / game_data_manager needs the game's config module
+game_data_manager = pytest.importorskip('game_project.managers.game_data_manager')
+EventSystem = game_data_manager.EventSystem
+
+
+def test_batched_handlers_receive_one_list_per_frame():
+    events = EventSystem()
+    hits, batches = [], []
+    events.register_handler('hit', hits.append)
+    events.register_handler('hit', batches.append, batch=True)
+
+    for damage in (3, 5, 8):
+        events.trigger_event('hit', damage)
+    assert hits == [3, 5, 8]
+    assert batches == []
+
+    events.dispatch_batches()
+    events.dispatch_batches()
+    assert batches == [[3, 5, 8]]
+
+    events.trigger_event('hit', 13)
+    events.dispatch_batches()
+    assert batches == [[3, 5, 8], [13]]
+
+
+def test_history_ring_keeps_the_newest_events():
+    events = EventSystem(history_size=4)
+    for turn in range(6):
+        events.trigger_event('turn' if turn % 2 else 'hit', turn)
+
+    assert [event['data'] for event in events.get_history()] == [2, 3, 4, 5]
+    assert [event['data'] for event in events.get_history('hit')] == [2, 4]
+    assert [event['data'] for event in events.get_history(limit=1)] == [5]
+    assert events.get_history('dodge') == []
+
+
+def test_ids_and_names_are_interchangeable():
+    events = EventSystem()
+    received = []
+    crit = events.get_event_id('crit')
+    events.register_handler('crit', received.append)
+    events.trigger_event(crit, 'by id')
+    events.unregister_handler(crit, received.append)
+    events.trigger_event('crit', 'ignored')
+    assert received == ['by id']
+
+
+def test_unknown_ids_are_rejected():
+    events = EventSystem()
+    events.get_event_id('hit')
+    with pytest.raises(ValueError):
+        events.register_handler(5, print)
+    with pytest.raises(ValueError):
+        events.trigger_event(-1)
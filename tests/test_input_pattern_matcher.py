@@ -0,0 +1,88 @@
+import pytest
+from input_pattern_matcher import InputPatternMatcher, NS_PER_SECOND
+
+MS = NS_PER_SECOND // 1000
+UP, DOWN, LEFT, RIGHT = 1, 2, 3, 4
+
+
+@pytest.fixture
+def matcher():
+    matcher = InputPatternMatcher()
+    matcher.register('dash', [RIGHT, RIGHT], max_interval=0.2)
+    matcher.register('hadouken', [DOWN, RIGHT, UP], window=0.5)
+    return matcher
+
+
+def test_sequence_matches(matcher):
+    assert matcher.feed(DOWN, 0) == []
+    assert matcher.feed(RIGHT, 100 * MS) == []
+    assert matcher.feed(UP, 200 * MS) == ['hadouken']
+    assert matcher.get_match('hadouken') == (0, 200 * MS)
+    assert matcher.get_match('hadouken', since_ns=1) is None
+
+    matcher.begin_frame()
+    assert matcher.get_match('hadouken') is None
+
+
+def test_interval_and_window_guards(matcher):
+    matcher.feed(RIGHT, 0)
+    assert matcher.feed(RIGHT, 300 * MS) == []
+
+    matcher.feed(DOWN, 1000 * MS)
+    matcher.feed(RIGHT, 1300 * MS)
+    assert matcher.feed(UP, 1600 * MS) == []
+
+
+def test_overlapping_patterns_share_the_trie(matcher):
+    # 第二个 RIGHT 同时完成 dash 并推进 hadouken / The second RIGHT completes dash and advances hadouken
+    matcher.feed(DOWN, 0)
+    matcher.feed(RIGHT, 50 * MS)
+    assert matcher.feed(RIGHT, 100 * MS) == ['dash']
+    assert matcher.get_progress('hadouken') == 0
+    assert not matcher.is_reachable('hadouken')
+
+    matcher.feed(DOWN, 200 * MS)
+    assert matcher.get_progress('hadouken') == 1
+    assert matcher.is_reachable('hadouken')
+
+
+def test_hold_pattern(matcher):
+    matcher.register('charge', [DOWN], hold=0.3)
+    matcher.feed(DOWN, 0)
+    assert matcher.update(100 * MS, {DOWN}) == []
+    assert matcher.is_reachable('charge')
+    assert matcher.update(300 * MS, {DOWN}) == ['charge']
+    assert matcher.get_match('charge') == (0, 300 * MS)
+
+    matcher.feed(DOWN, 1000 * MS)
+    # 提前松开时长按失败 / Releasing early fails the hold
+    assert matcher.update(1100 * MS, set()) == []
+    assert not matcher.holds
+
+
+def test_recompile_keeps_cursors(matcher):
+    matcher.feed(DOWN, 0)
+    matcher.feed(RIGHT, 50 * MS)
+
+    # 注册新模式会重新编译，进行中的输入不受影响 / Registering recompiles without interrupting input
+    matcher.register('uppercut', [LEFT, DOWN])
+    assert matcher.feed(UP, 100 * MS) == ['hadouken']
+
+    # 重复注册相同的定义不会重新编译 / Registering an identical definition does not recompile
+    matcher.register('uppercut', [LEFT, DOWN])
+    assert not matcher._dirty
+
+
+def test_unregister_drops_cursors_on_removed_paths(matcher):
+    matcher.feed(DOWN, 0)
+    matcher.unregister('hadouken')
+    assert matcher.feed(RIGHT, 50 * MS) == []
+    assert matcher.get_progress('hadouken') == 0
+    assert 'hadouken' not in matcher.patterns
+
+
+def test_update_expires_stale_cursors(matcher):
+    matcher.feed(RIGHT, 0)
+    assert matcher.cursors
+    matcher.update(500 * MS, set())
+    assert not matcher.cursors
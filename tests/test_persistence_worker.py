@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+from persistence_worker import PersistenceWorker, snapshot
+
+
+@pytest.fixture
+def worker():
+    worker = PersistenceWorker("test-writer")
+    yield worker
+    worker.stop()
+
+
+def test_coalesced_writes_keep_the_last_payload(worker):
+    written = []
+    worker.submit('slot', written.append, 1)
+    assert worker.flush(1.0)
+
+    # 间隔内的提交被合并，只写最后一次 / Submissions inside the interval are coalesced into the last one
+    worker.submit('slot', written.append, 2, min_interval=60.0)
+    worker.submit('slot', written.append, 3, min_interval=60.0)
+    assert worker.flush(1.0)
+    assert written == [1, 3]
+    assert worker.stats['coalesced'] == 1
+
+
+def test_min_interval_debounces_writes(worker):
+    written = []
+    worker.submit('settings', written.append, 'first')
+    assert worker.flush(1.0)
+
+    worker.submit('settings', written.append, 'second', min_interval=0.2)
+    time.sleep(0.05)
+    assert written == ['first']
+    assert worker.has_pending()
+
+    deadline = time.monotonic() + 2.0
+    while worker.has_pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert written == ['first', 'second']
+
+
+def test_flush_times_out_while_a_write_is_blocked(worker):
+    release = threading.Event()
+    worker.submit('slow', lambda data: release.wait(), None)
+
+    assert not worker.flush(timeout=0.05)
+    release.set()
+    assert worker.flush(1.0)
+    assert not worker.has_pending()
+
+
+def test_results_are_reported_to_every_coalesced_submitter(worker):
+    results = []
+
+    def fail(data):
+        raise OSError("disk full")
+
+    worker.submit('slot', fail, 1, min_interval=60.0, on_complete=results.append)
+    worker.submit('slot', fail, 2, min_interval=60.0, on_complete=results.append)
+    assert worker.flush(1.0)
+    assert results == [False, False]
+    assert worker.stats['failed'] == 1
+
+    worker.submit('other', lambda data: False, None, on_complete=results.append)
+    worker.submit('third', lambda data: None, None, on_complete=results.append)
+    assert worker.flush(1.0)
+    assert results[2:] == [False, True]
+
+
+def test_submissions_after_stop_are_written_synchronously(worker):
+    worker.stop()
+    written = []
+    worker.submit('late', written.append, 'data')
+    assert written == ['data']
+
+
+def test_snapshot_is_independent():
+    data = {'player': {'inventory': [{'id': 1}], 'tags': {'a'}}}
+    copy = snapshot(data)
+    data['player']['inventory'][0]['id'] = 2
+    assert copy == {'player': {'inventory': [{'id': 1}], 'tags': ['a']}}
@@ -0,0 +1,123 @@
+import os
+
+import pytest
+from save_engine import SaveEngine
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return SaveEngine(str(tmp_path))
+
+
+def make_data():
+    return {
+        'save_time': '2024-01-01T00:00:00',
+        'settings': {'language': 'en', 'volume': 0.5},
+        'player': {'gold': 10, 'inventory': ['potion'] * 200}
+    }
+
+
+def test_round_trip_and_partial_load(engine):
+    data = make_data()
+    assert engine.save(1, data)
+    assert SaveEngine(engine.base_path).load(1) == data
+    assert SaveEngine(engine.base_path).load(1, sections=['settings']) == {'settings': data['settings']}
+
+
+def test_only_dirty_sections_are_encoded(engine):
+    data = make_data()
+    engine.save(1, data)
+
+    data['settings']['language'] = 'zh'
+    data['player']['gold'] = 99
+    engine.mark_dirty(1, 'settings')
+    engine.save(1, data, dirty={'player'})
+    loaded = SaveEngine(engine.base_path).load(1)
+    assert loaded['settings']['language'] == 'zh'
+    assert loaded['player']['gold'] == 99
+
+    # 未标记的段复用缓存的字节 / Unmarked sections reuse their cached bytes
+    data['player']['gold'] = 5
+    engine.save(1, data, dirty=set())
+    assert SaveEngine(engine.base_path).load(1)['player']['gold'] == 99
+
+
+def test_dirty_sections_carry_over_to_other_slots(engine):
+    data = make_data()
+    engine.save(1, data)
+    engine.save(2, data)
+
+    data['player']['gold'] = 42
+    engine.save(1, data, dirty={'player'})
+    engine.save(2, data, dirty=set())
+    assert SaveEngine(engine.base_path).load(2)['player']['gold'] == 42
+
+
+def test_unchanged_save_skips_the_write(engine):
+    data = make_data()
+    engine.save(1, data)
+    mtime = os.path.getmtime(engine.slot_path(1))
+    os.utime(engine.slot_path(1), (mtime - 100, mtime - 100))
+
+    assert engine.save(1, make_data(), dirty=set())
+    assert os.path.getmtime(engine.slot_path(1)) == mtime - 100
+
+
+def test_corrupt_slot_is_rejected(engine):
+    engine.save(1, make_data())
+    path = engine.slot_path(1)
+    with open(path, 'rb') as f:
+        data = bytearray(f.read())
+    data[-1] ^= 0xFF
+    with open(path, 'wb') as f:
+        f.write(data)
+
+    assert SaveEngine(engine.base_path).load(1) is None
+
+
+@pytest.mark.parametrize('size', [0, 4, 8, 9, 20])
+def test_truncated_slot_is_rejected(engine, size):
+    engine.save(1, make_data())
+    path = engine.slot_path(1)
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(data[:size])
+
+    reopened = SaveEngine(engine.base_path)
+    assert reopened.load(1) is None
+    # 重建索引时跳过损坏的槽位 / Rebuilding the index skips the damaged slot
+    os.remove(os.path.join(engine.base_path, SaveEngine.INDEX_FILE))
+    assert SaveEngine(engine.base_path).list_slots() == {}
+
+
+def test_index_metadata_is_carried_forward(engine):
+    engine.save(1, make_data(), metadata={'player': {'gold': 10}}, thumbnail=b'rgb')
+    engine.save(1, make_data())
+
+    reopened = SaveEngine(engine.base_path)
+    assert reopened.get_metadata(1) == {'save_time': '2024-01-01T00:00:00', 'player': {'gold': 10}}
+    assert reopened.load_thumbnail(1) == b'rgb'
+    assert reopened.latest_slot() == '1'
+
+
+def test_index_is_rebuilt_when_missing(engine):
+    engine.save(1, make_data())
+    engine.save(2, make_data())
+    os.remove(os.path.join(engine.base_path, SaveEngine.INDEX_FILE))
+
+    assert sorted(SaveEngine(engine.base_path).list_slots()) == ['1', '2']
+
+
+def test_delete(engine):
+    engine.save(1, make_data(), thumbnail=b'rgb')
+    assert engine.delete(1)
+    assert not engine.exists(1)
+    assert engine.list_slots() == {}
+    assert SaveEngine(engine.base_path).load(1) is None
+
+
+def test_engines_are_shared_per_directory(tmp_path):
+    first = SaveEngine.for_directory(str(tmp_path))
+    assert SaveEngine.for_directory(str(tmp_path) + os.sep) is first
+    assert SaveEngine.for_directory(str(tmp_path / 'other')) is not first
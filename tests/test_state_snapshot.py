@@ -0,0 +1,111 @@
+import random
+
+import pytest
+from state_snapshot import StateSnapshotEngine
+
+
+class FakeCharacter:
+    def __init__(self, name, hp):
+        self.name = name
+        self.hp = hp
+        self.max_hp = hp
+        self.atk = 10
+        self.skills = {'slash': {'current_cooldown': 0}}
+        self.buffs = []
+        self.threat_system = {'threat': 0}
+
+
+class FakeBattle:
+    def __init__(self):
+        self.player_team = [FakeCharacter('hero', 100)]
+        self.enemy_team = [FakeCharacter('slime', 50), FakeCharacter('bat', 30)]
+        self.turn_order = self.player_team + self.enemy_team
+        self.current_turn = 0
+        self.battle_state = {'phase': 'battle', 'combo_count': 0}
+        self.rng = random.Random(42)
+
+
+@pytest.fixture
+def battle():
+    return FakeBattle()
+
+
+def test_restore_is_exact(battle):
+    engine = StateSnapshotEngine(capacity=8)
+    engine.capture(battle, timestamp=0.0, force=True)
+    expected_roll = random.Random(42).random()
+
+    hero, slime, bat = battle.player_team[0], battle.enemy_team[0], battle.enemy_team[1]
+    hero.hp = 40
+    hero.skills['slash']['current_cooldown'] = 3
+    hero.buffs.append({'type': 'attack_up', 'duration': 2})
+    hero.threat_system['threat'] = 9
+    battle.enemy_team.remove(bat)
+    battle.turn_order.reverse()
+    battle.current_turn = 2
+    battle.battle_state['combo_count'] = 5
+    battle.rng.random()
+
+    assert engine.restore(battle)
+    assert hero.hp == 100
+    assert hero.skills['slash']['current_cooldown'] == 0
+    assert hero.buffs == []
+    assert hero.threat_system == {'threat': 0}
+    assert battle.enemy_team == [slime, bat]
+    assert battle.turn_order == [hero, slime, bat]
+    assert battle.current_turn == 0
+    assert battle.battle_state['combo_count'] == 0
+    # 随机数回到捕获时的位置 / The RNG is back at the captured position
+    assert battle.rng.random() == expected_roll
+
+
+def test_restore_drops_newer_snapshots(battle):
+    engine = StateSnapshotEngine(capacity=8)
+    hero = battle.player_team[0]
+    for second, hp in enumerate((100, 80, 60)):
+        hero.hp = hp
+        engine.capture(battle, timestamp=float(second), force=True)
+
+    assert engine.restore(battle, steps=2)
+    assert hero.hp == 80
+    assert len(engine) == 2
+
+    # 被丢弃的快照不会再被恢复 / The dropped snapshot is never restored again
+    hero.hp = 10
+    engine.capture(battle, timestamp=3.0, force=True)
+    assert engine.restore(battle, steps=2)
+    assert hero.hp == 80
+
+
+def test_restore_seconds_ago_falls_back_to_oldest(battle):
+    engine = StateSnapshotEngine(capacity=3)
+    hero = battle.player_team[0]
+    for second in range(5):
+        hero.hp = 100 - second
+        engine.capture(battle, timestamp=float(second), force=True)
+    assert len(engine) == 3
+
+    assert engine.restore(battle, seconds_ago=1.5, now=4.0)
+    assert hero.hp == 98
+
+    assert engine.restore(battle, seconds_ago=60.0, now=4.0)
+    assert hero.hp == 98
+    assert len(engine) == 1
+
+
+def test_capture_is_throttled_and_shares_unchanged_parts(battle):
+    engine = StateSnapshotEngine(capacity=8, rate=10.0)
+    assert engine.capture(battle, timestamp=0.0)
+    assert not engine.capture(battle, timestamp=0.05)
+
+    battle.enemy_team[0].hp = 1
+    assert engine.capture(battle, timestamp=0.2)
+    first, second = engine._at(2), engine._at(1)
+    # 未变化的角色和战斗状态共享同一个对象 / Unchanged characters and battle state share one object
+    assert first[1][0] is second[1][0]
+    assert first[1][1] is not second[1][1]
+    assert first[2] is second[2]
+
+
+def test_restore_without_history(battle):
+    assert not StateSnapshotEngine(capacity=4).restore(battle)
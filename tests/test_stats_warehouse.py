@@ -0,0 +1,82 @@
+import os
+
+import pytest
+from game_project.managers.persistence_worker import PersistenceWorker
+from game_project.managers.stats_warehouse import StatsWarehouse
+
+DAY = 86400.0
+
+
+@pytest.fixture
+def worker():
+    worker = PersistenceWorker("test-stats")
+    yield worker
+    worker.stop()
+
+
+def record_battle(stats, rows):
+    for i in range(rows):
+        stats.record('damage', float(i % 50), 'Warrior' if i % 2 else 'Ranger',
+                     weather='rain', battle=1, timestamp=DAY * 19000 + i)
+
+
+def test_rollups_survive_a_reload(tmp_path, worker):
+    stats = StatsWarehouse(str(tmp_path), worker)
+    stats.CHUNK_ROWS = 64
+    record_battle(stats, 200)
+    assert stats.get_rollup('damage')['count'] == 200
+    stats.flush()
+
+    reloaded = StatsWarehouse(str(tmp_path))
+    rollup = reloaded.get_rollup('damage')
+    assert (rollup['count'], rollup['min'], rollup['max']) == (200, 0.0, 49.0)
+    assert reloaded.get_rollup('damage', 'class', 'Warrior')['count'] == 100
+    assert reloaded.get_keys('session') == ['1']
+    assert reloaded.session == 2
+    assert sum(len(column) for column in reloaded.iter_column('value')) == 200
+
+
+def test_rollups_on_disk_count_only_written_chunks(tmp_path):
+    stats = StatsWarehouse(str(tmp_path))
+    stats.CHUNK_ROWS = 64
+    record_battle(stats, 100)
+
+    # 未 flush 就"崩溃"：只有第一个块和它的汇总在磁盘上 / "Crash" without a flush: only the first chunk and its rollups are on disk
+    reloaded = StatsWarehouse(str(tmp_path))
+    assert reloaded.get_rollup('damage')['count'] == 64
+    assert sum(len(column) for column in reloaded.iter_column('value')) == 64
+
+
+def test_full_chunks_are_written_by_the_worker(tmp_path, worker):
+    stats = StatsWarehouse(str(tmp_path), worker)
+    stats.CHUNK_ROWS = 64
+    record_battle(stats, 130)
+
+    # 写出之前冻结的块从内存读取 / Frozen chunks are read from memory until they are written
+    chunks = list(stats.iter_chunks(['value', 'weather']))
+    assert [len(chunk['value']) for chunk in chunks] == [64, 64, 2]
+    assert stats.decode('weather', chunks[0]['weather'][0]) == 'rain'
+
+    assert worker.flush(5.0)
+    assert not stats._unwritten
+    assert sorted(os.listdir(str(tmp_path))) == ['chunk_000000.col', 'chunk_000001.col', 'rollups.json']
+
+
+def test_failed_chunk_is_retried(tmp_path, monkeypatch):
+    stats = StatsWarehouse(str(tmp_path))
+    stats.CHUNK_ROWS = 8
+    chunk_path = stats._chunk_path
+
+    def broken(index):
+        return os.path.join(str(tmp_path), 'missing', f"{index}.col")
+
+    monkeypatch.setattr(stats, '_chunk_path', broken)
+    record_battle(stats, 8)
+    assert stats._failed_chunks == {0}
+    assert not os.path.exists(os.path.join(str(tmp_path), StatsWarehouse.ROLLUP_FILE))
+
+    monkeypatch.setattr(stats, '_chunk_path', chunk_path)
+    stats.flush()
+    reloaded = StatsWarehouse(str(tmp_path))
+    assert reloaded.get_rollup('damage')['count'] == 8
+    assert sum(len(column) for column in reloaded.iter_column('value')) == 8
@@ -0,0 +1,71 @@
+import pytest
+from voice_allocator import VoiceAllocator
+
+
+class FakeChannel:
+    def __init__(self):
+        self.playing = None
+        self.volume = 1.0
+
+    def get_busy(self):
+        return self.playing is not None
+
+    def stop(self):
+        self.playing = None
+
+    def set_volume(self, volume):
+        self.volume = volume
+
+    def play(self, sound):
+        self.playing = sound
+
+
+@pytest.fixture
+def channels():
+    return [FakeChannel(), FakeChannel()]
+
+
+@pytest.fixture
+def allocator(channels):
+    return VoiceAllocator(channels, lambda name: name)
+
+
+def test_channels_busy_in_the_mixer_are_not_free(allocator, channels):
+    # 分配器之外开始播放的通道 / A channel started outside the allocator
+    channels[0].play('menu_click')
+    allocator.request('attack')
+    allocator.flush()
+    assert channels[0].playing == 'menu_click'
+    assert channels[1].playing == 'attack'
+
+    # 通道用尽时只抢占自己的语音 / With every channel busy only the allocator's own voices are stolen
+    allocator.request('critical_hit')
+    allocator.flush()
+    assert channels[0].playing == 'menu_click'
+    assert channels[1].playing == 'critical_hit'
+    assert allocator.stats['stolen'] == 1
+
+    allocator.request('skill')
+    allocator.flush()
+    assert allocator.stats['dropped'] == 1
+
+
+def test_merged_requests_use_the_nearest_distance(allocator):
+    allocator.request('attack', distance=1200.0)
+    allocator.request('attack', distance=0.0)
+    allocator.request('attack', distance=600.0)
+    request = allocator.pending['attack']
+    assert request['count'] == 3
+    assert request['distance'] == 0.0
+    assert request['score'] == allocator._get_score('attack', 1.0, 0.0)
+
+
+def test_finished_channels_are_reused(allocator, channels):
+    allocator.request('attack')
+    allocator.request('hurt')
+    allocator.flush()
+    channels[0].stop()
+
+    allocator.request('dodge')
+    allocator.flush()
+    assert [channel.playing for channel in channels] == ['dodge', 'attack']
@@ -5,10 +5,16 @@ import logging
 import math
 from typing import List, Dict, Tuple
 
+from game_project.ui.surface_factory import surface_factory
+from game_project.managers.graphics_quality import graphics_quality
+
 class ParallaxBackground:
     """视差背景类 / Parallax background class"""
     def __init__(self, layer_info):
         self.layer_info = layer_info
+        # 位置以窗口像素为单位，绘制到其他尺寸的目标时按比例换算
+        # Positions are in window pixels and are rescaled when drawing into a target of another size
+        self.world_width = None
         # 使用高精度浮点数实现亚像素移动 / Use high precision floats for sub-pixel movement
         for layer in self.layer_info:
             layer['position'] = [0.0, 0.0]
@@ -32,7 +38,7 @@ class ParallaxBackground:
         screen_height = screen.get_height()
         current_size = (screen_width, screen_height)
         
-        for layer in self.layer_info:
+        for layer in self.visible_layers(graphics_quality.parallax_layers):
             if 'image' not in layer or layer['image'] is None:
                 continue
             
@@ -46,15 +52,27 @@ class ParallaxBackground:
             
             # 使用亚像素精度计算位置 / Calculate position with sub-pixel precision
             x_pos = layer['position'][0] + layer['sub_pixel']
+            if self.world_width and self.world_width != screen_width:
+                x_pos = x_pos * screen_width / self.world_width
             x_pixel = math.floor(x_pos)  # 转换为整数像素 / Convert to integer pixels
             
             # 使用缓存的图像和双重缓冲 / Use cached image and double buffering
             screen.blit(layer['scaled_image'], (x_pixel, 0))
             screen.blit(layer['scaled_image'], (x_pixel + screen_width, 0))
     
+    def visible_layers(self, max_layers=None):
+        """限制层数时保留最远的天空层和最近的几层 / With a layer limit keep the far sky layer and the nearest layers"""
+        layers = self.layer_info
+        if max_layers is None or max_layers >= len(layers):
+            return layers
+        if max_layers <= 1:
+            return layers[:1]
+        return layers[:1] + layers[len(layers) - (max_layers - 1):]
+    
     def update(self, dt):
         """更新背景位置 / Update background position"""
         screen_width = pygame.display.get_surface().get_width()
+        self.world_width = screen_width
         
         for layer in self.layer_info:
             # 使用物理模拟实现更平滑的移动
@@ -91,6 +109,12 @@ class BackgroundManager:
         # 使用双缓冲 / Use double buffering
         self.buffer_surface = pygame.Surface(screen_size, pygame.HWSURFACE|pygame.DOUBLEBUF)
         
+        # 降低动画频率时累积时间，背景没动就不重绘
+        # Time accumulates while the animation rate is lowered; an unchanged background is not redrawn
+        self._pending_dt = 0.0
+        self._rate_accumulator = 0.0
+        self._drawn = {}
+        
         # 初始化背景
         self._init_backgrounds()
         
@@ -145,19 +169,41 @@ class BackgroundManager:
             logging.error(f"初始化背景时出错: {e}")
     
     def update(self, dt):
-        """更新背景 / Update background"""
+        """更新背景（按画质调节器的动画频率）/ Update the background at the governor's animation rate"""
         if self.current_background:
-            self.current_background.update(dt)
+            self._pending_dt += dt
+            self._rate_accumulator += graphics_quality.background_rate
+            if self._rate_accumulator >= 1.0:
+                self._rate_accumulator -= 1.0
+                self.current_background.update(self._pending_dt)
+                self._pending_dt = 0.0
+                self._drawn.clear()
     
     def render(self, screen):
         """渲染背景 / Render background"""
         if self.current_background:
-            # 先渲染到缓冲表面 / Render to buffer surface first
-            self.buffer_surface.fill((0, 0, 0))
-            self.current_background.draw(self.buffer_surface)
+            if self._needs_redraw('buffer', self.buffer_surface):
+                # 先渲染到缓冲表面 / Render to buffer surface first
+                self.buffer_surface.fill((0, 0, 0))
+                self.current_background.draw(self.buffer_surface)
             # 然后一次性复制到屏幕 / Then copy to screen at once
             screen.blit(self.buffer_surface, (0, 0))
     
+    def render_scene(self, target):
+        """直接绘制到任意尺寸的场景目标（见 RenderScaler）
+        Draw straight into a scene target of any size, see RenderScaler"""
+        if self.current_background and self._needs_redraw('scene', target):
+            target.fill((0, 0, 0))
+            self.current_background.draw(target)
+    
+    def _needs_redraw(self, slot, target):
+        """目标上次绘制之后背景是否变化 / Whether the background changed since the target was last drawn"""
+        key = (id(target), target.get_size(), graphics_quality.parallax_layers)
+        if self._drawn.get(slot) == key:
+            return False
+        self._drawn[slot] = key
+        return True
+    
     def cleanup(self):
         """清理资源 / Cleanup resources"""
         self.current_background = None
@@ -166,20 +212,17 @@ class BackgroundManager:
         """创建默认背景 / Create default background"""
         class DefaultBackground:
             def __init__(self, screen_size):
-                self.surface = pygame.Surface(screen_size)
-                # 创建渐变背景
-                for y in range(screen_size[1]):
-                    color = (
-                        max(0, min(255, 30 + y // 4)),
-                        max(0, min(255, 30 + y // 6)),
-                        max(0, min(255, 40 + y // 3))
-                    )
-                    pygame.draw.line(self.surface, color, (0, y), (screen_size[0], y))
+                # 使用缓存的渐变背景
+                self.surface = surface_factory.default_background(screen_size)
             
             def update(self, dt):
                 pass
             
             def draw(self, screen):
-                screen.blit(self.surface, (0, 0))
+                surface = self.surface
+                if surface.get_size() != screen.get_size():
+                    # 按目标尺寸取缓存的渐变 / Use the cached gradient for the target size
+                    surface = surface_factory.default_background(screen.get_size())
+                screen.blit(surface, (0, 0))
         
         self.current_background = DefaultBackground(self.screen_size)
\ No newline at end of file
@@ -1,4 +1,6 @@
 import pygame
+import logging
+from game_project.ui.background_manager import BackgroundManager
 from game_project.ui.components import (
     CharacterPanel, 
     QTEDisplay, 
@@ -38,6 +40,24 @@ class BattleUI:
         self._load_resources()
         self.setup_ui()
         
+        # 战斗背景；渲染缩放生效时由 render_scene 以较低分辨率绘制
+        # Battle background; drawn at reduced resolution by render_scene while render scaling is active
+        self.background_manager = self._create_background_manager()
+        self._background_buffer = None
+        
+    def _create_background_manager(self):
+        """创建背景管理器 / Create background manager"""
+        try:
+            return BackgroundManager(
+                screen_size=self.screen_size,
+                resource_manager=self.resource_manager,
+                background_folder='start_clouds',
+                speeds=[5, 15, 25, 35, 45, 55]
+            )
+        except Exception as e:
+            logging.error(f"创建背景管理器失败: {e}")
+            return None
+        
     def _load_resources(self):
         """加载UI资源 / Load UI resources"""
         self.ui_assets = {}
@@ -181,8 +201,12 @@ class BattleUI:
             screen_h // 2
         )
         
-    def update(self, dt, battle_state):
+    def update(self, dt, battle_state=None):
         """更新UI状态 / Update UI state"""
+        if self.background_manager:
+            self.background_manager.update(dt)
+        if battle_state is None:
+            return
         try:
             # 更新所有UI元素 / Update all UI elements
             self._update_character_elements(dt, battle_state)
@@ -228,6 +252,27 @@ class BattleUI:
             if text.update(dt)
         ]
         
+    def render_scene(self, scene):
+        """以降低的分辨率绘制战斗场景（渲染缩放生效时由 Game.render 调用）
+        Draw the battle scene at reduced resolution; called by Game.render while render scaling is active"""
+        if self.background_manager:
+            self.background_manager.render_scene(scene)
+            
+    def render(self, screen):
+        """渲染战斗界面 / Render battle screen"""
+        render_queue = self.game_engine.render_queue
+        
+        # 渲染背景（缩放生效时已由 render_scene 绘制）
+        # Render the background, unless render_scene already drew it at the scaled resolution
+        if self.background_manager and not self.game_engine.render_scaler.active:
+            if self._background_buffer is None:
+                self._background_buffer = pygame.Surface(self.screen_size)
+            self.background_manager.render(self._background_buffer)
+            render_queue.submit('background', self._background_buffer, (0, 0))
+            
+        # 面板、按钮和指示器以原生分辨率绘制 / Panels, buttons and indicators draw at native resolution
+        render_queue.draw('ui', self.draw)
+        
     def draw(self, surface):
         """绘制UI / Draw UI"""
         try:
@@ -13,12 +13,61 @@ from game_project.animation.warrior_animation_controller import WarriorAnimation
 from ..core.game_state import GameState
 from ..config import Colors
 from ..ui.components.character_panel import CharacterPanel
+from ..ui.components.cached_widget import CachedWidget
 from ..ui.components.menu_button import MenuButton
 from ..animation.particle_system import ParticleSystem
 from ..ui.background_manager import BackgroundManager
 from ..core.characters import Tanker, Warrior, Ranger
 from ..animation.character_loader import CharacterAnimationConfig, CharacterAnimationLoader
 
+class AttributePanel(CachedWidget):
+    """角色属性面板：只在切换角色时重绘，淡入淡出用整面透明度
+    Attribute panel: redrawn only when the character changes; fades use surface alpha"""
+    ATTRIBUTES = [
+        ('HP', 'hp'),
+        ('Attack', 'attack'),
+        ('Defense', 'defense'),
+        ('Speed', 'speed'),
+        ('Critical', 'critical')
+    ]
+    CHARACTER_CLASSES = {
+        'Tanker': Tanker,
+        'Warrior': Warrior,
+        'Ranger': Ranger
+    }
+
+    def __init__(self, owner, size=(300, 400)):
+        super().__init__(size)
+        self.owner = owner
+
+    def cache_key(self):
+        return (self.owner.current_character_type, id(self.owner.icons), id(self.owner.attribute_font))
+
+    def render_cache(self, surface):
+        width, height = self.cache_size
+
+        # 绘制半透明背景
+        pygame.draw.rect(surface, (20, 20, 30, 204), (0, 0, width, height))
+        pygame.draw.rect(surface, (100, 100, 120, 255), (0, 0, width, height), 2)
+
+        # 获取角色属性
+        character_class = self.CHARACTER_CLASSES[self.owner.current_character_type]
+
+        # 渲染属性
+        y_offset = 20
+        for attr_name, icon_key in self.ATTRIBUTES:
+            # 绘制图标
+            icon = self.owner.icons[icon_key]
+            icon_rect = icon.get_rect(topleft=(20, y_offset))
+            surface.blit(icon, icon_rect)
+
+            # 绘制属性名和值
+            attr_text = f"{attr_name}: {getattr(character_class, f'base_{attr_name.lower()}', 0)}"
+            text_surface = self.owner.attribute_font.render(attr_text, True, (200, 200, 200))
+            surface.blit(text_surface, (60, y_offset + 5))
+
+            y_offset += 50
+
 class CharacterSelectUI:
     """角色选择界面 / Character selection screen"""
     def __init__(self, game_engine):
@@ -143,6 +192,9 @@ class CharacterSelectUI:
             }
         }
         
+        # 缓存的属性面板 / Cached attribute panel
+        self.attribute_panel = AttributePanel(self)
+        
     def _load_sounds(self):
         """加载音效 / Load sound effects"""
         try:
@@ -588,13 +640,9 @@ class CharacterSelectUI:
             # 渲染按钮
             self._render_buttons(screen)
             
-            # 渲染过渡效果（修改这里）
+            # 渲染过渡效果：使用共享的过渡合成器叠加黑色
             if hasattr(self, 'transition_alpha') and self.transition_alpha > 0:
-                # 创建一个带Alpha通道的surface
-                transition_surface = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
-                # 使用SRCALPHA确保Alpha值被正确应用
-                transition_surface.fill((0, 0, 0, min(255, self.transition_alpha)))
-                screen.blit(transition_surface, (0, 0))
+                self.game_engine.transition_effect.draw_fade(screen, self.transition_alpha)
                 # 逐渐减少alpha值
                 self.transition_alpha = max(0, self.transition_alpha - 5)
                 
@@ -657,50 +705,13 @@ class CharacterSelectUI:
         if anim['alpha'] <= 0:
             return
             
-        # 创建属性面板
-        panel_width = 300
-        panel_height = 400
-        panel = pygame.Surface((panel_width, panel_height), pygame.SRCALPHA)
-        
-        # 绘制半透明背景
-        background_color = (20, 20, 30, int(anim['alpha'] * 0.8))
-        pygame.draw.rect(panel, background_color, (0, 0, panel_width, panel_height))
-        pygame.draw.rect(panel, (100, 100, 120, int(anim['alpha'])), 
-                        (0, 0, panel_width, panel_height), 2)
-        
-        # 获取角色属性
-        character_class = {
-            'Tanker': Tanker,
-            'Warrior': Warrior,
-            'Ranger': Ranger
-        }[self.current_character_type]
-        
-        # 渲染属性
-        y_offset = 20
-        for attr_name, icon_key in [
-            ('HP', 'hp'),
-            ('Attack', 'attack'),
-            ('Defense', 'defense'),
-            ('Speed', 'speed'),
-            ('Critical', 'critical')
-        ]:
-            # 制图标
-            icon = self.icons[icon_key]
-            icon_rect = icon.get_rect(topleft=(20, y_offset))
-            panel.blit(icon, icon_rect)
-            
-            # 绘制属性名和值
-            attr_text = f"{attr_name}: {getattr(character_class, f'base_{attr_name.lower()}', 0)}"
-            text_surface = self.attribute_font.render(attr_text, True, 
-                                                    (200, 200, 200, int(anim['alpha'])))
-            panel.blit(text_surface, (60, y_offset + 5))
-            
-            y_offset += 50
+        # 属性面板缓存在离屏表面，只在切换角色时重绘
+        panel_width, panel_height = self.attribute_panel.cache_size
         
         # 渲染面板
         panel_x = self.screen_size[0] // 2 + 100
         panel_y = self.screen_size[1] // 2 - panel_height // 2
-        screen.blit(panel, (panel_x, panel_y))
+        self.attribute_panel.blit_cached(screen, (panel_x, panel_y), anim['alpha'])
 
     def _render_selected_characters(self, screen):
         """渲染已选择的角色列表 / Render selected characters list"""
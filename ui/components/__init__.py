@@ -4,6 +4,7 @@ from .morale_indicator import MoraleIndicator
 from .turn_indicator import TurnIndicator
 from .weather_indicator import WeatherIndicator
 from .skill_button import SkillButton
+from .cached_widget import CachedWidget
 
 __all__ = [
     'CharacterPanel',
@@ -11,5 +12,6 @@ __all__ = [
     'MoraleIndicator',
     'TurnIndicator',
     'WeatherIndicator',
-    'SkillButton'
+    'SkillButton',
+    'CachedWidget'
 ] 
\ No newline at end of file
@@ -0,0 +1,83 @@
+import weakref
+import pygame
+from pygame import Surface
+
+class CachedWidget:
+    """缓存组件基类 / Cached widget base
+
+    组件把自己渲染到私有表面，只有输入（cache_key 返回的元组，例如角色属性、悬停状态）变化或
+    被显式失效时才重绘，其余帧直接 blit 缓存结果。透明度不进入缓存键：blit 时按档位设置整面
+    透明度。
+    A widget renders itself into a private surface and redraws only when its
+    inputs (the tuple returned by cache_key, e.g. character stats or hover
+    state) change or it is invalidated explicitly; every other frame blits
+    the cached result. Alpha is not part of the key: it is applied as
+    bucketed surface alpha at blit time.
+
+    缓存键之外的输入（例如语言、资源）变化时需要显式失效：
+    Inputs outside the cache key, such as the language or assets, need explicit invalidation:
+        invalidate()          单个组件 / one widget
+        invalidate_all()      所有组件，例如切换语言 / every widget, e.g. on a language switch
+    """
+
+    ALPHA_BUCKET = 16
+
+    _widgets = weakref.WeakSet()
+
+    def __init__(self, size):
+        self.cache_size = tuple(size)
+        self._cache_surface = None
+        self._cache_key = None
+        self._cache_valid = False
+        CachedWidget._widgets.add(self)
+
+    # ---- 子类实现 / Implemented by subclasses ----
+
+    def cache_key(self) -> tuple:
+        """决定缓存内容的输入 / Inputs that determine the cached content"""
+        return ()
+
+    def render_cache(self, surface: Surface):
+        """把组件绘制到缓存表面（坐标相对于组件左上角）
+        Draw the widget into the cache surface, relative to its top-left"""
+        raise NotImplementedError
+
+    # ---- 缓存 / Cache ----
+
+    def get_cached_surface(self) -> Surface:
+        """获取缓存表面，输入变化时重绘 / Get the cached surface, redrawing if the inputs changed"""
+        key = self.cache_key()
+        surface = self._cache_surface
+        if surface is None or surface.get_size() != self.cache_size:
+            surface = self._cache_surface = Surface(self.cache_size, pygame.SRCALPHA)
+            self._cache_valid = False
+        if not self._cache_valid or key != self._cache_key:
+            surface.fill((0, 0, 0, 0))
+            self.render_cache(surface)
+            self._cache_key = key
+            self._cache_valid = True
+        return surface
+
+    def blit_cached(self, target: Surface, dest, alpha=None):
+        """把缓存结果 blit 到目标 / Blit the cached result onto the target"""
+        surface = self.get_cached_surface()
+        surface.set_alpha(None if alpha is None else self.alpha_bucket(alpha))
+        target.blit(surface, dest)
+
+    @classmethod
+    def alpha_bucket(cls, alpha) -> int:
+        """把透明度量化到档位 / Quantise alpha to a bucket"""
+        alpha = max(0, min(255, int(alpha)))
+        return 255 if alpha >= 255 else alpha // cls.ALPHA_BUCKET * cls.ALPHA_BUCKET
+
+    # ---- 失效 / Invalidation ----
+
+    def invalidate(self):
+        """下次绘制时重绘 / Redraw on the next draw"""
+        self._cache_valid = False
+
+    @classmethod
+    def invalidate_all(cls):
+        """使所有组件失效，例如切换语言之后 / Invalidate every widget, e.g. after a language switch"""
+        for widget in list(cls._widgets):
+            widget.invalidate()
@@ -1,66 +1,84 @@
 import pygame
 from pygame import Surface, Rect
 
-class CharacterPanel:
-    """角色面板组件 / Character panel component"""
+from .cached_widget import CachedWidget
+
+class CharacterPanel(CachedWidget):
+    """角色面板组件 / Character panel component
+
+    面板只在角色属性、悬停或选中状态变化时重绘到缓存表面。
+    The panel is redrawn into its cache only when the character's stats or
+    the hover / selected state change.
+    """
+    _name_font = None
+    _stats_font = None
+
     def __init__(self, x: int, y: int, width: int, height: int, is_enemy: bool = False):
+        super().__init__((width, height))
         self.rect = Rect(x, y, width, height)
         self.is_enemy = is_enemy
         self.character = None
         self.animation_timer = 0
+        self.ui_assets = {}
         
         # 面板状态
         self.selected = False
         self.hover = False
         
-    def update(self, dt):
+    def update(self, dt, character=None):
+        if character is not None:
+            self.character = character
+            
         if not self.character:
             return
             
         self.animation_timer += dt
         
+    def cache_key(self):
+        character = self.character
+        return (
+            id(character), character.name, character.current_hp, character.max_hp,
+            character.attack, character.defense, character.portrait_id, character.class_id,
+            self.hover, self.selected, id(self.ui_assets)
+        )
+        
     def render(self, surface: Surface, ui_assets: dict):
         if not self.character:
             return
-            
+        self.ui_assets = ui_assets
+        self.blit_cached(surface, self.rect.topleft)
+        
+    def render_cache(self, surface: Surface):
+        ui_assets = self.ui_assets
+        rect = surface.get_rect()
+        
         # 绘制面板背景
         color = (60, 60, 60) if self.is_enemy else (40, 40, 40)
         if self.hover:
             color = tuple(min(c + 20, 255) for c in color)
-        pygame.draw.rect(surface, color, self.rect)
+        pygame.draw.rect(surface, color, rect)
         
         # 绘制选中边框
         if self.selected:
-            pygame.draw.rect(surface, (255, 215, 0), self.rect, 2)
+            pygame.draw.rect(surface, (255, 215, 0), rect, 2)
             
         # 绘制角色头像
-        portrait_rect = pygame.Rect(
-            self.rect.x + 5,
-            self.rect.y + 5,
-            80,
-            80
-        )
+        portrait_rect = pygame.Rect(5, 5, 80, 80)
         if 'portraits' in ui_assets and self.character.portrait_id is not None:
             portrait = ui_assets['portraits'].get_sprite(self.character.portrait_id)
             surface.blit(portrait, portrait_rect)
             
         # 绘制角色名称
-        name_font = pygame.font.Font(None, 24)
-        name_surface = name_font.render(self.character.name, True, (255, 255, 255))
-        name_rect = name_surface.get_rect(
-            midtop=(self.rect.centerx, self.rect.y + 90)
-        )
+        if CharacterPanel._name_font is None:
+            CharacterPanel._name_font = pygame.font.Font(None, 24)
+        name_surface = CharacterPanel._name_font.render(self.character.name, True, (255, 255, 255))
+        name_rect = name_surface.get_rect(midtop=(rect.centerx, 90))
         surface.blit(name_surface, name_rect)
         
         # 绘制角色职业图标
         if 'icons' in ui_assets and self.character.class_id is not None:
             class_icon = ui_assets['icons'].get_sprite(self.character.class_id)
-            icon_rect = pygame.Rect(
-                self.rect.x + self.rect.width - 40,
-                self.rect.y + 5,
-                30,
-                30
-            )
+            icon_rect = pygame.Rect(rect.width - 40, 5, 30, 30)
             surface.blit(class_icon, icon_rect)
             
         # 绘制角色属性
@@ -71,7 +89,10 @@ class CharacterPanel:
         if not self.character:
             return
             
-        stats_font = pygame.font.Font(None, 20)
+        if CharacterPanel._stats_font is None:
+            CharacterPanel._stats_font = pygame.font.Font(None, 20)
+        stats_font = CharacterPanel._stats_font
+        centerx = surface.get_width() // 2
         y_offset = 120
         
         # 显示主要属性
@@ -83,8 +104,6 @@ class CharacterPanel:
         
         for stat in stats:
             stat_surface = stats_font.render(stat, True, (200, 200, 200))
-            stat_rect = stat_surface.get_rect(
-                midtop=(self.rect.centerx, self.rect.y + y_offset)
-            )
+            stat_rect = stat_surface.get_rect(midtop=(centerx, y_offset))
             surface.blit(stat_surface, stat_rect)
             y_offset += 20
\ No newline at end of file
@@ -3,6 +3,7 @@ import math
 from typing import Callable, Tuple
 
 from game_project.managers import ResourceManager
+from game_project.ui.surface_factory import surface_factory
 
 class MenuButton:
     def __init__(self, text: str, x: float, y: float, callback: Callable,
@@ -68,11 +69,6 @@ class MenuButton:
             self.font = pygame.font.Font(None, 32)
         
         self._create_text_surfaces()
-        
-        # 创建发光表面
-        self.glow_surface = pygame.Surface((self.rect.width + self.glow_radius*2, 
-                                          self.rect.height + self.glow_radius*2), 
-                                          pygame.SRCALPHA)
     
     def _create_text_surfaces(self):
         """创建文字表面 / Create text surfaces"""
@@ -153,6 +149,16 @@ class MenuButton:
     
     def draw(self, screen):
         """绘制按钮 / Draw button"""
+        for surface, rect in self._layers():
+            screen.blit(surface, rect)
+    
+    def submit(self, render_queue, layer='ui', z=0):
+        """把按钮提交到渲染队列 / Submit the button to the render queue"""
+        for surface, rect in self._layers():
+            render_queue.submit(layer, surface, rect, z)
+    
+    def _layers(self):
+        """按钮的背景和文字表面及其位置 / The button's background and text surfaces with their positions"""
         # 计算当前位置(加入悬停偏移)
         current_y = self.y + self.hover_offset
         
@@ -174,42 +180,28 @@ class MenuButton:
         else:
             bg_color = (50, 50, 50, 120)
         
-        # 绘制圆角矩形背景(无边框)
-        background_surface = pygame.Surface(button_rect.size, pygame.SRCALPHA)
-        pygame.draw.rect(background_surface, bg_color, background_surface.get_rect(), border_radius=10)
-        screen.blit(background_surface, button_rect)
+        # 圆角矩形背景(无边框)，使用缓存的面板
+        background = surface_factory.panel(button_rect.size, bg_color, 10)
         
-        # 绘制文字
-        self._draw_text(screen, current_y)
+        # 文字
+        text, text_rect = self._get_text(current_y)
+        return ((background, button_rect), (text, text_rect))
     
     def _draw_glow(self, screen, current_y):
         """绘制发光效果"""
-        self.glow_surface.fill((0, 0, 0, 0))
-        
-        # 创建多层发光
-        for radius in range(self.glow_radius, 0, -2):
-            alpha = int(self.glow_alpha * (radius/self.glow_radius))
-            pygame.draw.rect(
-                self.glow_surface,
-                (*self.glow_color, alpha),
-                (self.glow_radius-radius, self.glow_radius-radius,
-                 self.rect.width+radius*2, self.rect.height+radius*2),
-                border_radius=10
-            )
-        
-        # 制发光层
-        glow_rect = self.glow_surface.get_rect(center=(self.x, current_y))
-        screen.blit(self.glow_surface, glow_rect, special_flags=pygame.BLEND_ALPHA_SDL2)
+        # 多层发光按透明度缓存
+        glow_surface = surface_factory.glow(self.rect.size, self.glow_color, self.glow_alpha, self.glow_radius)
+        glow_rect = glow_surface.get_rect(center=(self.x, current_y))
+        screen.blit(glow_surface, glow_rect, special_flags=pygame.BLEND_ALPHA_SDL2)
     
     def _create_gradient_background(self, surface, rect):
         """创建渐变背景"""
-        for i in range(rect.height):
-            alpha = int(180 * (1 - i/rect.height))
-            color = (100, 150, 255, alpha) if self.hovered else (50, 50, 50, alpha)
-            pygame.draw.line(surface, color, (0, i), (rect.width, i))
+        color = (100, 150, 255) if self.hovered else (50, 50, 50)
+        gradient = surface_factory.gradient(rect.size, (*color, 180), (*color, 0))
+        surface.blit(gradient, (0, 0))
     
-    def _draw_text(self, screen, current_y):
-        """绘制文字"""
+    def _get_text(self, current_y):
+        """获取当前状态的文字表面和位置"""
         if not self.active:
             current_text = self.disabled_text
         elif self.pressed:
@@ -227,7 +219,7 @@ class MenuButton:
             current_text = pygame.transform.scale(current_text, scaled_size)
         
         text_rect = current_text.get_rect(center=(self.x, current_y))
-        screen.blit(current_text, text_rect)
+        return current_text, text_rect
     
     def handle_event(self, event):
         """处理按钮事件 / Handle button events"""
@@ -3,6 +3,8 @@ import math
 import random
 from pygame import gfxdraw
 
+from game_project.managers.graphics_quality import graphics_quality
+
 class WeatherIndicator:
     def __init__(self, game, x, y, width=160, height=90):
         self.game = game
@@ -13,6 +15,8 @@ class WeatherIndicator:
         
         # 创建主surface / Create main surface
         self.surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        # 闪电闪光层只分配一次 / The lightning flash layer is allocated once
+        self.flash_surface = pygame.Surface((width, height), pygame.SRCALPHA)
         
         # 粒子系统 / Particle system
         self.particles = []
@@ -85,7 +89,7 @@ class WeatherIndicator:
     def _update_rain_particles(self, dt, rain_effects):
         """更新雨天粒子 / Update rain particles"""
         intensity = rain_effects['intensity']
-        if len(self.particles) < 50 * intensity:
+        if len(self.particles) < graphics_quality.weather_limit('weather_indicator', 50 * intensity):
             self.particles.append({
                 'x': random.randint(0, self.width),
                 'y': -5,
@@ -103,7 +107,7 @@ class WeatherIndicator:
     def _update_snow_particles(self, dt, snow_effects):
         """更新雪天粒子 / Update snow particles"""
         intensity = snow_effects['intensity']
-        if len(self.particles) < 30 * intensity:
+        if len(self.particles) < graphics_quality.weather_limit('weather_indicator', 30 * intensity):
             self.particles.append({
                 'x': random.randint(0, self.width),
                 'y': -5,
@@ -122,14 +126,11 @@ class WeatherIndicator:
 
     def draw(self, surface):
         """绘制天气指示器 / Draw weather indicator"""
-        # 清空surface / Clear surface
-        self.surface.fill((0, 0, 0, 0))
-        
         weather_system = self.weather_manager.weather_system
         current_weather = weather_system['current_weather']
         effects = weather_system['effects']
         
-        # 绘制背景 / Draw background
+        # 绘制背景（同时清空surface）/ Draw background, which also clears the surface
         self._draw_background(current_weather, effects)
         
         # 绘制云层 / Draw clouds
@@ -155,7 +156,8 @@ class WeatherIndicator:
         else:
             color = (135, 206, 235, 200)
             
-        pygame.draw.rect(self.surface, color, (0, 0, self.width, self.height))
+        # 整面填充代替清空加绘制矩形 / One fill instead of clearing and drawing a rect
+        self.surface.fill(color)
         
     def _draw_clouds(self):
         """绘制云层 / Draw clouds"""
@@ -192,10 +194,9 @@ class WeatherIndicator:
             
         # 绘制闪光效果 / Draw flash effect
         if self.lightning_flash:
-            flash_surface = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
             flash_alpha = int(self.flash_timer * 255)
-            flash_surface.fill((255, 255, 255, flash_alpha))
-            self.surface.blit(flash_surface, (0, 0))
+            self.flash_surface.fill((255, 255, 255, flash_alpha))
+            self.surface.blit(self.flash_surface, (0, 0))
             
     def _create_lightning(self):
         """创建闪电效果 / Create lightning effect"""
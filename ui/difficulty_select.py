@@ -2,6 +2,7 @@ import pygame
 import math
 import logging
 from ..ui.background_manager import BackgroundManager
+from ..ui.surface_factory import surface_factory
 from ..animation.particle_system import ParticleSystem
 from ..ui.components.menu_button import MenuButton
 from ..core.game_state import GameState
@@ -81,15 +82,7 @@ class DifficultySelect:
         except Exception as e:
             logging.error(f"创建背景管理器失败: {e}")
             # 创建渐变背景作为后备方案
-            surface = pygame.Surface(self.screen_size)
-            for y in range(self.screen_size[1]):
-                color = (
-                    max(0, min(255, 30 + y // 4)),
-                    max(0, min(255, 30 + y // 6)),
-                    max(0, min(255, 40 + y // 3))
-                )
-                pygame.draw.line(surface, color, (0, y), (self.screen_size[0], y))
-            return surface
+            return surface_factory.default_background(self.screen_size)
 
     def _load_resources(self):
         """加载UI资源 / Load UI resources"""
@@ -5,8 +5,10 @@ from game_project.config import Colors
 from ..core.game_state import GameState
 from ..animation.particle_system import ParticleSystem
 from game_project.ui.background_manager import BackgroundManager
+from game_project.ui.surface_factory import surface_factory
 from game_project.ui.components.menu_button import MenuButton
 from game_project.ui.components.icon_button import IconButton
+from game_project.ui.components.cached_widget import CachedWidget
 import os
 import json
 import math
@@ -103,15 +105,7 @@ class MainMenu:
         except Exception as e:
             logging.error(f"创建背景管理器失败: {e}")
             # 创建一个渐变背景作为后备方案
-            surface = pygame.Surface(self.screen_size)
-            for y in range(self.screen_size[1]):
-                color = (
-                    max(0, min(255, 30 + y // 4)),
-                    max(0, min(255, 30 + y // 6)),
-                    max(0, min(255, 40 + y // 3))
-                )
-                pygame.draw.line(surface, color, (0, y), (self.screen_size[0], y))
-            return surface
+            return surface_factory.default_background(self.screen_size)
         
     def _load_resources(self):
         """加载UI资源 / Load UI resources"""
@@ -331,9 +325,10 @@ class MainMenu:
         if data_manager:
             current_lang = data_manager.game_data['settings']['language']
             next_lang = 'en' if current_lang == 'zh' else 'zh'
-            data_manager.game_data['settings']['language'] = next_lang
-            data_manager.save_settings()
+            data_manager.set_setting('language', next_lang)
             self._refresh_text()
+            # 缓存的组件需要用新语言重绘 / Cached widgets must redraw in the new language
+            CachedWidget.invalidate_all()
             
     def show_help(self):
         """显示帮助信息 / Show help"""
@@ -356,11 +351,8 @@ class MainMenu:
     def save_game(self):
         """保存游戏 / Save game"""
         if self.game_engine.current_state != GameState.MAIN_MENU:
-            success = self.game_engine.save_game()
-            if success:
-                self.game_engine.ui_manager.show_notification("游戏已保存 / Game saved")
-            else:
-                self.game_engine.ui_manager.show_notification("保存失败 / Save failed")
+            # 后台写入完成后由 Game 显示结果 / Game shows the result once the background write finishes
+            self.game_engine.save_game()
                 
     def _refresh_text(self):
         """刷新所有文本 / Refresh all text"""
@@ -390,15 +382,25 @@ class MainMenu:
         # 更新粒子效果
         self.particles.update(dt)
         
+    def render_scene(self, scene):
+        """以降低的分辨率绘制背景（渲染缩放生效时由 Game.render 调用）
+        Draw the background at reduced resolution; called by Game.render while render scaling is active"""
+        self.background_manager.render_scene(scene)
+        
     def render(self, screen):
         """渲染主菜单 / Render main menu"""
-        # 使用缓存的背景
-        if not self._cache['background_buffer']:
-            self._cache['background_buffer'] = pygame.Surface(self.screen_size)
-        
-        # 渲染背景
-        self.background_manager.render(self._cache['background_buffer'])
-        screen.blit(self._cache['background_buffer'], (0, 0))
+        # 提交到渲染队列，由 Game.render 按层批量绘制
+        # Submit to the render queue; Game.render draws it in per-layer batches
+        render_queue = self.game_engine.render_queue
+        
+        # 渲染背景（缩放生效时已由 render_scene 绘制）
+        # Render the background, unless render_scene already drew it at the scaled resolution
+        if not self.game_engine.render_scaler.active:
+            # 使用缓存的背景
+            if not self._cache['background_buffer']:
+                self._cache['background_buffer'] = pygame.Surface(self.screen_size)
+            self.background_manager.render(self._cache['background_buffer'])
+            render_queue.submit('background', self._cache['background_buffer'], (0, 0))
         
         # 渲染标题 - 位置调整到屏幕13%处
         if self._cache['title_surface']:
@@ -409,18 +411,18 @@ class MainMenu:
                 self.screen_size[0] // 2 - title_rect.width // 2,
                 title_y
             )
-            screen.blit(title_surface, title_pos)
+            render_queue.submit('ui', title_surface, title_pos)
         
         # 渲染按钮
         for button in self.buttons.values():
-            button.draw(screen)
+            button.submit(render_queue)
         
         # 渲染图标按钮
         for icon in self.icon_buttons.values():
-            icon.draw(screen)
+            render_queue.draw('ui', icon.draw)
         
         # 渲染粒子效果
-        self.particles.render(screen)
+        render_queue.draw('ui', self.particles.render)
         
     def _create_cached_title(self):
         """创建缓存的标题表面 / Create cached title surface"""
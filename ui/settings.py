@@ -3,6 +3,7 @@ from pygame import Surface
 from ..core.game_state import GameState
 from ..animation.particle_system import ParticleSystem
 from ..config import Colors
+from .components.cached_widget import CachedWidget
 
 class SettingsUI:
     """设置界面 / Settings screen"""
@@ -25,6 +26,12 @@ class SettingsUI:
             'difficulty': 'normal'
         }
         
+        # 画质开关以画质服务为准 / Quality options follow the quality service
+        quality = getattr(game_engine, 'graphics_quality', None)
+        if quality is not None:
+            self.settings['particle_effects'] = quality.particles_enabled
+            self.settings['graphics_quality'] = quality.setting
+        
         # UI元素位置
         self.ui_elements = {
             'sliders': {},
@@ -45,7 +52,6 @@ class SettingsUI:
             'speed': 2.0,
             'callback': None
         }
-        self.transition_surface = pygame.Surface(self.screen_size, pygame.SRCALPHA)
         
         # 添加背景管理器
         self.background_manager = self._create_background_manager()
@@ -105,6 +111,35 @@ class SettingsUI:
             'text': self.settings['language'].upper()
         }
         
+        # 创建渲染缩放按钮 / Create the render scale button
+        self.ui_elements['buttons']['render_scale'] = {
+            'rect': pygame.Rect(300, 460, 150, 40),
+            'text': self._render_scale_text()
+        }
+        
+        # 创建画质档位按钮 / Create the graphics quality button
+        self.ui_elements['buttons']['graphics_quality'] = {
+            'rect': pygame.Rect(300, 520, 150, 40),
+            'text': self._graphics_quality_text()
+        }
+        
+        # 创建自适应画质按钮 / Create the adaptive quality button
+        self.ui_elements['buttons']['adaptive_quality'] = {
+            'rect': pygame.Rect(470, 520, 150, 40),
+            'text': self._adaptive_quality_text()
+        }
+        
+        # 创建输入延迟校准按钮 / Create the input latency calibration buttons
+        self.ui_elements['buttons']['calibrate_keyboard'] = {
+            'rect': pygame.Rect(470, 400, 150, 40),
+            'text': 'Calibrate Keys'
+        }
+        self.ui_elements['buttons']['calibrate_mouse'] = {
+            'rect': pygame.Rect(470, 460, 150, 40),
+            'text': 'Calibrate Mouse'
+        }
+        self.calibration_result = None
+        
         # 创建返回按钮
         self.ui_elements['buttons']['back'] = {
             'rect': pygame.Rect(50, 500, 100, 40),
@@ -113,6 +148,13 @@ class SettingsUI:
         
     def handle_input(self, event):
         """处理输入事件"""
+        # 校准期间按键和点击只用于校准，ESC 取消 / During calibration input only feeds it; ESC cancels
+        if self._is_calibrating():
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                self.game_engine.get_manager('qte').cancel_latency_calibration()
+                self.calibration_result = 'Calibration cancelled'
+            return
+            
         if event.type == pygame.MOUSEBUTTONDOWN:
             mouse_pos = pygame.mouse.get_pos()
             
@@ -144,6 +186,7 @@ class SettingsUI:
             self.game_engine.audio_manager.set_music_volume(value)
         elif setting == 'sfx_volume':
             self.game_engine.audio_manager.set_sfx_volume(value)
+        self._persist_setting(setting, value)
             
     def _handle_toggle_click(self, setting):
         """处理开关点击"""
@@ -162,6 +205,19 @@ class SettingsUI:
         """处理按钮点击"""
         if button_name == 'language':
             self._cycle_language()
+        elif button_name == 'render_scale':
+            self.game_engine.set_render_scale()
+            self.ui_elements['buttons']['render_scale']['text'] = self._render_scale_text()
+        elif button_name == 'graphics_quality':
+            self.settings['graphics_quality'] = self.game_engine.set_graphics_quality()
+            self.ui_elements['buttons']['graphics_quality']['text'] = self._graphics_quality_text()
+        elif button_name == 'adaptive_quality':
+            self.game_engine.toggle_adaptive_quality()
+            self.ui_elements['buttons']['adaptive_quality']['text'] = self._adaptive_quality_text()
+        elif button_name in ('calibrate_keyboard', 'calibrate_mouse'):
+            device = button_name.split('_', 1)[1]
+            if self.game_engine.get_manager('qte').start_latency_calibration(device):
+                self.calibration_result = None
         elif button_name == 'back':
             self.game_engine.set_state(GameState.MAIN_MENU)
             
@@ -172,10 +228,52 @@ class SettingsUI:
         next_index = (current_index + 1) % len(languages)
         self.settings['language'] = languages[next_index]
         self.ui_elements['buttons']['language']['text'] = languages[next_index].upper()
+        self._persist_setting('language', languages[next_index])
+        # 缓存的组件需要用新语言重绘 / Cached widgets must redraw in the new language
+        CachedWidget.invalidate_all()
+        
+    def _render_scale_text(self):
+        """渲染缩放按钮文本 / Render scale button text"""
+        scaler = getattr(self.game_engine, 'render_scaler', None)
+        scale = scaler.base_scale if scaler else 1.0
+        return f"Scale {int(round(scale * 100))}%"
+        
+    def _graphics_quality_text(self):
+        """画质按钮文本 / Graphics quality button text"""
+        quality = getattr(self.game_engine, 'graphics_quality', None)
+        if quality is None:
+            return self.settings['graphics_quality'].title()
+        if quality.auto:
+            return f"Auto ({quality.tier.title()})"
+        return quality.tier.title()
+        
+    def _adaptive_quality_text(self):
+        """自适应画质按钮文本 / Adaptive quality button text"""
+        governor = getattr(self.game_engine, 'quality_governor', None)
+        return "Adaptive On" if governor and governor.enabled else "Adaptive Off"
+        
+    def _persist_setting(self, setting, value):
+        """保存设置（拖动滑块时由后台线程合并写入）
+        Persist a setting; slider drags are coalesced by the background writer"""
+        data_manager = self.game_engine.get_manager('data')
+        if data_manager:
+            data_manager.set_setting(setting, value)
+        
+    def _is_calibrating(self):
+        """是否正在校准输入延迟 / Whether input latency calibration is running"""
+        qte_manager = self.game_engine.get_manager('qte')
+        return qte_manager is not None and qte_manager.get_calibration_beat() is not None
         
     def update(self, dt):
         """更新UI状态"""
-        pass
+        if not self._is_calibrating():
+            return
+        result = self.game_engine.get_manager('qte').update_calibration()
+        if result is not None:
+            if result['offset'] is None:
+                self.calibration_result = 'Calibration failed, try again'
+            else:
+                self.calibration_result = f"{result['device'].title()} offset {result['offset'] * 1000:+.0f} ms"
         
     def render(self, screen: Surface):
         """渲染UI"""
@@ -201,6 +299,35 @@ class SettingsUI:
         for button_name, button in self.ui_elements['buttons'].items():
             self._render_button(screen, button_name, button)
             
+        # 绘制校准节拍或结果 / Draw the calibration beat or its result
+        qte_manager = self.game_engine.get_manager('qte')
+        beat = qte_manager.get_calibration_beat() if qte_manager else None
+        if beat is not None:
+            self._render_calibration(screen, beat)
+        elif self.calibration_result:
+            text = self.font.render(self.calibration_result, True, Colors.WHITE)
+            screen.blit(text, (470, 350))
+            
+    def _render_calibration(self, screen, beat):
+        """绘制校准节拍：每拍开始时圆圈闪亮，随后渐暗
+        Draw the calibration beat: the circle flashes at each beat and then fades"""
+        overlay = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 200))
+        screen.blit(overlay, (0, 0))
+        
+        center = (screen.get_width() // 2, screen.get_height() // 2)
+        index = int(beat)
+        if index >= 1:
+            # 第 0 拍是准备时间 / Beat 0 is the lead-in
+            brightness = int(255 * (1.0 - (beat - index)) ** 2)
+            pygame.draw.circle(screen, (brightness, brightness, 255), center, 50)
+        pygame.draw.circle(screen, Colors.WHITE, center, 50, 2)
+        
+        device = self.game_engine.get_manager('qte').get_calibration_device()
+        prompt = "Click on the beat" if device == 'mouse' else "Press any key on the beat"
+        text = self.font.render(f"{prompt} (ESC to cancel)", True, Colors.WHITE)
+        screen.blit(text, text.get_rect(center=(center[0], center[1] + 90)))
+            
     def _render_slider(self, screen, setting, slider):
         """渲染滑块"""
         # 绘制滑块背景
@@ -0,0 +1,115 @@
+import pygame
+from collections import OrderedDict
+from typing import List, Tuple
+
+class SurfaceFactory:
+    """预渲染表面工厂 / Pre-rendered surface factory
+
+    渐变、圆角面板和发光层按（类型、尺寸、颜色、圆角、状态）缓存，界面每帧只需 blit。
+    垂直渐变先生成 1 像素宽的色带，再用一次 transform.scale 拉伸到目标宽度，
+    代替逐行调用 pygame.draw.line。
+    Gradients, rounded panels and glows are cached by (kind, size, colours,
+    radius, state), so menus only blit every frame. A vertical gradient is
+    built as a 1-pixel-wide strip and stretched to full width with one
+    transform.scale call instead of drawing it line by line.
+    """
+
+    MAX_ENTRIES = 256
+    # 发光透明度量化步长，限制动画产生的缓存条目 / Glow alpha step, bounds entries created by animation
+    GLOW_ALPHA_STEP = 8
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._cache: OrderedDict = OrderedDict()
+
+    def gradient(self, size: Tuple[int, int], top: tuple, bottom: tuple) -> pygame.Surface:
+        """垂直线性渐变；颜色带透明度时返回 SRCALPHA 表面
+        Vertical linear gradient; RGBA colours give a SRCALPHA surface"""
+        key = ('gradient', tuple(size), tuple(top), tuple(bottom))
+        surface = self._get(key)
+        if surface is None:
+            channels = max(len(top), len(bottom))
+            top = tuple(top) + (255,) * (channels - len(top))
+            bottom = tuple(bottom) + (255,) * (channels - len(bottom))
+            span = max(1, size[1] - 1)
+            rows = [
+                tuple(int(a + (b - a) * y / span + 0.5) for a, b in zip(top, bottom))
+                for y in range(size[1])
+            ]
+            surface = self._put(key, self._build_strip(size, rows))
+        return surface
+
+    def default_background(self, size: Tuple[int, int]) -> pygame.Surface:
+        """菜单默认的蓝灰渐变背景 / The default blue-grey menu background gradient"""
+        key = ('default_background', tuple(size))
+        surface = self._get(key)
+        if surface is None:
+            rows = [
+                (
+                    max(0, min(255, 30 + y // 4)),
+                    max(0, min(255, 30 + y // 6)),
+                    max(0, min(255, 40 + y // 3))
+                )
+                for y in range(size[1])
+            ]
+            surface = self._put(key, self._build_strip(size, rows))
+        return surface
+
+    def panel(self, size: Tuple[int, int], color: tuple, radius: int = 0) -> pygame.Surface:
+        """圆角面板 / Rounded panel"""
+        key = ('panel', tuple(size), tuple(color), radius)
+        surface = self._get(key)
+        if surface is None:
+            surface = pygame.Surface(size, pygame.SRCALPHA)
+            pygame.draw.rect(surface, color, surface.get_rect(), border_radius=radius)
+            surface = self._put(key, surface)
+        return surface
+
+    def glow(self, size: Tuple[int, int], color: tuple, alpha: int,
+             glow_radius: int, border_radius: int = 10) -> pygame.Surface:
+        """多层发光，size 为被包围矩形的尺寸 / Layered glow around a rect of the given size"""
+        alpha = int(alpha) // self.GLOW_ALPHA_STEP * self.GLOW_ALPHA_STEP
+        key = ('glow', tuple(size), tuple(color[:3]), alpha, glow_radius, border_radius)
+        surface = self._get(key)
+        if surface is None:
+            width, height = size
+            surface = pygame.Surface((width + glow_radius * 2, height + glow_radius * 2), pygame.SRCALPHA)
+            for radius in range(glow_radius, 0, -2):
+                pygame.draw.rect(
+                    surface,
+                    (*color[:3], int(alpha * radius / glow_radius)),
+                    (glow_radius - radius, glow_radius - radius, width + radius * 2, height + radius * 2),
+                    border_radius=border_radius
+                )
+            surface = self._put(key, surface)
+        return surface
+
+    def clear(self):
+        """清空缓存（例如分辨率变化后）/ Clear the cache, e.g. after a resolution change"""
+        self._cache.clear()
+
+    def _build_strip(self, size: Tuple[int, int], rows: List[tuple]) -> pygame.Surface:
+        """把每行颜色写成 1 像素宽的色带并拉伸到整宽 / Write per-row colours as a 1-pixel strip and stretch it"""
+        format_name = 'RGBA' if len(rows[0]) == 4 else 'RGB'
+        column = pygame.image.frombuffer(bytes(c for row in rows for c in row), (1, size[1]), format_name)
+        return pygame.transform.scale(column, size)
+
+    def _get(self, key):
+        """读取缓存并刷新其新近度 / Read the cache and refresh recency"""
+        surface = self._cache.get(key)
+        if surface is not None:
+            self._cache.move_to_end(key)
+        return surface
+
+    def _put(self, key, surface: pygame.Surface) -> pygame.Surface:
+        """写入缓存，超出容量时淘汰最久未用的条目 / Store, evicting the least recently used entry"""
+        # 转换为显示格式以加速 blit / Convert to the display format for faster blits
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha() if surface.get_flags() & pygame.SRCALPHA else surface.convert()
+        self._cache[key] = surface
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return surface
+
+# 界面共享的工厂实例 / Factory instance shared by the UI
+surface_factory = SurfaceFactory()